@@ -310,3 +310,14 @@ class ProfesorAdmin(admin.ModelAdmin):
 
     nombre_completo.short_description = "Profesor"
 
+
+
+from .models import LoteBoletas
+
+@admin.register(LoteBoletas)
+class LoteBoletasAdmin(admin.ModelAdmin):
+    list_display = ("listado", "formato", "estado", "total_alumnos", "total_calificaciones", "solicitado_por", "creado_en", "terminado_en")
+    list_filter = ("estado", "formato")
+    search_fields = ("listado__nombre", "listado__programa__codigo")
+    list_select_related = ("listado", "listado__programa", "solicitado_por")
+    readonly_fields = ("archivo", "total_alumnos", "total_calificaciones", "error", "creado_en", "iniciado_en", "terminado_en")
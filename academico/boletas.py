@@ -0,0 +1,190 @@
+# academico/boletas.py
+"""
+Boletas de calificaciones.
+
+- `contexto_boleta(alumno, califs, listado)`: contexto de reportes/boleta_calificaciones.html
+  a partir de calificaciones ya cargadas (periodo = min/max de fechas en memoria).
+- `boletas_de_listado(listado)`: todas las boletas de un ListadoMaterias con dos consultas
+  (alumnos inscritos + calificaciones del listado), agrupadas en memoria.
+- `procesar_pendientes()`: worker de LoteBoletas (`manage.py procesar_lotes_boletas`),
+  genera un PDF único o un ZIP con un PDF por alumno.
+"""
+import logging
+import tempfile
+import zipfile
+from collections import defaultdict
+from io import BytesIO
+
+from django.core.files import File
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.text import slugify
+
+from alumnos.models import Alumno
+from .models import Calificacion, ListadoAlumno, LoteBoletas
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE = "reportes/boleta_calificaciones.html"
+
+
+def contexto_boleta(alumno, califs, listado=None, *, show_print_button=True) -> dict:
+    """
+    `califs`: Calificacion del alumno (con item y item__materia cargados) ya ordenadas
+    por fecha de inicio y código de materia.
+    """
+    if listado is None and califs:
+        listado = califs[0].item.listado
+    programa = listado.programa if listado else None
+    periodo_txt = "—"
+    rvoe = None
+
+    if califs:
+        # período a partir del rango de fechas de las materias del listado
+        inicios = [c.item.fecha_inicio for c in califs if c.item.fecha_inicio]
+        fines = [c.item.fecha_fin for c in califs if c.item.fecha_fin]
+        if inicios and fines:
+            periodo_txt = f"{min(inicios):%b %Y} – {max(fines):%b %Y}".upper()
+        rvoe = (getattr(programa, "rvoe_clave", "") or "").strip()
+
+    filas = []
+    for c in califs:
+        filas.append({
+            "codigo": c.item.materia.codigo,
+            "materia": c.item.materia.nombre,
+            "inicio": c.item.fecha_inicio,
+            "fin": c.item.fecha_fin,
+            "nota": c.nota if c.nota is not None else 0.0,
+            "aprobado": getattr(c, "aprobado", None),
+            "obs": c.observaciones or "",
+        })
+
+    info = getattr(alumno, "informacionEscolar", None)
+    return {
+        "alumno": alumno,
+        "programa": programa,
+        "listado": listado,
+        "periodo_txt": periodo_txt,
+        "rvoe": rvoe,
+        "filas": filas,
+        "hoy": timezone.now(),
+        "firmante": {
+            "nombre": "RA. EN D. YASMIN CAM",  # placeholder
+            "cargo": "Directora General y de Servicios Escolares",
+        },
+        "show_print_button": show_print_button,
+        "institucion": {
+            "nombre": "Instituto Universitario de Alta Formación",
+            "rfc": "IUAT0913LI2",
+            "cct": "23PSU0064H",
+            "direccion": "Blvd. Kukulkán Km 3.5, Plaza Nautilus Int. 53, Cancún, Q.R.",
+            "ciudad": "México",
+            "telefono": "998 939 4481",
+            "email": "cadministrativa@iuaf.edu.mx",
+            "campus": getattr(info, "sede", None),
+        },
+    }
+
+
+def boletas_de_listado(listado):
+    """
+    Itera (alumno, califs) de todos los inscritos al listado, en orden de número de estudiante.
+    """
+    inscritos = ListadoAlumno.objects.filter(listado=listado).values("alumno_id")
+    alumnos = list(
+        Alumno.objects
+        .filter(pk__in=inscritos)
+        .select_related("informacionEscolar", "informacionEscolar__sede")
+        .order_by("numero_estudiante")
+    )
+
+    por_alumno = defaultdict(list)
+    califs = (
+        Calificacion.objects
+        .filter(item__listado=listado, alumno_id__in=inscritos)
+        .select_related("item", "item__materia")
+        .order_by("item__fecha_inicio", "item__materia__codigo")
+    )
+    for c in califs:
+        c.item.listado = listado  # evita consulta por item
+        por_alumno[c.alumno_id].append(c)
+
+    for alumno in alumnos:
+        yield alumno, por_alumno.get(alumno.pk, [])
+
+
+def _pdf_boleta(alumno, califs, listado) -> bytes:
+    from alumnos.services.pdf_render import html_a_pdf
+
+    html = render_to_string(TEMPLATE, contexto_boleta(alumno, califs, listado, show_print_button=False))
+    return html_a_pdf(html, css=None)
+
+
+def generar_lote(lote: LoteBoletas):
+    from pypdf import PdfReader, PdfWriter
+
+    listado = lote.listado
+    total_alumnos = total_califs = 0
+    nombre_base = slugify(f"boletas-{listado.programa.codigo}-{listado.nombre}") or f"boletas-{listado.pk}"
+
+    with tempfile.TemporaryFile() as tmp:
+        if lote.formato == "zip":
+            with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                for alumno, califs in boletas_de_listado(listado):
+                    nombre = slugify(f"{alumno.numero_estudiante}-{alumno.apellido_p}-{alumno.nombre}")
+                    zf.writestr(f"{nombre}.pdf", _pdf_boleta(alumno, califs, listado))
+                    total_alumnos += 1
+                    total_califs += len(califs)
+            ext = "zip"
+        else:
+            writer = PdfWriter()
+            for alumno, califs in boletas_de_listado(listado):
+                for page in PdfReader(BytesIO(_pdf_boleta(alumno, califs, listado))).pages:
+                    writer.add_page(page)
+                total_alumnos += 1
+                total_califs += len(califs)
+            writer.add_metadata({"/Title": f"Boletas {listado}", "/Author": "CampusIUAF"})
+            writer.write(tmp)
+            ext = "pdf"
+
+        tmp.seek(0)
+        if lote.archivo:
+            lote.archivo.delete(save=False)
+        lote.archivo.save(f"{nombre_base}-{lote.pk}.{ext}", File(tmp), save=False)
+
+    lote.total_alumnos = total_alumnos
+    lote.total_calificaciones = total_califs
+    lote.estado = "listo"
+    lote.error = ""
+    lote.terminado_en = timezone.now()
+    lote.save(update_fields=["archivo", "total_alumnos", "total_calificaciones", "estado", "error", "terminado_en"])
+    return lote
+
+
+def _reclamar(lote) -> bool:
+    return LoteBoletas.objects.filter(pk=lote.pk, estado="pendiente").update(
+        estado="procesando", iniciado_en=timezone.now(),
+    ) == 1
+
+
+def procesar_pendientes(limit: int = 5) -> dict:
+    stats = {"procesados": 0, "errores": 0}
+    pendientes = (
+        LoteBoletas.objects
+        .filter(estado="pendiente")
+        .select_related("listado", "listado__programa")
+        .order_by("creado_en")[:limit]
+    )
+    for lote in list(pendientes):
+        if not _reclamar(lote):
+            continue
+        try:
+            generar_lote(lote)
+            stats["procesados"] += 1
+        except Exception as exc:
+            logger.exception("Lote de boletas %s falló", lote.pk)
+            LoteBoletas.objects.filter(pk=lote.pk).update(
+                estado="error", error=f"{type(exc).__name__}: {exc}"[:2000], terminado_en=timezone.now(),
+            )
+            stats["errores"] += 1
+    return stats
@@ -0,0 +1,32 @@
+# academico/management/commands/procesar_lotes_boletas.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from academico.boletas import procesar_pendientes
+from academico.models import LoteBoletas
+
+
+class Command(BaseCommand):
+    help = "Worker de boletas por lote: genera el PDF único o el ZIP de cada LoteBoletas pendiente."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=5, help="Máximo de lotes por pasada.")
+        parser.add_argument("--loop", action="store_true", help="Queda corriendo (modo worker).")
+        parser.add_argument("--sleep", type=float, default=10.0, help="Segundos entre pasadas sin trabajo (con --loop).")
+        parser.add_argument("--reintentar", action="store_true", help="Regresa a la cola los lotes en 'error' o atorados en 'procesando'.")
+
+    def handle(self, *args, **opts):
+        if opts["reintentar"]:
+            n = LoteBoletas.objects.filter(estado__in=["error", "procesando"]).update(estado="pendiente")
+            self.stdout.write(f"{n} lotes en cola.")
+
+        while True:
+            stats = procesar_pendientes(limit=opts["limit"])
+            trabajo = stats["procesados"] + stats["errores"]
+            if trabajo or not opts["loop"]:
+                self.stdout.write(f"procesados={stats['procesados']} errores={stats['errores']}")
+            if not opts["loop"]:
+                break
+            if not trabajo:
+                time.sleep(opts["sleep"])
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:50
+
+import academico.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0009_profesor_grado_academico'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoteBoletas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('formato', models.CharField(choices=[('pdf', 'PDF único'), ('zip', 'ZIP (un PDF por alumno)')], default='pdf', max_length=3)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('listo', 'Listo'), ('error', 'Error')], db_index=True, default='pendiente', max_length=12)),
+                ('archivo', models.FileField(blank=True, upload_to=academico.models.lote_boletas_path)),
+                ('total_alumnos', models.PositiveIntegerField(default=0)),
+                ('total_calificaciones', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('iniciado_en', models.DateTimeField(blank=True, null=True)),
+                ('terminado_en', models.DateTimeField(blank=True, null=True)),
+                ('listado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lotes_boletas', to='academico.listadomaterias')),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Lote de boletas',
+                'verbose_name_plural': 'Lotes de boletas',
+                'ordering': ['-creado_en'],
+            },
+        ),
+    ]
@@ -36,7 +36,14 @@ class Materia(models.Model):
     def profesor_titular(self):
         """
         Devuelve el profesor marcado como titular (o None si no hay).
+        Usa prefetch_related("asignaciones_profesor__profesor") si está cargado.
         """
+        prefetch = getattr(self, "_prefetched_objects_cache", {})
+        if "asignaciones_profesor" in prefetch:
+            for asignacion in prefetch["asignaciones_profesor"]:
+                if asignacion.es_titular and asignacion.activo:
+                    return asignacion.profesor
+            return None
         asignacion = self.asignaciones_profesor.filter(
             es_titular=True,
             activo=True,
@@ -274,3 +281,43 @@ class ProfesorMateria(models.Model):
     def __str__(self):
         rol = "Titular" if self.es_titular else "Docente"
         return f"{self.materia} — {self.profesor} ({rol})"
+
+
+######################################################
+
+def lote_boletas_path(instance, filename):
+    return f"boletas/lotes/{instance.listado_id}/{filename}"
+
+class LoteBoletas(models.Model):
+    """
+    Generación en segundo plano de las boletas de todos los alumnos de un Listado,
+    en un solo PDF o en un ZIP (un PDF por alumno). Lo procesa
+    `manage.py procesar_lotes_boletas`.
+    """
+    FORMATOS = [("pdf", "PDF único"), ("zip", "ZIP (un PDF por alumno)")]
+    ESTADOS = [
+        ("pendiente", "Pendiente"),
+        ("procesando", "Procesando"),
+        ("listo", "Listo"),
+        ("error", "Error"),
+    ]
+
+    listado = models.ForeignKey(ListadoMaterias, on_delete=models.CASCADE, related_name="lotes_boletas")
+    formato = models.CharField(max_length=3, choices=FORMATOS, default="pdf")
+    estado = models.CharField(max_length=12, choices=ESTADOS, default="pendiente", db_index=True)
+    archivo = models.FileField(upload_to=lote_boletas_path, blank=True)
+    total_alumnos = models.PositiveIntegerField(default=0)
+    total_calificaciones = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    solicitado_por = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    creado_en = models.DateTimeField(auto_now_add=True)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    terminado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-creado_en"]
+        verbose_name = "Lote de boletas"
+        verbose_name_plural = "Lotes de boletas"
+
+    def __str__(self):
+        return f"{self.listado} · {self.get_formato_display()} · {self.estado}"
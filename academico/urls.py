@@ -7,6 +7,8 @@ app_name = "academico"
 urlpatterns = [
     path("listados/", views.listados_list, name="listados_list"),
     path("listados/<int:pk>/", views.listado_detalle, name="listado_detalle"),
+    path("listados/<int:pk>/boletas/", views.boletas_lote_crear, name="boletas_lote_crear"),
+    path("boletas/lote/<int:pk>/descargar/", views.boletas_lote_descargar, name="boletas_lote_descargar"),
     path("listados/item/<int:pk>/calificaciones/", views.calificaciones_item, name="calificaciones_item"),
     path("materias-profesores/", views.materias_profesores_list, name="materias_profesores_list"),
 
@@ -79,7 +79,9 @@ def listados_list(request):
     if q:
         qs = qs.filter(nombre__icontains=q)
 
-    programas = Programa.objects.all().order_by("codigo")
+    from alumnos.services import catalogos
+
+    programas = catalogos.obtener("programas")  # ordenados por código
 
     return render(
         request,
@@ -108,20 +110,19 @@ def listado_detalle(request, pk):
         ListadoMateriaItem.objects
         .filter(listado=listado)
         .select_related("materia")
+        .annotate(num_calificaciones=Count("calificaciones"))
         .order_by("fecha_inicio", "materia__codigo")
     )
 
     inscripciones = (
         ListadoAlumno.objects
         .filter(listado=listado)
-        .select_related("alumno", "alumno__informacionEscolar")
+        # str(alumno) usa informacionEscolar.programa
+        .select_related("alumno", "alumno__informacionEscolar", "alumno__informacionEscolar__programa")
         .order_by("alumno__numero_estudiante")
     )
 
-    calif_por_item = {
-        it.id: Calificacion.objects.filter(item=it).count()
-        for it in items
-    }
+    calif_por_item = {it.id: it.num_calificaciones for it in items}
 
     return render(
         request,
@@ -131,6 +132,7 @@ def listado_detalle(request, pk):
             "items": items,
             "inscripciones": inscripciones,
             "calif_por_item": calif_por_item,
+            "lotes_boletas": listado.lotes_boletas.all()[:5],
         },
     )
 
@@ -327,3 +329,44 @@ def profesor_materias(request, pk):
             "asignaciones": asignaciones,
         },
     )
+
+
+# ---------- Boletas por lote (todo el listado) ----------
+from django.http import HttpResponseForbidden
+from django.views.decorators.http import require_POST
+
+from .models import LoteBoletas
+
+
+def _puede_boletas(user):
+    return user.is_superuser or user.groups.filter(name="editar_estatus_academico").exists()
+
+
+@login_required
+@require_POST
+def boletas_lote_crear(request, pk):
+    """Encola la generación de las boletas de todo el listado (PDF único o ZIP)."""
+    listado = get_object_or_404(ListadoMaterias, pk=pk)
+    if not _puede_boletas(request.user):
+        return HttpResponseForbidden("No tienes permiso para generar boletas.")
+
+    formato = request.POST.get("formato") if request.POST.get("formato") in ("pdf", "zip") else "pdf"
+    en_curso = LoteBoletas.objects.filter(
+        listado=listado, formato=formato, estado__in=["pendiente", "procesando"]
+    ).exists()
+    if en_curso:
+        messages.info(request, "Ya hay un lote de boletas en proceso para este listado.")
+    else:
+        LoteBoletas.objects.create(listado=listado, formato=formato, solicitado_por=request.user)
+        messages.success(request, "Lote de boletas en cola. Aparecerá abajo cuando esté listo.")
+    return redirect("academico:listado_detalle", pk=listado.pk)
+
+
+@login_required
+def boletas_lote_descargar(request, pk):
+    from alumnos.services.protected_media import serve_protected_file
+
+    lote = get_object_or_404(LoteBoletas.objects.select_related("listado"), pk=pk, estado="listo")
+    if not _puede_boletas(request.user):
+        return HttpResponseForbidden("No tienes permiso para descargar boletas.")
+    return serve_protected_file(request, lote.archivo, as_attachment=True)
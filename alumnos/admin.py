@@ -11,7 +11,8 @@ from .models import (
     Financiamiento, Pais, Estado, Programa, InformacionEscolar, Alumno,
     ConceptoPago, Cargo, Pago, ReinscripcionHito,  Sede, PagoDiario, UserProfile,
     MovimientoBanco, DocumentoTipo, ProgramaDocumentoRequisito, DocumentoAlumno,
-    ContadorAlumno, ClipCredential, ClipPaymentOrder, TwilioConfig
+    ContadorAlumno, BloqueNumeracion, ClipCredential, ClipPaymentOrder, TwilioConfig,
+    CampanaMensajes, MensajeTwilio, ReglaConcepto, CorreoSaliente,
 )
 
 # =============================
@@ -347,6 +348,24 @@ class ConceptoPagoAdmin(admin.ModelAdmin):
     search_fields = ("codigo", "nombre")
     actions = [exportar_csv, borrar_todo_modelo]
 
+@admin.register(ReglaConcepto)
+class ReglaConceptoAdmin(admin.ModelAdmin):
+    list_display = ("patron", "concepto", "prioridad", "activo")
+    list_filter = ("activo", "concepto")
+    list_editable = ("prioridad", "activo")
+    search_fields = ("patron", "concepto__codigo", "concepto__nombre")
+    autocomplete_fields = ("concepto",)
+    actions = ("reclasificar_pagos",)
+
+    @admin.action(description="Reclasificar todos los pagos con las reglas vigentes")
+    def reclasificar_pagos(self, request, queryset):
+        from .services import clasificador_conceptos
+        stats = clasificador_conceptos.reclasificar(todos=True)
+        self.message_user(
+            request,
+            f"{stats['cambiados']} pagos cambiaron; por revisar: {stats['revision']}, sin regla: {stats['sin_regla']}.",
+        )
+
 @admin.register(Cargo)
 class CargoAdmin(admin.ModelAdmin):
     list_display = ("alumno", "concepto", "monto", "fecha_cargo", "fecha_vencimiento", "pagado")
@@ -371,21 +390,21 @@ class PagoAdmin(admin.ModelAdmin):
 @admin.register(PagoDiario)
 class PagoDiarioAdmin(admin.ModelAdmin):
     list_display = (
-        "fecha", "folio", "monto", "forma_pago", "concepto", "programa",
+        "fecha", "folio", "monto", "forma_pago", "concepto", "concepto_pago", "clasificacion", "programa",
         "sede", "curp", "numero_alumno", "alumno_link", "mov_banco_link", "creado_en",
     )
     list_display_links = ("fecha", "folio")
     date_hierarchy = "fecha"
     ordering = ("-fecha", "-creado_en")
 
-    list_filter = (("fecha", admin.DateFieldListFilter), "programa", "sede", "forma_pago", ("alumno", admin.EmptyFieldListFilter))
+    list_filter = (("fecha", admin.DateFieldListFilter), "clasificacion", "concepto_pago", "programa", "sede", "forma_pago", ("alumno", admin.EmptyFieldListFilter))
     search_fields = (
         "folio", "nombre", "curp", "programa", "concepto", "pago_detalle",
         "no_auto", "emision", "numero_alumno",
         "alumno__numero_estudiante", "alumno__nombre", "alumno__apellido_p", "alumno__apellido_m",
     )
 
-    list_select_related = ("alumno", "movimiento")
+    list_select_related = ("alumno", "movimiento", "concepto_pago")
     autocomplete_fields = ("alumno",)
     readonly_fields = ("creado_en", "actualizado_en")
     actions = ("vincular_alumno_por_numero", "desvincular_alumno", exportar_csv, borrar_todo_modelo)
@@ -431,6 +450,8 @@ class PagoDiarioAdmin(admin.ModelAdmin):
         self.message_user(request, f"{updated} pagos desvinculados del Alumno.")
 
     def save_model(self, request, obj, form, change):
+        if "concepto_pago" in form.changed_data:
+            obj.clasificacion = "manual"  # el clasificador ya no lo toca
         if not obj.alumno_id and obj.numero_alumno:
             from .models import Alumno
             try:
@@ -533,8 +554,12 @@ class ProgramaDocumentoRequisitoAdmin(admin.ModelAdmin):
 
 @admin.register(DocumentoAlumno)
 class DocumentoAlumnoAdmin(admin.ModelAdmin):
-    list_display = ("info_escolar", "tipo", "archivo", "valido", "verificado_por", "verificado_en", "creado_en")
-    list_filter = ("tipo", "valido")
+    list_display = ("info_escolar", "tipo", "archivo", "valido", "verificado_por", "verificado_en", "creado_en", "derivado_estado", "paginas")
+    list_filter = ("tipo", "valido", "derivado_estado")
+    readonly_fields = (
+        "blob", "nombre_original", "derivado", "miniatura", "derivado_estado", "derivado_origen", "derivado_error",
+        "derivado_en", "paginas", "bytes_original", "bytes_derivado",
+    )
     search_fields = (
         "info_escolar__alumno__numero_estudiante",
         "info_escolar__alumno__nombre",
@@ -552,6 +577,24 @@ class ContadorAlumnoAdmin(admin.ModelAdmin):
     search_fields = ("llave",)
     actions = [exportar_csv, borrar_todo_modelo]
 
+@admin.register(BloqueNumeracion)
+class BloqueNumeracionAdmin(admin.ModelAdmin):
+    list_display = ("llave", "inicio", "fin", "origen", "reservado_en")
+    list_filter = ("llave",)
+    search_fields = ("origen",)
+    readonly_fields = ("llave", "inicio", "fin", "origen", "reservado_en")
+    actions = [exportar_csv]
+
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    list_display = ("id", "tipo", "alumno", "estado", "intentos", "siguiente_intento", "destinatario", "enviado_en")
+    list_filter = ("tipo", "estado")
+    search_fields = ("destinatario", "alumno__numero_estudiante", "alumno__nombre", "alumno__apellido_p")
+    list_select_related = ("alumno",)
+    raw_id_fields = ("alumno",)
+    readonly_fields = ("creado_en", "enviado_en")
+    actions = [exportar_csv]
+
 @admin.register(ClipCredential)
 class ClipCredentialAdmin(admin.ModelAdmin):
     list_display = ("name", "is_sandbox", "active", "updated_at")
@@ -574,6 +617,52 @@ class TwilioConfigAdmin(admin.ModelAdmin):
     actions = [exportar_csv, borrar_todo_modelo]
 
 
+@admin.register(CampanaMensajes)
+class CampanaMensajesAdmin(admin.ModelAdmin):
+    list_display = ("nombre", "canal", "estado", "total", "sin_telefono", "enviados", "entregados", "fallidos", "creado_en")
+    list_filter = ("estado", "canal", "env")
+    search_fields = ("nombre",)
+    readonly_fields = ("estado", "total", "sin_telefono", "enviados", "entregados", "fallidos",
+                       "creado_por", "creado_en", "iniciado_en", "terminado_en")
+    actions = ("encolar", "cancelar", exportar_csv)
+
+    def save_model(self, request, obj, form, change):
+        if not obj.creado_por_id:
+            obj.creado_por = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description="Encolar (arma los mensajes; los envía `enviar_campanas`)")
+    def encolar(self, request, queryset):
+        from .services.mensajeria import encolar
+        for campana in queryset:
+            try:
+                c = encolar(campana)
+            except ValueError as e:
+                self.message_user(request, f"{campana.nombre}: {e}", level=messages.WARNING)
+                continue
+            self.message_user(request, f"{c.nombre}: {c.total} mensajes en cola ({c.sin_telefono} sin teléfono válido).")
+
+    @admin.action(description="Cancelar (deja de enviar lo pendiente)")
+    def cancelar(self, request, queryset):
+        updated = queryset.filter(estado__in=["borrador", "pendiente", "enviando"]).update(estado="cancelada")
+        self.message_user(request, f"{updated} campañas canceladas.")
+
+@admin.register(MensajeTwilio)
+class MensajeTwilioAdmin(admin.ModelAdmin):
+    list_display = ("id", "campana", "alumno", "canal", "telefono", "estado", "error_code", "enviado_en", "actualizado_en")
+    list_filter = ("estado", "canal", "env")
+    search_fields = ("telefono", "sid", "alumno__numero_estudiante", "alumno__nombre", "alumno__apellido_p")
+    list_select_related = ("campana", "alumno")
+    raw_id_fields = ("campana", "alumno")
+    actions = [exportar_csv]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # ==========================================================
 # usuarios / perfiles (User + UserProfile)
 # ==========================================================
@@ -791,4 +880,44 @@ class EstatusAdministrativoAdmin(BaseEstatusAdmin):
 class ReinscripcionHitoAdmin(admin.ModelAdmin):
     list_display = ("programa", "meses_offset", "monto", "activo", "nombre")
     list_filter  = ("activo", "programa")
-    search_fields = ("programa__codigo", "programa__nombre", "nombre")
\ No newline at end of file
+    search_fields = ("programa__codigo", "programa__nombre", "nombre")
+
+from .models import CurpConsulta
+
+@admin.register(CurpConsulta)
+class CurpConsultaAdmin(admin.ModelAdmin):
+    list_display = ("curp", "consultado_en", "hits")
+    search_fields = ("curp",)
+    date_hierarchy = "consultado_en"
+    readonly_fields = ("curp", "datos", "consultado_en", "hits")
+
+
+from .models import ArchivoBlob
+
+@admin.register(ArchivoBlob)
+class ArchivoBlobAdmin(admin.ModelAdmin):
+    list_display = ("sha256", "archivo", "tamano", "refs", "creado_en")
+    search_fields = ("sha256", "archivo")
+    readonly_fields = ("sha256", "archivo", "tamano", "refs", "creado_en")
+
+
+from .models import EstadoCuentaSnapshot
+
+@admin.register(EstadoCuentaSnapshot)
+class EstadoCuentaSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("alumno", "periodo", "num_pagos", "total_pagado", "adeudo", "pdf", "generado_en")
+    list_filter = ("periodo",)
+    search_fields = ("alumno__numero_estudiante", "alumno__nombre", "alumno__apellido_p")
+    list_select_related = ("alumno",)
+    readonly_fields = ("alumno", "periodo", "contexto", "total_pagado", "adeudo", "num_pagos", "pdf", "generado_en")
+
+
+from .models import MuestraLenta
+
+@admin.register(MuestraLenta)
+class MuestraLentaAdmin(admin.ModelAdmin):
+    list_display = ("creado_en", "url_name", "metodo", "status", "ms", "consultas", "db_ms", "usuario")
+    list_filter = ("url_name", "metodo", "status")
+    search_fields = ("url_name", "ruta")
+    list_select_related = ("usuario",)
+    readonly_fields = ("creado_en", "url_name", "ruta", "metodo", "status", "ms", "consultas", "db_ms", "bytes", "usuario", "sql")
@@ -5,5 +5,11 @@ class AlumnosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'alumnos'
 
-    #def ready(self):
-    #    from . import signals  # noqa: F401
\ No newline at end of file
+    def ready(self):
+        from alumnos.services import alertas, catalogos, clasificador_conceptos, correos, vinculo_pagos
+
+        catalogos.conectar_senales()
+        alertas.conectar_senales()
+        vinculo_pagos.conectar_senales()
+        clasificador_conceptos.conectar_senales()
+        correos.conectar_senales()
@@ -14,63 +14,39 @@ def _money(x):
     return x.quantize(DIN, rounding=ROUND_HALF_UP)
 
 def _q_pagos_del_alumno(alumno):
-    q = Q(alumno=alumno)
-    if getattr(alumno, 'curp', None):
-        q |= Q(curp__iexact=alumno.curp)
-    if getattr(alumno, 'numero_estudiante', None):
-        q |= Q(numero_alumno=alumno.numero_estudiante)
-    return q
-
-def _keywords_concepto(concepto):
-    # intenta usar codigo y nombre del concepto
-    vals = set()
-    if getattr(concepto, 'codigo', None):
-        vals.add(str(concepto.codigo))
-    if getattr(concepto, 'nombre', None):
-        vals.add(str(concepto.nombre))
-    # añade sin tildes / variantes básicas
-    base = set()
-    for v in list(vals):
-        vv = v.lower()
-        base.add(vv)
-        base.add(vv.replace('í','i').replace('ó','o').replace('á','a').replace('é','e').replace('ú','u'))
-    return [v for v in base if v]
+    # los pagos que llegan solo con CURP / número se ligan al guardar o con
+    # `manage.py vincular_pagos` (alumnos.services.vinculo_pagos): basta la FK
+    return Q(alumno=alumno)
 
 def _filtro_pagos_por_concepto(concepto):
-    kws = _keywords_concepto(concepto)
-    q = Q()
-    for w in kws:
-        q |= Q(concepto__icontains=w) | Q(pago_detalle__icontains=w)
-    return q
+    # PagoDiario.concepto_pago lo asigna alumnos.services.clasificador_conceptos
+    return Q(concepto_pago=concepto)
 
 from decimal import Decimal
 from django.db import transaction
 
-def calcular_cargos_con_saldo(alumno, restar_pagos_mas_recientes=True):
-    """
-    Devuelve una lista por cada Cargo del alumno con:
-      cargo_id, concepto, fecha_cargo, monto_original, monto_aplicado, monto_restante,
-      is_overdue, is_due_today, dias_mora.
+def pagos_para_saldo(alumno):
+    """Una sola consulta con los pagos que pueden aplicarse a cargos del alumno."""
+    return list(
+        PagoDiario.objects
+        .filter(_q_pagos_del_alumno(alumno), concepto_pago__isnull=False)
+        .exclude(monto__isnull=True)
+        .exclude(monto=0)
+        .order_by('fecha', 'creado_en')
+    )
 
-    Además, ACTUALIZA Cargo.pagado en BD:
-      - True  si el cargo queda totalmente cubierto (monto_restante == 0.00)
-      - False si aún hay saldo pendiente (> 0.00)
+def aplicar_pagos(cargos, pagos, restar_pagos_mas_recientes=True):
+    """
+    Reparto de `pagos` (PagoDiario) sobre `cargos` (Cargo con concepto) por concepto,
+    sin consultas. Devuelve (detalle, cargos cuyo `pagado` cambió); el atributo
+    `pagado` de esos cargos ya queda actualizado en memoria.
     """
-    # 1) Trae cargos del alumno (incluye concepto)
-    cargos_qs = (
-        Cargo.objects
-        .select_related('concepto')
-        .filter(alumno=alumno)
-        .order_by('-fecha_cargo', '-id')
-    )
-    cargos = list(cargos_qs)
     if not cargos:
-        return []
+        return [], []
 
-    # Diccionario rápido id->objeto para actualizar luego
     cargos_by_id = {c.id: c for c in cargos}
 
-    # 2) Estructura de trabajo por cargo
+    # 1) Estructura de trabajo por cargo
     detalle = [{
         'cargo_id': c.id,
         'concepto_codigo': getattr(c.concepto, 'codigo', ''),
@@ -85,42 +61,32 @@ def calcular_cargos_con_saldo(alumno, restar_pagos_mas_recientes=True):
         'dias_mora': 0,
     } for c in cargos]
 
-    # 3) Agrupa cargos por concepto y calcula flags básicos
+    # 2) Agrupa cargos por concepto y calcula flags básicos
     cargos_por_concepto = {}
     hoy = date.today()
-    for ci in detalle:
+    for c, ci in zip(cargos, detalle):
         fv = ci.get('fecha_vencimiento') or ci.get('fecha_cargo')
         if fv and ci['monto_restante'] > 0:
             ci['is_overdue']  = fv < hoy
             ci['is_due_today'] = fv == hoy
             ci['dias_mora']    = (hoy - fv).days if fv < hoy else 0
 
-        key = (ci['concepto_codigo'] or '').upper()
-        cargos_por_concepto.setdefault(key, []).append(ci)
-
-    # 4) Aplica pagos por concepto
-    for concepto_key, lista_cargos in cargos_por_concepto.items():
-        concepto_obj = next(
-            (c.concepto for c in cargos if (getattr(c.concepto, 'codigo', '') or '').upper() == concepto_key),
-            None
-        )
+        cargos_por_concepto.setdefault(c.concepto_id, []).append(ci)
 
-        pagos_qs = (
-            PagoDiario.objects
-            .filter(_q_pagos_del_alumno(alumno) & _filtro_pagos_por_concepto(concepto_obj))
-            .exclude(monto__isnull=True)
-            .exclude(monto=0)
-        )
-        pagos_qs = (pagos_qs.order_by('-fecha', '-creado_en')
-                    if restar_pagos_mas_recientes
-                    else pagos_qs.order_by('fecha', 'creado_en'))
+    # Orden de aplicación de pagos (antes: order_by en cada consulta por concepto)
+    pagos = sorted(pagos, key=lambda p: (p.fecha or date.min, p.creado_en), reverse=restar_pagos_mas_recientes)
 
-        pagos = [{'id': p.id, 'monto_restante': _money(p.monto)} for p in pagos_qs]
+    # 3) Aplica pagos por concepto (PagoDiario.concepto_pago)
+    for concepto_id, lista_cargos in cargos_por_concepto.items():
+        pagos_concepto = [
+            {'id': p.id, 'monto_restante': _money(p.monto)}
+            for p in pagos if p.concepto_pago_id == concepto_id
+        ]
 
         # Orden de cargos: por fecha_cargo y luego id (sin invertir, para estabilidad)
         lista_cargos.sort(key=lambda x: (x['fecha_cargo'] or x['cargo_id'], x['cargo_id']))
 
-        for pago in pagos:
+        for pago in pagos_concepto:
             if pago['monto_restante'] <= 0:
                 continue
             for ci in lista_cargos:
@@ -134,18 +100,50 @@ def calcular_cargos_con_saldo(alumno, restar_pagos_mas_recientes=True):
                 ci['monto_restante'] = _money(ci['monto_restante'] - aplica)
                 pago['monto_restante'] = _money(pago['monto_restante'] - aplica)
 
-    # 5) Persistir Cargo.pagado según saldo resultante
-    to_update = []
+    # 4) Cargo.pagado según saldo resultante
+    cambiados = []
     for ci in detalle:
         cargo_obj = cargos_by_id[ci['cargo_id']]
         pagado_nuevo = (ci['monto_restante'] == Decimal('0.00'))
         if cargo_obj.pagado != pagado_nuevo:
             cargo_obj.pagado = pagado_nuevo
-            to_update.append(cargo_obj)
+            cambiados.append(cargo_obj)
+
+    return detalle, cambiados
+
+def guardar_pagado(cargos):
+    """Persiste solo el campo `pagado` de los cargos que cambiaron."""
+    from alumnos.services import alertas
 
-    if to_update:
+    if cargos:
         # Agrupa en una transacción y actualiza en bloque solo el campo pagado
         with transaction.atomic():
-            Cargo.objects.bulk_update(to_update, ['pagado'])
+            Cargo.objects.bulk_update(cargos, ['pagado'])
+            # bulk_update no manda señales
+            alertas.marcar(alumnos={c.alumno_id for c in cargos})
+
+def calcular_cargos_con_saldo(alumno, restar_pagos_mas_recientes=True):
+    """
+    Devuelve una lista por cada Cargo del alumno con:
+      cargo_id, concepto, fecha_cargo, monto_original, monto_aplicado, monto_restante,
+      is_overdue, is_due_today, dias_mora.
+
+    Además, ACTUALIZA Cargo.pagado en BD:
+      - True  si el cargo queda totalmente cubierto (monto_restante == 0.00)
+      - False si aún hay saldo pendiente (> 0.00)
+
+    Dos consultas (cargos y pagos) sin importar cuántos conceptos tenga el alumno;
+    el filtro por concepto se hace en memoria.
+    """
+    cargos = list(
+        Cargo.objects
+        .select_related('concepto')
+        .filter(alumno=alumno)
+        .order_by('-fecha_cargo', '-id')
+    )
+    if not cargos:
+        return []
 
+    detalle, cambiados = aplicar_pagos(cargos, pagos_para_saldo(alumno), restar_pagos_mas_recientes)
+    guardar_pagado(cambiados)
     return detalle
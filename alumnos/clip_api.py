@@ -1,5 +1,5 @@
 # alumnos/clip_api.py
-import uuid, base64, re, unicodedata, hmac, hashlib
+import uuid, base64, re, unicodedata, hmac, hashlib, json
 import requests
 from typing import Optional, Tuple
 from .utils import get_active_clip_credential
@@ -19,6 +19,36 @@ def _sanitize_description(text: str, max_len: int = 60) -> str:
     text = re.sub(r"\s+", " ", text).strip()
     return text[:max_len] or "Pago"
 
+def _payload_checkout(*, amount, description, order_id, success_url, cancel_url,
+                      metadata=None, use_cents=True, description_max_len=60) -> dict:
+    try:
+        amt = float(amount)
+    except Exception:
+        raise ValueError("amount debe convertirse a número (float).")
+
+    desc_sanitized = _sanitize_description(description, max_len=description_max_len)
+
+    if use_cents:
+        payload = {
+            "amount": { "value": int(round(amt * 100)), "currency": "MXN" },
+            "description": desc_sanitized,
+            "reference": order_id,         # muchas cuentas usan 'reference'
+            "success_url": success_url,
+            "cancel_url": cancel_url,
+            "metadata": metadata or {},
+        }
+    else:
+        payload = {
+            "amount": amt,
+            "currency": "MXN",
+            "description": desc_sanitized,
+            "order_id": order_id,
+            "success_url": success_url,
+            "cancel_url": cancel_url,
+            "metadata": metadata or {},
+        }
+    return payload
+
 class ClipClient:
     def __init__(self, sandbox: Optional[bool] = None):
         cred = get_active_clip_credential(sandbox=sandbox)
@@ -83,33 +113,10 @@ class ClipClient:
 
         url = self.base_url + CLIP_ENDPOINT_CREATE
         idem = str(uuid.uuid4())
-
-        try:
-            amt = float(amount)
-        except Exception:
-            raise ValueError("amount debe convertirse a número (float).")
-
-        desc_sanitized = _sanitize_description(description, max_len=description_max_len)
-
-        if use_cents:
-            payload = {
-                "amount": { "value": int(round(amt * 100)), "currency": "MXN" },
-                "description": desc_sanitized,
-                "reference": order_id,         # muchas cuentas usan 'reference'
-                "success_url": success_url,
-                "cancel_url": cancel_url,
-                "metadata": metadata or {},
-            }
-        else:
-            payload = {
-                "amount": amt,
-                "currency": "MXN",
-                "description": desc_sanitized,
-                "order_id": order_id,
-                "success_url": success_url,
-                "cancel_url": cancel_url,
-                "metadata": metadata or {},
-            }
+        payload = _payload_checkout(
+            amount=amount, description=description, order_id=order_id, success_url=success_url,
+            cancel_url=cancel_url, metadata=metadata, use_cents=use_cents, description_max_len=description_max_len,
+        )
 
         try:
             resp = requests.post(
@@ -125,6 +132,35 @@ class ClipClient:
             data["message"] = data.get("_raw_text") or "Error no especificado por la API"
         return data, code
 
+    async def create_payment_link_async(self, **kwargs) -> Tuple[dict, int]:
+        """
+        Igual que create_payment_link pero con aiohttp: para vistas async, no ocupa un
+        worker mientras Clip responde. El constructor consulta la BD: en una vista async
+        créalo con `await sync_to_async(ClipClient)()`.
+        """
+        import aiohttp
+
+        payload = _payload_checkout(**kwargs)
+        headers = self._headers(idempotency_key=str(uuid.uuid4()))
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)) as http:
+                async with http.post(self.base_url + CLIP_ENDPOINT_CREATE, json=payload, headers=headers) as resp:
+                    code = resp.status
+                    body_text = await resp.text()
+                    content_type = resp.headers.get("content-type", "")
+        except (aiohttp.ClientError, TimeoutError) as e:
+            return {"error": "connection_error", "detail": str(e)}, 0
+
+        try:
+            data = json.loads(body_text)
+        except ValueError:
+            data = {"_raw_text": body_text[:2000], "_http_status": code, "_content_type": content_type}
+            if code in (401, 403):
+                data["message"] = "Unauthorized/Forbidden (revisa api_key, secret y x-api-key)"
+        if code >= 400 and "message" not in data:
+            data["message"] = data.get("_raw_text") or "Error no especificado por la API"
+        return data, code
+
     def retrieve_payment_link_status(self, payment_req_id: str) -> Tuple[dict, int]:
         url = self.base_url + CLIP_ENDPOINT_STATUS.format(payment_req_id=payment_req_id)
         try:
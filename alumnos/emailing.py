@@ -1,19 +1,20 @@
 # alumnos/emailing.py
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
-from django.contrib.staticfiles import finders
 from django.utils.html import strip_tags
 from email.mime.image import MIMEImage
 from typing import List, Optional
 import os
 
+from alumnos.services.estaticos import ruta_estatico
+
 def _attach_inline_logo(message, static_path: str = "iuaf/logo-email.png", cid: str = "logo_cid"):
     """
     Adjunta un logo inline (opcional). Asegúrate de tener /static/iuaf/logo-email.png
     y en el HTML usa: <img src="cid:logo_cid" ...>
     """
     try:
-        path = finders.find(static_path)
+        path = ruta_estatico(static_path)
         if not path:
             return
         with open(path, "rb") as f:
@@ -27,7 +28,7 @@ def _attach_inline_logo(message, static_path: str = "iuaf/logo-email.png", cid:
 def _find_static(path_rel: str) -> Optional[str]:
     """Devuelve ruta absoluta del archivo estático o None si no existe."""
     try:
-        return finders.find(path_rel)
+        return ruta_estatico(path_rel)
     except Exception:
         return None
 
@@ -4,16 +4,15 @@ from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 
-def enviar_bienvenida_alumno(alumno) -> bool:
+
+def mensaje_bienvenida(alumno, *, connection=None):
     """
-    Envía correo de bienvenida al alumno (HTML). Devuelve True/False.
-    No lanza excepción hacia fuera.
+    Correo de bienvenida al alumno (HTML) listo para `send()`, o None si no tiene correo.
+    No envía: lo usa el worker de la bandeja de salida (alumnos.services.correos), que
+    reutiliza una sola conexión SMTP para todo el lote.
     """
-    return 0
-    if not getattr(settings, "SEND_WELCOME_EMAILS", False):
-        return False
     if not alumno.email:
-        return False
+        return None
 
     contexto = {
         "alumno": alumno,
@@ -25,17 +24,12 @@ def enviar_bienvenida_alumno(alumno) -> bool:
     html = render_to_string("emails/welcome_student.html", contexto)
     text = strip_tags(html)
 
-    try:
-        msg = EmailMultiAlternatives(
-            subject=subject,
-            body=text,
-            from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None) or settings.EMAIL_HOST_USER,
-            to=[alumno.email],
-        )
-        msg.attach_alternative(html, "text/html")
-        msg.send(fail_silently=False)
-        return True
-    except Exception as e:
-        # Log básico a consola; puedes integrar logging estructurado si prefieres
-        print(f"[EMAIL] Error enviando bienvenida a {alumno.email}: {e}")
-        return False
+    msg = EmailMultiAlternatives(
+        subject=subject,
+        body=text,
+        from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None) or settings.EMAIL_HOST_USER,
+        to=[alumno.email],
+        connection=connection,
+    )
+    msg.attach_alternative(html, "text/html")
+    return msg
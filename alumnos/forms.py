@@ -2,6 +2,7 @@
 from django import forms
 from django.db.models import Q, Count
 from django.forms import modelformset_factory, inlineformset_factory
+from django.forms.models import ModelChoiceIterator
 from decimal import Decimal
 
 from .models import (
@@ -27,6 +28,56 @@ class ClearableFileInputAccept(forms.ClearableFileInput):
         super().__init__(*args, **kwargs)
 
 
+class _CatalogoIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.filas():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.filas()) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.filas())
+
+
+class CatalogoChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField que arma las opciones y valida contra alumnos.services.catalogos
+    (sin consultas). Se usa con Meta.field_classes; el catálogo sale del modelo del
+    queryset. Para acotar opciones: field.filtro = lambda obj: ...
+    """
+    iterator = _CatalogoIterator
+
+    def __init__(self, queryset, *args, **kwargs):
+        from alumnos.services.catalogos import catalogo_de_modelo
+
+        super().__init__(queryset, *args, **kwargs)
+        self.catalogo = catalogo_de_modelo(queryset.model)
+        self.filtro = None
+
+    def filas(self):
+        from alumnos.services import catalogos
+
+        filas = catalogos.obtener(self.catalogo)
+        return [o for o in filas if self.filtro(o)] if self.filtro else filas
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        self.validate_no_null_characters(value)
+        key = self.to_field_name or "pk"
+        if isinstance(value, self.queryset.model):
+            value = getattr(value, key)
+        for obj in self.filas():
+            if str(getattr(obj, key)) == str(value):
+                return obj
+        raise forms.ValidationError(
+            self.error_messages["invalid_choice"], code="invalid_choice", params={"value": value},
+        )
+
+
 # ============================================================
 #  ALUMNO
 # ============================================================
@@ -62,6 +113,7 @@ class AlumnoForm(forms.ModelForm):
             "curp": forms.TextInput(attrs={"style": "text-transform:uppercase"}),
             "email_institucional": forms.EmailInput(),
         }
+        field_classes = {"pais": CatalogoChoiceField, "estado": CatalogoChoiceField}
 
     REQUIRED_ON_CREATE = ("curp", "nombre", "apellido_p", "apellido_m")
 
@@ -103,18 +155,17 @@ class AlumnoForm(forms.ModelForm):
         if "curp" in self.fields:
             self.fields["curp"].widget.attrs["oninput"] = "this.value=this.value.toUpperCase()"
 
-        # Estados dependientes
+        # Estados dependientes (del catálogo en caché; sin país no hay opciones)
         if "estado" in self.fields:
-            self.fields["estado"].queryset = Estado.objects.none()
+            pais_id = None
             if "pais" in self.data:
                 try:
                     pais_id = int(self.data.get("pais"))
                 except (TypeError, ValueError):
                     pais_id = None
-                if pais_id:
-                    self.fields["estado"].queryset = Estado.objects.filter(pais_id=pais_id).order_by("nombre")
             elif self.instance.pk and self.instance.pais_id:
-                self.fields["estado"].queryset = Estado.objects.filter(pais_id=self.instance.pais_id).order_by("nombre")
+                pais_id = self.instance.pais_id
+            self.fields["estado"].filtro = lambda e, pais_id=pais_id: pais_id is not None and e.pais_id == pais_id
 
         # Planes disponibles (libres o el actual)
         if "informacionEscolar" in self.fields:
@@ -147,6 +198,7 @@ from alumnos.permisos import (
 )
 
 from alumnos.models import Programa, Financiamiento, Grupo
+from alumnos.services import catalogos
 
 class InformacionEscolarForm(forms.ModelForm):
     inicio_programa = forms.DateField(
@@ -215,6 +267,11 @@ class InformacionEscolarForm(forms.ModelForm):
             "precio_equivalencia": forms.NumberInput(attrs={"class": "form-control is-readonly-input is-readonly", "readonly": "readonly", "step": "0.01"}),
             "numero_reinscripciones": forms.NumberInput(attrs={"class": "form-control is-readonly-input is-readonly", "readonly": "readonly"}),
         }
+        field_classes = {
+            "programa": CatalogoChoiceField,
+            "financiamiento": CatalogoChoiceField,
+            "sede": CatalogoChoiceField,
+        }
 
     READONLY_PRICE_FIELDS = [
         "monto_descuento",
@@ -236,12 +293,11 @@ class InformacionEscolarForm(forms.ModelForm):
         prog = None
         if "programa" in (self.data or {}):
             try:
-                prog_id = int(self.data.get("programa"))
-                prog = Programa.objects.filter(pk=prog_id).first()
+                prog = catalogos.por_pk("programas", self.data.get("programa"))
             except Exception:
                 prog = None
         if not prog and self.instance and self.instance.programa_id:
-            prog = self.instance.programa
+            prog = catalogos.por_pk("programas", self.instance.programa_id) or self.instance.programa
         return prog
 
     def _get_financiamiento(self):
@@ -253,12 +309,11 @@ class InformacionEscolarForm(forms.ModelForm):
         fin = None
         if "financiamiento" in (self.data or {}):
             try:
-                fin_id = int(self.data.get("financiamiento"))
-                fin = Financiamiento.objects.filter(pk=fin_id).first()
+                fin = catalogos.por_pk("financiamientos", self.data.get("financiamiento"))
             except Exception:
                 fin = None
         if not fin and self.instance and self.instance.financiamiento_id:
-            fin = self.instance.financiamiento
+            fin = catalogos.por_pk("financiamientos", self.instance.financiamiento_id) or self.instance.financiamiento
 
         # Asegura coherencia programa-financiamiento (permitiendo globales)
         if fin and prog:
@@ -344,16 +399,11 @@ class InformacionEscolarForm(forms.ModelForm):
         # --------- Filtrar financiamientos por programa seleccionado ----------
         programa = self._get_programa()
         if "financiamiento" in self.fields:
-            if programa:
-                qs = Financiamiento.objects.filter(
-                    Q(programa=programa) | Q(programa__isnull=True)
-                )
-            else:
-                qs = Financiamiento.objects.filter(programa__isnull=True)
-
-            # Si quieres, ordena por algo que sí exista, p.ej. id o programa_id
-            qs = qs.order_by("programa_id", "id")
-            self.fields["financiamiento"].queryset = qs
+            # Del catálogo en caché (ordenado por programa_id, id): los del programa y los globales
+            programa_id = programa.pk if programa else None
+            self.fields["financiamiento"].filtro = (
+                lambda f: f.programa_id is None or f.programa_id == programa_id
+            )
 
             # Etiqueta visible del financiamiento (usa __str__ y marca globales)
             self.fields["financiamiento"].label_from_instance = lambda f: (
@@ -0,0 +1,36 @@
+# alumnos/management/commands/benchmark_vistas.py
+from django.core.management.base import BaseCommand
+
+from alumnos.services.benchmark import ejecutar, guardar_json
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide consultas SQL, tiempo y pico de memoria de las vistas/servicios pesados sobre el "
+        "conjunto sintético (ver seed_datos_sinteticos) y guarda el resultado en JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--salida", default="benchmark_vistas.json", help="Ruta del JSON de resultados.")
+        parser.add_argument("--repeticiones", type=int, default=3)
+        parser.add_argument("--solo", action="append", help="Solo este escenario (repetible).")
+        parser.add_argument("--etiqueta", default="", help="Texto libre guardado en el JSON (commit, máquina…).")
+
+    def handle(self, *args, **opts):
+        resultados = ejecutar(repeticiones=opts["repeticiones"], solo=opts["solo"])
+        guardar_json(resultados, opts["salida"], etiqueta=opts["etiqueta"], repeticiones=opts["repeticiones"])
+
+        excedidos = 0
+        for nombre, r in resultados.items():
+            linea = (
+                f"{nombre:28} consultas={r['consultas']:>4}/{r['presupuesto'] or '-':<4} "
+                f"ms={r['ms_mediana']:>9} pico={r['pico_kib']:>9} KiB"
+            )
+            if r["excede"]:
+                excedidos += 1
+                self.stdout.write(self.style.ERROR(linea + "  EXCEDE PRESUPUESTO"))
+            else:
+                self.stdout.write(linea)
+        self.stdout.write(f"Resultados en {opts['salida']}")
+        if excedidos:
+            self.stderr.write(self.style.WARNING(f"{excedidos} escenario(s) exceden su presupuesto de consultas."))
@@ -0,0 +1,27 @@
+# alumnos/management/commands/corte_cartera.py
+from django.core.management.base import BaseCommand
+
+from alumnos.services import cartera_corte, vinculo_pagos
+
+
+class Command(BaseCommand):
+    help = (
+        "Corte de cartera de todos los alumnos (SaldoCartera): saldo, días de mora y tramo "
+        "de antigüedad, calculados en bloque. Correr cada noche; también corrige Cargo.pagado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sin-reconciliar", action="store_true",
+            help="Solo escribe el corte; no actualiza Cargo.pagado.",
+        )
+
+    def handle(self, *args, **opts):
+        # pagos importados sin alumno: el corte solo ve los ligados por FK
+        vinculo_pagos.vincular()
+        st = cartera_corte.corte(reconciliar=not opts["sin_reconciliar"])
+        self.stdout.write(
+            f"Corte {st['fecha']}: {st['alumnos']} alumnos con saldo, "
+            f"saldo ${st['saldo']:,} (vencido ${st['vencido']:,}); "
+            f"{st['cargos']} cargos, {st['pagos']} pagos, {st['cargos_actualizados']} cargos actualizados."
+        )
@@ -0,0 +1,91 @@
+# alumnos/management/commands/deduplicar_documentos.py
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from alumnos.models import ArchivoBlob, DocumentoAlumno
+from alumnos.services.blobs import hash_archivo, recalcular_refs, recolectar_huerfanos
+
+
+def _mb(n):
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Pasa los DocumentoAlumno existentes a almacenamiento por hash (ArchivoBlob): "
+        "un archivo por contenido, borra copias duplicadas y recalcula referencias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Solo reporta; no cambia nada.")
+        parser.add_argument("--conservar-archivos", action="store_true", help="No borra del disco las copias duplicadas.")
+        parser.add_argument("--gc", action="store_true", help="Al final borra blobs sin documentos.")
+        parser.add_argument("--limit", type=int, default=0, help="Máximo de documentos a revisar (0 = todos).")
+
+    def handle(self, *args, **opts):
+        dry = opts["dry_run"]
+        qs = DocumentoAlumno.objects.filter(blob__isnull=True).exclude(archivo="").order_by("id")
+        if opts["limit"]:
+            qs = qs[:opts["limit"]]
+
+        stats = {"revisados": 0, "nuevos": 0, "duplicados": 0, "faltantes": 0, "bytes": 0}
+        # sha -> blob creado en esta corrida (para el dry-run, que no guarda nada)
+        vistos = {}
+
+        for doc in qs.iterator():
+            stats["revisados"] += 1
+            archivo = doc.archivo
+            storage = archivo.storage
+            if not storage.exists(archivo.name):
+                stats["faltantes"] += 1
+                self.stderr.write(f"[faltante] doc {doc.pk}: {archivo.name}")
+                continue
+
+            with storage.open(archivo.name, "rb") as fh:
+                sha, size = hash_archivo(fh)
+
+            blob = vistos.get(sha) or ArchivoBlob.objects.filter(sha256=sha).first()
+            nombre_original = doc.nombre_original or os.path.basename(archivo.name)
+
+            if blob is None:
+                # Primer documento con este contenido: su archivo actual se vuelve el blob (sin copiar)
+                stats["nuevos"] += 1
+                if dry:
+                    vistos[sha] = ArchivoBlob(sha256=sha, archivo=archivo.name, tamano=size)
+                    continue
+                blob = ArchivoBlob.objects.create(sha256=sha, archivo=archivo.name, tamano=size)
+                vistos[sha] = blob
+                DocumentoAlumno.objects.filter(pk=doc.pk).update(blob=blob, nombre_original=nombre_original)
+                continue
+
+            stats["duplicados"] += 1
+            stats["bytes"] += size
+            if dry:
+                continue
+
+            viejo = archivo.name
+            with transaction.atomic():
+                cambios = {"blob": blob, "archivo": blob.archivo.name, "nombre_original": nombre_original}
+                if doc.derivados_vigentes:
+                    # mismo contenido: los derivados siguen sirviendo
+                    cambios["derivado_origen"] = blob.archivo.name
+                DocumentoAlumno.objects.filter(pk=doc.pk).update(**cambios)
+
+            if not opts["conservar_archivos"] and viejo != blob.archivo.name:
+                if not DocumentoAlumno.objects.filter(archivo=viejo).exists():
+                    storage.delete(viejo)
+
+        self.stdout.write(
+            "revisados={revisados} blobs_nuevos={nuevos} duplicados={duplicados} faltantes={faltantes}".format(**stats)
+        )
+        self.stdout.write(f"Espacio {'recuperable' if dry else 'recuperado'}: {_mb(stats['bytes'])}")
+
+        if dry:
+            return
+
+        recalcular_refs()
+        if opts["gc"]:
+            n, total = recolectar_huerfanos()
+            self.stdout.write(f"GC: {n} blobs huérfanos borrados ({_mb(total)}).")
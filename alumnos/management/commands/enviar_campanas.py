@@ -0,0 +1,31 @@
+# alumnos/management/commands/enviar_campanas.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from alumnos.services.mensajeria import procesar_pendientes, reintentar
+
+
+class Command(BaseCommand):
+    help = "Worker de campañas SMS/WhatsApp: envía los mensajes de cada CampanaMensajes pendiente."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=5, help="Máximo de campañas por pasada.")
+        parser.add_argument("--loop", action="store_true", help="Queda corriendo (modo worker).")
+        parser.add_argument("--sleep", type=float, default=10.0, help="Segundos entre pasadas sin trabajo (con --loop).")
+        parser.add_argument("--reintentar", action="store_true", help="Regresa a la cola las campañas atoradas en 'enviando'.")
+
+    def handle(self, *args, **opts):
+        if opts["reintentar"]:
+            self.stdout.write(f"{reintentar()} campañas en cola.")
+
+        while True:
+            stats = procesar_pendientes(limit=opts["limit"])
+            if stats["campanas"] or not opts["loop"]:
+                self.stdout.write(
+                    f"campañas={stats['campanas']} enviados={stats['enviados']} errores={stats['errores']}"
+                )
+            if not opts["loop"]:
+                break
+            if not stats["campanas"]:
+                time.sleep(opts["sleep"])
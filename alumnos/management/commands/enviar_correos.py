@@ -0,0 +1,29 @@
+# alumnos/management/commands/enviar_correos.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from alumnos.services.correos import LOTE, enviar_pendientes, reintentar
+
+
+class Command(BaseCommand):
+    help = "Worker de la bandeja de salida: envía los CorreoSaliente pendientes (bienvenida) con reintentos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=LOTE, help="Máximo de correos por pasada.")
+        parser.add_argument("--loop", action="store_true", help="Queda corriendo (modo worker).")
+        parser.add_argument("--sleep", type=float, default=30.0, help="Segundos entre pasadas sin trabajo (con --loop).")
+        parser.add_argument("--reintentar", action="store_true", help="Regresa a la cola los correos fallidos.")
+
+    def handle(self, *args, **opts):
+        if opts["reintentar"]:
+            self.stdout.write(f"{reintentar()} correos en cola.")
+
+        while True:
+            stats = enviar_pendientes(limit=opts["limit"])
+            if stats or not opts["loop"]:
+                self.stdout.write(" ".join(f"{k}={stats[k]}" for k in ("enviado", "pendiente", "fallido", "omitido")))
+            if not opts["loop"]:
+                break
+            if not stats:
+                time.sleep(opts["sleep"])
@@ -0,0 +1,50 @@
+# alumnos/management/commands/generar_estados_cuenta.py
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from alumnos.models import Alumno, EstadoCuentaSnapshot
+from alumnos.services.estado_cuenta import generar_cortes, renderizar_pdfs
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera los cortes mensuales de estado de cuenta (EstadoCuentaSnapshot) de todos los "
+        "alumnos en consultas por lote y sus PDF en un pool de procesos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--periodo", help="Mes del corte YYYY-MM (por defecto el mes anterior).")
+        parser.add_argument("--alumno", type=int, action="append", help="Solo estos números de estudiante (repetible).")
+        parser.add_argument("--regenerar", action="store_true", help="Reemplaza cortes existentes del periodo.")
+        parser.add_argument("--sin-pdf", action="store_true", help="Solo guarda los cortes, sin PDF.")
+        parser.add_argument("--solo-pdf", action="store_true", help="Solo genera PDF faltantes del periodo.")
+        parser.add_argument("--procesos", type=int, default=4, help="Procesos para PDF (1 = sin pool).")
+
+    def handle(self, *args, **opts):
+        if opts["periodo"]:
+            try:
+                periodo = datetime.strptime(opts["periodo"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--periodo debe ser YYYY-MM")
+        else:
+            hoy = date.today()
+            periodo = date(hoy.year - 1, 12, 1) if hoy.month == 1 else date(hoy.year, hoy.month - 1, 1)
+
+        alumnos_qs = Alumno.objects.filter(informacionEscolar__isnull=False)
+        if opts["alumno"]:
+            alumnos_qs = alumnos_qs.filter(pk__in=opts["alumno"])
+
+        if not opts["solo_pdf"]:
+            stats = generar_cortes(periodo, alumnos_qs, regenerar=opts["regenerar"])
+            self.stdout.write(f"Cortes {periodo:%Y-%m}: creados={stats['creados']} reemplazados={stats['reemplazados']}")
+
+        if opts["sin_pdf"]:
+            return
+
+        pendientes = EstadoCuentaSnapshot.objects.filter(periodo=periodo, pdf="")
+        if opts["alumno"]:
+            pendientes = pendientes.filter(alumno_id__in=opts["alumno"])
+        ids = list(pendientes.values_list("pk", flat=True))
+        stats = renderizar_pdfs(ids, procesos=opts["procesos"])
+        self.stdout.write(f"PDF: generados={stats['pdfs']} errores={stats['errores']}")
@@ -0,0 +1,24 @@
+# alumnos/management/commands/huecos_numeracion.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from alumnos.services import numeracion
+
+
+class Command(BaseCommand):
+    help = (
+        "Lista los números de estudiante reservados (BloqueNumeracion) que no llegaron a "
+        "un alumno: bloques de procesos reiniciados o altas que fallaron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=1,
+                            help="Solo bloques reservados hace más de N días (los recientes pueden seguir en uso).")
+
+    def handle(self, *args, **opts):
+        rangos = numeracion.huecos(antes_de=timezone.now() - timedelta(days=opts["dias"]))
+        for inicio, fin in rangos:
+            self.stdout.write(str(inicio) if inicio == fin else f"{inicio}-{fin}")
+        self.stdout.write(f"Números sin usar: {sum(fin - inicio + 1 for inicio, fin in rangos)} en {len(rangos)} rangos")
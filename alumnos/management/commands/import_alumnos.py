@@ -1,5 +1,6 @@
 from django.core.management import BaseCommand, CommandError
 from alumnos.models import Alumno, Programa   # <-- AÑADIDO
+from alumnos.services.correos import sin_bienvenida
 import pandas as pd
 import re
 from typing import Optional
@@ -223,10 +224,12 @@ class Command(BaseCommand):
                 "estatus": _norm_cell(r.get(mapeo.get("estatus"))),
             }
 
-            obj, created = Alumno.objects.update_or_create(
-                numero_estudiante=num,
-                defaults=datos
-            )
+            # importación masiva: sin bienvenida automática por alumno
+            with sin_bienvenida():
+                obj, created = Alumno.objects.update_or_create(
+                    numero_estudiante=num,
+                    defaults=datos
+                )
             creados += int(created)
             actualizados += int(not created)
 
@@ -226,6 +226,7 @@ class Command(BaseCommand):
                     programa=programa,
                     no_auto=no_auto,
                     curp=curp,
+                    numero_alumno=numero_alumno,
                     emision=emision,
                     alumno=alumno,
                 )
@@ -0,0 +1,28 @@
+# alumnos/management/commands/ingerir_estados_twilio.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from alumnos.services.mensajeria import ingerir_estados
+
+
+class Command(BaseCommand):
+    help = "Aplica por lotes los status callbacks de Twilio (EventoEstadoTwilio) a MensajeTwilio."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=5000, help="Máximo de eventos por pasada.")
+        parser.add_argument("--loop", action="store_true", help="Queda corriendo (modo worker).")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Segundos entre pasadas (con --loop).")
+
+    def handle(self, *args, **opts):
+        while True:
+            stats = ingerir_estados(limit=opts["limit"])
+            if stats["eventos"] or not opts["loop"]:
+                self.stdout.write(
+                    f"eventos={stats['eventos']} mensajes={stats['mensajes']} huerfanos={stats['huerfanos']}"
+                )
+            if not opts["loop"]:
+                break
+            # lote lleno: seguir sin esperar
+            if stats["eventos"] < opts["limit"]:
+                time.sleep(opts["sleep"])
@@ -0,0 +1,22 @@
+# alumnos/management/commands/invalidar_catalogos.py
+from django.core.management.base import BaseCommand, CommandError
+
+from alumnos.services.catalogos import CATALOGOS, invalidar
+
+
+class Command(BaseCommand):
+    help = (
+        "Sube la versión de los catálogos en caché (tras migraciones de datos, update() masivos "
+        "o SQL directo, que no mandan señales). Sin argumentos invalida todos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("catalogos", nargs="*", help=f"Opcional: {', '.join(CATALOGOS)}.")
+
+    def handle(self, *args, **opts):
+        desconocidos = set(opts["catalogos"]) - set(CATALOGOS)
+        if desconocidos:
+            raise CommandError(f"Catálogos desconocidos: {', '.join(sorted(desconocidos))}")
+        nombres = opts["catalogos"] or list(CATALOGOS)
+        invalidar(*nombres)
+        self.stdout.write(f"Invalidados: {', '.join(nombres)}")
@@ -0,0 +1,36 @@
+# alumnos/management/commands/optimizar_imagenes.py
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from alumnos.services.estaticos import optimizar_imagen
+
+
+class Command(BaseCommand):
+    help = (
+        "Reduce en STATIC_ROOT (después de collectstatic) las imágenes de correos y PDFs: PNG a "
+        "paleta, JPEG progresivo. La fuente en static/ no se toca. Con StaticComprimido "
+        "collectstatic ya lo hace. Sin argumentos usa STATIC_IMAGENES_OPTIMIZAR."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("imagenes", nargs="*", help="Rutas relativas a static/ (iuaf/logo-email.png …).")
+        parser.add_argument("--colores", type=int, default=256, help="Colores de la paleta PNG (0 = sin pérdida).")
+        parser.add_argument("--calidad-jpeg", type=int, default=85)
+        parser.add_argument("--dry-run", action="store_true", help="Solo muestra cuánto se ahorraría.")
+
+    def handle(self, *args, **opts):
+        total_antes = total_despues = 0
+        for rel in opts["imagenes"] or settings.STATIC_IMAGENES_OPTIMIZAR:
+            ruta = os.path.join(settings.STATIC_ROOT, rel)
+            if not os.path.isfile(ruta):
+                self.stderr.write(f"No está en STATIC_ROOT (¿falta collectstatic?): {rel}")
+                continue
+            antes, despues = optimizar_imagen(
+                ruta, colores=opts["colores"], calidad_jpeg=opts["calidad_jpeg"], escribir=not opts["dry_run"],
+            )
+            total_antes += antes
+            total_despues += despues
+            self.stdout.write(f"{rel}: {antes:,} -> {despues:,} bytes")
+        self.stdout.write(f"Total: {total_antes:,} -> {total_despues:,} bytes")
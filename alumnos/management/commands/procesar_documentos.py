@@ -0,0 +1,38 @@
+# alumnos/management/commands/procesar_documentos.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from alumnos.models import DocumentoAlumno
+from alumnos.services.documentos_derivados import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = "Worker de documentos: genera PDF derivado, miniatura, páginas y tamaños de DocumentoAlumno pendientes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=50, help="Máximo de documentos por pasada.")
+        parser.add_argument("--loop", action="store_true", help="Queda corriendo (modo worker).")
+        parser.add_argument("--sleep", type=float, default=10.0, help="Segundos entre pasadas sin trabajo (con --loop).")
+        parser.add_argument("--reintentar-errores", action="store_true", help="Regresa a la cola los documentos en 'error'.")
+        parser.add_argument("--todos", action="store_true", help="Regenera los derivados de todos los documentos.")
+
+    def handle(self, *args, **opts):
+        if opts["todos"]:
+            n = DocumentoAlumno.objects.exclude(derivado_estado="procesando").update(derivado_estado="pendiente")
+            self.stdout.write(f"{n} documentos en cola.")
+        elif opts["reintentar_errores"]:
+            n = DocumentoAlumno.objects.filter(derivado_estado="error").update(derivado_estado="pendiente")
+            self.stdout.write(f"{n} documentos con error en cola.")
+
+        while True:
+            stats = procesar_pendientes(limit=opts["limit"])
+            trabajo = stats["procesados"] + stats["errores"]
+            if trabajo or not opts["loop"]:
+                self.stdout.write(
+                    f"procesados={stats['procesados']} errores={stats['errores']} omitidos={stats['omitidos']}"
+                )
+            if not opts["loop"]:
+                break
+            if not trabajo:
+                time.sleep(opts["sleep"])
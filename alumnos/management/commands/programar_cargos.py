@@ -0,0 +1,63 @@
+# alumnos/management/commands/programar_cargos.py
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from alumnos.models import Programa
+from alumnos.services import plan_cargos
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera o completa en bloque el plan de cargos (inscripción, mensualidades y "
+        "reinscripciones) de un grupo de alumnos; sin filtros, de todos los que tienen plan. "
+        "Pensado para el cron mensual. --dry-run muestra qué se crearía."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grupo", type=int, help="Id del Grupo.")
+        parser.add_argument("--programa", type=str, help="Código del Programa.")
+        parser.add_argument("--sede", type=int, help="Id de la Sede.")
+        parser.add_argument("--inicio", type=str, help="Generación: mes de inicio del programa (AAAA-MM).")
+        parser.add_argument("--concepto", type=int, help="Id del ConceptoPago de las mensualidades (por omisión COLEGIATURA).")
+        parser.add_argument("--dry-run", action="store_true", help="No escribe; lista los cargos que faltan.")
+        parser.add_argument("--mostrar", type=int, default=50, help="Cargos a listar con --dry-run (0: todos).")
+
+    def handle(self, *args, **opts):
+        filtros = {"grupo": opts["grupo"], "sede": opts["sede"]}
+        if opts["programa"]:
+            programa = Programa.objects.filter(codigo=opts["programa"]).first()
+            if programa is None:
+                raise CommandError(f"No existe el programa {opts['programa']}.")
+            filtros["programa"] = programa
+        if opts["inicio"]:
+            try:
+                filtros["inicio"] = datetime.strptime(opts["inicio"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--inicio debe ser AAAA-MM.")
+
+        detalle = [] if opts["dry_run"] else None
+        try:
+            st = plan_cargos.programar(
+                plan_cargos.cohorte(**filtros), concepto_id=opts["concepto"], preview=opts["dry_run"], detalle=detalle,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if detalle is not None:
+            faltan = [p for p in detalle if p.estado in ("nuevo", "vencimiento")]
+            for p in faltan[:opts["mostrar"] or None]:
+                accion = "crear" if p.estado == "nuevo" else "vencimiento"
+                self.stdout.write(
+                    f"  {p.alumno_id}  {accion:<11} {p.tipo:<13} {p.fecha_cargo}  vence {p.fecha_vencimiento}  ${p.monto:,.2f}"
+                )
+            if opts["mostrar"] and len(faltan) > opts["mostrar"]:
+                self.stdout.write(f"  … y {len(faltan) - opts['mostrar']} más")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'[simulación] ' if opts['dry_run'] else ''}Alumnos: {st['alumnos']} (sin plan: {st['sin_plan']}); "
+            f"cargos nuevos: {st['nuevos']} (inscripción {st['inscripcion_nuevos']}, "
+            f"mensualidades {st['mensualidad_nuevos']}, reinscripciones {st['reinscripcion_nuevos']}), "
+            f"ya existían: {st['existentes'] + st['vencimientos']}, vencimientos completados: {st['vencimientos']}, "
+            f"hitos fuera del plan: {st['fuera_de_rango']}."
+        ))
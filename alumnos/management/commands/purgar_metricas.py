@@ -0,0 +1,15 @@
+# alumnos/management/commands/purgar_metricas.py
+from django.core.management.base import BaseCommand
+
+from alumnos.services.rendimiento import purgar
+
+
+class Command(BaseCommand):
+    help = "Borra métricas de rendimiento (MetricaVista/MuestraLenta) más viejas que la retención."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=None, help="Por defecto settings.PERF_RETENCION_DIAS.")
+
+    def handle(self, *args, **opts):
+        metricas, muestras = purgar(opts["dias"])
+        self.stdout.write(f"Borradas: métricas={metricas} muestras={muestras}")
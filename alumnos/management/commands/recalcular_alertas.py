@@ -0,0 +1,21 @@
+# alumnos/management/commands/recalcular_alertas.py
+from django.core.management.base import BaseCommand
+
+from alumnos.services import alertas
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la tabla AlertaAlumno. Correr a diario (los cargos se vuelven exigibles "
+        "por fecha) y tras importaciones masivas o update() que no mandan señales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("alumnos", nargs="*", type=int, help="Opcional: números de estudiante; sin argumentos, todos.")
+
+    def handle(self, *args, **opts):
+        if opts["alumnos"]:
+            n = alertas.recalcular(opts["alumnos"])
+        else:
+            n = alertas.recalcular_todos()
+        self.stdout.write(f"Alertas recalculadas: {n}")
@@ -0,0 +1,22 @@
+# alumnos/management/commands/reclasificar_pagos.py
+from django.core.management.base import BaseCommand
+
+from alumnos.services import clasificador_conceptos
+
+
+class Command(BaseCommand):
+    help = (
+        "Asigna PagoDiario.concepto_pago según las reglas de concepto. Por omisión solo los "
+        "pagos sin clasificar (importados con bulk_create/update); --todos tras cambiar reglas. "
+        "Los clasificados a mano no se tocan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--todos", action="store_true", help="Reclasifica también los ya clasificados (no los manuales).")
+
+    def handle(self, *args, **opts):
+        stats = clasificador_conceptos.reclasificar(todos=opts["todos"])
+        self.stdout.write(
+            f"Clasificados: {stats['auto']}, por revisar: {stats['revision']}, "
+            f"sin regla: {stats['sin_regla']}; cambiados: {stats['cambiados']}"
+        )
@@ -0,0 +1,46 @@
+# alumnos/management/commands/seed_datos_sinteticos.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from alumnos.services.datos_sinteticos import limpiar, sembrar
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea un conjunto de datos sintético (alumnos, pagos, cargos, documentos, cobros, "
+        "calificaciones y cursos LMS) para medir rendimiento. Por defecto 10k alumnos / 500k pagos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alumnos", type=int, default=10_000)
+        parser.add_argument("--pagos", type=int, default=500_000)
+        parser.add_argument("--movimientos", type=int, default=2_000, help="Movimientos bancarios (abonos) sin conciliar.")
+        parser.add_argument("--invitaciones", type=int, default=1_000, help="BillingInvite + PaymentRecord.")
+        parser.add_argument("--usuarios", type=int, default=50, help="Alumnos con usuario para el portal/LMS.")
+        parser.add_argument("--programas", type=int, default=8)
+        parser.add_argument("--seed", type=int, default=2024, help="Semilla aleatoria (resultados reproducibles).")
+        parser.add_argument("--batch-size", type=int, default=2_000)
+        parser.add_argument("--limpiar", action="store_true", help="Borra los datos sintéticos existentes y termina.")
+        parser.add_argument("--forzar", action="store_true", help="Permite correr con DEBUG=False (producción).")
+
+    def handle(self, *args, **opts):
+        if not settings.DEBUG and not opts["forzar"]:
+            raise CommandError("DEBUG=False: usa --forzar si de verdad quieres sembrar datos en esta base.")
+
+        if opts["limpiar"]:
+            stats = limpiar()
+            self.stdout.write(self.style.SUCCESS(" ".join(f"{k}={v}" for k, v in stats.items())))
+            return
+
+        stats = sembrar(
+            alumnos=opts["alumnos"],
+            pagos=opts["pagos"],
+            movimientos=opts["movimientos"],
+            invitaciones=opts["invitaciones"],
+            usuarios=opts["usuarios"],
+            programas=opts["programas"],
+            seed=opts["seed"],
+            batch_size=opts["batch_size"],
+            log=lambda msg: self.stdout.write(f"  {msg}"),
+        )
+        self.stdout.write(self.style.SUCCESS(" ".join(f"{k}={v}" for k, v in stats.items())))
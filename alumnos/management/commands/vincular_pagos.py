@@ -0,0 +1,32 @@
+# alumnos/management/commands/vincular_pagos.py
+import csv
+
+from django.core.management.base import BaseCommand
+
+from alumnos.services import vinculo_pagos
+
+
+class Command(BaseCommand):
+    help = (
+        "Liga PagoDiario sin alumno por número de alumno, CURP o nombre y normaliza las CURP. "
+        "Correr a diario y tras importar pagos; los saldos solo consideran pagos ligados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--csv", help="Escribe aquí los pagos que no se pudieron ligar, con el motivo.")
+
+    def handle(self, *args, **opts):
+        pendientes = [] if opts["csv"] else None
+        stats = vinculo_pagos.vincular(pendientes=pendientes)
+
+        ligados = ", ".join(f"{v}: {stats[v]}" for v in vinculo_pagos.VIAS)
+        sin_ligar = ", ".join(f"{m}: {stats[m]}" for m in vinculo_pagos.MOTIVOS)
+        self.stdout.write(f"Ligados ({ligados}); CURP normalizadas: {stats['curp_normalizada']}")
+        self.stdout.write(f"Sin ligar: {sum(stats[m] for m in vinculo_pagos.MOTIVOS)} ({sin_ligar})")
+
+        if pendientes is not None:
+            with open(opts["csv"], "w", newline="", encoding="utf-8") as fh:
+                w = csv.writer(fh)
+                w.writerow(["id", "folio", "fecha", "nombre", "curp", "motivo"])
+                w.writerows(pendientes)
+            self.stdout.write(f"Pendientes escritos en {opts['csv']}")
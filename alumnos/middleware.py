@@ -0,0 +1,145 @@
+# alumnos/middleware.py
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+
+class _ContadorSQL:
+    """execute_wrapper: cuenta consultas y tiempo de BD; guarda el SQL (sin parámetros)."""
+
+    __slots__ = ("consultas", "db_ms", "sql", "max_sql")
+
+    def __init__(self, max_sql):
+        self.consultas = 0
+        self.db_ms = 0.0
+        self.sql = []
+        self.max_sql = max_sql
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            self.consultas += 1
+            self.db_ms += ms
+            if len(self.sql) < self.max_sql:
+                self.sql.append((ms, sql))
+
+
+class RendimientoMiddleware:
+    """
+    Mide cada petición: latencia, consultas y tiempo de BD, tamaño de respuesta.
+    Se agrega por nombre de URL en alumnos.services.rendimiento (panel: /rendimiento/).
+    Va al inicio de MIDDLEWARE para incluir sesión/autenticación en la medición.
+
+    Con ASGI las vistas async hacen sus consultas en otros hilos: de ellas se mide la
+    latencia y el tamaño, pero consultas/tiempo de BD quedan en 0.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.activo = getattr(settings, "PERF_ACTIVO", True)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.activo:
+            return self.get_response(request)
+
+        contador = _ContadorSQL(settings.PERF_MAX_SQL_MUESTRA)
+        t0 = time.perf_counter()
+        with connection.execute_wrapper(contador):
+            response = self.get_response(request)
+        ms = (time.perf_counter() - t0) * 1000
+
+        try:
+            self._registrar(request, response, ms, contador)
+        except Exception:
+            pass  # las métricas nunca deben romper la respuesta
+        return response
+
+    async def __acall__(self, request):
+        if not self.activo:
+            return await self.get_response(request)
+
+        contador = _ContadorSQL(0)
+        t0 = time.perf_counter()
+        response = await self.get_response(request)
+        ms = (time.perf_counter() - t0) * 1000
+
+        try:
+            # request.user es perezoso y puede consultar la BD
+            await sync_to_async(self._registrar)(request, response, ms, contador)
+        except Exception:
+            pass
+        return response
+
+    def _registrar(self, request, response, ms, contador):
+        from alumnos.services.rendimiento import acumulador
+
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            url_name = match.view_name or match._func_path
+        else:
+            url_name = f"(sin ruta {response.status_code})"
+
+        if getattr(response, "streaming", False):
+            bytes_ = int(response.get("Content-Length") or 0)
+        else:
+            bytes_ = len(response.content)
+
+        user = getattr(request, "user", None)
+        acumulador.registrar(
+            url_name=url_name,
+            metodo=request.method,
+            status=response.status_code,
+            ms=ms,
+            consultas=contador.consultas,
+            db_ms=contador.db_ms,
+            bytes_=bytes_,
+            ruta=request.get_full_path(),
+            usuario_id=user.pk if user is not None and user.is_authenticated else None,
+            sql=contador.sql if ms >= settings.PERF_LENTO_MS else None,
+        )
+
+
+class NMas1Middleware:
+    """
+    Detector de N+1 por petición (alumnos.services.nmas1). Solo corre con
+    NMAS1_ACTIVO (por defecto en DEBUG); se lee en cada petición para que las pruebas
+    puedan activarlo con override_settings(NMAS1_ACTIVO=True, NMAS1_ESTRICTO=True).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            # las consultas de una vista async corren en otros hilos: no hay qué observar
+            return self.get_response(request)
+        if not getattr(settings, "NMAS1_ACTIVO", False):
+            return self.get_response(request)
+
+        from alumnos.services.nmas1 import DetectorNMas1
+
+        detector = DetectorNMas1()
+        with connection.execute_wrapper(detector):
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        vista = match.view_name if match is not None else request.path
+        detector.verificar(f"{request.method} {request.path} ({vista})")
+        return response
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0048_informacionescolar_grupo_oficial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurpConsulta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('curp', models.CharField(max_length=18, unique=True, verbose_name='CURP')),
+                ('datos', models.JSONField(default=dict)),
+                ('consultado_en', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('hits', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Consulta de CURP',
+                'verbose_name_plural': 'Consultas de CURP',
+                'ordering': ['-consultado_en'],
+            },
+        ),
+    ]
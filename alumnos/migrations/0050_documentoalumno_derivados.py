@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:41
+
+import alumnos.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0049_curpconsulta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentoalumno',
+            name='bytes_derivado',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='documentoalumno',
+            name='bytes_original',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='documentoalumno',
+            name='derivado',
+            field=models.FileField(blank=True, upload_to=alumnos.models.doc_derivado_path),
+        ),
+        migrations.AddField(
+            model_name='documentoalumno',
+            name='derivado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='documentoalumno',
+            name='derivado_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='documentoalumno',
+            name='derivado_estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('listo', 'Listo'), ('error', 'Error')], db_index=True, default='pendiente', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='documentoalumno',
+            name='derivado_origen',
+            field=models.CharField(blank=True, help_text='archivo.name del que se generaron los derivados', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='documentoalumno',
+            name='miniatura',
+            field=models.FileField(blank=True, upload_to=alumnos.models.doc_miniatura_path),
+        ),
+        migrations.AddField(
+            model_name='documentoalumno',
+            name='paginas',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
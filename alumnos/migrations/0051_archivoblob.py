@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:44
+
+import alumnos.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0050_documentoalumno_derivados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('archivo', models.FileField(max_length=255, upload_to=alumnos.models.blob_upload_path)),
+                ('tamano', models.PositiveBigIntegerField(default=0)),
+                ('refs', models.PositiveIntegerField(default=0)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo (blob)',
+                'verbose_name_plural': 'Archivos (blobs)',
+            },
+        ),
+        migrations.AddField(
+            model_name='documentoalumno',
+            name='nombre_original',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='documentoalumno',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='documentos', to='alumnos.archivoblob'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:46
+
+import alumnos.models
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0051_archivoblob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadoCuentaSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.DateField(help_text='Primer día del mes del corte')),
+                ('contexto', models.JSONField(default=dict)),
+                ('total_pagado', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('adeudo', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('num_pagos', models.PositiveIntegerField(default=0)),
+                ('pdf', models.FileField(blank=True, upload_to=alumnos.models.estado_cuenta_pdf_path)),
+                ('generado_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estados_cuenta', to='alumnos.alumno')),
+            ],
+            options={
+                'verbose_name': 'Estado de cuenta (corte)',
+                'verbose_name_plural': 'Estados de cuenta (cortes)',
+                'ordering': ['-periodo', 'alumno_id'],
+                'constraints': [models.UniqueConstraint(fields=('alumno', 'periodo'), name='uniq_estado_cuenta_alumno_periodo')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0052_estadocuentasnapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricaVista',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ventana', models.DateTimeField(db_index=True)),
+                ('url_name', models.CharField(max_length=200)),
+                ('metodo', models.CharField(max_length=8)),
+                ('peticiones', models.PositiveIntegerField(default=0)),
+                ('errores', models.PositiveIntegerField(default=0, help_text='Respuestas 5xx')),
+                ('ms_total', models.FloatField(default=0)),
+                ('ms_max', models.FloatField(default=0)),
+                ('consultas_total', models.PositiveIntegerField(default=0)),
+                ('db_ms_total', models.FloatField(default=0)),
+                ('bytes_total', models.BigIntegerField(default=0)),
+                ('histograma', models.JSONField(default=list)),
+            ],
+            options={
+                'verbose_name': 'Métrica de vista',
+                'verbose_name_plural': 'Métricas de vistas',
+                'indexes': [models.Index(fields=['ventana', 'url_name'], name='alumnos_met_ventana_c1d792_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MuestraLenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado_en', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('url_name', models.CharField(db_index=True, max_length=200)),
+                ('ruta', models.CharField(max_length=500)),
+                ('metodo', models.CharField(max_length=8)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('ms', models.FloatField()),
+                ('consultas', models.PositiveIntegerField(default=0)),
+                ('db_ms', models.FloatField(default=0)),
+                ('bytes', models.BigIntegerField(default=0)),
+                ('sql', models.JSONField(default=list, help_text='[[ms, sql], …] en orden de ejecución')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Petición lenta',
+                'verbose_name_plural': 'Peticiones lentas',
+                'ordering': ['-creado_en'],
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0053_metricas_rendimiento'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoEstadoTwilio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sid', models.CharField(db_index=True, max_length=64)),
+                ('estado', models.CharField(max_length=16)),
+                ('error_code', models.CharField(blank=True, max_length=16)),
+                ('payload', models.JSONField(default=dict)),
+                ('recibido_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Evento de estado Twilio',
+                'verbose_name_plural': 'Eventos de estado Twilio',
+            },
+        ),
+        migrations.CreateModel(
+            name='CampanaMensajes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=150)),
+                ('canal', models.CharField(choices=[('sms', 'SMS'), ('whatsapp', 'WhatsApp')], default='sms', max_length=10)),
+                ('env', models.CharField(blank=True, choices=[('sandbox', 'sandbox'), ('prod', 'prod')], help_text='Vacío: la config activa de prod y, si no hay, la de sandbox.', max_length=16, verbose_name='Entorno Twilio')),
+                ('cuerpo', models.TextField(help_text='Variables: {nombre}, {nombre_completo}, {numero_estudiante}, {saldo_vencido}')),
+                ('solo_adeudo_vencido', models.BooleanField(default=False, verbose_name='Solo con cargos vencidos')),
+                ('estado', models.CharField(choices=[('borrador', 'Borrador'), ('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('terminada', 'Terminada'), ('cancelada', 'Cancelada')], db_index=True, default='borrador', max_length=12)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('sin_telefono', models.PositiveIntegerField(default=0, help_text='Alumnos filtrados sin teléfono válido')),
+                ('enviados', models.PositiveIntegerField(default=0)),
+                ('entregados', models.PositiveIntegerField(default=0)),
+                ('fallidos', models.PositiveIntegerField(default=0)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('iniciado_en', models.DateTimeField(blank=True, null=True)),
+                ('terminado_en', models.DateTimeField(blank=True, null=True)),
+                ('creado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('estatus_academico', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='alumnos.estatusacademico')),
+                ('estatus_administrativo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='alumnos.estatusadministrativo')),
+                ('programa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='alumnos.programa')),
+                ('sede', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='alumnos.sede')),
+            ],
+            options={
+                'verbose_name': 'Campaña de mensajes',
+                'verbose_name_plural': 'Campañas de mensajes',
+                'ordering': ['-creado_en'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MensajeTwilio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('canal', models.CharField(choices=[('sms', 'SMS'), ('whatsapp', 'WhatsApp')], default='sms', max_length=10)),
+                ('env', models.CharField(blank=True, max_length=16)),
+                ('telefono', models.CharField(max_length=40)),
+                ('cuerpo', models.TextField()),
+                ('estado', models.CharField(db_index=True, default='pendiente', max_length=16)),
+                ('sid', models.CharField(blank=True, max_length=64, null=True, unique=True)),
+                ('error_code', models.CharField(blank=True, max_length=16)),
+                ('error', models.TextField(blank=True)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('enviado_en', models.DateTimeField(blank=True, null=True)),
+                ('actualizado_en', models.DateTimeField(blank=True, help_text='Último status callback aplicado', null=True)),
+                ('alumno', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mensajes_twilio', to='alumnos.alumno')),
+                ('campana', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='mensajes', to='alumnos.campanamensajes')),
+            ],
+            options={
+                'verbose_name': 'Mensaje Twilio',
+                'verbose_name_plural': 'Mensajes Twilio',
+                'ordering': ['-creado_en'],
+                'indexes': [models.Index(fields=['campana', 'estado'], name='alumnos_men_campana_10ee15_idx')],
+            },
+        ),
+    ]
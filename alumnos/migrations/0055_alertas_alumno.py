@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0054_campanas_mensajes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertaAlumno',
+            fields=[
+                ('alumno', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='alertas', serialize=False, to='alumnos.alumno')),
+                ('flags', models.PositiveIntegerField(default=0)),
+                ('cargos_pendientes', models.PositiveIntegerField(default=0)),
+                ('documentos_faltantes', models.PositiveIntegerField(default=0)),
+                ('actualizado_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sede', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='alumnos.sede')),
+            ],
+            options={
+                'verbose_name': 'Alertas de alumno',
+                'verbose_name_plural': 'Alertas de alumnos',
+                'indexes': [models.Index(condition=models.Q(('flags__gt', 0)), fields=['sede', 'flags'], name='alerta_sede_flags')],
+            },
+        ),
+    ]
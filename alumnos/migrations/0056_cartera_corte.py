@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:43
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0055_alertas_alumno'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoCartera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_corte', models.DateField()),
+                ('saldo', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('vencido', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('cargos_pendientes', models.PositiveIntegerField(default=0)),
+                ('dias_mora', models.PositiveIntegerField(default=0)),
+                ('tramo', models.CharField(choices=[('por_vencer', 'Por vencer'), ('1_30', '1 a 30 días'), ('31_60', '31 a 60 días'), ('61_90', '61 a 90 días'), ('mas_90', 'Más de 90 días')], default='por_vencer', max_length=12)),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_cartera', to='alumnos.alumno')),
+                ('programa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='alumnos.programa')),
+                ('sede', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='alumnos.sede')),
+            ],
+            options={
+                'verbose_name': 'Saldo de cartera',
+                'verbose_name_plural': 'Saldos de cartera',
+                'indexes': [models.Index(fields=['fecha_corte', 'sede', 'tramo'], name='saldo_cartera_corte_sede')],
+                'constraints': [models.UniqueConstraint(fields=('fecha_corte', 'alumno'), name='saldo_cartera_corte_alumno')],
+            },
+        ),
+    ]
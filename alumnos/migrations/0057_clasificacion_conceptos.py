@@ -0,0 +1,70 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# sinónimos que usaba alumnos.servicios.CONCEPTO_KEYWORDS (código y nombre ya cuentan solos)
+SINONIMOS = {
+    "COLEGIATURA": ["colegiatura", "mensualidad", "tuition", "pago mensual"],
+    "INSCRIPCION": ["inscripcion", "matricula"],
+    "REINSCRIPCION": ["reinscripcion"],
+    "TITULACION": ["titulacion"],
+    "EQV": ["equivalencia"],
+}
+
+
+def crear_reglas(apps, schema_editor):
+    ConceptoPago = apps.get_model("alumnos", "ConceptoPago")
+    ReglaConcepto = apps.get_model("alumnos", "ReglaConcepto")
+    for concepto in ConceptoPago.objects.filter(codigo__in=SINONIMOS):
+        ReglaConcepto.objects.bulk_create(
+            ReglaConcepto(concepto=concepto, patron=patron) for patron in SINONIMOS[concepto.codigo]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0056_cartera_corte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReglaConcepto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('patron', models.CharField(max_length=120)),
+                ('prioridad', models.PositiveIntegerField(default=100, help_text='Menor gana.')),
+                ('activo', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Regla de concepto',
+                'verbose_name_plural': 'Reglas de concepto',
+                'ordering': ['prioridad', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='pagodiario',
+            name='clasificacion',
+            field=models.CharField(choices=[('pendiente', 'Sin clasificar'), ('auto', 'Automática'), ('revision', 'Ambigua, por revisar'), ('sin_regla', 'Sin regla que coincida'), ('manual', 'Manual')], default='pendiente', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='pagodiario',
+            name='concepto_pago',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pagos_diario', to='alumnos.conceptopago'),
+        ),
+        migrations.AddIndex(
+            model_name='pagodiario',
+            index=models.Index(fields=['alumno', 'concepto_pago'], name='pagodiario_alumno_concepto'),
+        ),
+        migrations.AddIndex(
+            model_name='pagodiario',
+            index=models.Index(condition=models.Q(('clasificacion__in', ['revision', 'sin_regla'])), fields=['clasificacion'], name='pagodiario_por_revisar'),
+        ),
+        migrations.AddField(
+            model_name='reglaconcepto',
+            name='concepto',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reglas', to='alumnos.conceptopago'),
+        ),
+        migrations.RunPython(crear_reglas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0057_clasificacion_conceptos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BloqueNumeracion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('llave', models.CharField(default='global', max_length=32)),
+                ('inicio', models.BigIntegerField()),
+                ('fin', models.BigIntegerField(help_text='Incluido.')),
+                ('origen', models.CharField(blank=True, help_text='host:pid del proceso que reservó.', max_length=80)),
+                ('reservado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Bloque de numeración',
+                'verbose_name_plural': 'Bloques de numeración',
+                'ordering': ['-inicio'],
+                'indexes': [models.Index(fields=['llave', 'inicio'], name='bloque_numeracion_llave')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0058_numeracion_bloques'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorreoSaliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('bienvenida', 'Bienvenida')], default='bienvenida', max_length=16)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('fallido', 'Fallido'), ('omitido', 'Omitido')], default='pendiente', max_length=10)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('siguiente_intento', models.DateTimeField(default=django.utils.timezone.now, help_text='Pendiente: no antes de esta hora. Enviando: el worker lo tiene reservado hasta esta hora.')),
+                ('destinatario', models.EmailField(blank=True, max_length=254)),
+                ('error', models.TextField(blank=True)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('enviado_en', models.DateTimeField(blank=True, null=True)),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='correos_salientes', to='alumnos.alumno')),
+            ],
+            options={
+                'verbose_name': 'Correo saliente',
+                'verbose_name_plural': 'Correos salientes',
+                'ordering': ['-creado_en'],
+                'indexes': [models.Index(fields=['estado', 'siguiente_intento'], name='correo_saliente_cola')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('estado__in', ('pendiente', 'enviando'))), fields=('alumno', 'tipo'), name='correo_saliente_abierto')],
+            },
+        ),
+    ]
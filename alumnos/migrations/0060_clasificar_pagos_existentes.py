@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def clasificar_pagos(apps, schema_editor):
+    # los saldos filtran por concepto_pago: los pagos de antes de 0057 quedaron en
+    # 'pendiente' y no deben depender de que corra el cron de reclasificar_pagos
+    from alumnos.services.clasificador_conceptos import reclasificar
+
+    reclasificar(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0059_correo_saliente'),
+    ]
+
+    operations = [
+        migrations.RunPython(clasificar_pagos, migrations.RunPython.noop),
+    ]
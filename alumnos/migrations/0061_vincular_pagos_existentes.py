@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def vincular_pagos(apps, schema_editor):
+    # los saldos filtran por la FK `alumno`: los pagos históricos que solo traen número
+    # o CURP deben quedar ligados al migrar, no cuando corra el cron de vincular_pagos
+    from alumnos.services.vinculo_pagos import vincular
+
+    vincular(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0060_clasificar_pagos_existentes'),
+    ]
+
+    operations = [
+        migrations.RunPython(vincular_pagos, migrations.RunPython.noop),
+    ]
@@ -33,6 +33,24 @@ def doc_upload_path(instance, filename):
     safe = _slugify_filename(filename)
     return os.path.join("documentos", str(alumno_pk), str(instance.info_escolar_id), tipo_slug, safe)
 
+def _doc_derivado_path(instance, filename, carpeta):
+    # En la carpeta del alumno (bajo documentos/, protegido igual que el archivo subido)
+    base = os.path.dirname(doc_upload_path(instance, filename))
+    return os.path.join(base, carpeta, _slugify_filename(filename))
+
+def blob_upload_path(instance, filename):
+    """
+    Ruta direccionada por contenido: documentos/blobs/<ab>/<sha256>.<ext>
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    return os.path.join("documentos", "blobs", instance.sha256[:2], f"{instance.sha256}{ext}")
+
+def doc_derivado_path(instance, filename):
+    return _doc_derivado_path(instance, filename, "derivados")
+
+def doc_miniatura_path(instance, filename):
+    return _doc_derivado_path(instance, filename, "miniaturas")
+
 # ============================================================
 # Documentación académica flexible por Programa
 # ============================================================
@@ -117,6 +135,27 @@ class ProgramaDocumentoRequisito(models.Model):
         return f"{self.programa.codigo} - {self.tipo.nombre} [{ob} min={self.minimo} max={self.maximo}]"
 
 
+class ArchivoBlob(models.Model):
+    """
+    Contenido de un archivo guardado una sola vez (clave = SHA-256).
+    Varios DocumentoAlumno pueden apuntar al mismo blob; `refs` cuenta cuántos.
+    El archivo físico solo se borra con `manage.py deduplicar_documentos --gc`,
+    que recalcula `refs` contra la tabla de documentos antes de borrar.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    archivo = models.FileField(upload_to=blob_upload_path, max_length=255)
+    tamano = models.PositiveBigIntegerField(default=0)
+    refs = models.PositiveIntegerField(default=0)
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archivo (blob)"
+        verbose_name_plural = "Archivos (blobs)"
+
+    def __str__(self):
+        return f"{self.sha256[:12]} · {self.refs} ref(s)"
+
+
 class DocumentoAlumno(models.Model):
     """
     Documento subido por un alumno para un plan (InformacionEscolar) y un tipo.
@@ -129,6 +168,10 @@ class DocumentoAlumno(models.Model):
     )
     tipo = models.ForeignKey(DocumentoTipo, on_delete=models.PROTECT, related_name="documentos")
     archivo = models.FileField(upload_to=doc_upload_path)
+    # Al guardar un archivo nuevo se calcula su hash y `archivo` pasa a apuntar al blob
+    # (ver alumnos/services/blobs.py); `nombre_original` conserva el nombre para descargas.
+    blob = models.ForeignKey(ArchivoBlob, null=True, blank=True, on_delete=models.PROTECT, related_name="documentos")
+    nombre_original = models.CharField(max_length=255, blank=True)
 
     # trazabilidad/estado
     subido_por = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="docs_subidos")
@@ -137,6 +180,24 @@ class DocumentoAlumno(models.Model):
     valido = models.BooleanField(default=None, null=True, help_text="¿Validado documentalmente?")
     notas = models.TextField(blank=True)
 
+    # Derivados generados en segundo plano (manage.py procesar_documentos):
+    # PDF listo para unir (imagen redimensionada/recomprimida) y miniatura para listados.
+    DERIVADO_ESTADOS = [
+        ("pendiente", "Pendiente"),
+        ("procesando", "Procesando"),
+        ("listo", "Listo"),
+        ("error", "Error"),
+    ]
+    derivado = models.FileField(upload_to=doc_derivado_path, blank=True)
+    miniatura = models.FileField(upload_to=doc_miniatura_path, blank=True)
+    derivado_estado = models.CharField(max_length=10, choices=DERIVADO_ESTADOS, default="pendiente", db_index=True)
+    derivado_origen = models.CharField(max_length=255, blank=True, help_text="archivo.name del que se generaron los derivados")
+    derivado_error = models.TextField(blank=True)
+    derivado_en = models.DateTimeField(null=True, blank=True)
+    paginas = models.PositiveIntegerField(null=True, blank=True)
+    bytes_original = models.PositiveBigIntegerField(null=True, blank=True)
+    bytes_derivado = models.PositiveBigIntegerField(null=True, blank=True)
+
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
 
@@ -149,7 +210,52 @@ class DocumentoAlumno(models.Model):
         verbose_name_plural = "Documentos del alumno"
 
     def __str__(self):
-        return f"{self.info_escolar_id} · {self.tipo.nombre} · {os.path.basename(self.archivo.name)}"
+        return f"{self.info_escolar_id} · {self.tipo.nombre} · {self.nombre_archivo}"
+
+    @property
+    def nombre_archivo(self) -> str:
+        return self.nombre_original or os.path.basename(self.archivo.name or "")
+
+    def save(self, *args, **kwargs):
+        from alumnos.services.blobs import asignar_blob, ajustar_refs
+
+        blob_anterior_id = None
+        if self.pk:
+            blob_anterior_id = DocumentoAlumno.objects.filter(pk=self.pk).values_list("blob_id", flat=True).first()
+        if self.archivo and not self.archivo._committed:
+            asignar_blob(self)
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = set(kwargs["update_fields"]) | {"archivo", "blob", "nombre_original"}
+
+        super().save(*args, **kwargs)
+
+        if self.blob_id != blob_anterior_id:
+            ajustar_refs(self.blob_id, +1)
+            ajustar_refs(blob_anterior_id, -1)
+
+        # Si cambió el archivo, los derivados ya no corresponden: de vuelta a la cola
+        if (self.archivo.name or "") != self.derivado_origen and self.derivado_estado not in ("pendiente", "procesando"):
+            self.derivado_estado = "pendiente"
+            DocumentoAlumno.objects.filter(pk=self.pk).update(derivado_estado="pendiente")
+
+    def delete(self, *args, **kwargs):
+        from alumnos.services.blobs import ajustar_refs
+
+        blob_id = self.blob_id
+        resultado = super().delete(*args, **kwargs)
+        ajustar_refs(blob_id, -1)
+        return resultado
+
+    @property
+    def derivados_vigentes(self) -> bool:
+        return self.derivado_estado == "listo" and self.derivado_origen == (self.archivo.name or "")
+
+    @property
+    def archivo_para_pdf(self):
+        """FieldFile a usar al unir documentos: el derivado si está vigente, si no el original."""
+        if self.derivados_vigentes and self.derivado:
+            return self.derivado
+        return self.archivo
 
 # ============================================================
 # Users / perfiles
@@ -629,7 +735,8 @@ class InformacionEscolar(models.Model):
     def __str__(self):
         return f"Plan {self.programa} · fin {self.fin_programa}"
 
-    def save(self, *args, **kwargs):
+    def calcular_precio_final(self) -> Decimal:
+        """Colegiatura menos el descuento del financiamiento y el manual (mínimo 0)."""
         desc_fin = Decimal("0.00")
         if self.financiamiento_id:
             try:
@@ -637,10 +744,12 @@ class InformacionEscolar(models.Model):
             except Exception:
                 desc_fin = Decimal("0.00")
         desc_manual = self.monto_descuento or Decimal("0.00")
+        bruto = (self.precio_colegiatura or Decimal("0")) - desc_fin - desc_manual
+        return max(bruto, Decimal("0.00")).quantize(Decimal("0.01"))
 
+    def save(self, *args, **kwargs):
         if self.precio_final is None:
-            bruto = (self.precio_colegiatura or Decimal("0")) - desc_fin - desc_manual
-            self.precio_final = max(bruto, Decimal("0.00")).quantize(Decimal("0.01"))
+            self.precio_final = self.calcular_precio_final()
         super().save(*args, **kwargs)
 
     @property
@@ -703,6 +812,55 @@ class InformacionEscolar(models.Model):
 # Alumnos y pagos
 # ============================================================
 
+def q_sedes_del_usuario(user, prefijo=""):
+    """
+    EXISTS: la sede del alumno (`<prefijo>informacionEscolar__sede`) es una de las sedes
+    del perfil de `user`. Es un semi-join sobre la tabla M2M del perfil: no duplica filas
+    (no hace falta distinct()) ni una consulta previa para leer las sedes.
+    """
+    from django.db.models import Exists, OuterRef
+
+    sedes = UserProfile.sedes.through.objects.filter(
+        userprofile__user_id=user.pk,
+        sede_id=OuterRef(f"{prefijo}informacionEscolar__sede_id"),
+    )
+    return Q(Exists(sedes))
+
+
+def q_alumnos_visibles(user, prefijo=""):
+    """
+    Alumnos que `user` puede ver, como Q. Con prefijo "alumno__" se aplica a modelos
+    con FK a Alumno (PagoDiario, Cargo, ...).
+      - superuser: todos
+      - grupo "admisiones": solo los que creó
+      - resto: los que creó y los de las sedes de su perfil
+    """
+    from alumnos.permisos import GRUPO_ADMISIONES, en_grupo
+
+    if not user.is_authenticated:
+        return Q(pk__in=[])
+    if user.is_superuser:
+        return Q()
+    creados = Q(**{f"{prefijo}created_by": user})
+    if en_grupo(user, GRUPO_ADMISIONES):
+        return creados
+    return creados | q_sedes_del_usuario(user, prefijo)
+
+
+class AlumnoQuerySet(models.QuerySet):
+    def visibles_para(self, user):
+        """Alcance de listados y búsquedas (ver q_alumnos_visibles)."""
+        return self.filter(q_alumnos_visibles(user))
+
+    def de_sedes_de(self, user):
+        """Solo alumnos de las sedes del perfil (sin perfil o sin sedes: ninguno)."""
+        if not user.is_authenticated:
+            return self.none()
+        if user.is_superuser:
+            return self
+        return self.filter(q_sedes_del_usuario(user))
+
+
 class Alumno(models.Model):
     from django.core.validators import RegexValidator
     SEXO_OPCIONES = [("Hombre", "Hombre"), ("Mujer", "Mujer")]
@@ -739,6 +897,8 @@ class Alumno(models.Model):
     informacionEscolar = models.OneToOneField('InformacionEscolar', on_delete=models.SET_NULL, null=True, blank=True,
                                               related_name='alumno', verbose_name="Plan financiero")
 
+    objects = AlumnoQuerySet.as_manager()
+
     class Meta:
         ordering = ["-numero_estudiante"]
         indexes = [
@@ -751,32 +911,7 @@ class Alumno(models.Model):
 
     @staticmethod
     def for_user(user):
-        qs = Alumno.objects.all()
-        if not user.is_authenticated:
-            return qs.none()
-        if user.is_superuser:
-            return qs
-        
-        # Si pertenece al grupo "admisiones", ve solo los que creó
-        if user.groups.filter(name="admisiones").exists():
-            return qs.filter(created_by=user)
-        
-        # Usuarios con perfil/sedes: pueden ver alumnos de sus sedes
-        # y, además, TODOS los que ellos mismos crearon.
-        profile = getattr(user, "profile", None)
-
-        # Siempre permitir ver los creados por el usuario
-        condition = Q(created_by=user)
-
-        #if not profile:
-        #    return qs.none()
-        if profile:
-            sedes_ids = list(profile.sedes.values_list("id", flat=True))
-            if sedes_ids:
-                condition |= Q(informacionEscolar__sede_id__in=sedes_ids)
-
-        # Si no hay profile o no tiene sedes, igual verá los que creó
-        return qs.filter(condition).distinct()
+        return Alumno.objects.visibles_para(user)
 
     @property
     def programa_clave(self):
@@ -802,10 +937,13 @@ class Alumno(models.Model):
         return self.email_institucional or self.email
     
 
+    def password_inicial(self) -> str:
+        year_2 = timezone.now().strftime("%y")
+        return f"iuaf{year_2}${self.nombre.lower()}"
+
     def save(self, *args, **kwargs):
         if not self.password_email_institucional:
-            year_2 = timezone.now().strftime("%y")
-            self.password_email_institucional = f"iuaf{year_2}${self.nombre.lower()}"
+            self.password_email_institucional = self.password_inicial()
         super().save(*args, **kwargs)
 
 
@@ -818,6 +956,30 @@ class ConceptoPago(models.Model):
         return f"{self.codigo} - {self.nombre}"
 
 
+class ReglaConcepto(models.Model):
+    """
+    Palabra o frase que identifica el concepto de un PagoDiario (alumnos.services.
+    clasificador_conceptos). Se compara sin mayúsculas ni acentos contra el concepto y
+    el detalle del pago. Gana la prioridad menor y, a igual prioridad, el patrón más
+    largo ("reinscripcion" sobre "inscripcion"). El código y el nombre de cada
+    ConceptoPago cuentan como reglas con la prioridad por omisión.
+    """
+    PRIORIDAD_DEFAULT = 100
+
+    concepto = models.ForeignKey(ConceptoPago, on_delete=models.CASCADE, related_name="reglas")
+    patron = models.CharField(max_length=120)
+    prioridad = models.PositiveIntegerField(default=PRIORIDAD_DEFAULT, help_text="Menor gana.")
+    activo = models.BooleanField(default=True)
+
+    class Meta:
+        verbose_name = "Regla de concepto"
+        verbose_name_plural = "Reglas de concepto"
+        ordering = ["prioridad", "id"]
+
+    def __str__(self):
+        return f"{self.patron} → {self.concepto.codigo}"
+
+
 class Cargo(models.Model):
     alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name="cargos")
     concepto = models.ForeignKey(ConceptoPago, on_delete=models.PROTECT)
@@ -909,6 +1071,18 @@ class PagoDiario(models.Model):
 
     alumno = models.ForeignKey(Alumno, null=True, blank=True, on_delete=models.SET_NULL, related_name="pagos_diario")
 
+    # concepto normalizado (ReglaConcepto); los saldos filtran por esta FK
+    CLASIFICACIONES = [
+        ("pendiente", "Sin clasificar"),
+        ("auto", "Automática"),
+        ("revision", "Ambigua, por revisar"),
+        ("sin_regla", "Sin regla que coincida"),
+        ("manual", "Manual"),
+    ]
+    POR_REVISAR = ("revision", "sin_regla")
+    concepto_pago = models.ForeignKey(ConceptoPago, null=True, blank=True, on_delete=models.SET_NULL, related_name="pagos_diario")
+    clasificacion = models.CharField(max_length=10, choices=CLASIFICACIONES, default="pendiente")
+
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
 
@@ -921,6 +1095,9 @@ class PagoDiario(models.Model):
             models.Index(fields=["fecha"]),
             models.Index(fields=["curp"]),
             models.Index(fields=["creado_en"]),
+            models.Index(fields=["alumno", "concepto_pago"], name="pagodiario_alumno_concepto"),
+            models.Index(fields=["clasificacion"], name="pagodiario_por_revisar",
+                         condition=models.Q(clasificacion__in=["revision", "sin_regla"])),
         ]
 
     def __str__(self):
@@ -935,6 +1112,27 @@ class ContadorAlumno(models.Model):
         return f"{self.llave} -> {self.ultimo_numero}"
 
 
+class BloqueNumeracion(models.Model):
+    """
+    Números de estudiante reservados de ContadorAlumno de una sola vez
+    (alumnos.services.numeracion). Los que no terminan en un Alumno son huecos.
+    """
+    llave = models.CharField(max_length=32, default="global")
+    inicio = models.BigIntegerField()
+    fin = models.BigIntegerField(help_text="Incluido.")
+    origen = models.CharField(max_length=80, blank=True, help_text="host:pid del proceso que reservó.")
+    reservado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Bloque de numeración"
+        verbose_name_plural = "Bloques de numeración"
+        ordering = ["-inicio"]
+        indexes = [models.Index(fields=["llave", "inicio"], name="bloque_numeracion_llave")]
+
+    def __str__(self):
+        return f"{self.llave}: {self.inicio}–{self.fin}"
+
+
 class ClipCredential(models.Model):
     name = models.CharField(max_length=60, help_text="Nombre descriptivo (ej. 'Clip Prod', 'Clip Sandbox')")
     public_key = models.CharField(max_length=255, blank=True, null=True)
@@ -1070,4 +1268,357 @@ class UploadInvite(models.Model):
         return True
 
     def __str__(self):
-        return f"Invite {self.alumno_id} ({'ok' if self.is_valid() else 'expired'})"
\ No newline at end of file
+        return f"Invite {self.alumno_id} ({'ok' if self.is_valid() else 'expired'})"
+
+class CurpConsulta(models.Model):
+    """
+    Caché persistente de consultas de CURP a gob.mx (ver alumnos.services.curp_lookup).
+    Solo se guardan consultas exitosas; vencen a los CURP_CACHE_TTL_DIAS.
+    """
+    curp = models.CharField("CURP", max_length=18, unique=True)
+    datos = models.JSONField(default=dict)
+    consultado_en = models.DateTimeField(default=timezone.now, db_index=True)
+    hits = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Consulta de CURP"
+        verbose_name_plural = "Consultas de CURP"
+        ordering = ["-consultado_en"]
+
+    def __str__(self):
+        return f"{self.curp} ({self.consultado_en:%Y-%m-%d})"
+
+
+def estado_cuenta_pdf_path(instance, filename):
+    return os.path.join("estados_cuenta", instance.periodo.strftime("%Y-%m"), f"{instance.alumno_id}.pdf")
+
+class EstadoCuentaSnapshot(models.Model):
+    """
+    Estado de cuenta mensual congelado (pagos con fecha hasta fin de `periodo`).
+    Lo genera `manage.py generar_estados_cuenta`; el contexto no se modifica después,
+    solo se adjunta el PDF. Para corregir un mes se regenera explícitamente (--regenerar).
+    """
+    alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name="estados_cuenta")
+    periodo = models.DateField(help_text="Primer día del mes del corte")
+    contexto = models.JSONField(default=dict)
+    total_pagado = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    adeudo = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    num_pagos = models.PositiveIntegerField(default=0)
+    pdf = models.FileField(upload_to=estado_cuenta_pdf_path, blank=True)
+    generado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Estado de cuenta (corte)"
+        verbose_name_plural = "Estados de cuenta (cortes)"
+        ordering = ["-periodo", "alumno_id"]
+        constraints = [
+            models.UniqueConstraint(fields=["alumno", "periodo"], name="uniq_estado_cuenta_alumno_periodo"),
+        ]
+
+    def __str__(self):
+        return f"{self.alumno_id} · {self.periodo:%Y-%m}"
+
+
+# ============================================================
+# Métricas de rendimiento (alumnos.middleware.RendimientoMiddleware)
+# ============================================================
+
+class MetricaVista(models.Model):
+    """
+    Agregado de peticiones de una vista en una ventana de un minuto, tal como lo
+    acumula un proceso entre dos vaciados. Puede haber varias filas por ventana
+    (una por worker); el panel las suma. `histograma` cuenta peticiones por
+    cubeta de latencia (ver alumnos.services.rendimiento.CUBETAS_MS).
+    """
+    ventana = models.DateTimeField(db_index=True)
+    url_name = models.CharField(max_length=200)
+    metodo = models.CharField(max_length=8)
+    peticiones = models.PositiveIntegerField(default=0)
+    errores = models.PositiveIntegerField(default=0, help_text="Respuestas 5xx")
+    ms_total = models.FloatField(default=0)
+    ms_max = models.FloatField(default=0)
+    consultas_total = models.PositiveIntegerField(default=0)
+    db_ms_total = models.FloatField(default=0)
+    bytes_total = models.BigIntegerField(default=0)
+    histograma = models.JSONField(default=list)
+
+    class Meta:
+        verbose_name = "Métrica de vista"
+        verbose_name_plural = "Métricas de vistas"
+        indexes = [models.Index(fields=["ventana", "url_name"])]
+
+    def __str__(self):
+        return f"{self.ventana:%Y-%m-%d %H:%M} {self.metodo} {self.url_name} ×{self.peticiones}"
+
+
+class MuestraLenta(models.Model):
+    """Petición que superó PERF_LENTO_MS, con sus consultas SQL (sin parámetros)."""
+    creado_en = models.DateTimeField(default=timezone.now, db_index=True)
+    url_name = models.CharField(max_length=200, db_index=True)
+    ruta = models.CharField(max_length=500)
+    metodo = models.CharField(max_length=8)
+    status = models.PositiveSmallIntegerField()
+    ms = models.FloatField()
+    consultas = models.PositiveIntegerField(default=0)
+    db_ms = models.FloatField(default=0)
+    bytes = models.BigIntegerField(default=0)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    sql = models.JSONField(default=list, help_text="[[ms, sql], …] en orden de ejecución")
+
+    class Meta:
+        verbose_name = "Petición lenta"
+        verbose_name_plural = "Peticiones lentas"
+        ordering = ["-creado_en"]
+
+    def __str__(self):
+        return f"{self.metodo} {self.ruta} {self.ms:.0f} ms"
+
+
+# ============================================================
+# Campañas de SMS / WhatsApp (alumnos.services.mensajeria)
+# ============================================================
+
+class CampanaMensajes(models.Model):
+    """
+    Envío masivo de SMS/WhatsApp a los alumnos que cumplen los filtros. "Encolar"
+    (admin) arma un MensajeTwilio por teléfono y la deja pendiente; la envía
+    `manage.py enviar_campanas` en paralelo y con límite de mensajes por segundo.
+    """
+    CANALES = [("sms", "SMS"), ("whatsapp", "WhatsApp")]
+    ESTADOS = [
+        ("borrador", "Borrador"),
+        ("pendiente", "Pendiente"),
+        ("enviando", "Enviando"),
+        ("terminada", "Terminada"),
+        ("cancelada", "Cancelada"),
+    ]
+
+    nombre = models.CharField(max_length=150)
+    canal = models.CharField(max_length=10, choices=CANALES, default="sms")
+    env = models.CharField("Entorno Twilio", max_length=16, choices=TwilioConfig.ENV_CHOICES, blank=True,
+                           help_text="Vacío: la config activa de prod y, si no hay, la de sandbox.")
+    cuerpo = models.TextField(help_text="Variables: {nombre}, {nombre_completo}, {numero_estudiante}, {saldo_vencido}")
+
+    # Filtros de destinatarios (vacío = sin filtrar)
+    programa = models.ForeignKey(Programa, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    sede = models.ForeignKey("Sede", null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    estatus_academico = models.ForeignKey(EstatusAcademico, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    estatus_administrativo = models.ForeignKey(EstatusAdministrativo, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    solo_adeudo_vencido = models.BooleanField("Solo con cargos vencidos", default=False)
+
+    estado = models.CharField(max_length=12, choices=ESTADOS, default="borrador", db_index=True)
+    total = models.PositiveIntegerField(default=0)
+    sin_telefono = models.PositiveIntegerField(default=0, help_text="Alumnos filtrados sin teléfono válido")
+    enviados = models.PositiveIntegerField(default=0)
+    entregados = models.PositiveIntegerField(default=0)
+    fallidos = models.PositiveIntegerField(default=0)
+    creado_por = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    creado_en = models.DateTimeField(auto_now_add=True)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    terminado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Campaña de mensajes"
+        verbose_name_plural = "Campañas de mensajes"
+        ordering = ["-creado_en"]
+
+    def __str__(self):
+        return f"{self.nombre} · {self.get_canal_display()} · {self.estado}"
+
+    def clean(self):
+        from alumnos.services.mensajeria import renderizar
+        try:
+            renderizar(self.cuerpo or "", Alumno(numero_estudiante=0, nombre=""))
+        except (ValueError, IndexError, AttributeError) as e:
+            raise ValidationError({"cuerpo": f"Plantilla inválida: {e}"})
+
+
+class MensajeTwilio(models.Model):
+    """
+    Bitácora de cada SMS/WhatsApp enviado (de campaña o suelto). `estado` empieza en
+    'pendiente' y luego sigue los estados de Twilio (queued, sent, delivered, failed…)
+    que llegan por status callback (EventoEstadoTwilio).
+    """
+    campana = models.ForeignKey(CampanaMensajes, null=True, blank=True, on_delete=models.CASCADE, related_name="mensajes")
+    alumno = models.ForeignKey(Alumno, null=True, blank=True, on_delete=models.SET_NULL, related_name="mensajes_twilio")
+    canal = models.CharField(max_length=10, choices=CampanaMensajes.CANALES, default="sms")
+    env = models.CharField(max_length=16, blank=True)
+    telefono = models.CharField(max_length=40)
+    cuerpo = models.TextField()
+    estado = models.CharField(max_length=16, default="pendiente", db_index=True)
+    sid = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    error_code = models.CharField(max_length=16, blank=True)
+    error = models.TextField(blank=True)
+    creado_en = models.DateTimeField(auto_now_add=True)
+    enviado_en = models.DateTimeField(null=True, blank=True)
+    actualizado_en = models.DateTimeField(null=True, blank=True, help_text="Último status callback aplicado")
+
+    class Meta:
+        verbose_name = "Mensaje Twilio"
+        verbose_name_plural = "Mensajes Twilio"
+        ordering = ["-creado_en"]
+        indexes = [models.Index(fields=["campana", "estado"])]
+
+    def __str__(self):
+        return f"{self.canal} {self.telefono} · {self.estado}"
+
+
+class EventoEstadoTwilio(models.Model):
+    """
+    Status callback de Twilio tal como llegó. El endpoint solo inserta; el worker
+    (`manage.py ingerir_estados_twilio`) los aplica por lotes a MensajeTwilio y los borra.
+    """
+    sid = models.CharField(max_length=64, db_index=True)
+    estado = models.CharField(max_length=16)
+    error_code = models.CharField(max_length=16, blank=True)
+    payload = models.JSONField(default=dict)
+    recibido_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Evento de estado Twilio"
+        verbose_name_plural = "Eventos de estado Twilio"
+
+    def __str__(self):
+        return f"{self.sid} → {self.estado}"
+
+
+# ============================================================
+# Alertas de calidad de datos (alumnos.services.alertas)
+# ============================================================
+
+class AlertaAlumno(models.Model):
+    """
+    Avisos precalculados de un alumno (los de la campana de la ficha) como bits de
+    `flags`. Los mantienen las señales de Alumno, InformacionEscolar, Cargo,
+    DocumentoAlumno y ProgramaDocumentoRequisito; `manage.py recalcular_alertas`
+    reconstruye todo (los cargos se vuelven exigibles con el paso de los días).
+    """
+    # (clave, etiqueta). El bit de cada alerta es su posición: solo agregar al final.
+    ALERTAS = (
+        ("sin_correo", "Sin correo personal o institucional"),
+        ("sin_telefono", "Sin teléfono"),
+        ("sin_curp", "Sin CURP"),
+        ("sin_info_escolar", "Sin información escolar"),
+        ("sin_sede", "Sin sede"),
+        ("sin_inicio", "Sin fecha de inicio de programa"),
+        ("sin_estatus_academico", "Sin estatus académico"),
+        ("sin_estatus_administrativo", "Sin estatus administrativo"),
+        ("bienvenida_pendiente", "Correo de bienvenida sin enviar"),
+        ("sin_pais", "Sin país de residencia"),
+        ("cargos_pendientes", "Cargos pendientes por pagar"),
+        ("documentos_faltantes", "Documentos requeridos faltantes"),
+        ("sin_grupo", "Sin grupo"),
+        ("sin_matricula", "Sin matrícula"),
+    )
+    BITS = {clave: 1 << i for i, (clave, _) in enumerate(ALERTAS)}
+
+    alumno = models.OneToOneField(Alumno, primary_key=True, on_delete=models.CASCADE, related_name="alertas")
+    sede = models.ForeignKey("Sede", null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    flags = models.PositiveIntegerField(default=0)
+    cargos_pendientes = models.PositiveIntegerField(default=0)
+    documentos_faltantes = models.PositiveIntegerField(default=0)
+    actualizado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Alertas de alumno"
+        verbose_name_plural = "Alertas de alumnos"
+        indexes = [
+            # la lista de trabajo solo recorre alumnos con algún problema
+            models.Index(fields=["sede", "flags"], name="alerta_sede_flags", condition=models.Q(flags__gt=0)),
+        ]
+
+    def __str__(self):
+        return f"{self.alumno_id} · {self.flags:b}"
+
+    @property
+    def etiquetas(self):
+        return [etiqueta for clave, etiqueta in self.ALERTAS if self.flags & self.BITS[clave]]
+
+
+# ============================================================
+# Cartera (corte diario)
+# ============================================================
+
+class SaldoCartera(models.Model):
+    """
+    Saldo por cobrar de un alumno a una fecha de corte. Lo escribe
+    `manage.py corte_cartera` (nocturno) para toda la institución a la vez; solo se
+    guardan alumnos con saldo. Los reportes agrupan por sede / programa / tramo.
+    """
+    TRAMOS = (
+        ("por_vencer", "Por vencer"),
+        ("1_30", "1 a 30 días"),
+        ("31_60", "31 a 60 días"),
+        ("61_90", "61 a 90 días"),
+        ("mas_90", "Más de 90 días"),
+    )
+    # límite superior (días de mora) de cada tramo, en el mismo orden; el último es abierto
+    LIMITES_TRAMOS = (0, 30, 60, 90)
+
+    fecha_corte = models.DateField()
+    alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name="saldos_cartera")
+    sede = models.ForeignKey("Sede", null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    programa = models.ForeignKey(Programa, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    saldo = models.DecimalField(max_digits=12, decimal_places=2)
+    vencido = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    cargos_pendientes = models.PositiveIntegerField(default=0)
+    dias_mora = models.PositiveIntegerField(default=0)
+    tramo = models.CharField(max_length=12, choices=TRAMOS, default="por_vencer")
+
+    class Meta:
+        verbose_name = "Saldo de cartera"
+        verbose_name_plural = "Saldos de cartera"
+        constraints = [
+            models.UniqueConstraint(fields=["fecha_corte", "alumno"], name="saldo_cartera_corte_alumno"),
+        ]
+        indexes = [
+            models.Index(fields=["fecha_corte", "sede", "tramo"], name="saldo_cartera_corte_sede"),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha_corte} · {self.alumno_id} · {self.saldo}"
+
+
+class CorreoSaliente(models.Model):
+    """
+    Bandeja de salida de correos automáticos (outbox). La fila se escribe en la misma
+    transacción que el cambio que la origina (el alta del alumno) y la envía el worker
+    `manage.py enviar_correos` con reintentos: guardar nunca espera al SMTP.
+    """
+    TIPOS = (("bienvenida", "Bienvenida"),)
+    ESTADOS = (
+        ("pendiente", "Pendiente"),
+        ("enviando", "Enviando"),
+        ("enviado", "Enviado"),
+        ("fallido", "Fallido"),
+        ("omitido", "Omitido"),
+    )
+
+    tipo = models.CharField(max_length=16, choices=TIPOS, default="bienvenida")
+    alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name="correos_salientes")
+    estado = models.CharField(max_length=10, choices=ESTADOS, default="pendiente")
+    intentos = models.PositiveSmallIntegerField(default=0)
+    siguiente_intento = models.DateTimeField(
+        default=timezone.now,
+        help_text="Pendiente: no antes de esta hora. Enviando: el worker lo tiene reservado hasta esta hora.",
+    )
+    destinatario = models.EmailField(blank=True)
+    error = models.TextField(blank=True)
+    creado_en = models.DateTimeField(auto_now_add=True)
+    enviado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Correo saliente"
+        verbose_name_plural = "Correos salientes"
+        ordering = ["-creado_en"]
+        constraints = [
+            # a lo más un correo abierto por alumno y tipo: encolar dos veces no duplica
+            models.UniqueConstraint(
+                fields=["alumno", "tipo"], condition=Q(estado__in=("pendiente", "enviando")),
+                name="correo_saliente_abierto",
+            ),
+        ]
+        indexes = [models.Index(fields=["estado", "siguiente_intento"], name="correo_saliente_cola")]
+
+    def __str__(self):
+        return f"{self.tipo} · {self.alumno_id} · {self.estado}"
@@ -6,26 +6,43 @@ GRUPO_EDITAR_ESTATUS_ADMIN = "editar_estatus_administrativo"
 
 GRUPO_PAGOS = "pagos"
 GRUPO_DOCUMENTOS = "documentos"
+GRUPO_ADMISIONES = "admisiones"
+
+def grupos_de(user) -> frozenset:
+    """
+    Nombres de los grupos del usuario, consultados una vez por objeto `user`
+    (request.user vive lo que dura la petición).
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    grupos = getattr(user, "_nombres_grupos", None)
+    if grupos is None:
+        grupos = frozenset(user.groups.values_list("name", flat=True))
+        user._nombres_grupos = grupos
+    return grupos
+
+def en_grupo(user, nombre) -> bool:
+    return nombre in grupos_de(user)
 
 def user_can_edit_estatus_academico(user):
     return user.is_authenticated and (
-        user.is_superuser or user.groups.filter(name=GRUPO_EDITAR_ESTATUS_ACADEMICO).exists()
+        user.is_superuser or en_grupo(user, GRUPO_EDITAR_ESTATUS_ACADEMICO)
     )
 
 def user_can_edit_estatus_administrativo(user):
     return user.is_authenticated and (
-        user.is_superuser or user.groups.filter(name=GRUPO_EDITAR_ESTATUS_ADMIN).exists()
+        user.is_superuser or en_grupo(user, GRUPO_EDITAR_ESTATUS_ADMIN)
     )
 
 
 def user_can_view_pagos(user):
     return user.is_authenticated and (
-        user.is_superuser or user.groups.filter(name=GRUPO_PAGOS).exists()
+        user.is_superuser or en_grupo(user, GRUPO_PAGOS)
     )
 
 def user_can_view_documentos(user):
     return user.is_authenticated and (
-        user.is_superuser or user.groups.filter(name=GRUPO_DOCUMENTOS).exists()
+        user.is_superuser or en_grupo(user, GRUPO_DOCUMENTOS)
     )
 
 
@@ -47,13 +64,29 @@ def user_can_edit_alumno(user, alumno):
     return profile.sedes.filter(id=sede_id).exists()
 
 
+def alumnos_editables(user):
+    """Los alumnos que user_can_edit_alumno deja editar, como queryset (para operaciones en bloque)."""
+    from alumnos.models import Alumno, q_sedes_del_usuario
+
+    if not user.is_authenticated:
+        return Alumno.objects.none()
+    if user.is_superuser or user.is_staff:
+        return Alumno.objects.all()
+    profile = getattr(user, "profile", None)
+    if not profile:
+        return Alumno.objects.none()
+    if profile.puede_editar_todo:
+        return Alumno.objects.all()
+    return Alumno.objects.filter(q_sedes_del_usuario(user))
+
+
 
 def user_can_view_alumno(user, alumno):
     if not user.is_authenticated:
         return False
     if user.is_superuser:
         return True
-    if user.groups.filter(name="admisiones").exists():
+    if en_grupo(user, GRUPO_ADMISIONES):
         return alumno.created_by_id == user.id
     profile = getattr(user, "profile", None)
     if not profile:
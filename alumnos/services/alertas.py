@@ -0,0 +1,274 @@
+# alumnos/services/alertas.py
+"""
+Alertas de calidad de datos por alumno (AlertaAlumno).
+
+- `flags_de(alumno, ...)` / `mensajes(...)`: las reglas de la campana de la ficha;
+  alumnos_detalle y la tabla usan las mismas.
+- `recalcular(ids)`: recalcula un lote con un número fijo de consultas y hace upsert.
+- `marcar(...)`: lo llaman las señales; junta los alumnos afectados durante la
+  transacción y los recalcula una sola vez al confirmar.
+- `con_alerta(qs, clave)`: filtra por tipo de alerta (bit) en SQL.
+
+Las escrituras sin señales (queryset.update(), bulk_create, SQL) no se detectan;
+además un cargo pasa a exigible solo por la fecha. `manage.py recalcular_alertas`
+(diario) reconstruye la tabla completa.
+"""
+import logging
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.lookups import GreaterThan
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+
+from alumnos.models import AlertaAlumno, Alumno, Cargo, DocumentoAlumno, InformacionEscolar, ProgramaDocumentoRequisito
+
+logger = logging.getLogger(__name__)
+
+BITS = AlertaAlumno.BITS
+LOTE = 500
+
+
+# ============================================================
+# Reglas
+# ============================================================
+
+def flags_de(alumno, *, n_pendientes: int, n_faltantes: int) -> int:
+    """Bits de AlertaAlumno para un alumno con su informacionEscolar ya cargada."""
+    info = alumno.informacionEscolar
+    reglas = {
+        "sin_correo": not alumno.email or not alumno.email_institucional,
+        "sin_telefono": not alumno.telefono,
+        "sin_curp": not alumno.curp,
+        "sin_info_escolar": not info,
+        "sin_sede": bool(info) and not info.sede_id,
+        "sin_inicio": bool(info) and not info.inicio_programa,
+        "sin_estatus_academico": bool(info) and not info.estatus_academico_id,
+        "sin_estatus_administrativo": bool(info) and not info.estatus_administrativo_id,
+        "bienvenida_pendiente": bool(
+            info and alumno.email and alumno.email_institucional
+            and info.inicio_programa and not info.bienvenida_enviada
+        ),
+        "sin_pais": not alumno.pais_id,
+        "cargos_pendientes": n_pendientes > 0,
+        "documentos_faltantes": n_faltantes > 0,
+        "sin_grupo": bool(info) and info.grupo_nuevo_id is None and info.grupo is None,
+        "sin_matricula": bool(info) and info.matricula is None,
+    }
+    flags = 0
+    for clave, activa in reglas.items():
+        if activa:
+            flags |= BITS[clave]
+    return flags
+
+
+_MENSAJES = {
+    "sin_correo": "Recuerda revisar y completar el correo electrónico del alumno.",
+    "sin_telefono": "Este alumno no tiene teléfono registrado.",
+    "sin_curp": "Falta la CURP del alumno.",
+    "sin_info_escolar": "El alumno no tiene información escolar asignada.",
+    "sin_sede": "El alumno no tiene sede asignada en su información escolar.",
+    "sin_inicio": "El alumno no tiene fecha de inicio de programa asignada en su información escolar.",
+    "sin_estatus_academico": "El alumno no tiene estatus académico asignado en su información escolar.",
+    "sin_estatus_administrativo": "El alumno no tiene estatus administrativo asignado en su información escolar.",
+    "bienvenida_pendiente": "No se ha enviado el correo de bienvenida al alumno.",
+    "sin_pais": "Falta el país de residencia del alumno.",
+    "sin_grupo": "El alumno no tiene un grupo asignado en su información escolar.",
+    "sin_matricula": "El alumno no tiene matrícula asignada en su información escolar.",
+}
+
+
+def mensajes(flags: int, *, n_pendientes: int = 0, n_faltantes: int = 0):
+    """Textos de la campana, en el orden de AlertaAlumno.ALERTAS."""
+    items = []
+    for clave, _ in AlertaAlumno.ALERTAS:
+        if not flags & BITS[clave]:
+            continue
+        if clave == "cargos_pendientes":
+            items.append(
+                f"El alumno tiene {n_pendientes} cargos pendientes por pagar." if n_pendientes > 1
+                else "El alumno tiene un cargo pendiente por pagar."
+            )
+        elif clave == "documentos_faltantes":
+            items.append(
+                f"Faltan {n_faltantes} documentos requeridos por el programa." if n_faltantes > 1
+                else "Falta un documento requerido por el programa."
+            )
+        else:
+            items.append(_MENSAJES[clave])
+    return items
+
+
+def con_alerta(qs, clave):
+    """qs de AlertaAlumno con el bit `clave` encendido."""
+    return qs.filter(GreaterThan(F("flags").bitand(BITS[clave]), 0))
+
+
+# ============================================================
+# Recálculo
+# ============================================================
+
+def _calcular_lote(ids, hoy):
+    alumnos = list(
+        Alumno.objects.filter(pk__in=ids)
+        .select_related("informacionEscolar")
+        .only(
+            "email", "email_institucional", "telefono", "curp", "pais",
+            "informacionEscolar__sede", "informacionEscolar__programa", "informacionEscolar__inicio_programa",
+            "informacionEscolar__estatus_academico", "informacionEscolar__estatus_administrativo",
+            "informacionEscolar__bienvenida_enviada", "informacionEscolar__grupo_nuevo",
+            "informacionEscolar__grupo", "informacionEscolar__matricula",
+        )
+    )
+    if not alumnos:
+        return []
+
+    # mismos cargos que "exigibles" en la ficha
+    pendientes = Counter(
+        Cargo.objects
+        .filter(alumno_id__in=ids, pagado=False)
+        .filter(Q(fecha_cargo__lte=hoy) | Q(fecha_vencimiento__lte=hoy))
+        .values_list("alumno_id", flat=True)
+    )
+
+    infos = {a.informacionEscolar_id: a.informacionEscolar for a in alumnos if a.informacionEscolar_id}
+    programas = {i.programa_id for i in infos.values() if i.programa_id}
+    requeridos = defaultdict(list)
+    for programa_id, tipo_id in (
+        ProgramaDocumentoRequisito.objects.filter(programa_id__in=programas, activo=True)
+        .values_list("programa_id", "tipo_id")
+    ):
+        requeridos[programa_id].append(tipo_id)
+    subidos = defaultdict(set)
+    if requeridos:
+        for info_id, tipo_id in (
+            DocumentoAlumno.objects.filter(info_escolar_id__in=infos, tipo_id__isnull=False)
+            .values_list("info_escolar_id", "tipo_id").distinct()
+        ):
+            subidos[info_id].add(tipo_id)
+
+    ahora = timezone.now()
+    filas = []
+    for a in alumnos:
+        info = a.informacionEscolar
+        n_faltantes = 0
+        if info and info.programa_id:
+            n_faltantes = sum(1 for t in requeridos.get(info.programa_id, ()) if t not in subidos[info.id])
+        n_pendientes = pendientes.get(a.pk, 0)
+        filas.append(AlertaAlumno(
+            alumno_id=a.pk,
+            sede_id=info.sede_id if info else None,
+            flags=flags_de(a, n_pendientes=n_pendientes, n_faltantes=n_faltantes),
+            cargos_pendientes=n_pendientes,
+            documentos_faltantes=n_faltantes,
+            actualizado_en=ahora,
+        ))
+    return filas
+
+
+def recalcular(ids, *, hoy=None) -> int:
+    """Recalcula y guarda (upsert) las alertas de los alumnos `ids`. Devuelve cuántas."""
+    ids = list(ids)
+    hoy = hoy or timezone.localdate()
+    total = 0
+    for i in range(0, len(ids), LOTE):
+        filas = _calcular_lote(ids[i:i + LOTE], hoy)
+        AlertaAlumno.objects.bulk_create(
+            filas,
+            update_conflicts=True,
+            unique_fields=["alumno"],
+            update_fields=["sede", "flags", "cargos_pendientes", "documentos_faltantes", "actualizado_en"],
+        )
+        total += len(filas)
+    return total
+
+
+def recalcular_todos(*, hoy=None) -> int:
+    ids = Alumno.objects.order_by("pk").values_list("pk", flat=True)
+    return recalcular(ids.iterator(chunk_size=LOTE * 4), hoy=hoy)
+
+
+# ============================================================
+# Señales
+# ============================================================
+
+def _vaciar():
+    conn = transaction.get_connection()
+    pendientes = getattr(conn, "_alertas_pendientes", None)
+    conn._alertas_pendientes = None
+    if not pendientes:
+        return
+    ids = set(pendientes["alumnos"])
+    if pendientes["infos"]:
+        ids.update(Alumno.objects.filter(informacionEscolar_id__in=pendientes["infos"]).values_list("pk", flat=True))
+    if pendientes["programas"]:
+        ids.update(
+            Alumno.objects.filter(informacionEscolar__programa_id__in=pendientes["programas"])
+            .values_list("pk", flat=True)
+        )
+    try:
+        recalcular(sorted(ids))
+    except Exception:
+        # nunca romper el guardado que disparó la señal; el recálculo diario lo corrige
+        logger.exception("No se pudieron recalcular alertas de %s alumnos", len(ids))
+
+
+def marcar(*, alumnos=(), infos=(), programas=()):
+    """
+    Programa el recálculo para cuando confirme la transacción actual (de inmediato
+    fuera de una). Varias señales en la misma transacción se juntan en un solo lote.
+    """
+    conn = transaction.get_connection()
+    pendientes = getattr(conn, "_alertas_pendientes", None)
+    # si la transacción anterior hizo rollback su on_commit se descartó: empezar de nuevo
+    registrado = pendientes is not None and any(c[1] is _vaciar for c in conn.run_on_commit)
+    if not registrado:
+        pendientes = conn._alertas_pendientes = {"alumnos": set(), "infos": set(), "programas": set()}
+    pendientes["alumnos"].update(a for a in alumnos if a)
+    pendientes["infos"].update(i for i in infos if i)
+    pendientes["programas"].update(p for p in programas if p)
+    if not registrado:
+        transaction.on_commit(_vaciar)
+
+
+def _alumno_guardado(sender, instance, **kwargs):
+    marcar(alumnos=[instance.pk])
+
+
+def _info_guardada(sender, instance, **kwargs):
+    marcar(infos=[instance.pk])
+
+
+def _info_por_borrar(sender, instance, **kwargs):
+    # después del borrado el alumno ya no apunta a esta información escolar
+    marcar(alumnos=Alumno.objects.filter(informacionEscolar=instance).values_list("pk", flat=True))
+
+
+def _cargo_cambiado(sender, instance, **kwargs):
+    marcar(alumnos=[instance.alumno_id])
+
+
+def _documento_cambiado(sender, instance, **kwargs):
+    marcar(infos=[instance.info_escolar_id])
+
+
+def _requisito_cambiado(sender, instance, **kwargs):
+    marcar(programas=[instance.programa_id])
+
+
+def conectar_senales():
+    """Llamado desde AlumnosConfig.ready()."""
+    conexiones = (
+        (post_save, Alumno, _alumno_guardado),
+        (post_save, InformacionEscolar, _info_guardada),
+        (pre_delete, InformacionEscolar, _info_por_borrar),
+        (post_save, Cargo, _cargo_cambiado),
+        (post_delete, Cargo, _cargo_cambiado),
+        (post_save, DocumentoAlumno, _documento_cambiado),
+        (post_delete, DocumentoAlumno, _documento_cambiado),
+        (post_save, ProgramaDocumentoRequisito, _requisito_cambiado),
+        (post_delete, ProgramaDocumentoRequisito, _requisito_cambiado),
+    )
+    for senal, modelo, receptor in conexiones:
+        senal.connect(receptor, sender=modelo, weak=False, dispatch_uid=f"alertas:{modelo._meta.label}")
@@ -0,0 +1,214 @@
+# alumnos/services/benchmark.py
+"""
+Benchmark de vistas y servicios pesados (`manage.py benchmark_vistas`).
+
+Cada escenario se ejecuta con el cliente de pruebas de Django (middleware, sesión y
+plantillas incluidos) y se mide:
+  - consultas SQL (CaptureQueriesContext),
+  - tiempo de pared (ms),
+  - pico de memoria Python (tracemalloc, KiB).
+
+`PRESUPUESTOS_CONSULTAS` es el máximo de consultas permitido por escenario; no depende
+del tamaño de los datos, así que un N+1 nuevo lo rompe aunque la base sea chica.
+alumnos/tests.py lo verifica en cada corrida de pruebas. En SQLite los prefetch_related
+de miles de filas se parten en lotes de 999 parámetros, así que con el conjunto completo
+algunas vistas de listado suman consultas que en Postgres no aparecen.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from alumnos.services.datos_sinteticos import DOMINIO_EMAIL, PREFIJO_USUARIO
+
+PRESUPUESTOS_CONSULTAS = {
+    "estudiantes": 6,
+    "alumnos_detalle": 11,
+    "documentos_alumnos_lista": 10,
+    "cargos_pendientes_todos": 6,
+    "conciliar_movimiento": 6,
+    "mis_cursos": 6,
+    "servicio_estados_cuenta": 2,
+    "servicio_boletas_listado": 2,
+}
+
+
+# ============================================================
+# Escenarios
+# ============================================================
+
+def _contexto():
+    """Objetos de referencia dentro del conjunto sintético."""
+    from academico.models import ListadoMaterias
+    from alumnos.models import Alumno, MovimientoBanco
+
+    sinteticos = Alumno.objects.filter(email__endswith=f"@{DOMINIO_EMAIL}")
+    # el alumno con más pagos: el peor caso del detalle
+    alumno = sinteticos.annotate(n=Count("pagos_diario")).order_by("-n").first()
+    alumno_portal = sinteticos.filter(user__isnull=False).select_related("user").first()
+    mov = MovimientoBanco.objects.filter(uid_hash__startswith="sint", conciliado=False).order_by("id").first()
+    listado = (
+        ListadoMaterias.objects.filter(programa__codigo__startswith="SINT-")
+        .annotate(n=Count("inscripciones")).order_by("-n").first()
+    )
+    if not (alumno and alumno_portal and mov and listado):
+        raise RuntimeError("No hay datos sintéticos: corre primero `manage.py seed_datos_sinteticos`.")
+    return {"alumno": alumno, "alumno_portal": alumno_portal, "mov": mov, "listado": listado}
+
+
+def _admin():
+    User = get_user_model()
+    user, creado = User.objects.get_or_create(
+        username=f"{PREFIJO_USUARIO}bench-admin",
+        defaults={"is_superuser": True, "is_staff": True},
+    )
+    if creado:
+        user.set_unusable_password()
+        user.save(update_fields=["password"])
+    return user
+
+
+def _vista(nombre_url, **kwargs):
+    def correr(client):
+        resp = client.get(reverse(nombre_url, kwargs=kwargs))
+        if resp.status_code != 200:
+            raise AssertionError(f"{nombre_url} respondió {resp.status_code}")
+        return resp
+    return correr
+
+
+def _servicio_estados_cuenta(ctx):
+    from alumnos.models import Alumno
+    from alumnos.services.estado_cuenta import calcular_estados_cuenta
+
+    qs = Alumno.objects.filter(email__endswith=f"@{DOMINIO_EMAIL}")
+
+    def correr(client):
+        return sum(1 for _ in calcular_estados_cuenta(qs))
+    return correr
+
+
+def _servicio_boletas(ctx):
+    from academico.boletas import boletas_de_listado, contexto_boleta
+
+    def correr(client):
+        return sum(1 for a, c in boletas_de_listado(ctx["listado"]) if contexto_boleta(a, c, ctx["listado"]))
+    return correr
+
+
+def escenarios(ctx):
+    """Lista de (nombre, usuario, callable(client))."""
+    return [
+        ("estudiantes", "admin", _vista("alumnos:estudiantes")),
+        ("alumnos_detalle", "admin", _vista("alumnos:alumnos_detalle", pk=ctx["alumno"].pk)),
+        ("documentos_alumnos_lista", "admin", _vista("alumnos:documentos_alumnos_lista")),
+        ("cargos_pendientes_todos", "admin", _vista("alumnos:cargos_pendientes_todos")),
+        ("conciliar_movimiento", "admin", _vista("alumnos:conciliar_movimiento", mov_id=ctx["mov"].pk)),
+        ("mis_cursos", "alumno", _vista("lms:mis_cursos")),
+        ("servicio_estados_cuenta", None, _servicio_estados_cuenta(ctx)),
+        ("servicio_boletas_listado", None, _servicio_boletas(ctx)),
+    ]
+
+
+# ============================================================
+# Medición
+# ============================================================
+
+def _host():
+    hosts = [h for h in settings.ALLOWED_HOSTS if h and "*" not in h and not h.startswith(".")]
+    return hosts[0] if hosts else "localhost"
+
+
+def medir(fn, client) -> dict:
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as cq:
+            t0 = time.perf_counter()
+            fn(client)
+            ms = (time.perf_counter() - t0) * 1000
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"consultas": len(cq.captured_queries), "ms": round(ms, 1), "pico_kib": round(pico / 1024, 1)}
+
+
+def ejecutar(*, repeticiones: int = 3, solo=None, ctx=None) -> dict:
+    """
+    Corre cada escenario `repeticiones` veces (más una de calentamiento) y devuelve
+    {nombre: {consultas, presupuesto, excede, ms_min, ms_mediana, ms_max, pico_kib}}.
+    """
+    # sin RendimientoMiddleware: su vaciado periódico metería consultas ajenas a la vista;
+    # igual la verificación periódica de versión de alumnos.services.catalogos
+    with override_settings(PERF_ACTIVO=False, CATALOGOS_VERIFICAR_SEGUNDOS=10 ** 6):
+        return _ejecutar(repeticiones, solo, ctx or _contexto())
+
+
+def _ejecutar(repeticiones, solo, ctx):
+    clientes = {
+        "admin": Client(HTTP_HOST=_host()),
+        "alumno": Client(HTTP_HOST=_host()),
+        None: None,
+    }
+    clientes["admin"].force_login(_admin())
+    clientes["alumno"].force_login(ctx["alumno_portal"].user)
+
+    resultados = {}
+    for nombre, usuario, fn in escenarios(ctx):
+        if solo and nombre not in solo:
+            continue
+        client = clientes[usuario]
+        fn(client)  # calentamiento: plantillas compiladas, caches de sesión/contenttypes
+        corridas = [medir(fn, client) for _ in range(repeticiones)]
+        tiempos = [c["ms"] for c in corridas]
+        consultas = max(c["consultas"] for c in corridas)
+        presupuesto = PRESUPUESTOS_CONSULTAS.get(nombre)
+        resultados[nombre] = {
+            "consultas": consultas,
+            "presupuesto": presupuesto,
+            "excede": presupuesto is not None and consultas > presupuesto,
+            "ms_min": min(tiempos),
+            "ms_mediana": round(statistics.median(tiempos), 1),
+            "ms_max": max(tiempos),
+            "pico_kib": max(c["pico_kib"] for c in corridas),
+        }
+    return resultados
+
+
+def volumen() -> dict:
+    """Tamaño de las tablas principales, para acompañar los resultados."""
+    from academico.models import Calificacion
+    from alumnos.models import Alumno, Cargo, DocumentoAlumno, MovimientoBanco, PagoDiario
+    from lms.models import AccesoCurso
+
+    return {
+        "alumnos": Alumno.objects.count(),
+        "pagos_diario": PagoDiario.objects.count(),
+        "cargos": Cargo.objects.count(),
+        "documentos": DocumentoAlumno.objects.count(),
+        "movimientos_banco": MovimientoBanco.objects.count(),
+        "calificaciones": Calificacion.objects.count(),
+        "accesos_lms": AccesoCurso.objects.count(),
+    }
+
+
+def guardar_json(resultados: dict, ruta: str, **extra):
+    from django.utils import timezone
+
+    data = {
+        "generado_en": timezone.now().isoformat(),
+        "motor_bd": connection.vendor,
+        "volumen": volumen(),
+        **extra,
+        "resultados": resultados,
+    }
+    with open(ruta, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, ensure_ascii=False, indent=2)
+    return data
@@ -0,0 +1,131 @@
+# alumnos/services/blobs.py
+"""
+Almacenamiento de documentos direccionado por contenido.
+
+Al guardar un DocumentoAlumno con archivo nuevo, `asignar_blob` calcula su SHA-256:
+  - si el contenido ya existe, el documento apunta al ArchivoBlob existente (no se escribe nada);
+  - si no, se guarda una sola vez en documentos/blobs/<ab>/<sha256>.<ext>.
+`DocumentoAlumno.archivo` queda con la ruta del blob, así que vistas, descargas y
+uniones de PDF no cambian.
+
+Los contadores `refs` se ajustan en save()/delete(); los borrados en bloque (cascadas,
+querysets) no pasan por ahí, por eso `recalcular_refs()` los corrige antes del GC.
+"""
+import hashlib
+import logging
+import os
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from alumnos.models import ArchivoBlob, DocumentoAlumno, blob_upload_path
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def hash_archivo(f):
+    """Devuelve (sha256_hex, tamaño) leyendo `f` por bloques; deja el archivo al inicio."""
+    h = hashlib.sha256()
+    size = 0
+    if hasattr(f, "seek"):
+        f.seek(0)
+    chunks = f.chunks(CHUNK_SIZE) if hasattr(f, "chunks") else iter(lambda: f.read(CHUNK_SIZE), b"")
+    for chunk in chunks:
+        h.update(chunk)
+        size += len(chunk)
+    if hasattr(f, "seek"):
+        f.seek(0)
+    return h.hexdigest(), size
+
+
+def obtener_o_crear_blob(f, nombre: str, sha: str, size: int) -> ArchivoBlob:
+    existente = ArchivoBlob.objects.filter(sha256=sha).first()
+    if existente and existente.archivo and existente.archivo.storage.exists(existente.archivo.name):
+        return existente
+
+    blob = existente or ArchivoBlob(sha256=sha, tamano=size)
+    storage = blob.archivo.storage
+    ruta = blob_upload_path(blob, nombre)
+    if storage.exists(ruta):
+        # mismo contenido ya en disco (p.ej. blob huérfano de un GC a medias)
+        blob.archivo.name = ruta
+    else:
+        f.seek(0)
+        blob.archivo.save(nombre, f, save=False)
+    blob.tamano = size
+
+    try:
+        with transaction.atomic():
+            blob.save()
+    except IntegrityError:
+        # Otro proceso creó el blob al mismo tiempo: usamos el suyo
+        ganador = ArchivoBlob.objects.get(sha256=sha)
+        if blob.archivo.name != ganador.archivo.name:
+            storage.delete(blob.archivo.name)
+        return ganador
+    return blob
+
+
+def asignar_blob(doc: DocumentoAlumno):
+    """
+    Para un documento con archivo sin guardar (subida nueva): lo asocia a su blob
+    y deja `doc.archivo` apuntando a la ruta del blob, ya "committed".
+    """
+    f = doc.archivo.file
+    nombre = os.path.basename(doc.archivo.name or getattr(f, "name", "") or "archivo")
+    sha, size = hash_archivo(f)
+    blob = obtener_o_crear_blob(f, nombre, sha, size)
+
+    doc.blob = blob
+    doc.nombre_original = nombre[:255]
+    doc.archivo.name = blob.archivo.name
+    doc.archivo._committed = True
+    return blob
+
+
+def ajustar_refs(blob_id, delta: int):
+    if not blob_id or not delta:
+        return
+    qs = ArchivoBlob.objects.filter(pk=blob_id)
+    if delta < 0:
+        qs = qs.filter(refs__gte=-delta)
+    qs.update(refs=F("refs") + delta)
+
+
+def recalcular_refs() -> int:
+    """Recalcula `refs` de todos los blobs contando documentos reales."""
+    conteo = (
+        DocumentoAlumno.objects
+        .filter(blob=OuterRef("pk"))
+        .order_by()
+        .values("blob")
+        .annotate(c=Count("id"))
+        .values("c")
+    )
+    return ArchivoBlob.objects.update(refs=Coalesce(Subquery(conteo), Value(0)))
+
+
+def recolectar_huerfanos(*, dry_run: bool = False):
+    """
+    Borra blobs sin documentos (archivo físico y fila). Devuelve (cuántos, bytes).
+    Usa la tabla de documentos como verdad, no solo el contador.
+    """
+    n, total = 0, 0
+    huerfanos = ArchivoBlob.objects.filter(refs=0, documentos__isnull=True)
+    for blob in huerfanos.iterator():
+        n += 1
+        total += blob.tamano
+        if dry_run:
+            continue
+        nombre = blob.archivo.name
+        with transaction.atomic():
+            borrados, _ = ArchivoBlob.objects.filter(pk=blob.pk, documentos__isnull=True).delete()
+        if borrados and nombre and not DocumentoAlumno.objects.filter(archivo=nombre).exists():
+            try:
+                blob.archivo.storage.delete(nombre)
+            except Exception:
+                logger.warning("No se pudo borrar el blob %s", nombre, exc_info=True)
+    return n, total
@@ -0,0 +1,220 @@
+# alumnos/services/cartera_corte.py
+"""
+Corte de cartera de toda la institución (tabla SaldoCartera).
+
+- `corte(hoy)`: lee Cargo, PagoDiario y Alumno con una consulta cada uno (en
+  streaming) y reparte los pagos con pandas para todos los alumnos a la vez, con las
+  reglas de alumnos.cartera.aplicar_pagos: pagos ligados al alumno
+  (alumnos.services.vinculo_pagos) y a un concepto (clasificador_conceptos); cargos
+  cubiertos en orden de fecha. Escribe el saldo de cada alumno con antigüedad y tramo, y corrige
+  Cargo.pagado de los cargos cuyo estado cambió (cargos_pendientes_todos lo usa).
+- `resumen(...)`: totales del corte por sede o programa y tramo.
+
+Dentro de un concepto el reparto secuencial deja cada cargo con
+min(monto, max(0, total pagado - cargos anteriores)); no depende del orden de los
+pagos, así que alcanza con sumas acumuladas por (alumno, concepto).
+"""
+import logging
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Count, Subquery, Sum
+from django.utils import timezone
+
+from alumnos.cartera import guardar_pagado
+from alumnos.models import Alumno, Cargo, PagoDiario, SaldoCartera
+
+logger = logging.getLogger(__name__)
+
+LOTE = 5000
+
+
+# ============================================================
+# Carga
+# ============================================================
+
+def _frame(qs, campos, columnas=None):
+    """DataFrame de qs.values_list(*campos) leído por bloques (sin cargar modelos)."""
+    filas = qs.values_list(*campos).iterator(chunk_size=LOTE)
+    return pd.DataFrame.from_records(filas, columns=list(columnas or campos))
+
+
+def _centavos(serie):
+    # DecimalField(…, 2): en centavos enteros las sumas son exactas
+    return (serie.astype(float) * 100).round().astype("int64")
+
+
+# ============================================================
+# Reparto
+# ============================================================
+
+def repartir(cargos, pagos, hoy):
+    """
+    Aplica los pagos a los cargos en bloque. Agrega a `cargos` (ordenado por alumno,
+    concepto y fecha) las columnas aplicado/restante en centavos, pagado_nuevo y
+    dias_mora. Sin consultas.
+    """
+    cargos = cargos.assign(centavos=_centavos(cargos["monto"])).sort_values(
+        ["alumno_id", "concepto_id", "fecha_cargo", "id"], kind="stable", ignore_index=True,
+    )
+    abonos = (
+        pagos.assign(centavos=_centavos(pagos["monto"]))
+        .astype({"alumno_id": "int64", "concepto_id": "int64"})
+        .groupby(["alumno_id", "concepto_id"])["centavos"].sum()
+    )
+    llave = [cargos["alumno_id"], cargos["concepto_id"]]
+    abonado = abonos.reindex(pd.MultiIndex.from_arrays(llave)).fillna(0).to_numpy()
+
+    positivo = cargos["centavos"].clip(lower=0)
+    previo = (positivo.groupby(llave).cumsum() - positivo).to_numpy()
+    aplicado = np.clip(abonado - previo, 0, positivo.to_numpy()).astype("int64")
+
+    vence = pd.to_datetime(cargos["fecha_vencimiento"].fillna(cargos["fecha_cargo"]))
+    dias = (pd.Timestamp(hoy) - vence).dt.days.to_numpy() if len(cargos) else np.zeros(0, dtype="int64")
+    restante = cargos["centavos"].to_numpy() - aplicado
+
+    return cargos.assign(
+        aplicado=aplicado,
+        restante=restante,
+        pagado_nuevo=restante == 0,
+        dias_mora=np.where((restante > 0) & (dias > 0), dias, 0),
+    )
+
+
+def saldos_por_alumno(cargos):
+    """Saldo, vencido, cargos pendientes y días de mora (máximo) por alumno con saldo."""
+    pendientes = cargos[cargos["restante"] > 0]
+    saldos = (
+        pendientes.assign(vencido=np.where(pendientes["dias_mora"] > 0, pendientes["restante"], 0))
+        .groupby("alumno_id")
+        .agg(saldo=("restante", "sum"), vencido=("vencido", "sum"),
+             cargos_pendientes=("id", "size"), dias_mora=("dias_mora", "max"))
+    )
+    posiciones = np.searchsorted(SaldoCartera.LIMITES_TRAMOS, saldos["dias_mora"].to_numpy(), side="left")
+    return saldos.assign(tramo=[SaldoCartera.TRAMOS[i][0] for i in posiciones])
+
+
+# ============================================================
+# Corte
+# ============================================================
+
+def _entero(v):
+    return None if pd.isna(v) else int(v)
+
+
+def _pesos(centavos):
+    return Decimal(int(centavos)).scaleb(-2)
+
+
+def corte(hoy=None, *, reconciliar: bool = True) -> dict:
+    """
+    Calcula y guarda el corte de `hoy` (reemplaza uno previo del mismo día). Con
+    `reconciliar`, persiste Cargo.pagado donde cambió. Devuelve estadísticas.
+    """
+    hoy = hoy or timezone.localdate()
+
+    cargos = _frame(
+        Cargo.objects.all(),
+        ("id", "alumno_id", "concepto_id", "monto", "fecha_cargo", "fecha_vencimiento", "pagado"),
+    )
+    # pagos ligados al alumno (vinculo_pagos) y clasificados (clasificador_conceptos)
+    pagos = _frame(
+        PagoDiario.objects.filter(monto__gt=0, alumno__isnull=False, concepto_pago__isnull=False).order_by(),
+        ("alumno_id", "concepto_pago_id", "monto"),
+        ("alumno_id", "concepto_id", "monto"),
+    )
+    alumnos = _frame(
+        Alumno.objects.filter(pk__in=Cargo.objects.values("alumno_id")).order_by(),
+        ("pk", "informacionEscolar__sede", "informacionEscolar__programa"),
+        ("alumno_id", "sede_id", "programa_id"),
+    ).set_index("alumno_id")
+
+    cargos = repartir(cargos, pagos, hoy)
+
+    cambiados = 0
+    if reconciliar:
+        distintos = cargos.loc[cargos["pagado_nuevo"] != cargos["pagado"].astype(bool), ["id", "alumno_id", "pagado_nuevo"]]
+        objetos = [Cargo(id=int(i), alumno_id=int(a), pagado=bool(p)) for i, a, p in distintos.itertuples(index=False)]
+        for i in range(0, len(objetos), LOTE):
+            guardar_pagado(objetos[i:i + LOTE])
+        cambiados = len(objetos)
+
+    saldos = saldos_por_alumno(cargos).join(alumnos[["sede_id", "programa_id"]])
+    filas = [
+        SaldoCartera(
+            fecha_corte=hoy,
+            alumno_id=int(alumno_id),
+            sede_id=_entero(s.sede_id),
+            programa_id=_entero(s.programa_id),
+            saldo=_pesos(s.saldo),
+            vencido=_pesos(s.vencido),
+            cargos_pendientes=int(s.cargos_pendientes),
+            dias_mora=int(s.dias_mora),
+            tramo=s.tramo,
+        )
+        for alumno_id, s in zip(saldos.index, saldos.itertuples(index=False))
+    ]
+    with transaction.atomic():
+        SaldoCartera.objects.filter(fecha_corte=hoy).delete()
+        SaldoCartera.objects.bulk_create(filas, batch_size=1000)
+
+    stats = {
+        "fecha": hoy,
+        "alumnos": len(filas),
+        "saldo": _pesos(saldos["saldo"].sum()),
+        "vencido": _pesos(saldos["vencido"].sum()),
+        "cargos": len(cargos),
+        "pagos": len(pagos),
+        "cargos_actualizados": cambiados,
+    }
+    logger.info("Corte de cartera %s", stats)
+    return stats
+
+
+# ============================================================
+# Reportes
+# ============================================================
+
+def resumen(fecha_corte=None, *, por=None) -> dict:
+    """
+    Totales del corte (el último si no se indica) por tramo; con `por` ("sede" o
+    "programa") también una fila por cada uno. Montos en el orden de SaldoCartera.TRAMOS.
+    """
+    if fecha_corte is None:
+        # subconsulta: una sola ida a la base también sin fecha
+        fecha_corte = Subquery(SaldoCartera.objects.order_by("-fecha_corte").values("fecha_corte")[:1])
+    orden = {clave: i for i, (clave, _) in enumerate(SaldoCartera.TRAMOS)}
+
+    def vacio():
+        return {"nombre": "", "tramos": [Decimal("0.00")] * len(orden), "saldo": Decimal("0.00"),
+                "vencido": Decimal("0.00"), "alumnos": 0}
+
+    campos = ["fecha_corte", "tramo"] + ([f"{por}_id", f"{por}__nombre"] if por else [])
+    qs = (
+        SaldoCartera.objects.filter(fecha_corte=fecha_corte)
+        .values(*campos)
+        .annotate(total=Sum("saldo"), total_vencido=Sum("vencido"), n=Count("pk"))
+    )
+    totales, filas, fecha = vacio(), {}, None
+    for r in qs:
+        fecha = r["fecha_corte"]
+        destinos = [totales]
+        if por:
+            fila = filas.setdefault(r[f"{por}_id"], vacio())
+            fila["nombre"] = r[f"{por}__nombre"] or "Sin asignar"
+            destinos.append(fila)
+        for d in destinos:
+            d["tramos"][orden[r["tramo"]]] += r["total"]
+            d["saldo"] += r["total"]
+            d["vencido"] += r["total_vencido"]
+            d["alumnos"] += r["n"]
+
+    return {
+        "fecha_corte": fecha,
+        "tramos": SaldoCartera.TRAMOS,
+        "filas": sorted(filas.values(), key=lambda f: -f["saldo"]),
+        "totales": totales,
+        "por_tramo": list(zip([etiqueta for _, etiqueta in SaldoCartera.TRAMOS], totales["tramos"])),
+    }
@@ -0,0 +1,292 @@
+# alumnos/services/catalogos.py
+"""
+Caché versionada de catálogos: Programa, ConceptoPago, ReglaConcepto, Sede, Pais,
+Estado, Financiamiento y TwilioConfig. Son tablas chicas que casi no cambian pero se
+consultan en cada conciliación, generación de cargos, listado o formulario.
+
+Dos niveles:
+  - local (por proceso): un dict con las filas ya cargadas; leerlo no hace consultas.
+  - compartido (alias CATALOGOS_CACHE, DatabaseCache `cache_catalogos`): guarda la
+    versión de cada catálogo y sus filas, para que los workers de gunicorn no vayan
+    todos a la BD cuando cambia algo.
+
+Cada catálogo tiene una clave de versión que los post_save/post_delete de sus modelos
+(y de los modelos que trae con select_related) incrementan. Un proceso compara su copia
+local con la versión compartida como mucho cada CATALOGOS_VERIFICAR_SEGUNDOS; los
+cambios hechos en el mismo proceso se ven de inmediato.
+
+Los secretos (CAMPOS_EXCLUIDOS) no se cargan: la caché compartida es una tabla más de
+la BD y la leen todos los procesos. Quien los necesite los lee del modelo.
+
+Los objetos devueltos se comparten entre peticiones: son de solo lectura. Las escrituras
+que no mandan señales (queryset.update(), bulk_create, SQL, migraciones de datos) deben
+ir seguidas de invalidar() o de `manage.py invalidar_catalogos`.
+"""
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+# nombre -> (modelo, select_related, order_by)
+CATALOGOS = {
+    "programas": ("alumnos.Programa", (), ("codigo",)),
+    "conceptos_pago": ("alumnos.ConceptoPago", (), ("nombre", "id")),
+    "reglas_concepto": ("alumnos.ReglaConcepto", (), ("prioridad", "id")),
+    "sedes": ("alumnos.Sede", ("pais", "estado"), ("nombre", "id")),
+    "paises": ("alumnos.Pais", (), ("nombre",)),
+    "estados": ("alumnos.Estado", ("pais",), ("pais__nombre", "nombre")),
+    "financiamientos": ("alumnos.Financiamiento", ("programa",), ("programa_id", "id")),
+    "twilio_configs": ("alumnos.TwilioConfig", (), ("-updated_at", "id")),
+}
+
+# nombre -> campos que nunca se guardan en la caché (ver mensajeria.auth_token)
+CAMPOS_EXCLUIDOS = {
+    "twilio_configs": ("auth_token",),
+}
+
+PUBLICAR_METRICAS_SEGUNDOS = 60
+_CLAVE_METRICAS = "catalogo:metricas"
+
+_Entrada = namedtuple("_Entrada", "version filas por_pk verificado")
+
+_lock = threading.Lock()
+_local = {}
+_contadores = {}
+_ultima_publicacion = 0.0
+
+
+def _cache():
+    return caches[settings.CATALOGOS_CACHE]
+
+
+def _clave_version(nombre):
+    return f"catalogo:{nombre}:version"
+
+
+def _clave_filas(nombre):
+    return f"catalogo:{nombre}:filas"
+
+
+def _contar(nombre, evento):
+    with _lock:
+        c = _contadores.setdefault(nombre, {"local": 0, "compartido": 0, "bd": 0, "verificaciones": 0})
+        c[evento] += 1
+
+
+# ============================================================
+# Lectura
+# ============================================================
+
+def _cargar_bd(nombre):
+    modelo, relacionados, orden = CATALOGOS[nombre]
+    qs = apps.get_model(modelo).objects.all()
+    if relacionados:
+        qs = qs.select_related(*relacionados)
+    if nombre in CAMPOS_EXCLUIDOS:
+        qs = qs.defer(*CAMPOS_EXCLUIDOS[nombre])
+    return tuple(qs.order_by(*orden))
+
+
+def _version_compartida(nombre):
+    cache = _cache()
+    version = cache.get(_clave_version(nombre))
+    if version is None:
+        cache.add(_clave_version(nombre), time.time_ns(), timeout=None)
+        version = cache.get(_clave_version(nombre))
+    return version
+
+
+def _entrada(nombre):
+    if nombre not in CATALOGOS:
+        raise KeyError(f"Catálogo desconocido: {nombre}")
+
+    ahora = time.monotonic()
+    entrada = _local.get(nombre)
+    if entrada is not None and ahora - entrada.verificado < settings.CATALOGOS_VERIFICAR_SEGUNDOS:
+        _contar(nombre, "local")
+        return entrada
+
+    try:
+        version = _version_compartida(nombre)
+        _contar(nombre, "verificaciones")
+    except Exception:
+        # sin caché compartida (p.ej. falta createcachetable): solo el nivel local
+        logger.warning("Caché compartida de catálogos no disponible", exc_info=True)
+        version = None
+
+    if entrada is not None and version is not None and entrada.version == version:
+        entrada = entrada._replace(verificado=ahora)
+        _contar(nombre, "local")
+    else:
+        filas = None
+        if version is not None:
+            guardado = _cache().get(_clave_filas(nombre))
+            if guardado is not None and guardado[0] == version:
+                filas = guardado[1]
+                _contar(nombre, "compartido")
+        if filas is None:
+            filas = _cargar_bd(nombre)
+            _contar(nombre, "bd")
+            if version is not None:
+                _cache().set(_clave_filas(nombre), (version, filas), timeout=None)
+        entrada = _Entrada(version, filas, {o.pk: o for o in filas}, ahora)
+
+    _local[nombre] = entrada
+    _publicar_metricas()  # aprovecha la visita a la caché compartida
+    return entrada
+
+
+def obtener(nombre):
+    """Todas las filas del catálogo (tupla, en el orden de CATALOGOS)."""
+    return _entrada(nombre).filas
+
+
+def por_pk(nombre, pk):
+    """La fila con ese pk (acepta str de formularios/GET) o None."""
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    return _entrada(nombre).por_pk.get(pk)
+
+
+def version(nombre):
+    """Versión compartida vigente del catálogo (None sin caché compartida). Base de los ETag."""
+    return _entrada(nombre).version
+
+
+def catalogo_de_modelo(modelo):
+    """Nombre del catálogo que contiene las filas de `modelo` (clase de modelo)."""
+    for nombre, (label, _, _) in CATALOGOS.items():
+        if label == modelo._meta.label:
+            return nombre
+    raise KeyError(f"{modelo._meta.label} no es un catálogo")
+
+
+def buscar(nombre, **campos):
+    """Primera fila cuyos atributos coinciden exactamente: buscar("conceptos_pago", codigo="COLEGIATURA")."""
+    for obj in obtener(nombre):
+        if all(getattr(obj, k) == v for k, v in campos.items()):
+            return obj
+    return None
+
+
+# ============================================================
+# Invalidación
+# ============================================================
+
+def invalidar(*nombres):
+    """Sube la versión compartida y descarta la copia local (todos los catálogos si no se indican)."""
+    nombres = nombres or tuple(CATALOGOS)
+    for nombre in nombres:
+        _local.pop(nombre, None)
+        try:
+            _cache().set(_clave_version(nombre), time.time_ns(), timeout=None)
+        except Exception:
+            logger.warning("No se pudo invalidar el catálogo %s en la caché compartida", nombre, exc_info=True)
+
+
+def limpiar_local():
+    """Descarta solo el nivel local (pruebas: el rollback de TestCase no manda señales)."""
+    _local.clear()
+
+
+def _dependencias():
+    """modelo -> catálogos que lo contienen (directo o vía select_related)."""
+    deps = {}
+    for nombre, (modelo, relacionados, _) in CATALOGOS.items():
+        modelo = apps.get_model(modelo)
+        deps.setdefault(modelo, set()).add(nombre)
+        for rel in relacionados:
+            deps.setdefault(modelo._meta.get_field(rel).related_model, set()).add(nombre)
+    return deps
+
+
+def _al_cambiar(sender, nombres, **kwargs):
+    invalidar(*nombres)
+    # otra vez al confirmar: otro worker pudo recargar con los datos previos mientras
+    # la transacción seguía abierta
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: invalidar(*nombres))
+
+
+def conectar_senales():
+    """Llamado desde AlumnosConfig.ready()."""
+    for modelo, nombres in _dependencias().items():
+        nombres = tuple(sorted(nombres))
+
+        def receptor(sender, _nombres=nombres, **kwargs):
+            _al_cambiar(sender, _nombres, **kwargs)
+
+        uid = f"catalogos:{modelo._meta.label}"
+        post_save.connect(receptor, sender=modelo, weak=False, dispatch_uid=uid)
+        post_delete.connect(receptor, sender=modelo, weak=False, dispatch_uid=uid)
+
+
+# ============================================================
+# Métricas
+# ============================================================
+
+def metricas_locales():
+    with _lock:
+        return {nombre: dict(c) for nombre, c in _contadores.items()}
+
+
+def _publicar_metricas(forzar=False):
+    """Copia los contadores de este proceso a la caché compartida (máx. 1 vez por minuto)."""
+    global _ultima_publicacion
+    ahora = time.monotonic()
+    if not forzar and ahora - _ultima_publicacion < PUBLICAR_METRICAS_SEGUNDOS:
+        return
+    _ultima_publicacion = ahora
+    try:
+        cache = _cache()
+        todas = cache.get(_CLAVE_METRICAS) or {}
+        todas[os.getpid()] = {"t": time.time(), "contadores": metricas_locales()}
+        limite = time.time() - 3600
+        todas = {pid: d for pid, d in todas.items() if d["t"] >= limite}
+        cache.set(_CLAVE_METRICAS, todas, timeout=None)
+    except Exception:
+        logger.debug("No se pudieron publicar las métricas de catálogos", exc_info=True)
+
+
+def metricas():
+    """
+    Aciertos por catálogo sumando los workers que publicaron en la última hora:
+    [{catalogo, local, compartido, bd, verificaciones, aciertos_pct, filas}].
+    """
+    _publicar_metricas(forzar=True)
+    try:
+        todas = _cache().get(_CLAVE_METRICAS) or {}
+    except Exception:
+        todas = {os.getpid(): {"contadores": metricas_locales()}}
+
+    suma = {}
+    for datos in todas.values():
+        for nombre, c in datos["contadores"].items():
+            s = suma.setdefault(nombre, {"local": 0, "compartido": 0, "bd": 0, "verificaciones": 0})
+            for k, v in c.items():
+                s[k] = s.get(k, 0) + v
+
+    filas = []
+    for nombre in CATALOGOS:
+        s = suma.get(nombre, {"local": 0, "compartido": 0, "bd": 0, "verificaciones": 0})
+        lecturas = s["local"] + s["compartido"] + s["bd"]
+        entrada = _local.get(nombre)
+        filas.append({
+            "catalogo": nombre,
+            **s,
+            "lecturas": lecturas,
+            "aciertos_pct": round(100 * (s["local"] + s["compartido"]) / lecturas, 1) if lecturas else None,
+            "filas": len(entrada.filas) if entrada is not None else None,
+        })
+    return {"catalogos": filas, "procesos": len(todas), "verificar_segundos": settings.CATALOGOS_VERIFICAR_SEGUNDOS}
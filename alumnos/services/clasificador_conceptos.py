@@ -0,0 +1,121 @@
+# alumnos/services/clasificador_conceptos.py
+"""
+Clasifica cada PagoDiario en un ConceptoPago (FK `concepto_pago`) al escribirlo, para
+que los saldos filtren por igualdad indexada en lugar de buscar palabras con icontains.
+
+- Reglas: ReglaConcepto activas más el código y el nombre de cada concepto, sin
+  mayúsculas ni acentos, contra "concepto + pago_detalle". Gana la prioridad menor y
+  a igual prioridad el patrón más largo. Si aun así empatan conceptos distintos el pago
+  queda en 'revision'; si ninguna coincide, en 'sin_regla'. Las reglas vienen de la
+  caché de catálogos: clasificar al guardar no hace consultas.
+- pre_save: clasifica salvo que la clasificación sea 'manual' (cola de revisión).
+- `reclasificar(...)` (`manage.py reclasificar_pagos`): en bloque, tras importaciones
+  con bulk_create/update o al cambiar las reglas. La migración 0060 lo corre con los
+  modelos históricos para los pagos que ya existían: los saldos no esperan al cron.
+"""
+import logging
+from collections import Counter, namedtuple
+
+from django.db.models.signals import pre_save
+
+from alumnos.models import PagoDiario, ReglaConcepto
+from alumnos.services import catalogos
+from alumnos.services.match_helpers import _compact, _norm
+
+logger = logging.getLogger(__name__)
+
+LOTE = 2000
+
+_Regla = namedtuple("_Regla", "prioridad largo patron concepto_id")
+
+
+def normalizar(texto):
+    return _compact(_norm(texto))
+
+
+def reglas(apps=None):
+    """
+    Reglas vigentes ordenadas de la más fuerte a la más débil. Con `apps` (registro
+    histórico de una migración) se leen de la BD en lugar de la caché de catálogos.
+    """
+    if apps is None:
+        reglas_concepto, conceptos = catalogos.obtener("reglas_concepto"), catalogos.obtener("conceptos_pago")
+    else:
+        reglas_concepto = apps.get_model("alumnos", "ReglaConcepto").objects.all()
+        conceptos = apps.get_model("alumnos", "ConceptoPago").objects.all()
+    lista = [
+        _Regla(r.prioridad, len(normalizar(r.patron)), normalizar(r.patron), r.concepto_id)
+        for r in reglas_concepto if r.activo
+    ]
+    for c in conceptos:
+        for valor in {c.codigo, c.nombre}:
+            patron = normalizar(valor)
+            if patron:
+                lista.append(_Regla(ReglaConcepto.PRIORIDAD_DEFAULT, len(patron), patron, c.pk))
+    return sorted((r for r in lista if r.patron), key=lambda r: (r.prioridad, -r.largo))
+
+
+def clasificar(concepto, pago_detalle, lista_reglas):
+    """(concepto_pago_id o None, clasificacion) para el texto de un pago."""
+    texto = normalizar(f"{concepto or ''} {pago_detalle or ''}")
+    if not texto:
+        return None, "sin_regla"
+    ganadoras = None
+    for r in lista_reglas:
+        if ganadoras is not None and (r.prioridad, r.largo) != ganadoras[0]:
+            break
+        if r.patron in texto:
+            if ganadoras is None:
+                ganadoras = ((r.prioridad, r.largo), set())
+            ganadoras[1].add(r.concepto_id)
+    if ganadoras is None:
+        return None, "sin_regla"
+    conceptos = ganadoras[1]
+    return (next(iter(conceptos)), "auto") if len(conceptos) == 1 else (None, "revision")
+
+
+# ============================================================
+# Al guardar
+# ============================================================
+
+def _pago_por_guardar(sender, instance, raw=False, **kwargs):
+    if raw or instance.clasificacion == "manual":
+        return
+    instance.concepto_pago_id, instance.clasificacion = clasificar(instance.concepto, instance.pago_detalle, reglas())
+
+
+def conectar_senales():
+    """Llamado desde AlumnosConfig.ready()."""
+    pre_save.connect(_pago_por_guardar, sender=PagoDiario, weak=False, dispatch_uid="clasificador_conceptos:PagoDiario")
+
+
+# ============================================================
+# En bloque
+# ============================================================
+
+def reclasificar(qs=None, *, todos: bool = False, apps=None) -> Counter:
+    """
+    Clasifica los pagos de `qs` (por omisión los que no son 'manual'; solo los
+    'pendiente' salvo `todos`) y guarda los que cambian con bulk_update por lotes.
+    `apps`: registro histórico cuando se llama desde una migración.
+    Devuelve un Counter por clasificación resultante, más "cambiados".
+    """
+    modelo = apps.get_model("alumnos", "PagoDiario") if apps else PagoDiario
+    if qs is None:
+        qs = modelo.objects.exclude(clasificacion="manual")
+        if not todos:
+            qs = qs.filter(clasificacion="pendiente")
+    lista_reglas = reglas(apps)
+    stats = Counter()
+    cambios = []
+    filas = qs.order_by("pk").values_list("pk", "concepto", "pago_detalle", "concepto_pago_id", "clasificacion")
+    for pk, concepto, detalle, actual, estado in filas.iterator(chunk_size=LOTE):
+        concepto_id, nuevo = clasificar(concepto, detalle, lista_reglas)
+        stats[nuevo] += 1
+        if (concepto_id, nuevo) != (actual, estado):
+            cambios.append(modelo(pk=pk, concepto_pago_id=concepto_id, clasificacion=nuevo))
+    # se escribe al terminar de leer: SQLite no admite escribir con el cursor abierto
+    modelo.objects.bulk_update(cambios, ["concepto_pago", "clasificacion"], batch_size=LOTE)
+    stats["cambiados"] = len(cambios)
+    logger.info("Reclasificación de pagos: %s", dict(stats))
+    return stats
@@ -0,0 +1,186 @@
+# alumnos/services/correos.py
+"""
+Bandeja de salida de correos automáticos (CorreoSaliente): dar de alta un alumno no
+espera al SMTP.
+
+- post_save de Alumno (alta, con settings.SEND_WELCOME_EMAILS): escribe la fila de
+  bienvenida en la misma transacción que el alumno; si el alta hace rollback, no
+  queda correo. Dentro de `sin_bienvenida()` no se encola nada.
+- `encolar_bienvenida(ids)`: en bloque, para importaciones con bulk_create (que no
+  mandan señales). Un alumno con bienvenida ya en cola no se duplica.
+- `enviar_pendientes(...)`: lo usa el worker (`manage.py enviar_correos`). Reserva un
+  lote, lo manda con una sola conexión SMTP y reintenta los fallos con espera
+  exponencial hasta MAX_INTENTOS. Al enviar marca InformacionEscolar.bienvenida_enviada;
+  si ya estaba marcada (envío manual desde la ficha) el correo se omite.
+"""
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from alumnos.models import Alumno, CorreoSaliente, InformacionEscolar
+
+logger = logging.getLogger(__name__)
+
+LOTE = 50
+MAX_INTENTOS = 5
+ESPERA_BASE = timedelta(minutes=5)   # 5, 10, 20, 40 min entre intentos
+# Un lote reservado que no se resolvió en este tiempo (worker caído) vuelve a la cola.
+RESERVA = timedelta(minutes=15)
+
+_local = threading.local()
+
+
+# ============================================================
+# Encolado
+# ============================================================
+
+@contextmanager
+def sin_bienvenida():
+    """Las altas de alumnos dentro del bloque (en este hilo) no encolan bienvenida."""
+    previo = getattr(_local, "sin_bienvenida", False)
+    _local.sin_bienvenida = True
+    try:
+        yield
+    finally:
+        _local.sin_bienvenida = previo
+
+
+def encolar_bienvenida(alumno_ids) -> int:
+    """Encola la bienvenida de cada alumno (una inserción por lote). Devuelve cuántos se pidieron."""
+    filas = [CorreoSaliente(tipo="bienvenida", alumno_id=pk) for pk in alumno_ids]
+    # el índice único parcial descarta a los que ya tienen una bienvenida pendiente
+    CorreoSaliente.objects.bulk_create(filas, batch_size=500, ignore_conflicts=True)
+    return len(filas)
+
+
+def _alumno_guardado(sender, instance, created, raw=False, **kwargs):
+    if not created or raw or not settings.SEND_WELCOME_EMAILS or getattr(_local, "sin_bienvenida", False):
+        return
+    CorreoSaliente.objects.create(tipo="bienvenida", alumno=instance)
+
+
+def conectar_senales():
+    """Llamado desde AlumnosConfig.ready()."""
+    post_save.connect(_alumno_guardado, sender=Alumno, weak=False, dispatch_uid="correos:Alumno")
+
+
+# ============================================================
+# Envío (worker)
+# ============================================================
+
+def _reclamar(limit, ahora):
+    """
+    Reserva hasta `limit` correos vencidos (pendientes o con la reserva expirada).
+    La hora de fin de la reserva identifica el lote: otro worker que llegue a las
+    mismas filas ya no las ve vencidas.
+    """
+    hasta = ahora + RESERVA
+    with transaction.atomic():
+        ids = list(
+            CorreoSaliente.objects.select_for_update(skip_locked=True)
+            .filter(estado__in=("pendiente", "enviando"), siguiente_intento__lte=ahora)
+            .order_by("siguiente_intento", "id")
+            .values_list("pk", flat=True)[:limit]
+        )
+        CorreoSaliente.objects.filter(
+            pk__in=ids, estado__in=("pendiente", "enviando"), siguiente_intento__lte=ahora,
+        ).update(estado="enviando", siguiente_intento=hasta)
+    return list(
+        CorreoSaliente.objects.filter(pk__in=ids, estado="enviando", siguiente_intento=hasta)
+        .select_related("alumno__informacionEscolar__programa", "alumno__informacionEscolar__sede")
+        .order_by("id")
+    )
+
+
+def _fallo(correo, exc, ahora):
+    correo.error = str(exc)[:2000]
+    if correo.intentos >= MAX_INTENTOS:
+        correo.estado = "fallido"
+    else:
+        correo.estado = "pendiente"
+        correo.siguiente_intento = ahora + ESPERA_BASE * 2 ** (correo.intentos - 1)
+
+
+def _enviar_uno(correo, conexion, ahora):
+    from alumnos.emails import mensaje_bienvenida
+
+    alumno = correo.alumno
+    info = alumno.informacionEscolar
+    if info and info.bienvenida_enviada:
+        correo.estado, correo.error = "omitido", "Bienvenida ya enviada."
+        return
+    try:
+        msg = mensaje_bienvenida(alumno, connection=conexion)
+        if msg is None:
+            correo.estado, correo.error = "omitido", "El alumno no tiene correo."
+            return
+        msg.send(fail_silently=False)
+    except Exception as exc:
+        logger.warning("Correo %s (alumno %s): %s", correo.pk, alumno.pk, exc)
+        _fallo(correo, exc, ahora)
+        return
+    correo.estado, correo.error = "enviado", ""
+    correo.destinatario = alumno.email
+    correo.enviado_en = timezone.now()
+
+
+def enviar_pendientes(limit: int = LOTE) -> Counter:
+    """Envía un lote de la bandeja. Devuelve un Counter por estado resultante."""
+    from alumnos.services import alertas
+
+    ahora = timezone.now()
+    lote = _reclamar(limit, ahora)
+    stats = Counter()
+    if not lote:
+        return stats
+    for correo in lote:
+        correo.intentos += 1
+
+    conexion = get_connection(fail_silently=False)
+    try:
+        conexion.open()
+    except Exception as exc:
+        # sin servidor: todo el lote cuenta como intento fallido
+        logger.warning("No se pudo abrir la conexión SMTP: %s", exc)
+        for correo in lote:
+            _fallo(correo, exc, ahora)
+    else:
+        try:
+            for correo in lote:
+                _enviar_uno(correo, conexion, ahora)
+        finally:
+            conexion.close()
+
+    CorreoSaliente.objects.bulk_update(
+        lote, ["estado", "intentos", "siguiente_intento", "destinatario", "error", "enviado_en"],
+    )
+    enviados = [c.alumno for c in lote if c.estado == "enviado"]
+    if enviados:
+        InformacionEscolar.objects.filter(
+            pk__in=[a.informacionEscolar_id for a in enviados if a.informacionEscolar_id],
+            bienvenida_enviada=False,
+        ).update(bienvenida_enviada=True, bienvenida_enviada_en=timezone.now())
+        # update() no manda señales
+        alertas.marcar(alumnos=[a.pk for a in enviados])
+
+    stats.update(c.estado for c in lote)
+    return stats
+
+
+def reintentar() -> int:
+    """Regresa a la cola los correos 'fallido' con los intentos en cero (p.ej. tras corregir el SMTP)."""
+    abiertos = CorreoSaliente.objects.filter(
+        alumno=OuterRef("alumno"), tipo=OuterRef("tipo"), estado__in=("pendiente", "enviando"),
+    )
+    return CorreoSaliente.objects.filter(estado="fallido").exclude(Exists(abiertos)).update(
+        estado="pendiente", intentos=0, siguiente_intento=timezone.now(),
+    )
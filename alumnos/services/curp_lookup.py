@@ -0,0 +1,382 @@
+# alumnos/services/curp_lookup.py
+"""
+Consulta de CURP en gob.mx con:
+  - caché persistente (tabla CurpConsulta) con TTL -> repetir un CURP no abre navegador;
+  - pool de navegadores headless reutilizables por proceso, con límite de concurrencia
+    y timeouts (ya no se lanza un Chrome nuevo por cada POST);
+  - modo fixture (settings.CURP_LOOKUP_FIXTURE_HTML) que parsea un HTML local en lugar
+    de ir a gob.mx, para pruebas y desarrollo sin Chrome.
+  - `abuscar_curp` para la vista async: la BD con el ORM async y el navegador en un
+    hilo aparte, sin bloquear el event loop ni el hilo de las vistas síncronas.
+"""
+import atexit
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from alumnos.models import CurpConsulta
+
+logger = logging.getLogger(__name__)
+
+CURP_URL_DEFAULT = "https://www.gob.mx/curp/"
+
+
+class CurpLookupError(RuntimeError):
+    pass
+
+
+class CurpLookupOcupado(CurpLookupError):
+    """No hubo navegador libre dentro de CURP_LOOKUP_ACQUIRE_TIMEOUT."""
+
+
+def _cfg(name, default):
+    return getattr(settings, name, default)
+
+
+# ============================================================
+# Parseo (compartido por navegador y fixture)
+# ============================================================
+
+def parse_datos_solicitante(html: str) -> dict:
+    """
+    Extrae la tabla 'Datos del solicitante' del HTML de resultados de gob.mx.
+    """
+    soup = BeautifulSoup(html or "", "lxml")
+    datos = {}
+    h4 = soup.find("h4", string=lambda s: s and "Datos del solicitante" in s)
+    if h4:
+        panel_div = h4.find_parent("div", class_="panel")
+        if panel_div:
+            for row in panel_div.select("table tr"):
+                tds = row.find_all("td")
+                if len(tds) == 2:
+                    etiqueta = tds[0].get_text(strip=True).rstrip(":")
+                    valor = tds[1].get_text(strip=True)
+                    datos[etiqueta] = valor
+    return _mapear_salida(datos)
+
+
+def _mapear_salida(datos: dict) -> dict:
+    salida = {
+        "CURP": datos.get("CURP") or datos.get("Curp"),
+        "Nombre": datos.get("Nombre(s)"),
+        "PrimerApellido": datos.get("Primer apellido"),
+        "SegundoApellido": datos.get("Segundo apellido"),
+        "Sexo": datos.get("Sexo"),
+        "FechaNacimiento": datos.get("Fecha de nacimiento"),
+        "Nacionalidad": datos.get("Nacionalidad"),
+        "EntidadNacimiento": datos.get("Entidad de nacimiento"),
+    }
+    return {k: v for k, v in salida.items() if v}
+
+
+# ============================================================
+# Navegador
+# ============================================================
+
+def _crear_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+
+    opts = Options()
+    # headless en servidor; en local puedes comentar esta línea para ver el navegador
+    opts.add_argument("--headless=new")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-dev-shm-usage")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--window-size=1280,1200")
+    opts.add_experimental_option("excludeSwitches", ["enable-automation"])
+    opts.add_experimental_option("useAutomationExtension", False)
+    opts.add_argument(
+        "user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    )
+
+    # ----------- INICIALIZACIÓN CROSS-PLATFORM -----------
+    is_windows = sys.platform.startswith("win")
+    try:
+        if is_windows:
+            # En Windows usamos webdriver_manager (cómodo para dev)
+            from webdriver_manager.chrome import ChromeDriverManager
+            service = Service(ChromeDriverManager().install())
+        else:
+            # En Linux/Docker usamos binarios del sistema (instálalos en la imagen)
+            CHROME_BIN = os.getenv("CHROME_BIN", "/usr/bin/chromium")
+            CHROMEDRIVER_BIN = os.getenv("CHROMEDRIVER_BIN", "/usr/bin/chromedriver")
+            if not os.path.exists(CHROME_BIN):
+                raise FileNotFoundError(f"No existe CHROME_BIN: {CHROME_BIN}")
+            if not os.path.exists(CHROMEDRIVER_BIN):
+                raise FileNotFoundError(f"No existe CHROMEDRIVER_BIN: {CHROMEDRIVER_BIN}")
+            opts.binary_location = CHROME_BIN
+            service = Service(CHROMEDRIVER_BIN)
+
+        driver = webdriver.Chrome(service=service, options=opts)
+    except Exception as e:
+        # Fallback en Windows: intentar con Edge si existe
+        if not is_windows:
+            raise
+        try:
+            from selenium.webdriver.edge.service import Service as EdgeService
+            from selenium.webdriver.edge.options import Options as EdgeOptions
+            from webdriver_manager.microsoft import EdgeChromiumDriverManager
+
+            eopts = EdgeOptions()
+            eopts.add_argument("--headless=new")
+            eopts.add_argument("--no-sandbox")
+            eopts.add_argument("--disable-dev-shm-usage")
+            eopts.add_argument("--disable-gpu")
+            eopts.add_argument("--window-size=1280,1200")
+            service = EdgeService(EdgeChromiumDriverManager().install())
+            driver = webdriver.Edge(service=service, options=eopts)
+        except Exception:
+            raise CurpLookupError(
+                "No pude iniciar Chrome/Chromedriver en Windows. "
+                "Instala Google Chrome o usa Edge (tengo fallback), "
+                "o bien instala manualmente el driver. Error original: %r" % e
+            )
+
+    driver.set_page_load_timeout(_cfg("CURP_LOOKUP_TIMEOUT", 25))
+    return driver
+
+
+class DriverPool:
+    """
+    Pool de navegadores por proceso. Cada gunicorn worker mantiene hasta `max_size`
+    navegadores "calientes"; se reciclan tras `max_usos` consultas o al fallar.
+    """
+
+    def __init__(self, factory, max_size=2, max_usos=50, acquire_timeout=10):
+        self.factory = factory
+        self.max_usos = max_usos
+        self.acquire_timeout = acquire_timeout
+        self._sem = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._idle = []  # [(driver, usos)]
+
+    @contextmanager
+    def driver(self):
+        if not self._sem.acquire(timeout=self.acquire_timeout):
+            raise CurpLookupOcupado("El servicio de CURP está ocupado; intenta de nuevo en unos segundos.")
+        entry = None
+        ok = False
+        try:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                entry = (self.factory(), 0)
+            yield entry[0]
+            ok = True
+        finally:
+            if entry is not None:
+                driver, usos = entry[0], entry[1] + 1
+                if ok and usos < self.max_usos:
+                    with self._lock:
+                        self._idle.append((driver, usos))
+                else:
+                    _quit(driver)
+            self._sem.release()
+
+    def cerrar(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver, _ in idle:
+            _quit(driver)
+
+
+def _quit(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> DriverPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(
+                _crear_driver,
+                max_size=_cfg("CURP_LOOKUP_MAX_DRIVERS", 2),
+                max_usos=_cfg("CURP_LOOKUP_MAX_USOS", 50),
+                acquire_timeout=_cfg("CURP_LOOKUP_ACQUIRE_TIMEOUT", 10),
+            )
+            atexit.register(_pool.cerrar)
+        return _pool
+
+
+def _consultar_con_driver(driver, curp: str) -> dict:
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
+    wait = WebDriverWait(driver, _cfg("CURP_LOOKUP_TIMEOUT", 25))
+
+    # navegador reutilizado: sin estado de la consulta anterior
+    driver.delete_all_cookies()
+    driver.get(_cfg("CURP_LOOKUP_URL", CURP_URL_DEFAULT))
+
+    # 1) Overlay/captcha
+    try:
+        wait.until(EC.invisibility_of_element_located((By.ID, "sec-overlay")))
+    except TimeoutException:
+        raise CurpLookupError("Overlay/captcha activo en gob.mx (no automatizable).")
+
+    # 2) Input CURP
+    possible_selectors = [
+        (By.ID, "curpInput"),
+        (By.CSS_SELECTOR, "input#curpInput"),
+        (By.CSS_SELECTOR, "input[name='curp']"),
+        (By.CSS_SELECTOR, "input[formcontrolname='curp']"),
+        (By.CSS_SELECTOR, "input[type='text']"),
+    ]
+    curp_input = None
+    for how, sel in possible_selectors:
+        try:
+            curp_input = wait.until(EC.element_to_be_clickable((how, sel)))
+            break
+        except TimeoutException:
+            continue
+    if not curp_input:
+        raise NoSuchElementException("No se encontró el campo CURP (DOM cambió o captcha).")
+
+    curp_input.clear()
+    curp_input.send_keys(curp)
+
+    # 3) Click en Buscar
+    clicked = False
+    for how, sel in [
+        (By.ID, "btnBuscar"),
+        (By.CSS_SELECTOR, "button#btnBuscar"),
+        (By.XPATH, "//button[contains(., 'Buscar')]"),
+        (By.CSS_SELECTOR, "button[type='submit']"),
+    ]:
+        try:
+            driver.find_element(how, sel).click()
+            clicked = True
+            break
+        except Exception:
+            pass
+    if not clicked:
+        curp_input.send_keys("\n")
+
+    # 4) Esperar resultados
+    try:
+        wait.until(EC.presence_of_element_located(
+            (By.XPATH, "//*[contains(., 'Datos del solicitante')]")
+        ))
+    except TimeoutException:
+        raise CurpLookupError("No aparecieron resultados; posible bloqueo/cambio de página.")
+
+    time.sleep(1)
+
+    # 5) Parse
+    salida = parse_datos_solicitante(driver.page_source)
+    if salida:
+        return salida
+
+    datos = {}
+    try:
+        panel_elem = driver.find_element(
+            By.XPATH, "//h4[contains(., 'Datos del solicitante')]/ancestor::div[contains(@class,'panel')]"
+        )
+        for r in panel_elem.find_elements(By.CSS_SELECTOR, "table tr"):
+            tds = r.find_elements(By.TAG_NAME, "td")
+            if len(tds) == 2:
+                datos[tds[0].text.strip().rstrip(":")] = tds[1].text.strip()
+    except Exception:
+        pass
+    return _mapear_salida(datos)
+
+
+def consultar_gobmx(curp: str) -> dict:
+    """
+    Consulta directa (sin caché). Con CURP_LOOKUP_FIXTURE_HTML configurado
+    lee ese archivo en lugar de abrir el navegador.
+    """
+    fixture = _cfg("CURP_LOOKUP_FIXTURE_HTML", "")
+    if fixture:
+        with open(fixture, encoding="utf-8") as fh:
+            return parse_datos_solicitante(fh.read())
+
+    with get_pool().driver() as driver:
+        return _consultar_con_driver(driver, curp)
+
+
+# ============================================================
+# API con caché
+# ============================================================
+
+def _vigentes(curp: str):
+    ttl = timedelta(days=_cfg("CURP_CACHE_TTL_DIAS", 30))
+    return CurpConsulta.objects.filter(curp=curp, consultado_en__gte=timezone.now() - ttl)
+
+
+def consulta_vigente(curp: str):
+    """La CurpConsulta no vencida de ese CURP, o None. No consulta gob.mx."""
+    return _vigentes(curp).first()
+
+
+async def aconsulta_vigente(curp: str):
+    return await _vigentes(curp).afirst()
+
+
+def buscar_curp(curp: str, *, forzar: bool = False):
+    """
+    Devuelve (datos, desde_cache). Usa la tabla CurpConsulta si la entrada
+    no ha vencido; si no, consulta gob.mx y guarda el resultado.
+    """
+    curp = (curp or "").strip().upper()
+    if not curp:
+        return {}, False
+
+    if not forzar:
+        hit = consulta_vigente(curp)
+        if hit:
+            CurpConsulta.objects.filter(pk=hit.pk).update(hits=F("hits") + 1)
+            return hit.datos, True
+
+    datos = consultar_gobmx(curp)
+    if datos and "Nombre" in datos:
+        CurpConsulta.objects.update_or_create(
+            curp=curp,
+            defaults={"datos": datos, "consultado_en": timezone.now()},
+        )
+    return datos, False
+
+
+async def abuscar_curp(curp: str, *, forzar: bool = False):
+    """buscar_curp para vistas async."""
+    curp = (curp or "").strip().upper()
+    if not curp:
+        return {}, False
+
+    if not forzar:
+        hit = await aconsulta_vigente(curp)
+        if hit:
+            await CurpConsulta.objects.filter(pk=hit.pk).aupdate(hits=F("hits") + 1)
+            return hit.datos, True
+
+    # el pool de navegadores es por hilo/proceso y no toca la BD: puede ir en un hilo suelto
+    datos = await sync_to_async(consultar_gobmx, thread_sensitive=False)(curp)
+    if datos and "Nombre" in datos:
+        await CurpConsulta.objects.aupdate_or_create(
+            curp=curp,
+            defaults={"datos": datos, "consultado_en": timezone.now()},
+        )
+    return datos, False
@@ -0,0 +1,423 @@
+# alumnos/services/datos_sinteticos.py
+"""
+Datos sintéticos para pruebas de carga (`manage.py seed_datos_sinteticos`).
+
+Todo se crea con bulk_create y queda marcado para poder borrarlo después:
+  - programas con código "SINT-…",
+  - alumnos con correo "@sintetico.invalid",
+  - usuarios con username "sint-…",
+  - pagos diarios con folio "SINT-…".
+Las relaciones cubren alumnos (planes, documentos, cargos, pagos diarios, movimientos
+bancarios), cobros (invitaciones y registros de pago), academico (listados,
+calificaciones) y lms (cursos, módulos, lecciones, accesos).
+"""
+import logging
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from alumnos.models import (
+    Alumno, Cargo, ConceptoPago, DocumentoAlumno, DocumentoTipo, Grupo, InformacionEscolar,
+    MovimientoBanco, PagoDiario, Pais, Programa, ProgramaDocumentoRequisito, Sede,
+)
+from alumnos.services import numeracion
+
+logger = logging.getLogger(__name__)
+
+PREFIJO_PROGRAMA = "SINT-"
+DOMINIO_EMAIL = "sintetico.invalid"
+PREFIJO_USUARIO = "sint-"
+
+NOMBRES = [
+    "María", "José", "Juan", "Guadalupe", "Ana", "Luis", "Carlos", "Fernanda", "Sofía", "Miguel",
+    "Alejandra", "Jorge", "Daniela", "Ricardo", "Valeria", "Eduardo", "Paola", "Roberto", "Karla", "Héctor",
+]
+APELLIDOS = [
+    "Hernández", "García", "Martínez", "López", "González", "Pérez", "Rodríguez", "Sánchez", "Ramírez",
+    "Cruz", "Flores", "Gómez", "Morales", "Vázquez", "Jiménez", "Reyes", "Díaz", "Torres", "Gutiérrez", "Ruiz",
+]
+FORMAS_PAGO = ["Transferencia", "Depósito", "Tarjeta", "Efectivo", "Stripe"]
+CONCEPTOS = [("COLEGIATURA", "Colegiatura", True), ("INSCRIPCION", "Inscripción", False)]
+TIPOS_DOCUMENTO = [("acta-nacimiento", "Acta de nacimiento"), ("curp", "CURP"), ("certificado", "Certificado")]
+
+
+def _lotes(iterable, n):
+    lote = []
+    for x in iterable:
+        lote.append(x)
+        if len(lote) >= n:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _catalogos(rnd, num_programas):
+    mx, _ = Pais.objects.get_or_create(nombre="México", defaults={"codigo_iso2": "MX", "codigo_iso3": "MEX"})
+    sedes = [
+        Sede.objects.get_or_create(nombre=f"Sede sintética {i}", pais=mx, estado=None)[0]
+        for i in range(1, 4)
+    ]
+    conceptos = {
+        codigo: ConceptoPago.objects.get_or_create(codigo=codigo, defaults={"nombre": nombre, "recurrente": rec})[0]
+        for codigo, nombre, rec in CONCEPTOS
+    }
+    tipos = [
+        DocumentoTipo.objects.get_or_create(slug=f"sint-{slug}", defaults={"nombre": nombre})[0]
+        for slug, nombre in TIPOS_DOCUMENTO
+    ]
+
+    programas, grupos = [], []
+    for i in range(1, num_programas + 1):
+        programa, _ = Programa.objects.get_or_create(
+            codigo=f"{PREFIJO_PROGRAMA}{i:02d}",
+            defaults={
+                "nombre": f"Programa sintético {i}",
+                "meses_programa": rnd.choice([12, 18, 24, 36]),
+                "colegiatura": Decimal(rnd.randrange(1800, 6000, 100)),
+                "inscripcion": Decimal("1500.00"),
+                "reinscripcion": Decimal("1200.00"),
+                "equivalencia": Decimal("0.00"),
+                "titulacion": Decimal("8000.00"),
+            },
+        )
+        programas.append(programa)
+        for t in tipos:
+            ProgramaDocumentoRequisito.objects.get_or_create(programa=programa, tipo=t)
+        for g in ("a", "b"):
+            grupos.append(Grupo.objects.get_or_create(
+                programa=programa, codigo=f"sint-{i}-{g}", defaults={"nombre": f"Grupo {g.upper()}"},
+            )[0])
+    return sedes, conceptos, tipos, programas, grupos
+
+
+def _alumnos(rnd, n, sedes, programas, grupos, batch_size):
+    hoy = timezone.localdate()
+    grupos_por_programa = {}
+    for g in grupos:
+        grupos_por_programa.setdefault(g.programa_id, []).append(g)
+
+    if not n:
+        return []
+    inicio_pk = numeracion.reservar(n).start  # del contador: no choca con altas posteriores
+    creados = []
+    for offset in range(0, n, batch_size):
+        planes, alumnos = [], []
+        for i in range(offset, min(offset + batch_size, n)):
+            programa = rnd.choice(programas)
+            inicio = hoy - timedelta(days=rnd.randint(0, 900))
+            colegiatura = programa.colegiatura
+            planes.append(InformacionEscolar(
+                programa=programa,
+                grupo_nuevo=rnd.choice(grupos_por_programa[programa.pk]),
+                sede=rnd.choice(sedes),
+                meses_programa=programa.meses_programa,
+                precio_colegiatura=colegiatura,
+                precio_inscripcion=programa.inscripcion,
+                precio_final=colegiatura,
+                inicio_programa=inicio,
+                fin_programa=inicio + timedelta(days=30 * programa.meses_programa),
+                matricula=f"S{inicio_pk + i}",
+            ))
+        InformacionEscolar.objects.bulk_create(planes, batch_size=batch_size)
+
+        for i, plan in zip(range(offset, offset + len(planes)), planes):
+            nombre = rnd.choice(NOMBRES)
+            ap, am = rnd.choice(APELLIDOS), rnd.choice(APELLIDOS)
+            num = inicio_pk + i
+            alumnos.append(Alumno(
+                numero_estudiante=num,
+                nombre=nombre,
+                apellido_p=ap,
+                apellido_m=am,
+                email=f"alumno{num}@{DOMINIO_EMAIL}",
+                curp=f"SINT{num:014d}"[:18],
+                pais_id=sedes[0].pais_id,
+                informacionEscolar=plan,
+                password_email_institucional="sintetico",
+            ))
+        Alumno.objects.bulk_create(alumnos, batch_size=batch_size)
+        creados.extend(alumnos)
+    return creados
+
+
+def _usuarios(alumnos, n):
+    User = get_user_model()
+    ligados = alumnos[:n]
+    users = [User(username=f"{PREFIJO_USUARIO}{a.pk}", email=a.email) for a in ligados]
+    for u in users:
+        u.set_unusable_password()
+    User.objects.bulk_create(users)
+    por_username = dict(User.objects.filter(username__in=[u.username for u in users]).values_list("username", "pk"))
+    for a in ligados:
+        a.user_id = por_username[f"{PREFIJO_USUARIO}{a.pk}"]
+    Alumno.objects.bulk_update(ligados, ["user"], batch_size=1000)
+    return len(users)
+
+
+def _documentos(rnd, alumnos, tipos, batch_size):
+    def gen():
+        for a in alumnos:
+            for t in rnd.sample(tipos, rnd.randint(0, len(tipos))):
+                yield DocumentoAlumno(
+                    info_escolar_id=a.informacionEscolar_id,
+                    tipo=t,
+                    archivo=f"documentos/sinteticos/{a.pk}/{t.slug}.pdf",
+                    nombre_original=f"{t.slug}.pdf",
+                    derivado_estado="listo",
+                )
+    total = 0
+    for lote in _lotes(gen(), batch_size):
+        DocumentoAlumno.objects.bulk_create(lote)
+        total += len(lote)
+    return total
+
+
+def _cargos(rnd, alumnos, conceptos, batch_size):
+    hoy = timezone.localdate()
+    colegiatura = conceptos["COLEGIATURA"]
+
+    def gen():
+        for a in alumnos:
+            plan = a.informacionEscolar
+            for m in range(plan.meses_programa):
+                fecha = plan.inicio_programa + timedelta(days=30 * m)
+                yield Cargo(
+                    alumno=a,
+                    concepto=colegiatura,
+                    monto=plan.precio_colegiatura,
+                    fecha_cargo=fecha,
+                    fecha_vencimiento=fecha + timedelta(days=10),
+                    pagado=fecha < hoy and rnd.random() < 0.8,
+                )
+    total = 0
+    for lote in _lotes(gen(), batch_size):
+        Cargo.objects.bulk_create(lote)
+        total += len(lote)
+    return total
+
+
+def _pagos(rnd, alumnos, conceptos, n, batch_size):
+    hoy = timezone.localdate()
+    colegiatura = conceptos["COLEGIATURA"]
+
+    def gen():
+        for i in range(n):
+            # ~5 % sin alumno vinculado, como los renglones sin identificar del reporte diario
+            a = rnd.choice(alumnos) if rnd.random() > 0.05 else None
+            plan = a.informacionEscolar if a else None
+            fecha = hoy - timedelta(days=rnd.randint(0, 900))
+            yield PagoDiario(
+                folio=f"SINT-{i:08d}",
+                alumno=a,
+                numero_alumno=a.pk if a else None,
+                curp=a.curp if a else None,
+                nombre=f"{a.nombre} {a.apellido_p}" if a else rnd.choice(APELLIDOS).upper(),
+                monto=(plan.precio_colegiatura if plan else Decimal(rnd.randrange(500, 6000, 50))),
+                forma_pago=rnd.choice(FORMAS_PAGO),
+                fecha=fecha,
+                concepto="Colegiatura",
+                concepto_pago=colegiatura,  # bulk_create no pasa por el clasificador
+                clasificacion="auto",
+                programa=plan.programa.nombre if plan else "",
+            )
+    total = 0
+    for lote in _lotes(gen(), batch_size):
+        PagoDiario.objects.bulk_create(lote)
+        total += len(lote)
+    return total
+
+
+def _movimientos(rnd, alumnos, n, batch_size):
+    hoy = timezone.localdate()
+    prefijo = f"sint{timezone.now():%Y%m%d%H%M%S}"
+    movs = []
+    for i in range(n):
+        a = rnd.choice(alumnos)
+        movs.append(MovimientoBanco(
+            fecha=hoy - timedelta(days=rnd.randint(0, 120)),
+            tipo="SPEI RECIBIDO",
+            monto=a.informacionEscolar.precio_colegiatura,
+            signo=1,
+            referencia_numerica=str(a.pk),
+            referencia_alfanumerica=f"{a.nombre} {a.apellido_p} {a.apellido_m}".upper(),
+            emisor_nombre=f"{a.nombre} {a.apellido_p} {a.apellido_m}".upper(),
+            uid_hash=f"{prefijo}{i:010d}"[:40],
+        ))
+    MovimientoBanco.objects.bulk_create(movs, batch_size=batch_size)
+    return len(movs)
+
+
+def _cobros(rnd, alumnos, n, batch_size):
+    from cobros.models import BillingInvite, PaymentRecord
+
+    ahora = timezone.now()
+    muestra = rnd.sample(alumnos, min(n, len(alumnos)))
+    invites = [
+        BillingInvite(
+            alumno=a,
+            amount=a.informacionEscolar.precio_colegiatura or Decimal("1000.00"),
+            description="Colegiatura (sintético)",
+            token=f"sint-{a.pk}-{rnd.getrandbits(40):x}",
+            expires_at=ahora + timedelta(days=30),
+        )
+        for a in muestra
+    ]
+    BillingInvite.objects.bulk_create(invites, batch_size=batch_size)
+    # bulk_create no pasa por PaymentRecord.save(): no genera PagoDiario adicionales
+    registros = [
+        PaymentRecord(alumno=inv.alumno, invite=inv, type="one_time", status=rnd.choice(["created", "paid"]),
+                      amount=inv.amount)
+        for inv in invites
+    ]
+    PaymentRecord.objects.bulk_create(registros, batch_size=batch_size)
+    return len(invites)
+
+
+def _academico(rnd, alumnos, programas, batch_size):
+    from academico.models import Calificacion, ListadoAlumno, ListadoMateriaItem, ListadoMaterias, Materia
+
+    hoy = timezone.localdate()
+    por_programa = {}
+    for a in alumnos:
+        por_programa.setdefault(a.informacionEscolar.programa_id, []).append(a)
+
+    total = 0
+    for programa in programas:
+        materias = [
+            Materia.objects.get_or_create(programa=programa, codigo=f"S{programa.pk}-{j:02d}",
+                                          defaults={"nombre": f"Materia sintética {j}"})[0]
+            for j in range(1, 7)
+        ]
+        listado, _ = ListadoMaterias.objects.get_or_create(programa=programa, nombre=f"Listado sintético {hoy:%Y-%m}")
+        items = [
+            ListadoMateriaItem.objects.get_or_create(
+                listado=listado, materia=m,
+                defaults={"fecha_inicio": hoy - timedelta(days=30 * (6 - j)),
+                          "fecha_fin": hoy - timedelta(days=30 * (5 - j))},
+            )[0]
+            for j, m in enumerate(materias)
+        ]
+        inscritos = por_programa.get(programa.pk, [])
+        ListadoAlumno.objects.bulk_create(
+            [ListadoAlumno(listado=listado, alumno=a) for a in inscritos], batch_size=batch_size,
+        )
+        califs = (
+            Calificacion(item=it, alumno=a, nota=Decimal(rnd.randint(50, 100)) / 10,
+                         aprobado=True, fecha=it.fecha_fin)
+            for a in inscritos for it in items
+        )
+        for lote in _lotes(califs, batch_size):
+            Calificacion.objects.bulk_create(lote)
+            total += len(lote)
+    return total
+
+
+def _lms(rnd, alumnos, grupos, batch_size):
+    from lms.models import AccesoCurso, Actividad, Curso, Leccion, Modulo
+
+    hoy = timezone.localdate()
+    cursos = []
+    for g in grupos:
+        for j in range(1, 4):
+            curso, creado = Curso.objects.get_or_create(
+                codigo=f"SINT-{g.pk}-{j}",
+                defaults={"programa_id": g.programa_id, "grupo": g, "nombre": f"Curso sintético {j}",
+                          "fecha_inicio": hoy - timedelta(days=60 * (3 - j)),
+                          "fecha_fin": hoy + timedelta(days=60 * (j - 1))},
+            )
+            cursos.append(curso)
+            if not creado:
+                continue
+            modulos = Modulo.objects.bulk_create([Modulo(curso=curso, titulo=f"Módulo {k}", orden=k) for k in range(1, 4)])
+            lecciones = Leccion.objects.bulk_create([
+                Leccion(modulo=m, titulo=f"Lección {k}", orden=k) for m in modulos for k in range(1, 5)
+            ])
+            Actividad.objects.bulk_create([
+                Actividad(leccion=l, titulo=f"Actividad {l.orden}", tipo=rnd.choice(["tarea", "quiz"]))
+                for l in lecciones
+            ])
+
+    cursos_por_grupo = {}
+    for c in cursos:
+        cursos_por_grupo.setdefault(c.grupo_id, []).append(c)
+    accesos = (
+        AccesoCurso(alumno=a, curso=c)
+        for a in alumnos
+        for c in cursos_por_grupo.get(a.informacionEscolar.grupo_nuevo_id, [])
+    )
+    total = 0
+    for lote in _lotes(accesos, batch_size):
+        AccesoCurso.objects.bulk_create(lote, ignore_conflicts=True)
+        total += len(lote)
+    return total
+
+
+def sembrar(*, alumnos=10_000, pagos=500_000, movimientos=2_000, invitaciones=1_000,
+            usuarios=50, programas=8, seed=2024, batch_size=2_000, log=None) -> dict:
+    """
+    Crea el conjunto completo. Cada bloque va en su propia transacción para que una
+    corrida grande no mantenga una sola transacción de minutos.
+    """
+    rnd = random.Random(seed)
+    log = log or logger.info
+    stats = {}
+
+    with transaction.atomic():
+        sedes, conceptos, tipos, progs, grupos = _catalogos(rnd, programas)
+    with transaction.atomic():
+        lista = _alumnos(rnd, alumnos, sedes, progs, grupos, batch_size)
+    stats["alumnos"] = len(lista)
+    log(f"alumnos: {len(lista)}")
+    if not lista:
+        return stats
+
+    # planes ya en memoria con su programa (evita consultas por alumno en los bloques siguientes)
+    por_pk = {p.pk: p for p in progs}
+    for a in lista:
+        a.informacionEscolar.programa = por_pk[a.informacionEscolar.programa_id]
+
+    pasos = [
+        ("usuarios", lambda: _usuarios(lista, usuarios)),
+        ("documentos", lambda: _documentos(rnd, lista, tipos, batch_size)),
+        ("cargos", lambda: _cargos(rnd, lista, conceptos, batch_size)),
+        ("pagos_diario", lambda: _pagos(rnd, lista, conceptos, pagos, batch_size)),
+        ("movimientos_banco", lambda: _movimientos(rnd, lista, movimientos, batch_size)),
+        ("cobros", lambda: _cobros(rnd, lista, invitaciones, batch_size)),
+        ("calificaciones", lambda: _academico(rnd, lista, progs, batch_size)),
+        ("accesos_lms", lambda: _lms(rnd, lista, grupos, batch_size)),
+    ]
+    for nombre, paso in pasos:
+        with transaction.atomic():
+            stats[nombre] = paso()
+        log(f"{nombre}: {stats[nombre]}")
+    return stats
+
+
+def limpiar() -> dict:
+    """Borra todo lo creado por `sembrar` (identificado por los prefijos)."""
+    from academico.models import ListadoMaterias, Materia
+    from lms.models import Curso
+
+    User = get_user_model()
+    alumnos = Alumno.objects.filter(email__endswith=f"@{DOMINIO_EMAIL}")
+    programas = Programa.objects.filter(codigo__startswith=PREFIJO_PROGRAMA)
+    stats = {}
+    with transaction.atomic():
+        stats["pagos_diario"] = PagoDiario.objects.filter(folio__startswith="SINT-").delete()[0]
+        stats["movimientos_banco"] = MovimientoBanco.objects.filter(uid_hash__startswith="sint").delete()[0]
+        planes = list(alumnos.values_list("informacionEscolar_id", flat=True))
+        stats["alumnos"] = alumnos.delete()[0]
+        DocumentoAlumno.objects.filter(info_escolar_id__in=planes).delete()
+        InformacionEscolar.objects.filter(pk__in=planes).delete()
+        Curso.objects.filter(programa__in=programas).delete()
+        ListadoMaterias.objects.filter(programa__in=programas).delete()
+        Materia.objects.filter(programa__in=programas).delete()
+        ProgramaDocumentoRequisito.objects.filter(programa__in=programas).delete()
+        stats["programas"] = programas.delete()[0]
+        User.objects.filter(username__startswith=PREFIJO_USUARIO).delete()
+    return stats
@@ -0,0 +1,167 @@
+# alumnos/services/detalle_alumno.py
+"""
+Datos de la ficha del alumno (`alumnos_detalle`) con un número fijo de consultas.
+
+`detalle_alumno(alumno, ...)` lee cada tabla una sola vez (cargos, pagos, documentos,
+requisitos del programa y calificaciones) y arma en memoria todas las pestañas:
+cargos exigibles, todos los pendientes, saldo por concepto (alumnos.cartera) y los
+avisos de la campana (reglas de alumnos.services.alertas). El número de consultas no depende de cuántos cargos, pagos o
+conceptos tenga el alumno.
+
+`alumno_para_detalle()` es el queryset con los select_related que usa la plantilla.
+"""
+from django.utils import timezone
+
+from alumnos.cartera import _q_pagos_del_alumno, aplicar_pagos, guardar_pagado
+from alumnos.models import Alumno, Cargo, DocumentoAlumno, PagoDiario, ProgramaDocumentoRequisito
+from alumnos.services import alertas
+
+SELECT_RELATED = (
+    "user", "created_by", "pais", "estado",
+    "informacionEscolar",
+    "informacionEscolar__programa",
+    "informacionEscolar__financiamiento",
+    "informacionEscolar__grupo_nuevo",
+    "informacionEscolar__estatus_academico",
+    "informacionEscolar__estatus_administrativo",
+    "informacionEscolar__sede__pais",
+    "informacionEscolar__sede__estado",
+)
+
+
+def alumno_para_detalle():
+    return Alumno.objects.select_related(*SELECT_RELATED)
+
+
+# ============================================================
+# Cargos
+# ============================================================
+
+def _marcar_cargo(c, hoy):
+    """Mismas banderas que antes se anotaban en SQL (due_date, is_overdue, ...)."""
+    fv = c.fecha_vencimiento
+    c.due_date = fv or c.fecha_cargo
+    c.is_overdue = (fv < hoy) if fv else (c.fecha_cargo < hoy)
+    c.is_in_date_window = (c.fecha_cargo <= hoy <= fv) if fv else (c.fecha_cargo == hoy)
+    c.status_order = 0 if c.is_overdue else (1 if c.is_in_date_window else 2)
+
+
+def _separar_cargos(cargos, hoy):
+    """
+    (exigibles, todos_pendientes) a partir de los cargos ya reconciliados.
+    Exigibles: en fecha de pago o vencidos; vencidos primero y luego por fecha desc.
+    Pendientes: vencidos → en fecha → por pagar.
+    """
+    pendientes = [c for c in cargos if not c.pagado]
+    for c in pendientes:
+        _marcar_cargo(c, hoy)
+
+    exigibles = [
+        c for c in pendientes
+        if c.fecha_cargo <= hoy or (c.fecha_vencimiento and c.fecha_vencimiento <= hoy)
+    ]
+    exigibles.sort(key=lambda c: (0 if c.is_overdue else 1, -c.due_date.toordinal(), -c.id))
+    todos = sorted(pendientes, key=lambda c: (c.status_order, c.due_date, -c.id))
+    return exigibles, todos
+
+
+def _filas_saldo(rows, hoy):
+    for d in rows:
+        fc = d.get("fecha_cargo")
+        fv = d.get("fecha_vencimiento") or None
+        if d.get("monto_restante", 0) > 0 and fc:
+            d.setdefault("is_overdue", (fv is not None and fv < hoy) or (fv is None and fc < hoy))
+            d.setdefault("is_in_date_window", (fv is not None and fc <= hoy <= fv) or (fv is None and fc == hoy))
+    return rows
+
+
+# ============================================================
+# Ficha completa
+# ============================================================
+
+def detalle_alumno(alumno, *, ver_pagos: bool, ver_documentos: bool,
+                   restar_pagos_mas_recientes: bool = True, hoy=None) -> dict:
+    """
+    Contexto de alumnos/detalle.html (salvo permisos de la vista). Reconcilia el saldo
+    por concepto y persiste Cargo.pagado como calcular_cargos_con_saldo, pero con una
+    sola lectura de cargos y de pagos para todas las pestañas.
+    """
+    from academico.models import Calificacion
+
+    hoy = hoy or timezone.now().date()
+    info = alumno.informacionEscolar
+    prog = info.programa if info else None
+
+    # -------- Cargos y pagos: una consulta cada uno --------
+    cargos = list(
+        Cargo.objects.filter(alumno=alumno)
+        .select_related("concepto")
+        .order_by("-fecha_cargo", "-id")
+    )
+    # misma lista para la pestaña de pagos y para el saldo
+    pagos_alumno = list(
+        PagoDiario.objects.filter(_q_pagos_del_alumno(alumno)).order_by("fecha", "-id")
+    )
+
+    rows, cambiados = aplicar_pagos(
+        cargos, [p for p in pagos_alumno if p.monto], restar_pagos_mas_recientes,
+    )
+    guardar_pagado(cambiados)
+    exigibles, pendientes = _separar_cargos(cargos, hoy)
+    _filas_saldo(rows, hoy)
+
+    pagos = pagos_total = None
+    if ver_pagos:
+        pagos = pagos_alumno
+        pagos_total = round(sum(p.monto for p in pagos if p.monto is not None), 2)
+
+    # -------- Documentos dinámicos por programa --------
+    docs, faltantes, docs_last_update = [], [], None
+    if ver_documentos and info and prog:
+        docs = list(
+            DocumentoAlumno.objects
+            .filter(info_escolar=info)
+            .select_related("tipo", "verificado_por", "subido_por")
+            .order_by("-actualizado_en")
+        )
+        docs_last_update = max((d.actualizado_en for d in docs), default=None)
+        subidos_tipo_ids = {d.tipo_id for d in docs if d.tipo_id}
+        faltantes = [
+            r.tipo for r in
+            ProgramaDocumentoRequisito.objects.filter(programa=prog, activo=True).select_related("tipo")
+            if r.tipo_id not in subidos_tipo_ids
+        ]
+
+    califs = list(
+        Calificacion.objects
+        .filter(alumno=alumno)
+        .select_related("item", "item__materia", "item__listado", "item__listado__programa")
+        .order_by("-item__listado__creado_en", "item__fecha_inicio", "item__materia__codigo")
+    )
+
+    return {
+        "hoy": hoy,
+        "hay_cargos_vinculados": bool(cargos),
+        "pagos": pagos,
+        "pagos_total": pagos_total or 0,
+        "pago_total_mayor_a_cero": bool(pagos_total and pagos_total > 0),
+        "cargos": exigibles if ver_pagos else None,
+        "cargos_pendientes": exigibles if ver_pagos else None,
+        "cargos_todos": pendientes,
+        "rows": rows,
+        "totales": {
+            "original": sum(d["monto_original"] for d in rows),
+            "aplicado": sum(d["monto_aplicado"] for d in rows),
+            "restante": sum(d["monto_restante"] for d in rows),
+        },
+        "docs": docs,
+        "docs_total": len(docs),
+        "docs_last_update": docs_last_update,
+        "faltantes": faltantes,
+        "fin_programa_is_future": bool(info and info.fin_programa and info.fin_programa > hoy),
+        "califs": califs,
+        "bell_items": alertas.mensajes(
+            alertas.flags_de(alumno, n_pendientes=len(exigibles), n_faltantes=len(faltantes)),
+            n_pendientes=len(exigibles), n_faltantes=len(faltantes),
+        ),
+    }
@@ -0,0 +1,241 @@
+# alumnos/services/documentos_derivados.py
+"""
+Derivados de DocumentoAlumno, generados una sola vez por archivo subido:
+  - `derivado`: PDF listo para unir. Imágenes -> orientadas (EXIF), redimensionadas y
+    recomprimidas a JPEG dentro de una hoja A4. PDFs -> reescritos con flujos comprimidos
+    (solo si el resultado es más chico; si no, se usa el original).
+  - `miniatura`: JPEG pequeño para listados (solo imágenes; no hay renderizador de PDF).
+  - `paginas`, `bytes_original`, `bytes_derivado`.
+Documentos con el mismo blob (mismo contenido) reutilizan la conversión ya hecha.
+
+Lo ejecuta el worker `manage.py procesar_documentos`; las vistas solo leen los
+derivados (ver DocumentoAlumno.archivo_para_pdf).
+"""
+import logging
+import os
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from django.utils import timezone
+
+from alumnos.models import DocumentoAlumno
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}
+
+MAX_LADO_PX = 2000       # ~180 dpi en A4: legible y muy por debajo de una foto de celular
+JPEG_QUALITY = 80
+MINIATURA_PX = 240
+# Un documento en 'procesando' más tiempo que esto se considera abandonado (worker caído)
+LOCK_TIMEOUT = timedelta(minutes=15)
+
+
+def _leer(fieldfile) -> bytes:
+    fieldfile.open("rb")
+    try:
+        return fieldfile.read()
+    finally:
+        try:
+            fieldfile.close()
+        except Exception:
+            pass
+
+
+def _abrir_imagen(data: bytes):
+    from PIL import Image, ImageOps
+
+    im = Image.open(BytesIO(data))
+    im = ImageOps.exif_transpose(im)
+    if im.mode not in ("RGB", "L"):
+        fondo = Image.new("RGB", im.size, "white")
+        if im.mode in ("RGBA", "LA", "P"):
+            im = im.convert("RGBA")
+            fondo.paste(im, mask=im.split()[-1])
+        else:
+            fondo.paste(im.convert("RGB"))
+        im = fondo
+    return im
+
+
+def _jpeg(im, max_px: int, quality: int) -> bytes:
+    from PIL import Image
+
+    im = im.copy()
+    im.thumbnail((max_px, max_px), Image.LANCZOS)
+    buf = BytesIO()
+    im.save(buf, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def _pdf_desde_jpeg(jpeg_bytes: bytes, size) -> bytes:
+    """Hoja A4 con la imagen centrada (mismos márgenes que _image_file_to_pdf_bytes)."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    W, H = A4
+    max_w, max_h = W - 80, H - 160
+    iw, ih = size
+    scale = min(max_w / iw, max_h / ih, 1.0) if iw and ih else 1.0
+    w, h = iw * scale, ih * scale
+
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    # JPEG se incrusta tal cual (DCTDecode), sin volver a decodificar
+    c.drawImage(ImageReader(BytesIO(jpeg_bytes)), (W - w) / 2, (H - h) / 2, width=w, height=h)
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def _derivados_imagen(data: bytes):
+    im = _abrir_imagen(data)
+    jpeg = _jpeg(im, MAX_LADO_PX, JPEG_QUALITY)
+    from PIL import Image
+    size = Image.open(BytesIO(jpeg)).size
+    pdf = _pdf_desde_jpeg(jpeg, size)
+    miniatura = _jpeg(im, MINIATURA_PX, 70)
+    return pdf, miniatura, 1
+
+
+def _derivados_pdf(data: bytes):
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(BytesIO(data))
+    paginas = len(reader.pages)
+    writer = PdfWriter(clone_from=reader)
+    for page in writer.pages:
+        page.compress_content_streams()
+    writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+    buf = BytesIO()
+    writer.write(buf)
+    pdf = buf.getvalue()
+    if len(pdf) >= len(data):
+        pdf = None  # no ganamos nada: se une el original
+    return pdf, None, paginas
+
+
+def _borrar(fieldfile, doc):
+    # Los derivados pueden estar compartidos entre documentos con el mismo blob
+    if fieldfile and fieldfile.name:
+        compartido = (
+            DocumentoAlumno.objects.exclude(pk=doc.pk)
+            .filter(Q(derivado=fieldfile.name) | Q(miniatura=fieldfile.name))
+            .exists()
+        )
+        if compartido:
+            return
+        try:
+            fieldfile.storage.delete(fieldfile.name)
+        except Exception:
+            logger.warning("No se pudo borrar %s", fieldfile.name, exc_info=True)
+
+
+def _derivados_de_otro(doc):
+    """Otro documento con el mismo blob y derivados vigentes (misma conversión)."""
+    if not doc.blob_id:
+        return None
+    return (
+        DocumentoAlumno.objects
+        .filter(blob_id=doc.blob_id, derivado_estado="listo", derivado_origen=doc.archivo.name)
+        .exclude(pk=doc.pk)
+        .first()
+    )
+
+
+def generar_derivados(doc: DocumentoAlumno) -> DocumentoAlumno:
+    """
+    Genera (o regenera) los derivados de `doc` y lo marca 'listo'.
+    Lanza la excepción original si el archivo no se puede leer/convertir.
+    """
+    origen = doc.archivo.name or ""
+    otro = _derivados_de_otro(doc)
+
+    _borrar(doc.derivado, doc)
+    _borrar(doc.miniatura, doc)
+
+    if otro:
+        # Mismo contenido ya convertido: se reutilizan sus archivos
+        doc.derivado = otro.derivado.name or None
+        doc.miniatura = otro.miniatura.name or None
+        doc.paginas = otro.paginas
+        doc.bytes_original = otro.bytes_original
+        doc.bytes_derivado = otro.bytes_derivado
+    else:
+        data = _leer(doc.archivo)
+        nombre = os.path.splitext(doc.nombre_archivo)[0] or f"doc-{doc.pk}"
+        ext = os.path.splitext(origen)[1].lower()
+
+        if ext in IMAGE_EXTS:
+            pdf, miniatura, paginas = _derivados_imagen(data)
+        elif ext == ".pdf":
+            pdf, miniatura, paginas = _derivados_pdf(data)
+        else:
+            pdf, miniatura, paginas = None, None, None
+
+        doc.derivado = None
+        doc.miniatura = None
+        if pdf:
+            doc.derivado.save(f"{nombre}.pdf", ContentFile(pdf), save=False)
+        if miniatura:
+            doc.miniatura.save(f"{nombre}.jpg", ContentFile(miniatura), save=False)
+
+        doc.paginas = paginas
+        doc.bytes_original = len(data)
+        doc.bytes_derivado = len(pdf) if pdf else None
+    doc.derivado_origen = origen
+    doc.derivado_estado = "listo"
+    doc.derivado_error = ""
+    doc.derivado_en = timezone.now()
+    doc.save(update_fields=[
+        "derivado", "miniatura", "paginas", "bytes_original", "bytes_derivado",
+        "derivado_origen", "derivado_estado", "derivado_error", "derivado_en",
+    ])
+    # Si reemplazaron el archivo mientras procesábamos, vuelve a la cola
+    DocumentoAlumno.objects.filter(pk=doc.pk).exclude(archivo=origen).update(derivado_estado="pendiente")
+    return doc
+
+
+def pendientes():
+    now = timezone.now()
+    return (
+        DocumentoAlumno.objects
+        .exclude(archivo="")
+        .filter(
+            Q(derivado_estado="pendiente")
+            | Q(derivado_estado="procesando", derivado_en__lt=now - LOCK_TIMEOUT)
+        )
+        .order_by("id")
+    )
+
+
+def _reclamar(doc) -> bool:
+    """Marca 'procesando' solo si otro worker no lo tomó (update condicional)."""
+    now = timezone.now()
+    reclamable = Q(derivado_estado="pendiente") | Q(derivado_estado="procesando", derivado_en__lt=now - LOCK_TIMEOUT)
+    return DocumentoAlumno.objects.filter(reclamable, pk=doc.pk).update(
+        derivado_estado="procesando", derivado_en=now,
+    ) == 1
+
+
+def procesar_pendientes(limit: int = 50) -> dict:
+    stats = {"procesados": 0, "errores": 0, "omitidos": 0}
+    for doc in list(pendientes().select_related("info_escolar", "tipo")[:limit]):
+        if not _reclamar(doc):
+            stats["omitidos"] += 1
+            continue
+        try:
+            generar_derivados(doc)
+            stats["procesados"] += 1
+        except Exception as exc:
+            logger.exception("No se pudieron generar derivados del documento %s", doc.pk)
+            DocumentoAlumno.objects.filter(pk=doc.pk).update(
+                derivado_estado="error",
+                derivado_error=f"{type(exc).__name__}: {exc}"[:2000],
+                derivado_origen=doc.archivo.name or "",
+            )
+            stats["errores"] += 1
+    return stats
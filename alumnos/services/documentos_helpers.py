@@ -1,6 +1,15 @@
 # alumnos/services/documentos_helpers.py
 from alumnos.models import ProgramaDocumentoRequisito
 
+
+def es_nacional(alumno) -> bool:
+    # Ajusta esta lógica si tu definición de "nacional" difiere
+    try:
+        return bool(alumno and alumno.pais and (alumno.pais.codigo_iso2 or "").upper() == "MX")
+    except Exception:
+        return False
+
+
 def requisitos_para_alumno(programa, alumno):
     """
     Devuelve los requisitos documentales que aplican al alumno, filtrando por nacionales/extranjeros.
@@ -9,17 +18,9 @@ def requisitos_para_alumno(programa, alumno):
     if not programa:
         return ProgramaDocumentoRequisito.objects.none()
 
-    # Ajusta esta lógica si tu definición de "nacional" difiere
-    es_nacional = False
-    try:
-        if alumno and alumno.pais and (alumno.pais.codigo_iso2 or "").upper() == "MX":
-            es_nacional = True
-    except Exception:
-        pass
-
     qs = ProgramaDocumentoRequisito.objects.filter(programa=programa, activo=True)
 
-    if es_nacional:
+    if es_nacional(alumno):
         qs = qs.exclude(aplica_a="solo_extranjeros")
     else:
         qs = qs.exclude(aplica_a="solo_nacionales")
@@ -0,0 +1,274 @@
+# alumnos/services/estado_cuenta.py
+"""
+Motor de estados de cuenta.
+
+- `contexto_estado_cuenta(alumno, pagos)`: arma el contexto de reportes/estado_cuenta.html
+  a partir de pagos ya cargados (sin consultas extra).
+- `calcular_estados_cuenta(alumnos_qs, hasta=None)`: una sola consulta sobre PagoDiario
+  ordenada por alumno y agrupada en Python para todos los alumnos a la vez.
+- `generar_cortes(periodo, ...)`: guarda EstadoCuentaSnapshot por alumno (bulk).
+- `renderizar_pdfs(ids, procesos)`: genera los PDF de los cortes en un pool de procesos.
+"""
+import logging
+from calendar import monthrange
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from decimal import Decimal
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Q
+
+from alumnos.models import Alumno, EstadoCuentaSnapshot, PagoDiario
+from alumnos.services.pdf_render import html_a_pdf
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE = "reportes/estado_cuenta.html"
+
+INSTITUCION = {
+    "nombre": "INSTITUTO UNIVERSITARIO DE ALTA FORMACIÓN IUAF SC.",
+    "direccion": "Blvd Kukulcan km 3.5 plaza nautilus local 53, Zona Hotelera",
+    "ciudad": "Cancún, Q.ROO.",
+    "telefono": "998 253 6750",
+    "rfc": "IUA170913LI2",
+    "cct": "23PSU0064H",
+    "email": "cadministrativa@iuaf.edu.mx",
+}
+
+
+def fin_de_mes(periodo: date) -> date:
+    return date(periodo.year, periodo.month, monthrange(periodo.year, periodo.month)[1])
+
+
+def contexto_estado_cuenta(alumno, pagos) -> dict:
+    """
+    `alumno` con informacionEscolar (y su programa) ya cargados; `pagos` lista de
+    PagoDiario del alumno en orden (fecha, pk). El resultado es serializable a JSON.
+    """
+    info = getattr(alumno, "informacionEscolar", None)
+    programa = getattr(info, "programa", None)
+
+    hay_pagos = bool(pagos)
+    numero_colegiatura = (getattr(info, "meses_programa", 0) or 0) if hay_pagos else 0
+    precio_final = Decimal(getattr(info, "precio_final", 0) or 0) if hay_pagos else Decimal("0")
+    precio_total = precio_final * numero_colegiatura
+
+    grado = getattr(programa, "codigo", "") or getattr(info, "grupo", "") or ""
+    programa_nombre = getattr(programa, "nombre", "") or ""
+
+    filas = []
+    total_pagado_num = Decimal("0.00")
+    for p in pagos:
+        total_pagado_num += p.monto or Decimal("0")
+        filas.append({
+            "monto": float(p.monto or 0),
+            "grado": grado,
+            "forma_pago": p.forma_pago or "",
+            "fecha_pago": p.fecha.strftime("%d/%m/%Y") if p.fecha else "",
+            "concepto": p.concepto or "",
+            "detalle": p.pago_detalle or "",
+            "programa": p.programa or programa_nombre,
+        })
+
+    colegiatura = Decimal(str(getattr(info, "precio_colegiatura", 0) or 0))
+    n_colegiaturas = (
+        getattr(info, "numero_reinscripciones", None)
+        or getattr(info, "meses_programa", None)
+        or 20
+    )
+
+    total_programa_num = colegiatura * Decimal(n_colegiaturas or 0)
+    if total_programa_num <= 0:
+        total_programa_num = total_pagado_num
+
+    adeudo_num = total_programa_num - total_pagado_num
+    if adeudo_num < 0:
+        adeudo_num = Decimal("0.00")
+
+    inicio = getattr(info, "inicio_programa", None)
+    alumno_ctx = {
+        "matricula": getattr(info, "matricula", "") or "",
+        "nombre": f"{alumno.nombre} {alumno.apellido_p or ''} {alumno.apellido_m or ''}".strip(),
+        "grupo": getattr(info, "grupo", "") or "",
+        "programa": programa_nombre,
+        "curp": alumno.curp or "",
+        "no_alumno": alumno.numero_estudiante,
+        "fecha_1er_pago": inicio.strftime("%d/%m/%Y") if inicio else "",
+    }
+
+    deuda = precio_total - total_pagado_num
+
+    return {
+        "institucion": INSTITUCION,
+        "alumno": alumno_ctx,
+        "pagos": filas,
+        "total_programa": f"{total_programa_num:,.2f}",
+        "total_pagado": f"{total_pagado_num:,.2f}",
+        "adeudo": f"{adeudo_num:,.2f}",
+        "numero_colegiatura": numero_colegiatura,
+        "precio_final": f"{precio_final:,.2f}",
+        "precio_total": f"{precio_total:,.2f}",
+        "deuda": f"{deuda:,.2f}",
+        # imágenes (coloca en /static/iuaf/)
+        "logo": "iuaf/logo-placeholder.png",
+        "qr": "iuaf/qr-placeholder.png",
+        "stamp": "iuaf/stamp-placeholder.png",
+        # valores numéricos para guardar en el corte
+        "_total_pagado": str(total_pagado_num),
+        "_adeudo": str(adeudo_num),
+    }
+
+
+def _pagos_qs(hasta=None):
+    qs = PagoDiario.objects.filter(alumno__isnull=False).only(
+        "alumno_id", "monto", "forma_pago", "fecha", "concepto", "pago_detalle", "programa",
+    )
+    if hasta:
+        qs = qs.filter(Q(fecha__lte=hasta) | Q(fecha__isnull=True))
+    return qs
+
+
+def calcular_estados_cuenta(alumnos_qs, hasta=None):
+    """
+    Itera (alumno, contexto) para todos los alumnos de `alumnos_qs`.
+    Dos consultas en total: alumnos (con info/programa) y pagos ordenados por alumno.
+    """
+    alumnos = {
+        a.pk: a
+        for a in alumnos_qs.select_related("informacionEscolar", "informacionEscolar__programa")
+    }
+    pagos = (
+        _pagos_qs(hasta)
+        .filter(alumno__in=alumnos_qs.values("pk"))
+        .order_by("alumno_id", "fecha", "pk")
+    )
+    con_pagos = set()
+    for alumno_id, grupo in groupby(pagos.iterator(chunk_size=2000), key=lambda p: p.alumno_id):
+        con_pagos.add(alumno_id)
+        alumno = alumnos[alumno_id]
+        yield alumno, contexto_estado_cuenta(alumno, list(grupo))
+    for alumno_id, alumno in alumnos.items():
+        if alumno_id not in con_pagos:
+            yield alumno, contexto_estado_cuenta(alumno, [])
+
+
+def contexto_para_plantilla(contexto: dict) -> dict:
+    return {k: v for k, v in contexto.items() if not k.startswith("_")}
+
+
+def generar_cortes(periodo: date, alumnos_qs=None, *, regenerar=False, batch_size=500) -> dict:
+    """
+    Crea los EstadoCuentaSnapshot del mes de `periodo` (día 1). Los cortes existentes
+    no se tocan salvo `regenerar=True` (se reemplazan, incluido el PDF).
+    """
+    periodo = periodo.replace(day=1)
+    hasta = fin_de_mes(periodo)
+    if alumnos_qs is None:
+        alumnos_qs = Alumno.objects.filter(informacionEscolar__isnull=False)
+
+    existentes = set(
+        EstadoCuentaSnapshot.objects.filter(periodo=periodo).values_list("alumno_id", flat=True)
+    )
+    if not regenerar:
+        alumnos_qs = alumnos_qs.exclude(pk__in=existentes)
+
+    stats = {"creados": 0, "reemplazados": 0}
+    lote = []
+
+    def _flush():
+        if not lote:
+            return
+        ids = [s.alumno_id for s in lote]
+        with transaction.atomic():
+            if regenerar:
+                viejos = EstadoCuentaSnapshot.objects.filter(periodo=periodo, alumno_id__in=ids)
+                for s in viejos.exclude(pdf=""):
+                    s.pdf.delete(save=False)
+                stats["reemplazados"] += viejos.delete()[0]
+            EstadoCuentaSnapshot.objects.bulk_create(lote, batch_size=batch_size)
+        stats["creados"] += len(lote)
+        lote.clear()
+
+    for alumno, ctx in calcular_estados_cuenta(alumnos_qs, hasta=hasta):
+        lote.append(EstadoCuentaSnapshot(
+            alumno=alumno,
+            periodo=periodo,
+            contexto=ctx,
+            total_pagado=Decimal(ctx["_total_pagado"]),
+            adeudo=Decimal(ctx["_adeudo"]),
+            num_pagos=len(ctx["pagos"]),
+        ))
+        if len(lote) >= batch_size:
+            _flush()
+    _flush()
+    return stats
+
+
+# ============================================================
+# PDF (pool de procesos)
+# ============================================================
+
+def renderizar_pdf(snapshot_id: int) -> int:
+    from django.core.files.base import ContentFile
+    from django.template.loader import render_to_string
+
+    snap = EstadoCuentaSnapshot.objects.get(pk=snapshot_id)
+    html = render_to_string(TEMPLATE, contexto_para_plantilla(snap.contexto))
+    if snap.pdf:
+        snap.pdf.delete(save=False)
+    snap.pdf.save(f"{snap.alumno_id}.pdf", ContentFile(html_a_pdf(html)), save=False)
+    EstadoCuentaSnapshot.objects.filter(pk=snap.pk).update(pdf=snap.pdf.name)
+    return snapshot_id
+
+
+def _init_worker():
+    import django
+    from django.db import connections
+
+    django.setup()
+    # no heredar conexiones abiertas del proceso padre
+    connections.close_all()
+
+
+def _renderizar_lote(ids):
+    ok, errores = 0, []
+    for sid in ids:
+        try:
+            renderizar_pdf(sid)
+            ok += 1
+        except Exception as exc:
+            errores.append((sid, f"{type(exc).__name__}: {exc}"))
+    return ok, errores
+
+
+def renderizar_pdfs(snapshot_ids, *, procesos: int = 4, lote: int = 50) -> dict:
+    """
+    Genera los PDF en paralelo. Con procesos<=1 corre en el proceso actual.
+    """
+    ids = list(snapshot_ids)
+    stats = {"pdfs": 0, "errores": 0}
+    if not ids:
+        return stats
+
+    lotes = [ids[i:i + lote] for i in range(0, len(ids), lote)]
+    if procesos <= 1:
+        resultados = (_renderizar_lote(l) for l in lotes)
+    else:
+        from django.db import connections
+
+        connections.close_all()
+        pool = ProcessPoolExecutor(max_workers=procesos, initializer=_init_worker)
+        futuros = [pool.submit(_renderizar_lote, l) for l in lotes]
+        resultados = (f.result() for f in as_completed(futuros))
+
+    try:
+        for ok, errores in resultados:
+            stats["pdfs"] += ok
+            stats["errores"] += len(errores)
+            for sid, err in errores:
+                logger.error("PDF de estado de cuenta %s falló: %s", sid, err)
+    finally:
+        if procesos > 1:
+            pool.shutdown()
+    return stats
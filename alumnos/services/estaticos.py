@@ -0,0 +1,188 @@
+# alumnos/services/estaticos.py
+"""
+Estáticos para producción:
+
+- `StaticComprimido` (STORAGES["staticfiles"] sin DEBUG): collectstatic copia cada
+  archivo también con hash en el nombre (`app.3f2a9c1b0d4e.css`, caché "immutable" en
+  nginx) y deja junto a los de texto un `.gz` (zopfli) y un `.br` (brotli) para que nginx
+  los sirva con gzip_static / brotli_static sin comprimir en cada petición.
+- Las imágenes de correos y PDFs (STATIC_IMAGENES_OPTIMIZAR) se reducen con
+  `optimizar_imagen(...)` solo en la copia de STATIC_ROOT: la fuente en static/ queda
+  intacta. `ruta_estatico` prefiere esa copia cuando está al día.
+
+Las referencias a archivos que no existen (CSS del tema, fuentes opcionales) se dejan
+sin hash en lugar de romper collectstatic o la plantilla.
+"""
+import gzip
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+COMPRIMIBLES = (
+    ".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".xml", ".html",
+    ".ico", ".ttf", ".otf", ".eot", ".webmanifest",
+)
+MIN_BYTES = 1024        # más chico no vale la pena (cabe en un paquete)
+MIN_AHORRO = 0.05       # solo se guarda la versión comprimida si ahorra al menos 5 %
+
+
+# ============================================================
+# Compresión
+# ============================================================
+
+def comprimir_gzip(datos: bytes) -> bytes:
+    try:
+        import zopfli.gzip
+    except ImportError:
+        return gzip.compress(datos, compresslevel=9, mtime=0)
+    return zopfli.gzip.compress(datos, numiterations=settings.STATIC_ZOPFLI_ITERACIONES)
+
+
+def comprimir_brotli(datos: bytes):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(datos, quality=11)
+
+
+class StaticComprimido(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            logger.warning("Estático inexistente, se deja sin hash: %s", name)
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        nombres = set()
+        for nombre in paths:
+            nombres.add(nombre)
+            hasheado = self.hashed_files.get(self.hash_key(self.clean_name(nombre)))
+            if hasheado:
+                nombres.add(hasheado)
+        comprimidos = sum(self._comprimir(n) for n in sorted(nombres) if n.lower().endswith(COMPRIMIBLES))
+        logger.info("collectstatic: %s versiones .gz/.br escritas", comprimidos)
+
+        optimizadas = 0
+        for rel in settings.STATIC_IMAGENES_OPTIMIZAR:
+            if rel not in paths:
+                continue
+            for nombre in {rel, self.hashed_files.get(self.hash_key(rel), rel)}:
+                if self.exists(nombre):
+                    antes, despues = optimizar_imagen(self.path(nombre))
+                    optimizadas += despues < antes
+        logger.info("collectstatic: %s imágenes reducidas", optimizadas)
+
+    def _comprimir(self, nombre) -> int:
+        if not self.exists(nombre):
+            return 0
+        modificado = self.get_modified_time(nombre)
+        pendientes = [
+            (ext, fn) for ext, fn in ((".gz", comprimir_gzip), (".br", comprimir_brotli))
+            if not self.exists(nombre + ext) or self.get_modified_time(nombre + ext) < modificado
+        ]
+        if not pendientes:
+            return 0
+
+        with self.open(nombre) as fh:
+            datos = fh.read()
+        if len(datos) < MIN_BYTES:
+            return 0
+
+        escritos = 0
+        for ext, fn in pendientes:
+            comprimido = fn(datos)
+            if comprimido is None or len(comprimido) > len(datos) * (1 - MIN_AHORRO):
+                continue
+            if self.exists(nombre + ext):
+                self.delete(nombre + ext)
+            self._save(nombre + ext, ContentFile(comprimido))
+            escritos += 1
+        return escritos
+
+
+def ruta_estatico(relpath: str):
+    """
+    Archivo en disco de un estático, también si viene con hash ({% static %} en
+    producción): primero los finders (fuente), luego STATIC_ROOT. None si no existe.
+    Las imágenes de STATIC_IMAGENES_OPTIMIZAR salen de STATIC_ROOT (ya reducidas)
+    mientras esa copia no sea más vieja que la fuente.
+    """
+    from django.contrib.staticfiles import finders
+
+    fuente = finders.find(relpath)
+    colectada = os.path.join(settings.STATIC_ROOT, relpath) if settings.STATIC_ROOT else None
+    if colectada is None or not os.path.isfile(colectada):
+        return fuente
+    if fuente is None:
+        return colectada
+    if relpath in settings.STATIC_IMAGENES_OPTIMIZAR and os.path.getmtime(colectada) >= os.path.getmtime(fuente):
+        return colectada
+    return fuente
+
+
+# ============================================================
+# Imágenes
+# ============================================================
+
+ERROR_MAX_PALETA = 1.5  # diferencia media por canal (0-255) aceptada al pasar a paleta
+
+
+def _a_paleta(im, colores):
+    """Paleta con difuminado; None si se nota (degradados, fotos)."""
+    from PIL import Image, ImageChops, ImageStat
+
+    if im.mode == "RGB":
+        paleta = im.quantize(colores, method=Image.Quantize.MEDIANCUT)
+    else:
+        paleta = im.quantize(colores, method=Image.Quantize.FASTOCTREE)  # el único que respeta alfa
+    diferencia = ImageStat.Stat(ImageChops.difference(im, paleta.convert(im.mode))).mean
+    return paleta if max(diferencia) <= ERROR_MAX_PALETA else None
+
+
+def optimizar_imagen(ruta: str, *, colores: int = 256, calidad_jpeg: int = 85, escribir: bool = True):
+    """
+    Reescribe la imagen si queda más chica (con pérdida: usar solo sobre copias). PNG: quita el canal alfa si es opaco y pasa
+    a paleta de `colores` cuando no se nota (ERROR_MAX_PALETA); si no, o con colores=0,
+    solo optimización sin pérdida. JPEG: progresivo a `calidad_jpeg`. Respeta el formato
+    real (hay JPEG con extensión .png). Devuelve (antes, después).
+    """
+    from PIL import Image
+
+    antes = os.path.getsize(ruta)
+    with Image.open(ruta) as im:
+        im.load()
+        formato = im.format
+        buf = io.BytesIO()
+        if formato == "PNG":
+            if im.mode not in ("P", "1", "L"):
+                im = im.convert("RGBA")
+                if im.getchannel("A").getextrema() == (255, 255):
+                    im = im.convert("RGB")
+                im = (_a_paleta(im, colores) if colores else None) or im
+            im.save(buf, "PNG", optimize=True)
+        elif formato == "JPEG":
+            im.save(buf, "JPEG", quality=calidad_jpeg, optimize=True, progressive=True)
+        else:
+            return antes, antes
+
+    datos = buf.getvalue()
+    if len(datos) >= antes * (1 - MIN_AHORRO):
+        return antes, antes
+    if escribir:
+        with open(ruta, "wb") as fh:
+            fh.write(datos)
+    return antes, len(datos)
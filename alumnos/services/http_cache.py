@@ -0,0 +1,70 @@
+# alumnos/services/http_cache.py
+"""
+Caché HTTP condicional (ETag / If-None-Match -> 304) para las APIs JSON que consultan
+los formularios de alta/edición de alumno en cada cambio de campo.
+
+El ETag sale de la versión de los catálogos (alumnos.services.catalogos), así que
+calcularlo no hace consultas. Las respuestas van con `Cache-Control: private, max-age`
+(API_LOOKUP_MAX_AGE): el navegador repite sin pedir nada durante ese tiempo y después
+revalida con If-None-Match. Son vistas con login, por eso `private`: nginx no las guarda
+en su caché compartida, solo deja pasar el 304.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+# Subir si cambia el JSON que arman las vistas: invalida los ETag ya emitidos
+FORMATO = "1"
+
+
+def etag_catalogos(*nombres):
+    """etag_func para `condicional`: la versión compartida de los catálogos indicados."""
+
+    def etag(request, *args, **kwargs):
+        from alumnos.services import catalogos
+
+        versiones = [catalogos.version(n) for n in nombres]
+        if any(v is None for v in versiones):
+            return None  # sin caché compartida no hay versión estable: respuesta normal
+        return "-".join([f"v{FORMATO}", *nombres, *map(str, versiones)])
+
+    return etag
+
+
+def condicional(etag_func, *, max_age=None):
+    """
+    Decorador (va debajo de login_required/permisos): responde 304 si If-None-Match
+    coincide y agrega ETag + Cache-Control privado a las respuestas GET/HEAD.
+    """
+
+    def _cabeceras(request, response):
+        if request.method in ("GET", "HEAD") and response.status_code in (200, 304) and response.has_header("ETag"):
+            edad = settings.API_LOOKUP_MAX_AGE if max_age is None else max_age
+            patch_cache_control(response, private=True, max_age=edad)
+            patch_vary_headers(response, ("Cookie",))
+        return response
+
+    def decorador(vista):
+        if iscoroutinefunction(vista):
+            # `condition` llama a etag_func de forma síncrona y aquí puede consultar la BD:
+            # se calcula antes, fuera del event loop, y se le pasa ya resuelto
+            @wraps(vista)
+            async def envoltura_async(request, *args, **kwargs):
+                etag = await sync_to_async(etag_func)(request, *args, **kwargs)
+                vista_condicional = condition(etag_func=lambda *a, **k: etag)(vista)
+                return _cabeceras(request, await vista_condicional(request, *args, **kwargs))
+
+            return envoltura_async
+
+        vista_condicional = condition(etag_func=etag_func)(vista)
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            return _cabeceras(request, vista_condicional(request, *args, **kwargs))
+
+        return envoltura
+
+    return decorador
@@ -0,0 +1,541 @@
+# alumnos/services/importacion_alumnos.py
+"""
+Importación de alumnos y de su plan (InformacionEscolar) desde la hoja de control
+(.xlsx/.xlsm). La usan `importar_alumnosV2` (alumno + plan) e `Informacion_escolar`
+(solo el plan de alumnos que ya existen).
+
+- Lectura: openpyxl en modo read_only, fila por fila; no carga el libro entero ni lo
+  lee dos veces. El encabezado es la fila, entre las primeras, que reconoce más
+  columnas.
+- Catálogos (países, sedes, programas, financiamientos y estatus) precargados en dicts
+  (alumnos.services.catalogos); los que falten se crean una sola vez.
+- Alumnos y planes existentes se leen con in_bulk y se escriben con bulk_create /
+  bulk_update por lotes, solo con los campos que cambiaron, en una transacción.
+- `dry_run`: lo mismo dentro de una transacción que se revierte; `diff` recibe las
+  altas y los cambios campo por campo.
+
+bulk_create/update no mandan señales: al confirmar se recalculan las alertas de los
+alumnos tocados (alertas.marcar). Una columna que no está en la hoja no se toca.
+Tampoco encolan la bienvenida de las altas: solo con `bienvenida`, en un solo lote
+(alumnos.services.correos).
+"""
+import logging
+import re
+import unicodedata
+from collections import Counter, namedtuple
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from itertools import chain, islice
+
+from django.db import transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+from openpyxl.utils.datetime import from_excel
+
+from alumnos.models import (
+    Alumno, EstatusAcademico, EstatusAdministrativo, Financiamiento, InformacionEscolar, Pais, Sede,
+)
+from alumnos.services import alertas, catalogos, correos
+from alumnos.services.vinculo_pagos import normalizar_curp
+
+logger = logging.getLogger(__name__)
+
+LOTE = 1000
+BUSCAR_ENCABEZADO = 80
+
+# clave -> encabezados aceptados (se comparan normalizados)
+COLUMNAS = {
+    "numero": ("No.", "No", "N°", "Nº", "Numero", "Número", "#", "ID"),
+    "programa": ("PROGRAMA",),
+    "curp": ("CURP",),
+    "matricula": ("Matrícula Of. SEQ",),
+    "nombre": ("NOMBRE",),
+    "telefono": ("TELEFONO",),
+    "correo": ("CORREO",),
+    "no_pagos": ("NO DE PAGOS (MESES)",),
+    "meses": ("Meses de Programa",),
+    "inscripcion": ("INSCRIPCIÓN",),
+    "colegiatura": ("Monto de Colegiatura (A PAGAR)",),
+    "grupo": ("Grupo de clase",),
+    "inicio": ("FECHA DE INICIO (PRIMERA CLASE CALENDARIO)",),
+    "fin_programa": ("Termina Programa",),
+    "sexo": ("Sexo",),
+    "sede": ("SEDE",),
+    "situacion": ("SITUACIÓN",),
+    "beca": ("Porcentaje de la Beca",),
+    "descuento": ("Monto del Descuento",),
+    "reinscripciones": ("# Reinsc",),
+    "equivalencia": ("Equivalencia",),
+    "titulacion": ("Titulación",),
+    "estatus_academico": ("ESTATUS ACADÉMICO",),
+}
+
+SEDE_PAISES = {"PANAMA": "Panamá", "GUATEMALA": "Guatemala"}
+
+# Sinónimos de estatus (código normalizado -> código del catálogo)
+MAP_ACADEMICO = {"BAJA": "BAJA_TEMPORAL"}
+MAP_ADMINISTRATIVO = {"BAJA": "BAJA_DEFINITIVA"}
+
+Cambio = namedtuple("Cambio", "numero accion campos")  # campos: [(campo, antes, después)]
+
+
+def describir(cambio) -> str:
+    """'123 cambio: email a@x -> b@x; plan.sede Cancún -> Toluca' (altas: solo el valor)."""
+    if cambio.accion == "alta":
+        campos = "; ".join(f"{c}={despues!s}" for c, _, despues in cambio.campos if despues not in (None, ""))
+    else:
+        campos = "; ".join(f"{c} {antes!s} -> {despues!s}" for c, antes, despues in cambio.campos)
+    return f"{cambio.numero} {cambio.accion}: {campos or 'sin cambios de campos'}"
+
+
+def reporte(stats, diff=None, mostrar=50):
+    """Líneas para la salida de los comandos: catálogos creados, repetidos y el diff."""
+    lineas = []
+    creados = {k[len("creados_"):]: v for k, v in stats.items() if k.startswith("creados_")}
+    if creados:
+        lineas.append("Catálogos creados: " + ", ".join(f"{k}: {v}" for k, v in creados.items()))
+    if stats["duplicados"]:
+        lineas.append(f"Números repetidos en la hoja (gana la última fila): {stats['duplicados']}")
+    if diff is not None:
+        lineas.append(f"SIMULACIÓN: no se guardó nada. Alumnos con cambios: {len(diff)}")
+        lineas += ["  " + describir(c) for c in diff[:mostrar or None]]
+        if mostrar and len(diff) > mostrar:
+            lineas.append(f"  ... y {len(diff) - mostrar} más")
+    return lineas
+
+
+# ============================================================
+# Conversión de celdas
+# ============================================================
+
+def norm(s) -> str:
+    """Sin acentos, mayúsculas, espacios colapsados y sin punto final (encabezados, códigos)."""
+    if s is None:
+        return ""
+    s = "".join(c for c in unicodedata.normalize("NFD", str(s)) if unicodedata.category(c) != "Mn")
+    return re.sub(r"\s+", " ", s).strip().upper().rstrip(".")
+
+
+def texto(v) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    return str(v).strip()
+
+
+def a_decimal(v, default="0.00") -> Decimal:
+    """Números o textos tipo "2,275" / "$2,275.00"; vacío o inválido -> default."""
+    s = texto(v).replace(",", "").replace("$", "").strip()
+    try:
+        return Decimal(s or default).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return Decimal(default)
+
+
+def a_entero(v, default=0) -> int:
+    try:
+        return int(float(texto(v).replace(",", "")))
+    except (ValueError, OverflowError):
+        return default
+
+
+def a_fecha(v):
+    """date o None: celdas fecha, seriales de Excel, 'YYYY-MM-DD' o 'dd/mm/aaaa'."""
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    if isinstance(v, (int, float)):
+        try:
+            return from_excel(v).date()
+        except (ValueError, OverflowError, AttributeError):
+            return None
+    s = texto(v)
+    for formato in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(s[:10], formato).date()
+        except ValueError:
+            pass
+    return None
+
+
+def numero_estudiante(v):
+    try:
+        return int(float(texto(v)))
+    except (ValueError, OverflowError):
+        return None
+
+
+def fecha_nacimiento_de_curp(curp):
+    """YYMMDD en las posiciones 5-10; siglo: YY <= año actual % 100 -> 2000."""
+    if not curp or len(curp) < 10:
+        return None
+    try:
+        yy, mm, dd = int(curp[4:6]), int(curp[6:8]), int(curp[8:10])
+        return date(2000 + yy if yy <= date.today().year % 100 else 1900 + yy, mm, dd)
+    except ValueError:
+        return None
+
+
+def separar_nombre(completo):
+    """'PRIMER SEGUNDO NOMBRE(S)' -> (nombres, apellido_p, apellido_m) en formato Título."""
+    tokens = texto(completo).split()
+    if len(tokens) >= 3:
+        ap, am, nombres = tokens[0], tokens[1], " ".join(tokens[2:])
+    elif len(tokens) == 2:
+        ap, am, nombres = tokens[0], "", tokens[1]
+    else:
+        ap, am, nombres = "", "", " ".join(tokens)
+    return tuple(" ".join(p.capitalize() for p in x.lower().split()) for x in (nombres, ap, am))
+
+
+def sexo_de(valor, curp):
+    s = norm(valor)
+    if s in ("H", "HOMBRE", "MASCULINO"):
+        return "Hombre"
+    if s in ("M", "MUJER", "FEMENINO"):
+        return "Mujer"
+    letra = curp[10] if curp and len(curp) >= 11 else ""
+    return {"H": "Hombre", "M": "Mujer"}.get(letra, "")
+
+
+def telefono(v):
+    return re.sub(r"[^\d+]", "", texto(v))[:20]
+
+
+def codigo_estatus(valor, sinonimos, *, titulacion=False):
+    cod = norm(valor).replace(" ", "_")
+    if not cod:
+        return ""
+    if "DEFINIT" in cod:
+        return "BAJA_DEFINITIVA"
+    if "TEMP" in cod:
+        return "BAJA_TEMPORAL"
+    if titulacion and "TITUL" in cod:
+        return "EN_TITULACION"
+    return sinonimos.get(cod, cod)
+
+
+def etiqueta_beca(v):
+    """0.5 o 50 -> 'Beca 50%'; vacío, 0 o inválido -> ''."""
+    try:
+        p = Decimal(texto(v).replace("%", ""))
+    except InvalidOperation:
+        return ""
+    if 0 < p <= 1:
+        return f"Beca {round(p * 100)}%"
+    if 1 < p <= 100:
+        return f"Beca {round(p)}%"
+    return ""
+
+
+# ============================================================
+# Lectura en streaming
+# ============================================================
+
+_ACEPTADOS = {norm(a): clave for clave, alias in COLUMNAS.items() for a in alias}
+
+
+def _posiciones(encabezado):
+    """{clave: índice de columna} para las columnas reconocidas de una fila."""
+    posiciones = {}
+    for i, celda in enumerate(encabezado):
+        clave = _ACEPTADOS.get(norm(celda))
+        if clave and clave not in posiciones:
+            posiciones[clave] = i
+    return posiciones
+
+
+def leer_filas(archivo, hoja):
+    """
+    Filas de datos de la hoja como dicts {clave: valor} (solo columnas presentes). Lee
+    con openpyxl read_only: memoria constante aunque el libro tenga miles de filas.
+    """
+    libro = load_workbook(archivo, read_only=True, data_only=True, keep_links=False)
+    try:
+        if hoja not in libro.sheetnames:
+            raise ValueError(f"No existe la hoja '{hoja}'. Hojas: {', '.join(libro.sheetnames)}")
+        ws = libro[hoja]
+        ws.reset_dimensions()  # algunos generadores guardan mal las dimensiones
+        filas = ws.iter_rows(values_only=True)
+        primeras = list(islice(filas, BUSCAR_ENCABEZADO))
+        candidatas = [(len(_posiciones(f)), -i, i) for i, f in enumerate(primeras)]
+        _, _, inicio = max(candidatas, default=(0, 0, 0))
+        posiciones = _posiciones(primeras[inicio]) if primeras else {}
+        if "numero" not in posiciones:
+            raise ValueError("No se encontró la columna de número de estudiante (No./ID).")
+        for fila in chain(primeras[inicio + 1:], filas):
+            yield {clave: fila[i] if i < len(fila) else None for clave, i in posiciones.items()}
+    finally:
+        libro.close()
+
+
+# ============================================================
+# Catálogos en memoria
+# ============================================================
+
+class _Catalogos:
+    """Catálogos por nombre/código; crea los faltantes una vez (create: manda señales)."""
+
+    def __init__(self, *, crear_sedes):
+        self.crear_sedes = crear_sedes
+        self.por_pk = {}
+        self.paises = {p.nombre: self._registrar(p) for p in catalogos.obtener("paises")}
+        self.programas = {norm(p.codigo): self._registrar(p) for p in catalogos.obtener("programas")}
+        self.sedes = {}
+        for s in catalogos.obtener("sedes"):
+            self.sedes.setdefault(s.nombre, self._registrar(s))
+        self.financiamientos = {}
+        for f in catalogos.obtener("financiamientos"):
+            if f.beca:
+                self.financiamientos.setdefault(f.beca, self._registrar(f))
+        self.estatus = {
+            modelo: {e.codigo: self._registrar(e) for e in modelo.objects.all()}
+            for modelo in (EstatusAcademico, EstatusAdministrativo)
+        }
+        self.creados = Counter()
+
+    def _registrar(self, obj):
+        self.por_pk[(type(obj), obj.pk)] = obj
+        return obj
+
+    def _crear(self, modelo, **campos):
+        self.creados[modelo._meta.verbose_name_plural.lower()] += 1
+        return self._registrar(modelo.objects.create(**campos))
+
+    def objeto(self, modelo, pk):
+        """Fila ya cargada (para mostrar el valor anterior en el diff) o el pk."""
+        return self.por_pk.get((modelo, pk), pk)
+
+    def pais(self, sede):
+        nombre = SEDE_PAISES.get(norm(sede), "México")
+        if nombre not in self.paises:
+            self.paises[nombre] = self._crear(Pais, nombre=nombre)
+        return self.paises[nombre]
+
+    def sede(self, valor):
+        nombre = texto(valor)
+        if not nombre:
+            return None
+        if nombre not in self.sedes and self.crear_sedes:
+            self.sedes[nombre] = self._crear(Sede, nombre=nombre, pais=self.pais(nombre), activo=True)
+        return self.sedes.get(nombre)
+
+    def programa(self, valor):
+        return self.programas.get(norm(valor))
+
+    def financiamiento(self, valor):
+        beca = etiqueta_beca(valor)
+        if not beca:
+            return None
+        if beca not in self.financiamientos:
+            self.financiamientos[beca] = self._crear(Financiamiento, beca=beca)
+        return self.financiamientos[beca]
+
+    def estatus_de(self, modelo, codigo):
+        if not codigo:
+            return None
+        por_codigo = self.estatus[modelo]
+        if codigo not in por_codigo:
+            por_codigo[codigo] = self._crear(modelo, codigo=codigo, nombre=codigo.replace("_", " "))
+        return por_codigo[codigo]
+
+
+# ============================================================
+# Fila -> campos
+# ============================================================
+
+def campos_alumno(fila, cat):
+    """Campos de Alumno de una fila (modo completo)."""
+    nombres, ap, am = separar_nombre(fila.get("nombre"))
+    curp = normalizar_curp(texto(fila.get("curp")))
+    campos = {
+        "nombre": nombres,
+        "apellido_p": ap,
+        "apellido_m": am,
+        "curp": curp,
+        "fecha_nacimiento": fecha_nacimiento_de_curp(curp),
+        "sexo": sexo_de(fila.get("sexo"), curp),
+        "pais": cat.pais(fila.get("sede")),
+    }
+    if "correo" in fila:
+        campos["email"] = texto(fila["correo"])
+    if "telefono" in fila:
+        campos["telefono"] = telefono(fila["telefono"])
+    return campos
+
+
+# clave de la hoja -> (campo de InformacionEscolar, conversión)
+_CAMPOS_PLAN = {
+    "colegiatura": ("precio_colegiatura", a_decimal),
+    "descuento": ("monto_descuento", a_decimal),
+    "inscripcion": ("precio_inscripcion", a_decimal),
+    "titulacion": ("precio_titulacion", a_decimal),
+    "equivalencia": ("precio_equivalencia", lambda v: a_decimal(v, "-1.00")),
+    "reinscripciones": ("numero_reinscripciones", a_entero),
+    "inicio": ("inicio_programa", a_fecha),
+    "fin_programa": ("fin_programa", a_fecha),
+    "grupo": ("grupo", texto),
+    "matricula": ("matricula", texto),
+}
+
+
+def campos_plan(fila, cat, programa):
+    """Campos de InformacionEscolar de una fila; solo los de columnas presentes."""
+    campos = {campo: conv(fila[clave]) for clave, (campo, conv) in _CAMPOS_PLAN.items() if clave in fila}
+    if "programa" in fila:
+        campos["programa"] = programa
+    if "meses" in fila or "no_pagos" in fila:
+        campos["meses_programa"] = a_entero(fila["meses"] if "meses" in fila else fila["no_pagos"])
+    if "sede" in fila:
+        campos["sede"] = cat.sede(fila["sede"])
+    if "beca" in fila:
+        campos["financiamiento"] = cat.financiamiento(fila["beca"])
+    if "estatus_academico" in fila:
+        codigo = codigo_estatus(fila["estatus_academico"], MAP_ACADEMICO, titulacion=True)
+        campos["estatus_academico"] = cat.estatus_de(EstatusAcademico, codigo)
+    if "situacion" in fila:
+        codigo = codigo_estatus(fila["situacion"], MAP_ADMINISTRATIVO)
+        campos["estatus_administrativo"] = cat.estatus_de(EstatusAdministrativo, codigo)
+    return campos
+
+
+def _asignar(obj, campos, cat):
+    """Asigna `campos` a obj y devuelve [(campo, antes, después)] de los que cambian."""
+    cambios = []
+    for nombre, nuevo in campos.items():
+        campo = obj._meta.get_field(nombre)
+        if campo.is_relation:
+            antes = getattr(obj, campo.attname)
+            if antes == (nuevo.pk if nuevo else None):
+                continue
+            antes = cat.objeto(campo.related_model, antes) if antes else None
+        else:
+            antes = getattr(obj, nombre)
+            if antes == nuevo:
+                continue
+        cambios.append((nombre, antes, nuevo))
+        setattr(obj, nombre, nuevo)
+    return cambios
+
+
+# ============================================================
+# Importación
+# ============================================================
+
+def importar(archivo, hoja="BASE ALUMNOS", *, solo_plan: bool = False, dry_run: bool = False,
+             diff=None, bienvenida: bool = False) -> Counter:
+    """
+    Importa la hoja. Con `solo_plan` (Informacion_escolar) solo actualiza o crea el plan
+    de alumnos existentes y exige programa; si no, crea/actualiza también el alumno.
+    `diff`, si se pasa una lista, recibe un Cambio por alumno nuevo o modificado.
+    Con `bienvenida` encola el correo de bienvenida de los alumnos nuevos.
+    Devuelve un Counter con altas, cambios, filas omitidas y catálogos creados.
+    """
+    stats = Counter()
+    with transaction.atomic():
+        cat = _Catalogos(crear_sedes=solo_plan)
+
+        # 1) Leer y convertir (la última fila de cada número gana)
+        filas = {}
+        for fila in leer_filas(archivo, hoja):
+            if not any(texto(v) for v in fila.values()):
+                continue
+            stats["filas"] += 1
+            numero = numero_estudiante(fila.get("numero"))
+            if not numero:
+                stats["omitidos"] += 1
+                continue
+            if not solo_plan and not texto(fila.get("nombre")):
+                stats["omitidos"] += 1
+                continue
+            if numero in filas:
+                stats["duplicados"] += 1
+            filas[numero] = fila
+
+        # 2) Existentes: una consulta por lote de números
+        existentes = (
+            Alumno.objects.select_related("informacionEscolar__financiamiento").in_bulk(list(filas))
+        )
+
+        alumnos_nuevos, alumnos_cambiados, planes_nuevos, planes_cambiados = [], [], [], []
+        campos_a, campos_p, tocados = set(), set(), set()
+        for numero, fila in filas.items():
+            alumno = existentes.get(numero)
+            if alumno is None and solo_plan:
+                stats["sin_alumno"] += 1
+                continue
+            programa = cat.programa(fila.get("programa"))
+            if solo_plan and programa is None:
+                stats["sin_programa"] += 1
+                continue
+
+            nuevo = alumno is None
+            if nuevo:
+                alumno = Alumno(numero_estudiante=numero)
+            cambios_a = [] if solo_plan else _asignar(alumno, campos_alumno(fila, cat), cat)
+
+            plan = alumno.informacionEscolar if alumno.informacionEscolar_id else None
+            plan_nuevo = plan is None
+            if plan_nuevo:
+                plan = InformacionEscolar(meses_programa=0, modalidad="en_linea")
+            cambios_p = _asignar(plan, campos_plan(fila, cat, programa), cat)
+            precio_final = plan.calcular_precio_final()
+            if plan.precio_final != precio_final:
+                cambios_p.append(("precio_final", plan.precio_final, precio_final))
+                plan.precio_final = precio_final
+
+            if nuevo:
+                alumno.password_email_institucional = alumno.password_inicial()
+                alumnos_nuevos.append(alumno)
+                stats["alumnos_nuevos"] += 1
+            elif cambios_a or plan_nuevo:
+                alumnos_cambiados.append(alumno)
+                campos_a.update(c[0] for c in cambios_a)
+                stats["alumnos_actualizados"] += 1
+            if plan_nuevo:
+                if plan.inicio_programa:
+                    plan.fecha_alta = timezone.make_aware(datetime.combine(plan.inicio_programa, time.min))
+                planes_nuevos.append((alumno, plan))
+                stats["planes_nuevos"] += 1
+            elif cambios_p:
+                planes_cambiados.append(plan)
+                campos_p.update(c[0] for c in cambios_p)
+                stats["planes_actualizados"] += 1
+
+            if nuevo or cambios_a or plan_nuevo or cambios_p:
+                tocados.add(numero)
+                if diff is not None:
+                    campos = cambios_a + [(f"plan.{c}", antes, despues) for c, antes, despues in cambios_p]
+                    diff.append(Cambio(numero, "alta" if nuevo else "cambio", campos))
+            else:
+                stats["sin_cambios"] += 1
+
+        # 3) Escribir por lotes: planes nuevos (para tener su pk), alumnos y cambios
+        InformacionEscolar.objects.bulk_create([p for _, p in planes_nuevos], batch_size=LOTE)
+        for alumno, plan in planes_nuevos:
+            alumno.informacionEscolar = plan
+            if not alumno._state.adding:
+                campos_a.add("informacionEscolar")
+        Alumno.objects.bulk_create(alumnos_nuevos, batch_size=LOTE)
+        if bienvenida:
+            stats["bienvenidas"] = correos.encolar_bienvenida(a.pk for a in alumnos_nuevos)
+        ahora = timezone.now()
+        for obj in chain(alumnos_cambiados, planes_cambiados):
+            obj.actualizado_en = ahora
+        if alumnos_cambiados:
+            Alumno.objects.bulk_update(alumnos_cambiados, sorted(campos_a | {"actualizado_en"}), batch_size=LOTE)
+        if planes_cambiados:
+            InformacionEscolar.objects.bulk_update(
+                planes_cambiados, sorted(campos_p | {"actualizado_en"}), batch_size=LOTE,
+            )
+
+        stats.update({f"creados_{k}": v for k, v in cat.creados.items()})
+        if dry_run:
+            transaction.set_rollback(True)
+        else:
+            alertas.marcar(alumnos=tocados)
+
+    logger.info("Importación de alumnos (%s)%s: %s", hoja, " [simulación]" if dry_run else "", dict(stats))
+    return stats
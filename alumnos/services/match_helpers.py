@@ -130,7 +130,9 @@ def buscar_alumnos_candidatos(texto: str, limit: int = 20):
                 Coalesce('nombre', Value(''))
             )),
         )
-        .only('numero_estudiante','nombre','apellido_p','apellido_m','email','curp','telefono')
+        .only('numero_estudiante','nombre','apellido_p','apellido_m','email','curp','telefono','informacionEscolar')
+        # las plantillas muestran el plan de cada candidato (str -> programa)
+        .select_related('informacionEscolar__programa')
     )
 
     # Para cada término (separado por coma) construimos su propio Q y combinamos con OR
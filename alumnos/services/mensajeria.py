@@ -0,0 +1,487 @@
+# alumnos/services/mensajeria.py
+"""
+SMS / WhatsApp por Twilio: cliente en caché, campañas masivas y estados de entrega.
+
+- `cliente_twilio(env)`: un `twilio.rest.Client` por entorno y proceso (reusa la sesión
+  HTTP). La TwilioConfig sale de alumnos.services.catalogos, así que no hay consulta por
+  mensaje; si cambia la config (updated_at) se arma un cliente nuevo. El auth_token no
+  está en el catálogo: se lee del modelo solo al armar el cliente (`auth_token(cfg)`).
+- `enviar(...)`: un mensaje suelto, registrado en MensajeTwilio.
+- `encolar(campana)`: arma un MensajeTwilio por teléfono a partir de los filtros.
+- `procesar_pendientes(...)`: lo usa el worker (`manage.py enviar_campanas`); envía con
+  TWILIO_CONCURRENCIA hilos y como máximo TWILIO_MENSAJES_POR_SEGUNDO. Los hilos solo
+  hablan con Twilio; la BD se actualiza por lotes desde el hilo principal.
+- `ingerir_estados(...)`: aplica por lotes los status callbacks guardados en
+  EventoEstadoTwilio (`manage.py ingerir_estados_twilio`).
+
+Con settings.TWILIO_FAKE=True se usa alumnos.services.twilio_fake (pruebas, desarrollo).
+"""
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, DecimalField, Exists, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LOTE_ENVIO = 200
+LOTE_SQL = 500   # sid__in / pk__in por consulta (límite de parámetros de SQLite)
+# Un callback cuyo sid aún no está en MensajeTwilio (el envío todavía no guarda su sid)
+# se reintenta hasta este tiempo; después se descarta (mensajes enviados por fuera).
+HUERFANO_TTL = timedelta(minutes=10)
+
+# Orden de los estados de Twilio: los callbacks pueden llegar desordenados
+RANGO_ESTADO = {
+    "accepted": 0, "scheduled": 0, "queued": 1, "sending": 2, "sent": 3,
+    "delivered": 4, "undelivered": 4, "failed": 4, "canceled": 4, "read": 5,
+}
+ENTREGADOS = ("delivered", "read")
+FALLIDOS = ("failed", "undelivered", "canceled", "error")
+
+
+# ============================================================
+# Configuración y cliente
+# ============================================================
+
+_clientes = {}
+_clientes_lock = threading.Lock()
+
+
+def config_twilio(env=None):
+    """
+    TwilioConfig activa del entorno; sin entorno, prod y si no hay, sandbox. Es la fila
+    del catálogo, sin auth_token: usar auth_token(cfg).
+    """
+    from alumnos.services import catalogos
+
+    activas = [c for c in catalogos.obtener("twilio_configs") if c.active]
+    for e in ([env] if env else ["prod", "sandbox"]):
+        for cfg in activas:
+            if cfg.env == e:
+                if not cfg.account_sid:
+                    raise ImproperlyConfigured(f"TwilioConfig {cfg} sin account_sid.")
+                return cfg
+    raise ImproperlyConfigured(f"No hay TwilioConfig activa{f' para {env}' if env else ''}.")
+
+
+def auth_token(cfg) -> str:
+    """Token de la config, leído del modelo (el catálogo en caché no lo trae)."""
+    from alumnos.models import TwilioConfig
+
+    token = TwilioConfig.objects.filter(pk=cfg.pk).values_list("auth_token", flat=True).first()
+    if not token:
+        raise ImproperlyConfigured(f"TwilioConfig {cfg} sin auth_token.")
+    return token
+
+
+def cliente_twilio(env=None):
+    """(cfg, client) del entorno; el client se reutiliza mientras la config no cambie."""
+    cfg = config_twilio(env)
+    firma = (cfg.pk, cfg.updated_at, settings.TWILIO_FAKE)
+    with _clientes_lock:
+        guardado = _clientes.get(cfg.env)
+        if guardado is None or guardado[0] != firma:
+            token = auth_token(cfg)
+            if settings.TWILIO_FAKE:
+                from alumnos.services.twilio_fake import FakeTwilioClient
+                client = FakeTwilioClient(cfg.account_sid, token)
+            else:
+                from twilio.rest import Client
+                client = Client(cfg.account_sid, token)
+            guardado = _clientes[cfg.env] = (firma, client)
+    return cfg, guardado[1]
+
+
+def url_callback():
+    base = (settings.TWILIO_CALLBACK_BASE_URL or "").rstrip("/")
+    return f"{base}{reverse('alumnos:twilio_status_callback')}" if base else None
+
+
+def normalizar_telefono(telefono):
+    """E.164 ('+52…'); 10 dígitos se toman como nacionales (TWILIO_CODIGO_PAIS). None si no sirve."""
+    digitos = re.sub(r"\D", "", telefono or "")
+    if len(digitos) == 10:
+        return f"+{settings.TWILIO_CODIGO_PAIS}{digitos}"
+    if 11 <= len(digitos) <= 15:
+        return f"+{digitos}"
+    return None
+
+
+def parametros_mensaje(cfg, canal, telefono, cuerpo, status_callback=None):
+    """kwargs de client.messages.create para SMS o WhatsApp según la config."""
+    params = {"body": cuerpo[:1600]}
+    if canal == "whatsapp":
+        params["to"] = telefono if telefono.startswith("whatsapp:") else f"whatsapp:{telefono}"
+        if cfg.whatsapp_from:
+            origen = cfg.whatsapp_from
+            params["from_"] = origen if origen.startswith("whatsapp:") else f"whatsapp:{origen}"
+        elif cfg.messaging_service_sid:
+            # solo si el Messaging Service tiene habilitado el canal WhatsApp
+            params["messaging_service_sid"] = cfg.messaging_service_sid
+        else:
+            raise ImproperlyConfigured("Falta whatsapp_from o messaging_service_sid en TwilioConfig.")
+    else:
+        params["to"] = telefono
+        if cfg.messaging_service_sid:
+            params["messaging_service_sid"] = cfg.messaging_service_sid
+        elif cfg.sms_from:
+            params["from_"] = cfg.sms_from
+        else:
+            raise ImproperlyConfigured("Falta sms_from o messaging_service_sid en TwilioConfig.")
+    if status_callback:
+        params["status_callback"] = status_callback
+    return params
+
+
+def enviar(canal, telefono, cuerpo, *, env=None, status_callback=None, alumno=None):
+    """
+    Envía un mensaje suelto y lo registra en MensajeTwilio. Devuelve el mensaje de Twilio
+    (lanza la excepción de Twilio si falla, como antes).
+    """
+    from alumnos.models import MensajeTwilio
+
+    cfg, client = cliente_twilio(env)
+    telefono = telefono.strip()
+    if not telefono.startswith("whatsapp:"):
+        telefono = normalizar_telefono(telefono) or telefono
+    registro = MensajeTwilio(alumno=alumno, canal=canal, env=cfg.env, telefono=telefono, cuerpo=cuerpo)
+    try:
+        m = client.messages.create(**parametros_mensaje(cfg, canal, telefono, cuerpo, status_callback))
+    except Exception as exc:
+        registro.estado = "error"
+        registro.error_code = str(getattr(exc, "code", "") or "")[:16]
+        registro.error = str(exc)[:2000]
+        registro.save()
+        raise
+    registro.sid = m.sid
+    registro.estado = m.status or "queued"
+    registro.enviado_en = timezone.now()
+    registro.save()
+    return m
+
+
+# ============================================================
+# Campañas: destinatarios y encolado
+# ============================================================
+
+def _cargos_vencidos(hoy):
+    from alumnos.models import Cargo
+
+    # mismo criterio que cargos_pendientes_todos (is_overdue)
+    return Cargo.objects.filter(alumno=OuterRef("pk"), pagado=False).filter(
+        Q(fecha_vencimiento__lt=hoy) | Q(fecha_vencimiento__isnull=True, fecha_cargo__lt=hoy)
+    )
+
+
+def destinatarios(campana):
+    """Alumnos que cumplen los filtros de la campaña, con `saldo_vencido` anotado."""
+    from alumnos.models import Alumno
+
+    hoy = timezone.localdate()
+    vencidos = _cargos_vencidos(hoy)
+    saldo = vencidos.order_by().values("alumno").annotate(s=Sum("monto")).values("s")
+
+    qs = Alumno.objects.all()
+    if campana.programa_id:
+        qs = qs.filter(informacionEscolar__programa_id=campana.programa_id)
+    if campana.sede_id:
+        qs = qs.filter(informacionEscolar__sede_id=campana.sede_id)
+    if campana.estatus_academico_id:
+        qs = qs.filter(informacionEscolar__estatus_academico_id=campana.estatus_academico_id)
+    if campana.estatus_administrativo_id:
+        qs = qs.filter(informacionEscolar__estatus_administrativo_id=campana.estatus_administrativo_id)
+    if campana.solo_adeudo_vencido:
+        qs = qs.filter(Exists(vencidos))
+    return (
+        qs.annotate(saldo_vencido=Coalesce(
+            Subquery(saldo, output_field=DecimalField(max_digits=12, decimal_places=2)),
+            Decimal("0.00"),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ))
+        .only("numero_estudiante", "nombre", "apellido_p", "apellido_m", "telefono")
+        .order_by("numero_estudiante")
+    )
+
+
+class _Variables(dict):
+    def __missing__(self, clave):
+        return "{" + clave + "}"
+
+
+def renderizar(cuerpo, alumno):
+    """Sustituye {nombre}, {nombre_completo}, {numero_estudiante}, {saldo_vencido}."""
+    saldo = getattr(alumno, "saldo_vencido", None) or Decimal("0.00")
+    return cuerpo.format_map(_Variables(
+        nombre=alumno.nombre,
+        nombre_completo=" ".join(p for p in (alumno.nombre, alumno.apellido_p, alumno.apellido_m) if p),
+        numero_estudiante=alumno.numero_estudiante,
+        saldo_vencido=f"${saldo:,.2f}",
+    ))
+
+
+def encolar(campana):
+    """
+    Borrador -> pendiente: un MensajeTwilio por teléfono (sin repetir). Devuelve la campaña.
+    """
+    from alumnos.models import CampanaMensajes, MensajeTwilio
+
+    with transaction.atomic():
+        c = CampanaMensajes.objects.select_for_update().get(pk=campana.pk)
+        if c.estado != "borrador":
+            raise ValueError(f"La campaña ya está {c.get_estado_display().lower()}.")
+
+        mensajes, vistos, sin_telefono = [], set(), 0
+        for alumno in destinatarios(c).iterator(chunk_size=2000):
+            telefono = normalizar_telefono(alumno.telefono)
+            if not telefono:
+                sin_telefono += 1
+                continue
+            if telefono in vistos:
+                continue
+            vistos.add(telefono)
+            mensajes.append(MensajeTwilio(
+                campana=c, alumno_id=alumno.pk, canal=c.canal, env=c.env,
+                telefono=telefono, cuerpo=renderizar(c.cuerpo, alumno),
+            ))
+        MensajeTwilio.objects.bulk_create(mensajes, batch_size=1000)
+
+        c.total = len(mensajes)
+        c.sin_telefono = sin_telefono
+        c.estado = "pendiente"
+        c.save(update_fields=["total", "sin_telefono", "estado"])
+    return c
+
+
+# ============================================================
+# Campañas: envío (worker)
+# ============================================================
+
+class LimiteTasa:
+    """Como máximo `por_segundo` llamadas a esperar() por segundo, entre todos los hilos."""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo if por_segundo else 0.0
+        self._siguiente = time.monotonic()
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._siguiente)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+def _enviar_uno(client, cfg, mensaje, limite, callback):
+    """Corre en un hilo: solo Twilio, sin BD. Deja el resultado en el objeto."""
+    limite.esperar()
+    try:
+        m = client.messages.create(**parametros_mensaje(cfg, mensaje.canal, mensaje.telefono, mensaje.cuerpo, callback))
+    except Exception as exc:
+        mensaje.estado = "error"
+        mensaje.error_code = str(getattr(exc, "code", "") or "")[:16]
+        mensaje.error = str(exc)[:2000]
+        return
+    mensaje.sid = m.sid
+    mensaje.estado = m.status or "queued"
+    mensaje.enviado_en = timezone.now()
+
+
+def actualizar_totales(campana_ids):
+    """Recalcula enviados/entregados/fallidos desde MensajeTwilio (una consulta por campaña)."""
+    from alumnos.models import CampanaMensajes, MensajeTwilio
+
+    for cid in campana_ids:
+        t = MensajeTwilio.objects.filter(campana_id=cid).aggregate(
+            enviados=Count("id", filter=Q(sid__isnull=False)),
+            entregados=Count("id", filter=Q(estado__in=ENTREGADOS)),
+            fallidos=Count("id", filter=Q(estado__in=FALLIDOS)),
+        )
+        CampanaMensajes.objects.filter(pk=cid).update(**t)
+
+
+def enviar_campana(campana) -> dict:
+    """Envía los mensajes pendientes de una campaña ya reclamada ('enviando')."""
+    from alumnos.models import CampanaMensajes, MensajeTwilio
+
+    stats = {"enviados": 0, "errores": 0}
+    cfg, client = cliente_twilio(campana.env or None)
+    limite = LimiteTasa(settings.TWILIO_MENSAJES_POR_SEGUNDO)
+    callback = url_callback()
+
+    with ThreadPoolExecutor(max_workers=settings.TWILIO_CONCURRENCIA) as pool:
+        while True:
+            if CampanaMensajes.objects.filter(pk=campana.pk, estado="cancelada").exists():
+                return stats
+            ids = list(
+                campana.mensajes.filter(estado="pendiente").order_by("id").values_list("id", flat=True)[:LOTE_ENVIO]
+            )
+            if not ids:
+                break
+            MensajeTwilio.objects.filter(pk__in=ids, estado="pendiente").update(estado="enviando")
+            lote = list(MensajeTwilio.objects.filter(pk__in=ids, estado="enviando"))
+            list(pool.map(lambda m: _enviar_uno(client, cfg, m, limite, callback), lote))
+            MensajeTwilio.objects.bulk_update(lote, ["estado", "sid", "error_code", "error", "enviado_en"])
+            for m in lote:
+                stats["errores" if m.estado == "error" else "enviados"] += 1
+            actualizar_totales([campana.pk])
+
+    CampanaMensajes.objects.filter(pk=campana.pk, estado="enviando").update(
+        estado="terminada", terminado_en=timezone.now(),
+    )
+    return stats
+
+
+def _reclamar(campana) -> bool:
+    from alumnos.models import CampanaMensajes
+
+    return CampanaMensajes.objects.filter(pk=campana.pk, estado="pendiente").update(
+        estado="enviando", iniciado_en=timezone.now(),
+    ) == 1
+
+
+def procesar_pendientes(limit: int = 5) -> dict:
+    from alumnos.models import CampanaMensajes
+
+    stats = {"campanas": 0, "enviados": 0, "errores": 0}
+    for campana in list(CampanaMensajes.objects.filter(estado="pendiente").order_by("id")[:limit]):
+        if not _reclamar(campana):
+            continue
+        try:
+            r = enviar_campana(campana)
+        except Exception:
+            # sin config/cliente: regresa a la cola con lo que no se alcanzó a enviar
+            logger.exception("Campaña %s: falló el envío", campana.pk)
+            campana.mensajes.filter(estado="enviando", sid__isnull=True).update(estado="pendiente")
+            CampanaMensajes.objects.filter(pk=campana.pk, estado="enviando").update(estado="pendiente")
+            continue
+        stats["campanas"] += 1
+        stats["enviados"] += r["enviados"]
+        stats["errores"] += r["errores"]
+    return stats
+
+
+def reintentar() -> int:
+    """
+    Regresa a la cola las campañas atoradas en 'enviando' (worker caído). Los mensajes
+    'enviando' sin sid se vuelven a mandar: si Twilio ya los había aceptado, llegan dos veces.
+    """
+    from alumnos.models import CampanaMensajes, MensajeTwilio
+
+    MensajeTwilio.objects.filter(campana__estado="enviando", estado="enviando", sid__isnull=True).update(estado="pendiente")
+    return CampanaMensajes.objects.filter(estado="enviando").update(estado="pendiente")
+
+
+# ============================================================
+# Status callbacks
+# ============================================================
+
+def firma_valida(urls, params, firma) -> bool:
+    """
+    X-Twilio-Signature contra el auth_token de la TwilioConfig de la cuenta
+    (AccountSid del callback; si no viene, cualquiera activa). `urls`: las URL completas
+    con las que Twilio pudo llamar (la de TWILIO_CALLBACK_BASE_URL y la de la petición).
+    Los tokens se leen del modelo: el catálogo en caché no los trae.
+    """
+    from twilio.request_validator import RequestValidator
+
+    from alumnos.models import TwilioConfig
+
+    if not firma:
+        return False
+    cuenta = params.get("AccountSid") if isinstance(params, dict) else None
+    configs = TwilioConfig.objects.filter(active=True).exclude(auth_token="")
+    if cuenta:
+        configs = configs.filter(account_sid=cuenta)
+    tokens = list(configs.values_list("auth_token", flat=True))
+    return any(
+        RequestValidator(token).validate(url, params, firma)
+        for token in tokens for url in dict.fromkeys(u for u in urls if u)
+    )
+
+
+def _campos_callback(payload: dict):
+    sid = payload.get("MessageSid") or payload.get("SmsSid")
+    estado = payload.get("MessageStatus") or payload.get("SmsStatus")
+    if not sid or not estado:
+        return None
+    return {"sid": sid[:64], "estado": estado[:16], "error_code": str(payload.get("ErrorCode") or "")[:16], "payload": payload}
+
+
+def registrar_callback(payload: dict):
+    """Guarda el callback tal cual (un INSERT). None si no trae sid/estado."""
+    from alumnos.models import EventoEstadoTwilio
+
+    campos = _campos_callback(payload)
+    return EventoEstadoTwilio.objects.create(**campos) if campos else None
+
+
+async def aregistrar_callback(payload: dict):
+    """registrar_callback para el endpoint async."""
+    from alumnos.models import EventoEstadoTwilio
+
+    campos = _campos_callback(payload)
+    return await EventoEstadoTwilio.objects.acreate(**campos) if campos else None
+
+
+def _en_lotes(valores, n=LOTE_SQL):
+    valores = list(valores)
+    for i in range(0, len(valores), n):
+        yield valores[i:i + n]
+
+
+def ingerir_estados(limit: int = 5000) -> dict:
+    """
+    Aplica hasta `limit` callbacks: por sid se queda con el estado más avanzado, actualiza
+    MensajeTwilio con bulk_update (nunca retrocede un estado) y borra los eventos aplicados.
+    """
+    from alumnos.models import EventoEstadoTwilio, MensajeTwilio
+
+    stats = {"eventos": 0, "mensajes": 0, "huerfanos": 0}
+    eventos = list(EventoEstadoTwilio.objects.order_by("id")[:limit])
+    if not eventos:
+        return stats
+    stats["eventos"] = len(eventos)
+
+    ultimo = {}
+    for e in eventos:
+        previo = ultimo.get(e.sid)
+        if previo is None or RANGO_ESTADO.get(e.estado, 0) >= RANGO_ESTADO.get(previo.estado, 0):
+            ultimo[e.sid] = e
+
+    ahora = timezone.now()
+    encontrados, actualizados = set(), []
+    for sids in _en_lotes(ultimo):
+        for m in MensajeTwilio.objects.filter(sid__in=sids).only("id", "sid", "estado", "error_code", "campana_id"):
+            encontrados.add(m.sid)
+            e = ultimo[m.sid]
+            if RANGO_ESTADO.get(e.estado, 0) < RANGO_ESTADO.get(m.estado, -1):
+                continue
+            m.estado = e.estado
+            m.error_code = e.error_code or m.error_code
+            m.actualizado_en = ahora
+            actualizados.append(m)
+    MensajeTwilio.objects.bulk_update(actualizados, ["estado", "error_code", "actualizado_en"], batch_size=LOTE_SQL)
+    stats["mensajes"] = len(actualizados)
+
+    vencidos = ahora - HUERFANO_TTL
+    borrar = [e.pk for e in eventos if e.sid in encontrados or e.recibido_en < vencidos]
+    stats["huerfanos"] = sum(1 for e in eventos if e.sid not in encontrados and e.recibido_en < vencidos)
+    for pks in _en_lotes(borrar):
+        EventoEstadoTwilio.objects.filter(pk__in=pks).delete()
+
+    actualizar_totales({m.campana_id for m in actualizados if m.campana_id})
+    return stats
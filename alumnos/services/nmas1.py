@@ -0,0 +1,105 @@
+# alumnos/services/nmas1.py
+"""
+Detector de consultas N+1.
+
+Agrupa el SQL ejecutado dentro de una petición (o de un bloque `detectar_nmas1()`) por
+"forma": el SQL de Django ya trae los valores como %s, solo se colapsan las listas
+IN (%s, %s, …) y los bloques VALUES de distinto largo. Si una misma forma se repite más
+de NMAS1_UMBRAL veces se reporta la vista y la línea de código del proyecto que la
+originó (la pila se captura una sola vez por forma, al cruzar el umbral).
+
+  - NMAS1_ACTIVO: activa el middleware (por defecto = DEBUG).
+  - NMAS1_ESTRICTO: en vez de solo registrar en el log, lanza ConsultasRepetidasError
+    (pensado para la suite de pruebas: override_settings(NMAS1_ESTRICTO=True)).
+"""
+import logging
+import os
+import re
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger("campusiuaf.nmas1")
+
+_RE_IN = re.compile(r"IN \((?:%s,\s*)*%s\)")
+_RE_VALUES = re.compile(r"VALUES\s*(?:\((?:%s,\s*)*%s\),\s*)*\((?:%s,\s*)*%s\)")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+_RAIZ = str(settings.BASE_DIR)
+_RUTAS_AJENAS = ("site-packages", "dist-packages", os.sep + "django" + os.sep)
+
+
+class ConsultasRepetidasError(AssertionError):
+    """Una forma de consulta se repitió más de NMAS1_UMBRAL veces (modo estricto)."""
+
+
+def forma_sql(sql: str) -> str:
+    sql = _RE_IN.sub("IN (…)", sql)
+    sql = _RE_VALUES.sub("VALUES (…)", sql)
+    return _RE_ESPACIOS.sub(" ", sql).strip()
+
+
+def _origen():
+    """Primer frame (del más interno al externo) que pertenece al código del proyecto."""
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        ruta = frame.filename
+        if not ruta.startswith(_RAIZ) or any(p in ruta for p in _RUTAS_AJENAS):
+            continue
+        if ruta.endswith(os.path.join("services", "nmas1.py")) or ruta.endswith("middleware.py"):
+            continue
+        return f"{os.path.relpath(ruta, _RAIZ)}:{frame.lineno} en {frame.name}()"
+    return "(origen fuera del proyecto; p.ej. una plantilla)"
+
+
+class DetectorNMas1:
+    """execute_wrapper que cuenta ejecuciones por forma de SQL."""
+
+    def __init__(self, umbral=None):
+        self.umbral = umbral if umbral is not None else settings.NMAS1_UMBRAL
+        self.conteo = {}
+        self.origenes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        forma = forma_sql(sql)
+        n = self.conteo.get(forma, 0) + 1
+        self.conteo[forma] = n
+        if n == self.umbral + 1:
+            self.origenes[forma] = _origen()
+        return execute(sql, params, many, context)
+
+    def repetidas(self):
+        """[(veces, forma, origen)] de las formas que superan el umbral, de más a menos."""
+        return sorted(
+            ((n, forma, self.origenes.get(forma, "")) for forma, n in self.conteo.items() if n > self.umbral),
+            reverse=True,
+        )
+
+    def reporte(self, donde: str) -> str:
+        lineas = [f"Posible N+1 en {donde}:"]
+        for n, forma, origen in self.repetidas():
+            lineas.append(f"  {n}× desde {origen}\n      {forma[:300]}")
+        return "\n".join(lineas)
+
+    def verificar(self, donde: str, estricto=None):
+        if not self.repetidas():
+            return
+        texto = self.reporte(donde)
+        estricto = settings.NMAS1_ESTRICTO if estricto is None else estricto
+        if estricto:
+            raise ConsultasRepetidasError(texto)
+        logger.warning(texto)
+
+
+@contextmanager
+def detectar_nmas1(donde: str = "bloque", *, umbral=None, estricto=None):
+    """
+    Para servicios, comandos o pruebas:
+        with detectar_nmas1("generar_cortes", estricto=True):
+            ...
+    """
+    detector = DetectorNMas1(umbral)
+    with connection.execute_wrapper(detector):
+        yield detector
+    detector.verificar(donde, estricto)
@@ -0,0 +1,114 @@
+# alumnos/services/numeracion.py
+"""
+Números de estudiante por bloques.
+
+ContadorAlumno guarda el último número reservado. En lugar de bloquear esa fila en cada
+alta, `reservar(n)` la sube n de una vez (un UPDATE en una transacción corta) y
+devuelve el rango contiguo; cada reserva queda en BloqueNumeracion.
+
+- Altas sueltas (`siguiente()`, alumnos_crear): cada proceso reserva un bloque de
+  NUMERACION_BLOQUE y reparte desde memoria, así los workers no esperan por la misma
+  fila. Entre workers los números ya no salen en orden estricto.
+- Cargas masivas: `reservar(len(filas))` una vez para toda la carga.
+- El contador nunca queda por debajo del mayor numero_estudiante (importaciones que
+  traen su número desde Excel); `siguiente()` además salta números ya ocupados.
+
+Números reservados que no llegan a un Alumno (proceso reiniciado con el bloque a medias,
+alta que falló) quedan como huecos: `huecos()` / `manage.py huecos_numeracion`.
+"""
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from alumnos.models import Alumno, BloqueNumeracion, ContadorAlumno
+
+LLAVE = "global"
+
+_lock = threading.Lock()
+_pools = {}  # llave -> (pid, iterador del bloque en curso)
+
+
+def _origen():
+    return f"{socket.gethostname()}:{os.getpid()}"[:80]
+
+
+def reservar(n: int, *, llave: str = LLAVE) -> range:
+    """Reserva n números consecutivos (un UPDATE del contador) y los devuelve como range."""
+    if n < 1:
+        raise ValueError("n debe ser al menos 1")
+    mayor = Alumno.objects.order_by("-numero_estudiante").values("numero_estudiante")[:1]
+    nuevo = Greatest(F("ultimo_numero"), Coalesce(Subquery(mayor), 0, output_field=models.BigIntegerField())) + n
+    with transaction.atomic():
+        if not ContadorAlumno.objects.filter(llave=llave).update(ultimo_numero=nuevo):
+            ContadorAlumno.objects.get_or_create(llave=llave)
+            ContadorAlumno.objects.filter(llave=llave).update(ultimo_numero=nuevo)
+        fin = ContadorAlumno.objects.filter(llave=llave).values_list("ultimo_numero", flat=True).get()
+        BloqueNumeracion.objects.create(llave=llave, inicio=fin - n + 1, fin=fin, origen=_origen())
+    return range(fin - n + 1, fin + 1)
+
+
+def _del_pool(llave):
+    if transaction.get_connection().in_atomic_block:
+        # la transacción de afuera puede revertir la reserva: sin pool, un número a la vez
+        return reservar(1, llave=llave)[0]
+    with _lock:
+        pid, pool = _pools.get(llave, (None, None))
+        num = next(pool, None) if pid == os.getpid() else None
+        if num is None:
+            pool = iter(reservar(settings.NUMERACION_BLOQUE, llave=llave))
+            _pools[llave] = (os.getpid(), pool)
+            num = next(pool)
+        return num
+
+
+def siguiente(llave: str = LLAVE) -> int:
+    """Número para un alta suelta: del bloque del proceso, saltando los ya ocupados."""
+    while True:
+        num = _del_pool(llave)
+        if not Alumno.objects.filter(pk=num).exists():
+            return num
+
+
+def vaciar_pool():
+    """Olvida los bloques en memoria (pruebas; lo que quedaba sin usar pasa a hueco)."""
+    with _lock:
+        _pools.clear()
+
+
+def huecos(*, llave: str = LLAVE, antes_de=None):
+    """
+    Rangos (inicio, fin) reservados que no tienen Alumno, de bloques reservados antes de
+    `antes_de` (por omisión hace un día: los más nuevos pueden seguir en el pool de un
+    proceso vivo).
+    """
+    antes_de = antes_de or timezone.now() - timedelta(days=1)
+    bloques = list(
+        BloqueNumeracion.objects.filter(llave=llave, reservado_en__lt=antes_de)
+        .order_by("inicio").values_list("inicio", "fin")
+    )
+    if not bloques:
+        return []
+    usados = set(
+        Alumno.objects.filter(pk__gte=bloques[0][0], pk__lte=max(f for _, f in bloques))
+        .values_list("pk", flat=True)
+    )
+    rangos = []
+    for inicio, fin in bloques:
+        abierto = None
+        for num in range(inicio, fin + 1):
+            if num in usados:
+                if abierto is not None:
+                    rangos.append((abierto, num - 1))
+                    abierto = None
+            elif abierto is None:
+                abierto = num
+        if abierto is not None:
+            rangos.append((abierto, fin))
+    return rangos
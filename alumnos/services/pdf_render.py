@@ -0,0 +1,44 @@
+# alumnos/services/pdf_render.py
+"""
+HTML -> PDF fuera de una petición (comandos y workers): WeasyPrint con xhtml2pdf
+como respaldo, resolviendo las rutas /static/ a archivos en disco.
+"""
+import io
+
+# Plantillas maquetadas a página completa A4 (estado de cuenta, recibos)
+CSS_PAGINA_COMPLETA = "@page { size: A4; margin: 0; } html, body { margin: 0; padding: 0; }"
+
+def _static_path(url: str):
+    from django.conf import settings
+    from alumnos.services.estaticos import ruta_estatico
+
+    static_url = settings.STATIC_URL if settings.STATIC_URL.startswith("/") else "/" + settings.STATIC_URL
+    for prefijo in ("file://" + static_url, static_url):
+        if url.startswith(prefijo):
+            return ruta_estatico(url[len(prefijo):])  # con hash, solo existe en STATIC_ROOT
+    return None
+
+
+def html_a_pdf(html: str, css: str | None = CSS_PAGINA_COMPLETA) -> bytes:
+    """WeasyPrint -> xhtml2pdf, resolviendo /static/ a disco (no hay request)."""
+    try:
+        from weasyprint import CSS, HTML, default_url_fetcher
+
+        def fetcher(url, *args, **kwargs):
+            path = _static_path(url)
+            if path:
+                return default_url_fetcher("file://" + path, *args, **kwargs)
+            return default_url_fetcher(url, *args, **kwargs)
+
+        return HTML(string=html, base_url="file:///", url_fetcher=fetcher).write_pdf(
+            stylesheets=[CSS(string=css)] if css else None
+        )
+    except Exception:
+        # sin WeasyPrint (o sin sus librerías de sistema): xhtml2pdf
+        from xhtml2pdf import pisa
+
+        buf = io.BytesIO()
+        r = pisa.CreatePDF(io.StringIO(html), dest=buf, link_callback=lambda uri, rel: _static_path(uri) or uri)
+        if r.err:
+            raise RuntimeError("No se pudo generar el PDF.")
+        return buf.getvalue()
@@ -0,0 +1,248 @@
+# alumnos/services/plan_cargos.py
+"""
+Plan de cargos (inscripción, mensualidades y reinscripciones) de uno o muchos alumnos.
+
+- `cargos_esperados(info, alumno_id, ...)`: los cargos que le tocan a un plan, sin
+  consultas. Reglas de siempre: inscripción en el inicio del programa (si hay precio),
+  una mensualidad por mes del plan y una reinscripción por hito activo del programa
+  dentro de la duración del plan; cada uno vence DIAS_VENCIMIENTO días después.
+- `programar(alumnos, ...)`: arma en memoria las llaves (alumno, concepto, fecha_cargo)
+  de todo el grupo, las compara con los Cargo existentes (una consulta por lote de
+  alumnos) y crea los que faltan con bulk_create. Un plan que se alargó solo recibe
+  los meses nuevos. A los existentes sin vencimiento se les pone. Con `preview` no
+  escribe nada.
+- `cohorte(...)`: alumnos de un Grupo, Programa y/o generación (mes de inicio).
+
+La usan `generar_cargos_mensuales` (un alumno), `programar_cargos_cohorte` (un grupo
+en una sola petición) y `manage.py programar_cargos` (cron mensual).
+"""
+import logging
+from calendar import monthrange
+from collections import Counter, defaultdict, namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from alumnos.models import Alumno, Cargo, ReinscripcionHito
+from alumnos.services import alertas, catalogos
+
+logger = logging.getLogger(__name__)
+
+LOTE = 500   # alumnos por consulta de existentes (límite de parámetros de SQLite)
+DIAS_VENCIMIENTO = 6
+
+# estado: nuevo | existente | vencimiento (existía sin fecha de vencimiento) | fuera_de_rango
+Previsto = namedtuple(
+    "Previsto", "alumno_id tipo concepto_id fecha_cargo fecha_vencimiento monto mes estado cargo_id",
+    defaults=("nuevo", None),
+)
+_CONTADOR = {"nuevo": "nuevos", "existente": "existentes", "vencimiento": "vencimientos", "fuera_de_rango": "fuera_de_rango"}
+
+
+# ============================================================
+# Conceptos y fechas
+# ============================================================
+
+def _concepto_por_codigo_o_nombre(codigos, fragmento):
+    """Primer ConceptoPago del catálogo con alguno de `codigos`; si no, el único cuyo nombre contiene `fragmento`."""
+    for code in codigos:
+        c = catalogos.buscar("conceptos_pago", codigo=code)
+        if c:
+            return c
+    por_nombre = [c for c in catalogos.obtener("conceptos_pago") if fragmento in c.nombre.lower()]
+    return por_nombre[0] if len(por_nombre) == 1 else None
+
+
+def concepto_mensual(concepto_id=None):
+    """El concepto indicado; si no, COLEGIATURA; si no, el primero del catálogo."""
+    if concepto_id and str(concepto_id).isdigit():
+        c = catalogos.por_pk("conceptos_pago", concepto_id)
+        if c:
+            return c
+    c = catalogos.buscar("conceptos_pago", codigo="COLEGIATURA")
+    if c:
+        return c
+    return min(catalogos.obtener("conceptos_pago"), key=lambda x: x.pk, default=None)
+
+
+def concepto_inscripcion():
+    return _concepto_por_codigo_o_nombre(("INSCRIPCION", "INSCRIPCIÓN", "INS"), "inscrip")
+
+
+def concepto_reinscripcion():
+    return _concepto_por_codigo_o_nombre(("REINSCRIPCION", "REINSCRIPCIÓN", "REINS"), "reinscrip")
+
+
+def primero_del_mes(base: date, offset: int) -> date:
+    y = base.year + (base.month - 1 + offset) // 12
+    m = (base.month - 1 + offset) % 12 + 1
+    return date(y, m, 1)
+
+
+def add_months_clamp(d: date, months: int) -> date:
+    """Suma 'months' meses a d. Si el mes destino no tiene ese día, ajusta al último del mes."""
+    y = d.year + (d.month - 1 + months) // 12
+    m = (d.month - 1 + months) % 12 + 1
+    return date(y, m, min(d.day, monthrange(y, m)[1]))
+
+
+def _decimal(v):
+    try:
+        return Decimal(v if v not in (None, "") else "0.00")
+    except Exception:
+        return Decimal("0.00")
+
+
+# ============================================================
+# Cargos esperados
+# ============================================================
+
+def cargos_esperados(info, alumno_id, *, mensual, inscripcion, reinscripcion, hitos, hoy):
+    """Lista de Previsto (estado 'nuevo' o 'fuera_de_rango') para el plan `info`. Sin consultas."""
+    meses = int(info.meses_programa or 0)
+    base = info.inicio_programa or hoy
+    vence = timedelta(days=DIAS_VENCIMIENTO)
+    filas = []
+
+    monto_insc = _decimal(info.precio_inscripcion)
+    if inscripcion and monto_insc > 0:
+        filas.append(Previsto(alumno_id, "inscripcion", inscripcion.pk, base, base + vence, monto_insc, 0))
+
+    monto_mes = _decimal(info.precio_final if info.precio_final is not None else info.precio_colegiatura)
+    for i in range(meses):
+        fecha = primero_del_mes(base, i)
+        filas.append(Previsto(alumno_id, "mensualidad", mensual.pk, fecha, fecha + vence, monto_mes, i + 1))
+
+    if reinscripcion and info.programa_id:
+        for h in hitos:
+            mes = int(h.meses_offset or 0)
+            if mes <= 0:
+                continue
+            fecha = add_months_clamp(base, mes)
+            monto = _decimal(h.monto if h.monto is not None else info.programa.reinscripcion)
+            estado = "fuera_de_rango" if mes > meses else "nuevo"
+            filas.append(Previsto(alumno_id, "reinscripcion", reinscripcion.pk, fecha, fecha + vence, monto, mes, estado))
+    return filas
+
+
+def cohorte(*, grupo=None, programa=None, inicio=None, sede=None):
+    """Alumnos con plan del Grupo / Programa / Sede indicados y, con `inicio`, del mismo mes de inicio."""
+    qs = Alumno.objects.filter(informacionEscolar__isnull=False)
+    if grupo:
+        qs = qs.filter(informacionEscolar__grupo_nuevo=grupo)
+    if programa:
+        qs = qs.filter(informacionEscolar__programa=programa)
+    if sede:
+        qs = qs.filter(informacionEscolar__sede=sede)
+    if inicio:
+        qs = qs.filter(
+            informacionEscolar__inicio_programa__year=inicio.year,
+            informacionEscolar__inicio_programa__month=inicio.month,
+        )
+    return qs
+
+
+# ============================================================
+# Programación en bloque
+# ============================================================
+
+def _existentes(alumno_ids, concepto_ids):
+    """{(alumno, concepto, fecha_cargo): (id, fecha_vencimiento)} de los cargos ya creados."""
+    datos = {}
+    for i in range(0, len(alumno_ids), LOTE):
+        filas = Cargo.objects.filter(
+            alumno_id__in=alumno_ids[i:i + LOTE], concepto_id__in=concepto_ids,
+        ).values_list("alumno_id", "concepto_id", "fecha_cargo", "id", "fecha_vencimiento")
+        for alumno_id, concepto_id, fecha, pk, vence in filas:
+            datos.setdefault((alumno_id, concepto_id, fecha), (pk, vence))
+    return datos
+
+
+def programar(alumnos, *, concepto_id=None, preview: bool = False, detalle=None, hoy=None) -> Counter:
+    """
+    Genera o completa el plan de cargos de `alumnos` (queryset). `detalle`, si se pasa
+    una lista, recibe un Previsto por cargo con su estado y, si existe o se creó, su id.
+    Devuelve un Counter: alumnos, sin_plan, nuevos, existentes, vencimientos,
+    fuera_de_rango y nuevos por tipo. Lanza ValueError si no hay concepto mensual.
+    """
+    hoy = hoy or timezone.localdate()
+    mensual = concepto_mensual(concepto_id)
+    if not mensual:
+        raise ValueError("No se encontró un Concepto de pago para crear cargos (mensual).")
+    inscripcion, reinscripcion = concepto_inscripcion(), concepto_reinscripcion()
+
+    planes = list(
+        alumnos.select_related("informacionEscolar__programa")
+        .only(
+            "numero_estudiante", "informacionEscolar", "informacionEscolar__programa",
+            "informacionEscolar__meses_programa", "informacionEscolar__inicio_programa",
+            "informacionEscolar__precio_final", "informacionEscolar__precio_colegiatura",
+            "informacionEscolar__precio_inscripcion", "informacionEscolar__programa__reinscripcion",
+        )
+        .order_by("numero_estudiante")
+    )
+    stats = Counter(alumnos=len(planes))
+    hitos = defaultdict(list)
+    programas = {a.informacionEscolar.programa_id for a in planes if a.informacionEscolar_id}
+    for h in ReinscripcionHito.objects.filter(programa_id__in=programas - {None}, activo=True).order_by("meses_offset"):
+        hitos[h.programa_id].append(h)
+
+    # 1) Cargos esperados en memoria; una llave repetida cuenta una sola vez
+    esperados, vistos = [], set()
+    for a in planes:
+        info = a.informacionEscolar
+        if info is None or int(info.meses_programa or 0) <= 0:
+            stats["sin_plan"] += 1
+            continue
+        for p in cargos_esperados(
+            info, a.pk, mensual=mensual, inscripcion=inscripcion, reinscripcion=reinscripcion,
+            hitos=hitos[info.programa_id], hoy=hoy,
+        ):
+            llave = (p.alumno_id, p.concepto_id, p.fecha_cargo)
+            if p.estado == "nuevo":
+                if llave in vistos:
+                    continue
+                vistos.add(llave)
+            esperados.append(p)
+
+    # 2) Contra lo existente: una consulta por lote de alumnos
+    conceptos = {p.concepto_id for p in esperados}
+    existentes = _existentes([a.pk for a in planes], conceptos) if esperados else {}
+    resultado = []
+    for p in esperados:
+        if p.estado == "nuevo" and (p.alumno_id, p.concepto_id, p.fecha_cargo) in existentes:
+            pk, vence = existentes[(p.alumno_id, p.concepto_id, p.fecha_cargo)]
+            p = p._replace(estado="existente" if vence else "vencimiento", cargo_id=pk)
+        stats[_CONTADOR[p.estado]] += 1
+        if p.estado == "nuevo":
+            stats[f"{p.tipo}_nuevos"] += 1
+        resultado.append(p)
+
+    # 3) Escribir en bloque
+    if not preview:
+        nuevos = [p for p in resultado if p.estado == "nuevo"]
+        sin_vence = [p for p in resultado if p.estado == "vencimiento"]
+        with transaction.atomic():
+            creados = Cargo.objects.bulk_create(
+                [
+                    Cargo(alumno_id=p.alumno_id, concepto_id=p.concepto_id, fecha_cargo=p.fecha_cargo,
+                          fecha_vencimiento=p.fecha_vencimiento, monto=p.monto, pagado=False)
+                    for p in nuevos
+                ],
+                batch_size=LOTE,
+            )
+            Cargo.objects.bulk_update(
+                [Cargo(pk=p.cargo_id, fecha_vencimiento=p.fecha_vencimiento) for p in sin_vence],
+                ["fecha_vencimiento"], batch_size=LOTE,
+            )
+            # bulk_create/update no mandan señales
+            alertas.marcar(alumnos={p.alumno_id for p in nuevos + sin_vence})
+        ids = iter(c.pk for c in creados)
+        resultado = [p._replace(cargo_id=next(ids)) if p.estado == "nuevo" else p for p in resultado]
+
+    if detalle is not None:
+        detalle.extend(resultado)
+    logger.info("Plan de cargos%s: %s", " [vista previa]" if preview else "", dict(stats))
+    return stats
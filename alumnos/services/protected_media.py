@@ -0,0 +1,145 @@
+# alumnos/services/protected_media.py
+"""
+Entrega de archivos de MEDIA_ROOT con control de acceso.
+
+La vista valida permisos y luego llama a `serve_protected_file(...)`:
+  - Si settings.PROTECTED_MEDIA_ACCEL_PREFIX está configurado (p.ej. "/protected-media/"),
+    responde vacío con `X-Accel-Redirect` y nginx hace la transferencia (location internal).
+  - Si no, Django sirve el archivo con soporte de Range (206) y peticiones
+    condicionales (ETag / Last-Modified -> 304 / 412).
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _content_disposition(filename: str, as_attachment: bool) -> str:
+    disp = "attachment" if as_attachment else "inline"
+    try:
+        filename.encode("ascii")
+        return f'{disp}; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"{disp}; filename*=utf-8''{quote(filename)}"
+
+
+def _etag_for(stat) -> str:
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def _parse_range(header: str, size: int):
+    """
+    Interpreta un único rango 'bytes=inicio-fin'. Devuelve (inicio, fin) inclusivo,
+    None si el header no aplica (se sirve completo) o 'invalid' si no es satisfacible.
+    Rangos múltiples se ignoran y se sirve el archivo completo.
+    """
+    m = _RANGE_RE.match((header or "").strip())
+    if not m:
+        return None
+    start_s, end_s = m.groups()
+    if not start_s and not end_s:
+        return None
+    if not start_s:
+        # sufijo: últimos N bytes
+        length = int(end_s)
+        if length == 0:
+            return "invalid"
+        start = max(size - length, 0)
+        end = size - 1
+    else:
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+        end = min(end, size - 1)
+    if start >= size or start > end:
+        return "invalid"
+    return start, end
+
+
+def _iter_range(path: str, start: int, length: int):
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = fh.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def _accel_response(name: str, filename: str, content_type: str, as_attachment: bool):
+    prefix = settings.PROTECTED_MEDIA_ACCEL_PREFIX.rstrip("/") + "/"
+    response = HttpResponse(content_type=content_type)
+    response["X-Accel-Redirect"] = prefix + quote(name.replace(os.sep, "/").lstrip("/"))
+    response["Content-Disposition"] = _content_disposition(filename, as_attachment)
+    # El navegador no debe cachear en proxies compartidos un archivo con permisos
+    response["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return response
+
+
+def serve_protected_file(request, fieldfile, *, as_attachment=False, filename=None):
+    """
+    Devuelve la respuesta para descargar `fieldfile` (FieldFile de un FileField)
+    ya validados los permisos por la vista que llama.
+    """
+    if not fieldfile or not fieldfile.name:
+        raise Http404("Archivo no disponible.")
+
+    filename = filename or os.path.basename(fieldfile.name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    if getattr(settings, "PROTECTED_MEDIA_ACCEL_PREFIX", ""):
+        return _accel_response(fieldfile.name, filename, content_type, as_attachment)
+
+    try:
+        path = fieldfile.path
+        stat = os.stat(path)
+    except (NotImplementedError, ValueError, FileNotFoundError):
+        raise Http404("Archivo no encontrado.")
+
+    etag = _etag_for(stat)
+    last_modified = int(stat.st_mtime)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    size = stat.st_size
+    rng = None
+    if request.method == "GET" and "HTTP_RANGE" in request.META:
+        # If-Range: solo respetamos el rango si el validador coincide
+        if_range = request.META.get("HTTP_IF_RANGE", "").strip()
+        if not if_range or if_range == etag or parse_http_date_safe(if_range) == last_modified:
+            rng = _parse_range(request.META["HTTP_RANGE"], size)
+
+    if rng == "invalid":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if rng:
+        start, end = rng
+        length = end - start + 1
+        response = StreamingHttpResponse(_iter_range(path, start, length), status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(length)
+    else:
+        # FileResponse usa wsgi.file_wrapper (sendfile) cuando el servidor lo soporta
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+        response["Content-Length"] = str(size)
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Content-Disposition"] = _content_disposition(filename, as_attachment)
+    response["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return response
@@ -0,0 +1,235 @@
+# alumnos/services/rendimiento.py
+"""
+Acumulador de métricas por vista para RendimientoMiddleware.
+
+Cada worker suma en memoria (por minuto, vista y método) latencia, consultas, tiempo de
+BD y bytes, más un histograma de latencias; un hilo de fondo lo vacía cada
+PERF_FLUSH_SEGUNDOS con un bulk_create de MetricaVista, fuera de la petición y con su
+propia conexión. Las peticiones más lentas que PERF_LENTO_MS se guardan
+como MuestraLenta con su SQL (solo las más lentas de cada vaciado).
+
+Los percentiles del panel se calculan sumando histogramas, así que no hace falta
+guardar cada petición.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Límite superior (ms) de cada cubeta; la última cubeta es "más de 60 s"
+CUBETAS_MS = [
+    5, 10, 20, 35, 50, 75, 100, 150, 200, 300, 400, 500, 750,
+    1000, 1500, 2000, 3000, 5000, 7500, 10000, 20000, 60000,
+]
+
+
+def cubeta(ms: float) -> int:
+    return bisect_left(CUBETAS_MS, ms)
+
+
+def percentil(histograma, p: float) -> float:
+    """Estimación del percentil `p` (0-100) interpolando dentro de la cubeta."""
+    total = sum(histograma)
+    if not total:
+        return 0.0
+    objetivo = total * p / 100
+    acumulado = 0
+    for i, n in enumerate(histograma):
+        if not n:
+            continue
+        if acumulado + n >= objetivo:
+            inferior = CUBETAS_MS[i - 1] if i > 0 else 0
+            superior = CUBETAS_MS[i] if i < len(CUBETAS_MS) else CUBETAS_MS[-1] * 2
+            return inferior + (superior - inferior) * (objetivo - acumulado) / n
+        acumulado += n
+    return float(CUBETAS_MS[-1])
+
+
+def sumar_histogramas(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    return [x + (b[i] if i < len(b) else 0) for i, x in enumerate(a)]
+
+
+class Acumulador:
+    """
+    `en_hilo=False` no arranca el hilo de vaciado: quien lo use llama flush() a mano
+    (pruebas, comandos).
+    """
+
+    def __init__(self, *, en_hilo=True):
+        self._lock = threading.Lock()
+        self._metricas = {}
+        self._muestras = []
+        self._en_hilo = en_hilo
+        self._hilo = None
+        self._pid = None
+
+    def registrar(self, *, url_name, metodo, status, ms, consultas, db_ms, bytes_, ruta="", usuario_id=None, sql=None):
+        ventana = timezone.now().replace(second=0, microsecond=0)
+        clave = (ventana, url_name, metodo)
+        with self._lock:
+            m = self._metricas.get(clave)
+            if m is None:
+                m = self._metricas[clave] = {
+                    "peticiones": 0, "errores": 0, "ms_total": 0.0, "ms_max": 0.0,
+                    "consultas_total": 0, "db_ms_total": 0.0, "bytes_total": 0,
+                    "histograma": [0] * (len(CUBETAS_MS) + 1),
+                }
+            m["peticiones"] += 1
+            m["errores"] += 1 if status >= 500 else 0
+            m["ms_total"] += ms
+            m["ms_max"] = max(m["ms_max"], ms)
+            m["consultas_total"] += consultas
+            m["db_ms_total"] += db_ms
+            m["bytes_total"] += bytes_
+            m["histograma"][cubeta(ms)] += 1
+
+            if ms >= settings.PERF_LENTO_MS:
+                self._muestras.append({
+                    "url_name": url_name, "ruta": ruta[:500], "metodo": metodo, "status": status,
+                    "ms": ms, "consultas": consultas, "db_ms": db_ms, "bytes": bytes_,
+                    "usuario_id": usuario_id,
+                    "sql": [[round(t, 2), s] for t, s in (sql or [])],
+                })
+                if len(self._muestras) > settings.PERF_MAX_MUESTRAS_FLUSH * 2:
+                    self._recortar_muestras()
+
+        if self._en_hilo:
+            self._arrancar_hilo()
+
+    def _arrancar_hilo(self):
+        # tras un fork (gunicorn --preload) el hilo del padre no existe en el hijo
+        if self._pid == os.getpid() and self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._hilo is not None and self._hilo.is_alive():
+                return
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(target=self._vaciar_periodicamente, name="rendimiento-flush", daemon=True)
+            self._hilo.start()
+
+    def _vaciar_periodicamente(self):
+        while True:
+            time.sleep(settings.PERF_FLUSH_SEGUNDOS)
+            try:
+                self.flush()
+            finally:
+                # las conexiones son por hilo: solo cierra la de este
+                connections.close_all()
+
+    def _recortar_muestras(self):
+        self._muestras.sort(key=lambda x: x["ms"], reverse=True)
+        del self._muestras[settings.PERF_MAX_MUESTRAS_FLUSH:]
+
+    def flush(self):
+        """
+        Escribe el acumulado a la BD. No lanza: perder métricas no debe tumbar a quien
+        vacía. Va en su propio atomic para que, si se llama dentro de una transacción
+        (el panel), un error solo revierta su savepoint y no la deje inutilizable.
+        """
+        from alumnos.models import MetricaVista, MuestraLenta
+
+        with self._lock:
+            metricas, self._metricas = self._metricas, {}
+            self._recortar_muestras()
+            muestras, self._muestras = self._muestras, []
+        if not metricas and not muestras:
+            return 0
+        try:
+            with transaction.atomic():
+                MetricaVista.objects.bulk_create([
+                    MetricaVista(ventana=v, url_name=u[:200], metodo=m, **datos)
+                    for (v, u, m), datos in metricas.items()
+                ])
+                MuestraLenta.objects.bulk_create([MuestraLenta(**d) for d in muestras])
+        except Exception:
+            logger.warning("No se pudieron guardar métricas de rendimiento", exc_info=True)
+            return 0
+        return len(metricas)
+
+
+acumulador = Acumulador()
+
+
+def _flush_al_salir():
+    try:
+        acumulador.flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_al_salir)
+
+
+# ============================================================
+# Consultas para el panel
+# ============================================================
+
+def resumen(desde, *, orden="tiempo_total"):
+    """
+    Una fila por vista con p50/p95 (ms), promedio de consultas/BD/bytes y errores.
+    `orden`: tiempo_total (peticiones × promedio), p95, peticiones o consultas.
+    """
+    from alumnos.models import MetricaVista
+
+    filas = {}
+    for m in MetricaVista.objects.filter(ventana__gte=desde).iterator():
+        f = filas.get(m.url_name)
+        if f is None:
+            f = filas[m.url_name] = {
+                "url_name": m.url_name, "metodos": set(), "peticiones": 0, "errores": 0,
+                "ms_total": 0.0, "ms_max": 0.0, "consultas_total": 0, "db_ms_total": 0.0,
+                "bytes_total": 0, "histograma": [],
+            }
+        f["metodos"].add(m.metodo)
+        f["peticiones"] += m.peticiones
+        f["errores"] += m.errores
+        f["ms_total"] += m.ms_total
+        f["ms_max"] = max(f["ms_max"], m.ms_max)
+        f["consultas_total"] += m.consultas_total
+        f["db_ms_total"] += m.db_ms_total
+        f["bytes_total"] += m.bytes_total
+        f["histograma"] = sumar_histogramas(f["histograma"], m.histograma or [])
+
+    resultado = []
+    for f in filas.values():
+        n = f["peticiones"] or 1
+        resultado.append({
+            "url_name": f["url_name"],
+            "metodos": ", ".join(sorted(f["metodos"])),
+            "peticiones": f["peticiones"],
+            "errores": f["errores"],
+            # la interpolación dentro de la cubeta puede pasarse del máximo observado
+            "p50": round(min(percentil(f["histograma"], 50), f["ms_max"]), 1),
+            "p95": round(min(percentil(f["histograma"], 95), f["ms_max"]), 1),
+            "ms_max": round(f["ms_max"], 1),
+            "ms_prom": round(f["ms_total"] / n, 1),
+            "tiempo_total_s": round(f["ms_total"] / 1000, 1),
+            "consultas_prom": round(f["consultas_total"] / n, 1),
+            "db_ms_prom": round(f["db_ms_total"] / n, 1),
+            "kb_prom": round(f["bytes_total"] / n / 1024, 1),
+        })
+    claves = {"p95": "p95", "peticiones": "peticiones", "consultas": "consultas_prom"}
+    resultado.sort(key=lambda r: r[claves.get(orden, "tiempo_total_s")], reverse=True)
+    return resultado
+
+
+def purgar(dias=None) -> tuple:
+    from alumnos.models import MetricaVista, MuestraLenta
+
+    dias = dias if dias is not None else settings.PERF_RETENCION_DIAS
+    limite = timezone.now() - timedelta(days=dias)
+    return (
+        MetricaVista.objects.filter(ventana__lt=limite).delete()[0],
+        MuestraLenta.objects.filter(creado_en__lt=limite).delete()[0],
+    )
@@ -0,0 +1,77 @@
+# alumnos/services/twilio_fake.py
+"""
+Twilio falso para pruebas y desarrollo (settings.TWILIO_FAKE=True): misma interfaz que
+`twilio.rest.Client` para lo que usamos (`client.messages.create(...)`), sin red.
+
+    cliente = FakeTwilioClient()
+    m = cliente.messages.create(to="+52...", body="hola", from_="+1...")
+    cliente.enviados                # [{"sid", "to", "body", ...}]
+    callback_falso(m.sid, "delivered")  # payload como el que manda Twilio
+    firma_falsa(url, datos, auth_token)  # X-Twilio-Signature de ese payload
+
+Números que terminan en FALLA_SUFIJO fallan como lo haría Twilio (código 21211,
+número inválido), para probar errores sin un número real.
+"""
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from twilio.base.exceptions import TwilioRestException
+
+FALLA_SUFIJO = "0000"
+
+
+def _sid() -> str:
+    return f"SMfake{uuid.uuid4().hex[:26]}"
+
+
+class _Mensajes:
+    def __init__(self, cliente):
+        self._cliente = cliente
+
+    def create(self, *, to, body, from_=None, messaging_service_sid=None, status_callback=None, **kwargs):
+        if self._cliente.latencia:
+            time.sleep(self._cliente.latencia)
+        if to.endswith(FALLA_SUFIJO):
+            raise TwilioRestException(
+                400, "/Messages.json", msg=f"The 'To' number {to} is not a valid phone number.", code=21211,
+            )
+        m = SimpleNamespace(
+            sid=_sid(), status="queued", to=to, body=body,
+            from_=from_ or messaging_service_sid, status_callback=status_callback,
+            error_code=None, error_message=None,
+        )
+        with self._cliente._lock:
+            self._cliente.enviados.append(vars(m))
+        return m
+
+
+class FakeTwilioClient:
+    def __init__(self, account_sid="ACfake", auth_token="fake", *, latencia: float = 0.0):
+        self.account_sid = account_sid
+        self.latencia = latencia  # segundos por mensaje, para probar concurrencia
+        self.enviados = []
+        self._lock = threading.Lock()
+        self.messages = _Mensajes(self)
+
+
+def callback_falso(sid: str, estado: str, *, error_code: str = "", cuenta: str = "ACfake") -> dict:
+    """Campos de un status callback de Twilio (form-encoded) para un mensaje."""
+    datos = {
+        "MessageSid": sid,
+        "SmsSid": sid,
+        "MessageStatus": estado,
+        "SmsStatus": estado,
+        "AccountSid": cuenta,
+    }
+    if error_code:
+        datos["ErrorCode"] = error_code
+    return datos
+
+
+def firma_falsa(url: str, datos: dict, auth_token: str) -> str:
+    """X-Twilio-Signature que Twilio mandaría con `datos` a `url` (misma cuenta)."""
+    from twilio.request_validator import RequestValidator
+
+    return RequestValidator(auth_token).compute_signature(url, datos)
@@ -0,0 +1,142 @@
+# alumnos/services/vinculo_pagos.py
+"""
+Vincula PagoDiario con su Alumno (FK) y normaliza la CURP.
+
+Los saldos (alumnos.cartera, alumnos.servicios, cartera_corte) filtran los pagos solo
+por `alumno`, con índice. Para eso cada pago debe quedar ligado:
+
+- Al guardar (pre_save): CURP en mayúsculas sin espacios ni guiones y, si no trae
+  alumno, se busca por `numero_alumno` y luego por CURP (búsquedas indexadas).
+- `vincular()` (`manage.py vincular_pagos`, nocturno y tras importaciones con
+  bulk_create/update): lo mismo para todos los pagos sin alumno, más el nombre
+  completo normalizado. Una CURP o un nombre que corresponde a varios alumnos no
+  se vincula; esos pagos se reportan como pendientes. La migración 0061 lo corre con
+  los modelos históricos para los pagos que ya existían: los saldos no esperan al cron.
+"""
+import logging
+import re
+from collections import Counter, defaultdict
+
+from django.db.models import Q
+from django.db.models.signals import pre_save
+
+from alumnos.models import Alumno, PagoDiario
+from alumnos.services.match_helpers import _compact, _norm
+
+logger = logging.getLogger(__name__)
+
+LOTE = 2000
+VIAS = ("por_numero", "por_curp", "por_nombre")
+MOTIVOS = ("curp_ambigua", "nombre_ambiguo", "sin_coincidencia")
+_NO_CURP = re.compile(r"[^A-Z0-9]")
+
+
+def normalizar_curp(valor):
+    """'  gomj-800101 hdfrrn09 ' -> 'GOMJ800101HDFRRN09'; vacía -> None."""
+    curp = _NO_CURP.sub("", (valor or "").upper())
+    return curp or None
+
+
+def normalizar_nombre(*partes):
+    return _compact(_norm(" ".join(p for p in partes if p)))
+
+
+# ============================================================
+# Al guardar
+# ============================================================
+
+def resolver_alumno_id(pago):
+    """Alumno de un pago por número o CURP exacta (sin nombre: requiere recorrer alumnos)."""
+    if pago.numero_alumno and Alumno.objects.filter(pk=pago.numero_alumno).exists():
+        return pago.numero_alumno
+    if pago.curp:
+        ids = list(Alumno.objects.filter(curp=pago.curp).values_list("pk", flat=True)[:2])
+        if len(ids) == 1:
+            return ids[0]
+    return None
+
+
+def _pago_por_guardar(sender, instance, raw=False, **kwargs):
+    if raw:  # loaddata
+        return
+    instance.curp = normalizar_curp(instance.curp)
+    if instance.alumno_id is None:
+        instance.alumno_id = resolver_alumno_id(instance)
+
+
+def conectar_senales():
+    """Llamado desde AlumnosConfig.ready()."""
+    pre_save.connect(_pago_por_guardar, sender=PagoDiario, weak=False, dispatch_uid="vinculo_pagos:PagoDiario")
+
+
+# ============================================================
+# En bloque
+# ============================================================
+
+class _Indice:
+    """Alumnos por número, CURP normalizada y nombre normalizado (una consulta)."""
+
+    def __init__(self, modelo=Alumno):
+        self.numeros = set()
+        self.curps = defaultdict(set)
+        self.nombres = defaultdict(set)
+        filas = modelo.objects.values_list("pk", "curp", "nombre", "apellido_p", "apellido_m")
+        for pk, curp, nombre, ap, am in filas.iterator(chunk_size=LOTE):
+            self.numeros.add(pk)
+            if normalizar_curp(curp):
+                self.curps[normalizar_curp(curp)].add(pk)
+            if nombre and ap:
+                self.nombres[normalizar_nombre(nombre, ap, am)].add(pk)
+
+    def resolver(self, numero, curp, nombre):
+        """(alumno_id, vía) o (None, motivo)."""
+        if numero and numero in self.numeros:
+            return numero, "numero"
+        candidatos = self.curps.get(curp) if curp else None
+        if candidatos:
+            return (next(iter(candidatos)), "curp") if len(candidatos) == 1 else (None, "curp_ambigua")
+        candidatos = self.nombres.get(normalizar_nombre(nombre)) if nombre else None
+        if candidatos:
+            return (next(iter(candidatos)), "nombre") if len(candidatos) == 1 else (None, "nombre_ambiguo")
+        return None, "sin_coincidencia"
+
+
+def vincular(*, pendientes=None, apps=None) -> Counter:
+    """
+    Liga los pagos sin alumno y normaliza las CURP de todos los que lo necesiten (una
+    lectura y bulk_update por lotes). `pendientes`, si se pasa una lista, recibe
+    (id, folio, fecha, nombre, curp, motivo) de cada pago que no se pudo ligar.
+    `apps`: registro histórico cuando se llama desde una migración.
+    Devuelve un Counter: vinculados por vía, curps normalizadas y pendientes por motivo.
+    """
+    pago_modelo = apps.get_model("alumnos", "PagoDiario") if apps else PagoDiario
+    indice = _Indice(apps.get_model("alumnos", "Alumno") if apps else Alumno)
+    stats = Counter()
+    cambios = []
+
+    qs = (
+        pago_modelo.objects
+        .filter(Q(alumno__isnull=True) | Q(curp__regex=r"[^A-Z0-9]"))
+        .order_by("pk")
+        .values_list("pk", "alumno_id", "curp", "numero_alumno", "nombre", "folio", "fecha")
+    )
+    for pk, alumno_id, curp, numero, nombre, folio, fecha in qs.iterator(chunk_size=LOTE):
+        nueva = normalizar_curp(curp)
+        if nueva != curp:
+            stats["curp_normalizada"] += 1
+        if alumno_id is None:
+            alumno_id, via = indice.resolver(numero, nueva, nombre)
+            if alumno_id:
+                stats[f"por_{via}"] += 1
+            else:
+                stats[via] += 1
+                if pendientes is not None:
+                    pendientes.append((pk, folio, fecha, nombre, nueva, via))
+                if nueva == curp:
+                    continue
+        cambios.append(pago_modelo(pk=pk, alumno_id=alumno_id, curp=nueva))
+    # se escribe al terminar de leer: SQLite no admite escribir con el cursor abierto
+    pago_modelo.objects.bulk_update(cambios, ["alumno", "curp"], batch_size=LOTE)
+
+    logger.info("Vínculo de pagos: %s", dict(stats))
+    return stats
@@ -5,16 +5,6 @@ from alumnos.models import Cargo, PagoDiario, Alumno
 
 DINERO = Decimal('0.01')
 
-# Palabras clave por concepto para detectar pagos relacionados desde PagoDiario
-CONCEPTO_KEYWORDS = {
-    # puedes ajustar/expandir
-    'COLEGIATURA': ['colegiatura', 'mensualidad', 'tuition', 'pago mensual'],
-    'INSCRIPCION': ['inscripción', 'inscripcion', 'matrícula', 'matricula'],
-    'REINSCRIPCION': ['reinscripción', 'reinscripcion'],
-    'TITULACION': ['titulación', 'titulacion'],
-    'EQV': ['equivalencia'],
-}
-
 def _money(x) -> Decimal:
     if x is None:
         return Decimal('0.00')
@@ -24,34 +14,17 @@ def _money(x) -> Decimal:
 
 def _q_pagos_por_concepto(concepto_codigo: str) -> Q:
     """
-    Construye un Q para filtrar PagoDiario por concepto/pago_detalle con palabras clave del concepto.
-    Si no hay keywords para el código, cae a un match por 'concepto__icontains'.
+    PagoDiario del concepto según su clasificación (`concepto_pago`, ver
+    alumnos.services.clasificador_conceptos): igualdad indexada, sin buscar palabras.
     """
-    code = (concepto_codigo or '').upper().strip()
-    kws = CONCEPTO_KEYWORDS.get(code, None)
-
-    q = Q()
-    if kws:
-        sub = Q()
-        for w in kws:
-            sub |= Q(concepto__icontains=w) | Q(pago_detalle__icontains=w)
-        q &= sub
-    else:
-        # Fallback: intenta por el código en texto
-        q &= (Q(concepto__icontains=code) | Q(pago_detalle__icontains=code))
-
-    return q
+    return Q(concepto_pago__codigo__iexact=(concepto_codigo or '').strip())
 
 def _q_pagos_del_alumno(alumno: Alumno) -> Q:
     """
-    Considera pagos enlazados por FK alumno y, como respaldo, por CURP o número de alumno si existen.
+    Pagos enlazados por FK alumno. Los que llegan solo con CURP o número de alumno se
+    ligan al guardar o con `manage.py vincular_pagos` (alumnos.services.vinculo_pagos).
     """
-    q = Q(alumno=alumno)
-    if getattr(alumno, 'curp', None):
-        q |= Q(curp__iexact=alumno.curp)
-    if getattr(alumno, 'numero_estudiante', None):
-        q |= Q(numero_alumno=alumno.numero_estudiante)
-    return q
+    return Q(alumno=alumno)
 
 def _ordenar_pagos_recientes(pagos_qs):
     # más recientes primero, y luego por creado_en si la fecha empata
@@ -67,7 +40,7 @@ def calcular_saldos_por_concepto(alumno: Alumno, concepto_codigo: str, restar_ma
     """
     Retorna un dict con el detalle de cargos (monto original, aplicado, restante) para el concepto.
     NO escribe nada en DB; solo calcula en memoria.
-    - Aplica pagos de PagoDiario que coincidan con el concepto (por keywords), en orden más reciente -> más antiguo.
+    - Aplica pagos de PagoDiario clasificados en el concepto (concepto_pago), en orden más reciente -> más antiguo.
     - Permite pagos parciales.
     """
     # 1) Cargos del concepto (aunque estén marcados como pagados, se recalcula “virtualmente”)
@@ -1,3 +1,1134 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core import mail
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from alumnos.models import (
+    AlertaAlumno, Alumno, ArchivoBlob, BloqueNumeracion, CampanaMensajes, Cargo, ConceptoPago, CorreoSaliente, CurpConsulta, DocumentoAlumno, DocumentoTipo, Estado, EstadoCuentaSnapshot, EventoEstadoTwilio, Financiamiento,
+    InformacionEscolar, MetricaVista, MuestraLenta, PagoDiario, Pais, ReglaConcepto, ReinscripcionHito, SaldoCartera, TwilioConfig, UploadInvite, UserProfile,
+)
+from alumnos.cartera import aplicar_pagos, pagos_para_saldo
+from alumnos.services import (
+    alertas, benchmark, cartera_corte, catalogos, clasificador_conceptos, correos, curp_lookup, documentos_derivados,
+    importacion_alumnos, mensajeria, numeracion, plan_cargos, rendimiento, vinculo_pagos,
+)
+from alumnos.services.datos_sinteticos import sembrar
+from alumnos.services.nmas1 import ConsultasRepetidasError, detectar_nmas1, forma_sql
+from alumnos.services.twilio_fake import callback_falso, firma_falsa
+
+
+@override_settings(NMAS1_ACTIVO=True, NMAS1_ESTRICTO=True)
+class PresupuestoConsultasTests(TestCase):
+    """
+    Cada vista/servicio de alumnos/services/benchmark.py debe quedar dentro de su
+    presupuesto de consultas. Se siembra con dos tamaños: si el número de consultas
+    crece con los datos (N+1) también falla, aunque siga bajo el presupuesto.
+    El detector de N+1 corre en modo estricto en estas peticiones.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=25, pagos=300, movimientos=5, invitaciones=5, usuarios=3, programas=2, seed=1)
+
+    def _medir(self):
+        return benchmark.ejecutar(repeticiones=1)
+
+    def test_vistas_dentro_del_presupuesto(self):
+        resultados = self._medir()
+        self.assertEqual(set(resultados), set(benchmark.PRESUPUESTOS_CONSULTAS))
+        for nombre, r in resultados.items():
+            with self.subTest(escenario=nombre):
+                self.assertLessEqual(
+                    r["consultas"], r["presupuesto"],
+                    f"{nombre}: {r['consultas']} consultas (presupuesto {r['presupuesto']})",
+                )
+
+    def test_consultas_no_crecen_con_los_datos(self):
+        antes = self._medir()
+        sembrar(alumnos=25, pagos=300, movimientos=5, invitaciones=5, usuarios=3, programas=2, seed=2)
+        despues = self._medir()
+        for nombre in antes:
+            with self.subTest(escenario=nombre):
+                self.assertEqual(antes[nombre]["consultas"], despues[nombre]["consultas"])
+
+
+@override_settings(PERF_ACTIVO=False)
+class DetalleAlumnoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=3, pagos=30, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=4)
+        cls.alumno = Alumno.objects.filter(cargos__isnull=False).first()
+        cls.user = get_user_model().objects.create_user("admisiones1")
+        for nombre in ("admisiones", "pagos", "documentos"):
+            cls.user.groups.add(Group.objects.get_or_create(name=nombre)[0])
+        Alumno.objects.filter(pk=cls.alumno.pk).update(created_by=cls.user)
+
+    def test_consultas_fijas_sin_importar_los_cargos(self):
+        self.client.force_login(self.user)
+        url = reverse("alumnos:alumnos_detalle", args=[self.alumno.pk])
+        self.client.get(url)  # primera vista: reconcilia Cargo.pagado
+
+        with self.assertNumQueries(11) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(sum("auth_group" in q["sql"] for q in ctx.captured_queries), 1)
+
+        base = Cargo.objects.filter(alumno=self.alumno).first()
+        for i in range(5):
+            Cargo.objects.create(alumno=self.alumno, concepto=base.concepto, monto=100 + i,
+                                 fecha_cargo=base.fecha_cargo, folio=f"T{i}")
+        self.client.get(url)
+        with self.assertNumQueries(11):
+            self.client.get(url)
+
+
+@override_settings(PERF_ACTIVO=False)
+class AlertasAlumnoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            sembrar(alumnos=3, pagos=0, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=5)
+        alertas.recalcular_todos()  # sembrar usa bulk_create (sin señales)
+        cls.alumno = Alumno.objects.select_related("informacionEscolar").first()
+
+    def _alerta(self):
+        return AlertaAlumno.objects.get(alumno=self.alumno)
+
+    def test_senales_mantienen_los_bits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Cargo.objects.filter(alumno=self.alumno).delete()
+        self.assertFalse(self._alerta().flags & AlertaAlumno.BITS["cargos_pendientes"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Cargo.objects.create(alumno=self.alumno, concepto=ConceptoPago.objects.first(), monto=100,
+                                 fecha_cargo=date.today() - timedelta(days=3))
+            self.alumno.curp = ""
+            self.alumno.save()
+        alerta = self._alerta()
+        self.assertEqual(alerta.cargos_pendientes, 1)
+        self.assertTrue(alerta.flags & AlertaAlumno.BITS["sin_curp"])
+
+        info = self.alumno.informacionEscolar
+        with self.captureOnCommitCallbacks(execute=True):
+            info.sede = None
+            info.save()
+        alerta = self._alerta()
+        self.assertIsNone(alerta.sede_id)
+        self.assertIn("Sin sede", alerta.etiquetas)
+
+    def test_lista_filtra_por_tipo(self):
+        admin = get_user_model().objects.create_superuser("admin-alertas")
+        AlertaAlumno.objects.filter(alumno=self.alumno).update(flags=AlertaAlumno.BITS["sin_matricula"])
+        AlertaAlumno.objects.exclude(alumno=self.alumno).update(flags=AlertaAlumno.BITS["sin_curp"])
+        self.client.force_login(admin)
+        resp = self.client.get(reverse("alumnos:alumnos_con_alertas"), {"tipo": "sin_matricula"})
+        self.assertEqual([a.alumno_id for a in resp.context["page_obj"]], [self.alumno.pk])
+
+
+@override_settings(PERF_ACTIVO=False)
+class AlcanceSedesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=12, pagos=60, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=6)
+        cls.sede = Alumno.objects.exclude(informacionEscolar__sede=None).first().informacionEscolar.sede
+        cls.user = get_user_model().objects.create_user("sede1")
+        cls.user.groups.add(Group.objects.get_or_create(name="pagos")[0])
+        UserProfile.objects.create(user=cls.user).sedes.add(cls.sede)
+        cls.propio = Alumno.objects.exclude(informacionEscolar__sede=cls.sede).first()
+        Alumno.objects.filter(pk=cls.propio.pk).update(created_by=cls.user)
+
+    def test_alumnos_visibles_sin_distinct(self):
+        esperados = set(Alumno.objects.filter(informacionEscolar__sede=self.sede).values_list("pk", flat=True))
+        esperados.add(self.propio.pk)
+        qs = Alumno.objects.visibles_para(self.user)
+        self.assertNotIn("DISTINCT", str(qs.query))
+        self.assertEqual(set(qs.values_list("pk", flat=True)), esperados)
+
+        Group.objects.get_or_create(name="admisiones")[0].user_set.add(self.user)
+        admisiones = get_user_model().objects.get(pk=self.user.pk)
+        self.assertEqual(list(Alumno.for_user(admisiones).values_list("pk", flat=True)), [self.propio.pk])
+
+    def test_lista_de_pagos_por_sede(self):
+        self.client.force_login(self.user)
+        pagos = self.client.get(reverse("alumnos:pagos_diario_lista")).context["pagos"]
+        esperados = PagoDiario.objects.filter(
+            alumno__informacionEscolar__sede=self.sede, fecha__gte=date.today() - timedelta(days=730),
+        )
+        self.assertTrue(esperados.exists())
+        self.assertEqual({p.pk for p in pagos}, set(esperados.values_list("pk", flat=True)))
+
+
+@override_settings(PERF_ACTIVO=False)
+class CorteCarteraTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=15, pagos=200, movimientos=1, invitaciones=1, usuarios=1, programas=2, seed=8)
+        # pagos de otro concepto
+        PagoDiario.objects.filter(pk__in=PagoDiario.objects.order_by("pk").values("pk")[:30]).update(
+            concepto="Inscripción", pago_detalle="Inscripción", clasificacion="pendiente",
+        )
+        clasificador_conceptos.reclasificar()
+
+    def test_coincide_con_el_reparto_por_alumno(self):
+        with self.assertNumQueries(7):
+            stats = cartera_corte.corte(reconciliar=False)
+        saldos = {s.alumno_id: s for s in SaldoCartera.objects.filter(fecha_corte=stats["fecha"])}
+        self.assertTrue(saldos)
+        for alumno in Alumno.objects.all():
+            cargos = list(Cargo.objects.select_related("concepto").filter(alumno=alumno))
+            detalle, _ = aplicar_pagos(cargos, pagos_para_saldo(alumno))
+            pendientes = [d for d in detalle if d["monto_restante"] > 0]
+            s = saldos.get(alumno.pk)
+            self.assertEqual(s.saldo if s else 0, sum(d["monto_restante"] for d in pendientes))
+            self.assertEqual(s.vencido if s else 0, sum(d["monto_restante"] for d in pendientes if d["is_overdue"]))
+            self.assertEqual(s.dias_mora if s else 0, max([d["dias_mora"] for d in pendientes], default=0))
+
+    def test_reconcilia_pagado_y_resume(self):
+        Cargo.objects.update(pagado=False)
+        stats = cartera_corte.corte()
+        self.assertGreater(stats["cargos_actualizados"], 0)
+        self.assertEqual(cartera_corte.corte()["cargos_actualizados"], 0)
+
+        admin = get_user_model().objects.create_superuser("admin-cartera")
+        self.client.force_login(admin)
+        resp = self.client.get(reverse("alumnos:cartera_resumen"), {"por": "programa"})
+        self.assertEqual(resp.context["fecha_corte"], stats["fecha"])
+        self.assertEqual(resp.context["totales"]["saldo"], stats["saldo"])
+        self.assertEqual(sum(f["saldo"] for f in resp.context["filas"]), stats["saldo"])
+
+
+@override_settings(PERF_ACTIVO=False)
+class PlanCargosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=4, pagos=0, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=4)
+        Cargo.objects.all().delete()
+        for codigo, nombre in (("COLEGIATURA", "Colegiatura"), ("INSCRIPCION", "Inscripción"), ("REINSCRIPCION", "Reinscripción")):
+            ConceptoPago.objects.get_or_create(codigo=codigo, defaults={"nombre": nombre})
+        InformacionEscolar.objects.update(
+            meses_programa=3, inicio_programa=date(2025, 1, 15), precio_final=Decimal("2000.00"),
+            precio_inscripcion=Decimal("1000.00"),
+        )
+        programa = InformacionEscolar.objects.first().programa
+        InformacionEscolar.objects.update(programa=programa)
+        ReinscripcionHito.objects.create(programa=programa, meses_offset=2, monto=Decimal("500.00"))
+        ReinscripcionHito.objects.create(programa=programa, meses_offset=9)
+
+    def test_vista_previa_crea_y_extiende_sin_duplicar(self):
+        alumnos = plan_cargos.cohorte(programa=InformacionEscolar.objects.first().programa)
+        detalle = []
+        stats = plan_cargos.programar(alumnos, preview=True, detalle=detalle)
+        self.assertFalse(Cargo.objects.exists())
+        # por alumno: inscripción, 3 mensualidades y el hito del mes 2; el del mes 9 queda fuera
+        self.assertEqual((stats["alumnos"], stats["nuevos"], stats["fuera_de_rango"]), (4, 20, 4))
+
+        primero = alumnos.order_by("pk").first()
+        Cargo.objects.create(
+            alumno=primero, concepto=plan_cargos.concepto_mensual(), fecha_cargo=date(2025, 1, 1), monto=Decimal("2000.00"),
+        )
+        # alumnos, hitos, existentes y la escritura, sin importar cuántos alumnos
+        with self.assertNumQueries(7):
+            stats = plan_cargos.programar(alumnos)
+        self.assertEqual((stats["nuevos"], stats["vencimientos"]), (19, 1))
+        self.assertFalse(Cargo.objects.filter(fecha_vencimiento__isnull=True).exists())
+        self.assertEqual(
+            Cargo.objects.get(alumno=primero, concepto__codigo="REINSCRIPCION").fecha_cargo, date(2025, 3, 15),
+        )
+
+        InformacionEscolar.objects.filter(pk=primero.informacionEscolar_id).update(meses_programa=4)
+        stats = plan_cargos.programar(alumnos)
+        self.assertEqual((stats["nuevos"], stats["existentes"]), (1, 20))
+
+    def test_vista_cohorte_y_por_alumno(self):
+        admin = get_user_model().objects.create_superuser("admin-plan")
+        self.client.force_login(admin)
+        resp = self.client.post(reverse("alumnos:programar_cargos_cohorte"), {"inicio": "2025-01", "preview": "1"})
+        self.assertEqual((resp.json()["nuevos"], len(resp.json()["cargos"])), (20, 20))
+        self.assertFalse(Cargo.objects.exists())
+
+        alumno = Alumno.objects.order_by("pk").first()
+        data = self.client.post(reverse("alumnos:generar_cargos_mensuales", args=[alumno.pk])).json()
+        self.assertEqual((data["creados"], data["inscripcion"]["creado"], data["reins_omitidos_fuera_rango"]), (3, True, 1))
+        self.assertEqual(Cargo.objects.count(), 5)
+
+
+class VinculoPagosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=6, pagos=40, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=9)
+        cls.alumno, cls.otro, cls.tercero = Alumno.objects.exclude(curp=None).order_by("pk")[:3]
+
+    def test_guardar_normaliza_curp_y_liga(self):
+        pago = PagoDiario.objects.create(monto=100, curp=f" {self.alumno.curp.lower()}-")
+        self.assertEqual(pago.curp, self.alumno.curp)
+        self.assertEqual(pago.alumno_id, self.alumno.pk)
+
+    def test_vincular_en_bloque_y_reporta_pendientes(self):
+        pagos = list(PagoDiario.objects.filter(alumno=self.alumno).order_by("pk")[:3])
+        por_numero, por_curp, por_nombre = pagos
+        PagoDiario.objects.filter(pk__in=[p.pk for p in pagos]).update(alumno=None, numero_alumno=None, curp=None)
+        PagoDiario.objects.filter(pk=por_numero.pk).update(numero_alumno=self.alumno.pk)
+        PagoDiario.objects.filter(pk=por_curp.pk).update(curp=self.alumno.curp.lower())
+        PagoDiario.objects.filter(pk=por_nombre.pk).update(
+            nombre=f"{self.alumno.nombre}  {self.alumno.apellido_p} {self.alumno.apellido_m}".upper(),
+        )
+        # una CURP de dos alumnos no se liga
+        Alumno.objects.filter(pk=self.tercero.pk).update(curp=self.otro.curp)
+        ambiguo = PagoDiario.objects.create(monto=50, curp=self.otro.curp)
+
+        pendientes = []
+        stats = vinculo_pagos.vincular(pendientes=pendientes)
+
+        self.assertEqual(
+            set(PagoDiario.objects.filter(pk__in=[p.pk for p in pagos]).values_list("alumno_id", flat=True)),
+            {self.alumno.pk},
+        )
+        self.assertEqual(PagoDiario.objects.get(pk=por_curp.pk).curp, self.alumno.curp)
+        self.assertEqual(stats["por_numero"], 1)
+        self.assertEqual(stats["por_nombre"], 1)
+        self.assertIn((ambiguo.pk, "curp_ambigua"), [(p[0], p[-1]) for p in pendientes])
+
+    def test_migracion_liga_los_pagos_existentes(self):
+        from django.apps import apps as registro
+
+        migracion = import_module("alumnos.migrations.0061_vincular_pagos_existentes")
+        pagos = list(PagoDiario.objects.filter(alumno=self.alumno).order_by("pk")[:2])
+        # como llegaron antes del vínculo al guardar: solo con número o CURP
+        PagoDiario.objects.filter(pk=pagos[0].pk).update(alumno=None, numero_alumno=self.alumno.pk)
+        PagoDiario.objects.filter(pk=pagos[1].pk).update(alumno=None, numero_alumno=None, curp=self.alumno.curp)
+
+        migracion.vincular_pagos(registro, None)
+        self.assertEqual(
+            list(PagoDiario.objects.filter(pk__in=[p.pk for p in pagos]).values_list("alumno_id", flat=True)),
+            [self.alumno.pk, self.alumno.pk],
+        )
+
+
+@override_settings(PERF_ACTIVO=False)
+class ClasificadorConceptosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=3, pagos=20, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=10)
+        cls.inscripcion = ConceptoPago.objects.get(codigo="INSCRIPCION")
+        cls.reinscripcion = ConceptoPago.objects.create(codigo="REINSCRIPCION", nombre="Reinscripción")
+        cls.titulacion = ConceptoPago.objects.create(codigo="TITULACION", nombre="Titulación")
+        ReglaConcepto.objects.create(concepto=cls.inscripcion, patron="matrícula")
+
+    def _clasificar(self, texto):
+        return clasificador_conceptos.clasificar(texto, "", clasificador_conceptos.reglas())
+
+    def test_reglas_prioridad_y_ambiguos(self):
+        self.assertEqual(self._clasificar("PAGO REINSCRIPCION 2do cuatri"), (self.reinscripcion.pk, "auto"))
+        self.assertEqual(self._clasificar("Matricula"), (self.inscripcion.pk, "auto"))
+        self.assertEqual(self._clasificar("donativo"), (None, "sin_regla"))
+
+        # mismo largo y prioridad en dos conceptos: a revisión, salvo que una regla tenga prioridad
+        regla = ReglaConcepto.objects.create(concepto=self.titulacion, patron="matricula")
+        self.assertEqual(self._clasificar("matricula"), (None, "revision"))
+        regla.prioridad = 10
+        regla.save()
+        self.assertEqual(self._clasificar("matricula"), (self.titulacion.pk, "auto"))
+
+    def test_al_guardar_y_cola_de_revision(self):
+        pago = PagoDiario.objects.create(monto=10, concepto="Titulación")
+        self.assertEqual((pago.concepto_pago_id, pago.clasificacion), (self.titulacion.pk, "auto"))
+
+        pago = PagoDiario.objects.create(monto=10, concepto="Donativo")
+        self.assertEqual(pago.clasificacion, "sin_regla")
+        admin = get_user_model().objects.create_superuser("admin-conceptos")
+        self.client.force_login(admin)
+        url = reverse("alumnos:pagos_concepto_revision")
+        self.assertIn(pago, self.client.get(url).context["page_obj"].object_list)
+        self.client.post(url, {"pago": pago.pk, "concepto": self.inscripcion.pk})
+        pago.refresh_from_db()
+        self.assertEqual((pago.concepto_pago_id, pago.clasificacion), (self.inscripcion.pk, "manual"))
+
+        # lo manual sobrevive a guardar y a reclasificar
+        pago.save()
+        PagoDiario.objects.exclude(pk=pago.pk).update(clasificacion="pendiente", concepto_pago=None)
+        stats = clasificador_conceptos.reclasificar(todos=True)
+        self.assertEqual(PagoDiario.objects.get(pk=pago.pk).concepto_pago_id, self.inscripcion.pk)
+        self.assertEqual(stats["cambiados"], PagoDiario.objects.exclude(pk=pago.pk).count())
+        self.assertFalse(PagoDiario.objects.filter(clasificacion="auto", concepto_pago=None).exists())
+
+    def test_migracion_clasifica_los_pagos_existentes(self):
+        from django.apps import apps as registro
+
+        migracion = import_module("alumnos.migrations.0060_clasificar_pagos_existentes")
+        manual = PagoDiario.objects.create(monto=10, concepto="Titulación")
+        PagoDiario.objects.filter(pk=manual.pk).update(clasificacion="manual", concepto_pago=self.inscripcion)
+        # como quedaron tras 0057: sin concepto y en 'pendiente'
+        PagoDiario.objects.exclude(pk=manual.pk).update(clasificacion="pendiente", concepto_pago=None)
+
+        migracion.clasificar_pagos(registro, None)
+        self.assertFalse(PagoDiario.objects.filter(clasificacion="pendiente").exists())
+        self.assertTrue(PagoDiario.objects.filter(clasificacion="auto", concepto_pago__isnull=False).exists())
+        self.assertEqual(PagoDiario.objects.get(pk=manual.pk).concepto_pago_id, self.inscripcion.pk)
+
+
+class ImportacionAlumnosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            sembrar(alumnos=2, pagos=1, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=11)
+        cls.existente = Alumno.objects.select_related("informacionEscolar__programa", "informacionEscolar__sede").first()
+
+    def _libro(self, filas):
+        from openpyxl import Workbook
+
+        libro = Workbook()
+        ws = libro.active
+        ws.title = "BASE ALUMNOS"
+        ws.append(["CONTROL DE ALUMNOS"])
+        ws.append(["No.", "PROGRAMA", "CURP", "NOMBRE", "CORREO", "SEDE", "Meses de Programa",
+                   "Monto de Colegiatura (A PAGAR)", "FECHA DE INICIO (PRIMERA CLASE CALENDARIO)", "ESTATUS ACADÉMICO"])
+        for fila in filas:
+            ws.append(fila)
+        fd, ruta = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        self.addCleanup(os.remove, ruta)
+        libro.save(ruta)
+        return ruta
+
+    def test_simulacion_importa_y_repite_sin_cambios(self):
+        plan = self.existente.informacionEscolar
+        programa, sede = plan.programa.codigo, plan.sede.nombre
+        ruta = self._libro([
+            [900001, programa, "gomj800101hdfrrn09", "GÓMEZ MARTÍNEZ JUAN", "j@x.com", sede, 12, "2,500", date(2025, 1, 6), "Vigente"],
+            [],
+            [self.existente.pk, programa, self.existente.curp,
+             f"{self.existente.apellido_p} {self.existente.apellido_m} {self.existente.nombre}", "nuevo@x.com",
+             sede, plan.meses_programa, plan.precio_colegiatura, plan.inicio_programa, "baja temporal"],
+        ])
+
+        diff = []
+        stats = importacion_alumnos.importar(ruta, dry_run=True, diff=diff)
+        self.assertEqual((stats["alumnos_nuevos"], stats["alumnos_actualizados"]), (1, 1))
+        self.assertFalse(Alumno.objects.filter(pk=900001).exists())
+        cambios = {c.numero: dict((campo, despues) for campo, _, despues in c.campos) for c in diff}
+        self.assertEqual(cambios[self.existente.pk]["email"], "nuevo@x.com")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            importacion_alumnos.importar(ruta)
+        nuevo = Alumno.objects.select_related("informacionEscolar__estatus_academico").get(pk=900001)
+        self.assertEqual((nuevo.nombre, nuevo.apellido_p, nuevo.curp), ("Juan", "Gómez", "GOMJ800101HDFRRN09"))
+        self.assertEqual(nuevo.informacionEscolar.precio_final, Decimal("2500.00"))
+        self.assertEqual(nuevo.informacionEscolar.estatus_academico.codigo, "VIGENTE")
+        self.assertTrue(AlertaAlumno.objects.filter(alumno=nuevo).exists())
+        self.assertEqual(Alumno.objects.get(pk=self.existente.pk).informacionEscolar_id, plan.pk)
+
+        stats = importacion_alumnos.importar(ruta, solo_plan=True)
+        self.assertEqual((stats["sin_cambios"], stats["planes_actualizados"]), (2, 0))
+        self.assertEqual(InformacionEscolar.objects.get(pk=plan.pk).estatus_academico.codigo, "BAJA_TEMPORAL")
+
+
+class NumeracionTests(TestCase):
+    def test_bloques_contiguos_sobre_el_mayor_y_huecos(self):
+        Alumno.objects.create(numero_estudiante=500, nombre="Importado")
+        self.assertEqual(numeracion.reservar(3), range(501, 504))
+        self.assertEqual(numeracion.reservar(2), range(504, 506))
+        Alumno.objects.create(numero_estudiante=502, nombre="Alta")
+        # dentro de una transacción no hay pool: un número a la vez
+        self.assertEqual(numeracion.siguiente(), 506)
+        self.assertEqual(BloqueNumeracion.objects.count(), 3)
+
+        ahora = timezone.now() + timedelta(seconds=1)
+        self.assertEqual(numeracion.huecos(antes_de=ahora), [(501, 501), (503, 503), (504, 505), (506, 506)])
+        Alumno.objects.create(numero_estudiante=10_000, nombre="Importado")
+        self.assertEqual(numeracion.reservar(1), range(10_001, 10_002))
+
+
+@override_settings(SEND_WELCOME_EMAILS=True)
+class CorreosSalientesTests(TestCase):
+    def test_alta_encola_y_worker_envia(self):
+        alumno = Alumno.objects.create(numero_estudiante=700, nombre="Ana", email="ana@example.com")
+        with correos.sin_bienvenida():
+            Alumno.objects.create(numero_estudiante=701, nombre="Importada", email="imp@example.com")
+        sin_correo = Alumno.objects.create(numero_estudiante=702, nombre="Sin correo")
+        # ya en cola: no se duplica
+        correos.encolar_bienvenida([alumno.pk])
+        self.assertEqual(CorreoSaliente.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+        stats = correos.enviar_pendientes()
+        self.assertEqual(stats, {"enviado": 1, "omitido": 1})
+        self.assertEqual(mail.outbox[0].to, ["ana@example.com"])
+        self.assertEqual(CorreoSaliente.objects.get(alumno=sin_correo).estado, "omitido")
+        self.assertFalse(correos.enviar_pendientes())
+
+    @override_settings(
+        EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+        EMAIL_HOST="127.0.0.1", EMAIL_PORT=1, EMAIL_USE_TLS=False, EMAIL_TIMEOUT=2,
+    )
+    def test_fallo_reintenta_con_espera(self):
+        Alumno.objects.create(numero_estudiante=710, nombre="Beto", email="beto@example.com")
+        self.assertEqual(correos.enviar_pendientes(), {"pendiente": 1})
+        correo = CorreoSaliente.objects.get()
+        self.assertEqual(correo.intentos, 1)
+        self.assertGreater(correo.siguiente_intento, timezone.now() + timedelta(minutes=4))
+        # todavía no toca
+        self.assertFalse(correos.enviar_pendientes())
+
+
+class DetectorNMas1Tests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=5, pagos=0, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=3)
+
+    def test_forma_colapsa_listas_in(self):
+        self.assertEqual(
+            forma_sql('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'),
+            forma_sql('SELECT 1 FROM t WHERE id IN (%s)'),
+        )
+
+    def test_consulta_por_fila_lanza_en_modo_estricto(self):
+        with self.assertRaises(ConsultasRepetidasError) as cm:
+            with detectar_nmas1("prueba", umbral=3, estricto=True):
+                for a in Alumno.objects.all():
+                    a.informacionEscolar  # una consulta por alumno
+        self.assertIn("alumnos/tests.py", str(cm.exception))
+
+    def test_select_related_no_lanza(self):
+        with detectar_nmas1("prueba", umbral=3, estricto=True):
+            for a in Alumno.objects.select_related("informacionEscolar"):
+                a.informacionEscolar
+
+
+class RendimientoTests(TestCase):
+    def setUp(self):
+        # sin hilo de vaciado: la prueba vacía a mano, dentro de su transacción
+        self.acumulador = rendimiento.Acumulador(en_hilo=False)
+        parche = mock.patch.object(rendimiento, "acumulador", self.acumulador)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_percentiles_sumando_histogramas_de_varios_workers(self):
+        n = len(rendimiento.CUBETAS_MS) + 1
+        a, b = [0] * n, [0] * n
+        a[rendimiento.cubeta(8)] = 90     # 90 peticiones en (5, 10] ms
+        b[rendimiento.cubeta(180)] = 10   # 10 en (150, 200] ms
+        ventana = timezone.now().replace(second=0, microsecond=0)
+        for h, ms_max in ((a, 9.0), (b, 190.0)):
+            MetricaVista.objects.create(
+                ventana=ventana, url_name="alumnos:lista", metodo="GET", peticiones=sum(h),
+                ms_total=0, ms_max=ms_max, histograma=h,
+            )
+
+        fila, = rendimiento.resumen(ventana - timedelta(minutes=1))
+        self.assertEqual(fila["peticiones"], 100)
+        self.assertEqual(rendimiento.percentil(rendimiento.sumar_histogramas(a, b), 50), 5 + 5 * 50 / 90)
+        self.assertLess(fila["p50"], 10)
+        self.assertEqual(fila["p95"], 175.0)
+        self.assertEqual(rendimiento.percentil([], 95), 0.0)
+
+    @override_settings(PERF_ACTIVO=True, PERF_LENTO_MS=0)
+    def test_middleware_acumula_y_el_panel_lo_muestra_solo_a_staff(self):
+        staff = get_user_model().objects.create_user("perf", is_staff=True)
+        self.client.force_login(get_user_model().objects.create_user("sin_staff"))
+        self.assertEqual(self.client.get(reverse("alumnos:rendimiento_panel")).status_code, 302)
+
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse("alumnos:rendimiento_panel")).status_code, 200)
+        # el panel vacía lo que acumuló el middleware de las peticiones anteriores
+        r = self.client.get(reverse("alumnos:rendimiento_panel"))
+        self.assertEqual(r.status_code, 200)
+        fila = next(f for f in r.context["filas"] if f["url_name"] == "alumnos:rendimiento_panel")
+        self.assertEqual(fila["peticiones"], 2)
+        self.assertGreater(fila["consultas_prom"], 0)
+        muestra = MuestraLenta.objects.filter(url_name="alumnos:rendimiento_panel", usuario=staff).first()
+        self.assertTrue(muestra.sql)
+
+    def test_vaciado_fallido_no_rompe_la_transaccion_que_lo_llama(self):
+        self.acumulador._metricas[(None, "alumnos:lista", "GET")] = {"peticiones": 1}  # ventana NOT NULL
+        with self.assertLogs("alumnos.services.rendimiento", "WARNING"):
+            self.assertEqual(self.acumulador.flush(), 0)
+        # la transacción de la prueba sigue usable
+        self.assertEqual(MetricaVista.objects.count(), 0)
+
+
+class CatalogosCacheTests(TestCase):
+    def setUp(self):
+        catalogos.limpiar_local()
+
+    def test_lecturas_repetidas_sin_consultas(self):
+        ConceptoPago.objects.create(codigo="COLEGIATURA", nombre="Colegiatura")
+        catalogos.obtener("conceptos_pago")
+        with self.assertNumQueries(0):
+            self.assertEqual(catalogos.buscar("conceptos_pago", codigo="COLEGIATURA").nombre, "Colegiatura")
+            self.assertIsNone(catalogos.por_pk("conceptos_pago", "no-es-pk"))
+
+    def test_senales_invalidan_incluso_via_select_related(self):
+        mx = Pais.objects.create(nombre="México")
+        Estado.objects.create(pais=mx, nombre="Jalisco")
+        self.assertEqual(catalogos.obtener("estados")[0].pais.nombre, "México")
+        mx.nombre = "Mexico"
+        mx.save()
+        self.assertEqual(catalogos.obtener("estados")[0].pais.nombre, "Mexico")
+        mx.estados.all().delete()
+        self.assertEqual(catalogos.obtener("estados"), ())
+
+    @override_settings(CATALOGOS_VERIFICAR_SEGUNDOS=0)
+    def test_otro_proceso_ve_la_nueva_version_compartida(self):
+        c = ConceptoPago.objects.create(codigo="INS", nombre="Inscripción")
+        catalogos.obtener("conceptos_pago")
+        # cambio sin señales (update) + invalidación "desde otro worker": solo la versión compartida
+        ConceptoPago.objects.filter(pk=c.pk).update(nombre="Inscripción 2026")
+        caches[settings.CATALOGOS_CACHE].set("catalogo:conceptos_pago:version", 1, timeout=None)
+        self.assertEqual(catalogos.por_pk("conceptos_pago", c.pk).nombre, "Inscripción 2026")
+
+
+@override_settings(PERF_ACTIVO=False)  # su vaciado al salir correría sin la BD de pruebas
+class ApisCondicionalesTests(TestCase):
+    def setUp(self):
+        catalogos.limpiar_local()
+        self.user = get_user_model().objects.create_superuser("etag", "etag@example.com", "x")
+        self.client.force_login(self.user)
+        self.url = reverse("alumnos:api_financiamientos_list")
+
+    def test_if_none_match_responde_304_hasta_que_cambia_el_catalogo(self):
+        f = Financiamiento.objects.create(beca="Global")
+        r = self.client.get(self.url)
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("private", r["Cache-Control"])
+        etag = r["ETag"]
+
+        r = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+
+        f.beca = "Global 2"
+        f.save()
+        r = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r["ETag"], etag)
+        self.assertEqual(r.json()["items"][0]["label"], "[] Global 2 (Global)")
+
+    def test_curp_get_solo_lee_lo_guardado(self):
+        url = reverse("alumnos:api_curp_lookup")
+        curp = "GOHY840512HDFNRT09"
+        self.assertEqual(self.client.get(url, {"curp": curp}).status_code, 404)
+
+        CurpConsulta.objects.create(curp=curp, datos={"Nombre": "YATNIEL"})
+        # sesión, usuario y una sola búsqueda de la CurpConsulta (el ETag y la vista la comparten)
+        with self.assertNumQueries(3):
+            r = self.client.get(url, {"curp": curp})
+        self.assertEqual(r.json()["data"]["Nombre"], "YATNIEL")
+        self.assertEqual(self.client.get(url, {"curp": curp}, HTTP_IF_NONE_MATCH=r["ETag"]).status_code, 304)
+
+    async def test_curp_por_asgi(self):
+        # cadena de middleware async + vista async + ETag calculado fuera del event loop
+        await self.async_client.aforce_login(self.user)
+        url = reverse("alumnos:api_curp_lookup")
+        curp = "GOHY840512HDFNRT09"
+        await CurpConsulta.objects.acreate(curp=curp, datos={"Nombre": "YATNIEL"})
+        r = await self.async_client.get(url, {"curp": curp})
+        self.assertEqual(r.json()["data"]["Nombre"], "YATNIEL")
+        r = await self.async_client.get(url, {"curp": curp}, headers={"if-none-match": r["ETag"]})
+        self.assertEqual(r.status_code, 304)
+
+
+CURP_FIXTURE = """
+<div class="panel"><h4>Datos del solicitante</h4><table>
+<tr><td>CURP:</td><td>GOHY840512HDFNRT09</td></tr>
+<tr><td>Nombre(s):</td><td>{nombre}</td></tr>
+<tr><td>Primer apellido:</td><td>GONZÁLEZ</td></tr>
+</table></div>
+"""
+
+
+@override_settings(PERF_ACTIVO=False)
+class CurpLookupTests(TestCase):
+    CURP = "GOHY840512HDFNRT09"
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.fixture = os.path.join(self.dir.name, "curp.html")
+        self._escribir("YATNIEL")
+        # un pool sin navegadores: si alguna consulta llega hasta aquí, falla
+        self._pool_previo = curp_lookup._pool
+        curp_lookup._pool = curp_lookup.DriverPool(self._sin_navegador, max_size=1, acquire_timeout=0)
+        self.addCleanup(setattr, curp_lookup, "_pool", self._pool_previo)
+
+    def _escribir(self, nombre):
+        with open(self.fixture, "w", encoding="utf-8") as fh:
+            fh.write(CURP_FIXTURE.format(nombre=nombre))
+
+    def _sin_navegador(self):
+        raise AssertionError("la consulta no debía abrir navegador")
+
+    def test_fixture_ttl_y_forzar(self):
+        with override_settings(CURP_LOOKUP_FIXTURE_HTML=self.fixture):
+            datos, desde_cache = curp_lookup.buscar_curp(self.CURP.lower())
+        self.assertEqual((datos["Nombre"], datos["PrimerApellido"], desde_cache), ("YATNIEL", "GONZÁLEZ", False))
+
+        # dentro del TTL: de la tabla, sin fixture ni navegador
+        datos, desde_cache = curp_lookup.buscar_curp(self.CURP)
+        self.assertEqual((datos["Nombre"], desde_cache), ("YATNIEL", True))
+        self.assertEqual(CurpConsulta.objects.get(curp=self.CURP).hits, 1)
+
+        self._escribir("YATNIEL ACTUALIZADO")
+        with override_settings(CURP_LOOKUP_FIXTURE_HTML=self.fixture):
+            datos, desde_cache = curp_lookup.buscar_curp(self.CURP, forzar=True)
+            self.assertEqual((datos["Nombre"], desde_cache), ("YATNIEL ACTUALIZADO", False))
+
+            # vencida: se consulta de nuevo
+            self._escribir("OTRO")
+            CurpConsulta.objects.update(consultado_en=timezone.now() - timedelta(days=settings.CURP_CACHE_TTL_DIAS + 1))
+            datos, desde_cache = curp_lookup.buscar_curp(self.CURP)
+        self.assertEqual((datos["Nombre"], desde_cache), ("OTRO", False))
+        self.assertEqual(CurpConsulta.objects.count(), 1)
+
+    def test_pool_ocupado_responde_503(self):
+        self.client.force_login(get_user_model().objects.create_superuser("curp"))
+        pool = curp_lookup._pool
+        pool._sem.acquire()  # el único navegador, ocupado
+        self.addCleanup(pool._sem.release)
+        r = self.client.post(reverse("alumnos:api_curp_lookup"), {"curp": self.CURP})
+        self.assertEqual(r.status_code, 503)
+        self.assertFalse(CurpConsulta.objects.exists())
+
+
+@override_settings(TWILIO_FAKE=True, TWILIO_MENSAJES_POR_SEGUNDO=0, PERF_ACTIVO=False)
+class CampanasMensajesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=6, pagos=0, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=4)
+        TwilioConfig.objects.create(name="pruebas", env="sandbox", account_sid="ACx", auth_token="x",
+                                    sms_from="+15550001111", active=True)
+        telefonos = ["993 123 4561", "(993) 123-4562", "+52 993 123 4563", "9931230000", "", "12"]
+        for alumno, tel in zip(Alumno.objects.order_by("numero_estudiante"), telefonos):
+            alumno.telefono = tel
+            alumno.save(update_fields=["telefono"])
+
+    def setUp(self):
+        catalogos.limpiar_local()
+
+    def test_envio_y_estados_por_callback(self):
+        campana = CampanaMensajes.objects.create(nombre="Aviso", cuerpo="Hola {nombre} ({numero_estudiante})")
+        campana = mensajeria.encolar(campana)
+        self.assertEqual((campana.total, campana.sin_telefono), (4, 2))
+
+        stats = mensajeria.procesar_pendientes()
+        self.assertEqual((stats["enviados"], stats["errores"]), (3, 1))
+        campana.refresh_from_db()
+        self.assertEqual((campana.estado, campana.enviados, campana.fallidos), ("terminada", 3, 1))
+
+        enviados = list(campana.mensajes.filter(sid__isnull=False))
+        self.assertTrue(all(m.telefono.startswith("+52993123456") for m in enviados))
+        self.assertIn(enviados[0].alumno.nombre, enviados[0].cuerpo)
+
+        # llegan desordenados: 'sent' después de 'delivered' no debe regresar el estado
+        for m in enviados:
+            self._callback(m.sid, "delivered")
+            self._callback(m.sid, "sent")
+        self._callback("SMotro", "delivered")  # enviado por fuera
+
+        stats = mensajeria.ingerir_estados()
+        self.assertEqual((stats["eventos"], stats["mensajes"]), (7, 3))
+        self.assertEqual(set(campana.mensajes.filter(sid__isnull=False).values_list("estado", flat=True)), {"delivered"})
+        campana.refresh_from_db()
+        self.assertEqual(campana.entregados, 3)
+        self.assertEqual(EventoEstadoTwilio.objects.count(), 1)  # el huérfano espera HUERFANO_TTL
+
+    def _callback(self, sid, estado):
+        datos = callback_falso(sid, estado, cuenta="ACx")
+        firma = firma_falsa(mensajeria.url_callback(), datos, "x")
+        resp = self.client.post(reverse("alumnos:twilio_status_callback"), datos, HTTP_X_TWILIO_SIGNATURE=firma)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_el_auth_token_no_se_guarda_en_la_cache_de_catalogos(self):
+        cfg, client = mensajeria.cliente_twilio()
+        self.assertEqual(mensajeria.auth_token(cfg), "x")
+        _, filas = caches[settings.CATALOGOS_CACHE].get("catalogo:twilio_configs:filas")
+        self.assertEqual([f.get_deferred_fields() for f in filas], [{"auth_token"}])
+        self.assertNotIn("auth_token", vars(cfg))
+
+    def test_callback_sin_firma_valida_no_se_guarda(self):
+        url = reverse("alumnos:twilio_status_callback")
+        datos = callback_falso("SMx", "delivered", cuenta="ACx")
+        self.assertEqual(self.client.post(url, datos).status_code, 403)
+        otra = firma_falsa(mensajeria.url_callback(), datos, "otro-token")
+        self.assertEqual(self.client.post(url, datos, HTTP_X_TWILIO_SIGNATURE=otra).status_code, 403)
+        self.assertFalse(EventoEstadoTwilio.objects.exists())
+
+
+class EstaticosComprimidosTests(TestCase):
+    def test_collectstatic_con_hash_y_precomprimidos(self):
+        with tempfile.TemporaryDirectory() as fuente, tempfile.TemporaryDirectory() as destino:
+            os.makedirs(os.path.join(fuente, "css"))
+            with open(os.path.join(fuente, "css", "app.css"), "w") as fh:
+                # la fuente no existe: debe quedar sin hash en lugar de romper collectstatic
+                fh.write("@font-face { src: url('../fonts/falta.ttf'); }\n" + ".a { color: red; }\n" * 200)
+
+            with override_settings(
+                STATICFILES_DIRS=[fuente], STATIC_ROOT=destino, STATIC_ZOPFLI_ITERACIONES=1,
+                STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+                STORAGES={**settings.STORAGES, "staticfiles": {"BACKEND": "alumnos.services.estaticos.StaticComprimido"}},
+            ):
+                call_command("collectstatic", interactive=False, verbosity=0)
+
+            with open(os.path.join(destino, "staticfiles.json")) as fh:
+                hasheado = json.load(fh)["paths"]["css/app.css"]
+            self.assertRegex(hasheado, r"^css/app\.[0-9a-f]{12}\.css$")
+            with open(os.path.join(destino, hasheado), "rb") as fh:
+                original = fh.read()
+            self.assertIn(b"../fonts/falta.ttf", original)
+            with open(os.path.join(destino, hasheado + ".gz"), "rb") as fh:
+                self.assertEqual(gzip.decompress(fh.read()), original)
+            self.assertTrue(os.path.exists(os.path.join(destino, hasheado + ".br")))
+
+    def test_imagenes_se_reducen_en_static_root_sin_tocar_la_fuente(self):
+        from PIL import Image
+
+        from alumnos.services.estaticos import ruta_estatico
+
+        with tempfile.TemporaryDirectory() as fuente, tempfile.TemporaryDirectory() as destino:
+            os.makedirs(os.path.join(fuente, "iuaf"))
+            origen = os.path.join(fuente, "iuaf", "hero.png")
+            im = Image.new("RGB", (200, 120), "white")
+            for x in range(0, 200, 10):
+                im.paste((0, 80, 160), (x, 0, x + 5, 120))
+            im.save(origen, compress_level=0)
+            with open(origen, "rb") as fh:
+                original = fh.read()
+
+            with override_settings(
+                STATICFILES_DIRS=[fuente], STATIC_ROOT=destino, STATIC_ZOPFLI_ITERACIONES=1,
+                STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+                STORAGES={**settings.STORAGES, "staticfiles": {"BACKEND": "alumnos.services.estaticos.StaticComprimido"}},
+                STATIC_IMAGENES_OPTIMIZAR=["iuaf/hero.png"],
+            ):
+                call_command("collectstatic", interactive=False, verbosity=0)
+                with open(os.path.join(destino, "staticfiles.json")) as fh:
+                    hasheado = json.load(fh)["paths"]["iuaf/hero.png"]
+                for rel in ("iuaf/hero.png", hasheado):
+                    self.assertLess(os.path.getsize(os.path.join(destino, rel)), len(original) / 2)
+                self.assertEqual(ruta_estatico("iuaf/hero.png"), os.path.join(destino, "iuaf", "hero.png"))
+
+            with open(origen, "rb") as fh:
+                self.assertEqual(fh.read(), original)
+
+
+# ============================================================
+# Documentos: blobs por contenido y derivados
+# ============================================================
+
+def _png(color="red", size=(60, 40)) -> bytes:
+    from PIL import Image
+
+    buf = BytesIO()
+    Image.new("RGB", size, color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class DocumentosTestMixin:
+    """MEDIA_ROOT temporal, un plan y un tipo de documento."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=1, pagos=0, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=12)
+        DocumentoAlumno.objects.all().delete()   # los sintéticos apuntan a archivos que no existen
+        cls.info = InformacionEscolar.objects.first()
+        cls.tipo = DocumentoTipo.objects.create(slug="acta", nombre="Acta", multiple=True)
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        ajuste = override_settings(MEDIA_ROOT=media.name)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+    def _subir(self, nombre, contenido):
+        return DocumentoAlumno.objects.create(
+            info_escolar=self.info, tipo=self.tipo, archivo=SimpleUploadedFile(nombre, contenido),
+        )
+
+
+class DocumentosBlobsTests(DocumentosTestMixin, TestCase):
+    def test_mismo_contenido_un_solo_blob(self):
+        a = self._subir("acta.png", _png())
+        b = self._subir("copia de acta.png", _png())
+        c = self._subir("otra.png", _png("blue"))
+
+        self.assertEqual(a.blob_id, b.blob_id)
+        self.assertNotEqual(a.blob_id, c.blob_id)
+        self.assertEqual(a.archivo.name, b.archivo.name)
+        self.assertEqual((a.nombre_archivo, b.nombre_archivo), ("acta.png", "copia de acta.png"))
+        blob = ArchivoBlob.objects.get(pk=a.blob_id)
+        self.assertEqual(blob.refs, 2)
+        self.assertEqual(len(os.listdir(os.path.dirname(blob.archivo.path))), 1)
+
+    def test_borrar_o_reemplazar_conserva_el_blob_compartido(self):
+        a = self._subir("acta.png", _png())
+        b = self._subir("acta.png", _png())
+        blob = ArchivoBlob.objects.get(pk=a.blob_id)
+
+        # reemplazar el archivo de uno: el blob sigue vivo por el otro
+        a.archivo = SimpleUploadedFile("nueva.png", _png("green"))
+        a.save()
+        blob.refresh_from_db()
+        self.assertNotEqual(a.blob_id, blob.pk)
+        self.assertEqual(blob.refs, 1)
+
+        # el GC no toca un blob con documentos
+        call_command("deduplicar_documentos", "--gc", stdout=StringIO())
+        self.assertTrue(ArchivoBlob.objects.filter(pk=blob.pk).exists())
+        self.assertTrue(default_storage.exists(blob.archivo.name))
+
+        # al borrar el último documento queda huérfano y el GC lo recoge
+        b.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.refs, 0)
+        call_command("deduplicar_documentos", "--gc", stdout=StringIO())
+        self.assertFalse(ArchivoBlob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(default_storage.exists(blob.archivo.name))
+
+    def test_deduplicar_dry_run_no_escribe(self):
+        # documentos de antes de los blobs: cada uno con su propia copia
+        rutas = [default_storage.save(f"documentos/viejos/{n}.png", ContentFile(_png())) for n in ("a", "b")]
+        docs = [
+            DocumentoAlumno.objects.create(info_escolar=self.info, tipo=self.tipo, archivo=ruta) for ruta in rutas
+        ]
+        self.assertTrue(all(d.blob_id is None for d in docs))
+
+        salida = StringIO()
+        call_command("deduplicar_documentos", "--dry-run", stdout=salida)
+        self.assertIn("blobs_nuevos=1 duplicados=1", salida.getvalue())
+        self.assertFalse(ArchivoBlob.objects.exists())
+        self.assertEqual(list(DocumentoAlumno.objects.filter(blob__isnull=False)), [])
+        self.assertTrue(all(default_storage.exists(r) for r in rutas))
+
+        call_command("deduplicar_documentos", stdout=StringIO())
+        blob = ArchivoBlob.objects.get()
+        self.assertEqual(blob.refs, 2)
+        self.assertEqual(set(DocumentoAlumno.objects.values_list("archivo", flat=True)), {blob.archivo.name})
+        self.assertEqual([default_storage.exists(r) for r in rutas], [True, False])
+
+
+class DocumentosDerivadosTests(DocumentosTestMixin, TestCase):
+    def test_worker_genera_derivados_y_reencola_al_cambiar_archivo(self):
+        doc = self._subir("acta.png", _png(size=(3000, 1500)))
+        self.assertEqual(doc.derivado_estado, "pendiente")
+
+        salida = StringIO()
+        call_command("procesar_documentos", stdout=salida)
+        self.assertIn("procesados=1 errores=0", salida.getvalue())
+
+        doc.refresh_from_db()
+        self.assertEqual(doc.derivado_estado, "listo")
+        self.assertTrue(doc.derivados_vigentes)
+        self.assertEqual(doc.archivo_para_pdf.name, doc.derivado.name)
+        self.assertEqual(doc.paginas, 1)
+        with default_storage.open(doc.derivado.name, "rb") as fh:
+            self.assertTrue(fh.read().startswith(b"%PDF"))
+        from PIL import Image
+        with default_storage.open(doc.miniatura.name, "rb") as fh:
+            self.assertLessEqual(max(Image.open(fh).size), documentos_derivados.MINIATURA_PX)
+
+        # ya reclamado y listo: otra pasada no hace nada
+        self.assertEqual(documentos_derivados.procesar_pendientes()["procesados"], 0)
+
+        # archivo nuevo: de vuelta a la cola y se une el original mientras tanto
+        doc.archivo = SimpleUploadedFile("acta2.png", _png("blue"))
+        doc.save()
+        doc.refresh_from_db()
+        self.assertEqual(doc.derivado_estado, "pendiente")
+        self.assertFalse(doc.derivados_vigentes)
+        self.assertEqual(doc.archivo_para_pdf.name, doc.archivo.name)
+
+        self.assertEqual(documentos_derivados.procesar_pendientes()["procesados"], 1)
+        doc.refresh_from_db()
+        self.assertEqual((doc.derivado_estado, doc.derivado_origen), ("listo", doc.archivo.name))
+
+    def test_reclamo_unico(self):
+        doc = self._subir("acta.png", _png())
+        self.assertTrue(documentos_derivados._reclamar(doc))
+        # otro worker llega tarde: no lo toma ni aparece como pendiente
+        self.assertFalse(documentos_derivados._reclamar(doc))
+        self.assertFalse(documentos_derivados.pendientes().exists())
+        self.assertEqual(documentos_derivados.procesar_pendientes(), {"procesados": 0, "errores": 0, "omitidos": 0})
+
+        # reclamo abandonado (worker caído): vuelve a estar disponible
+        DocumentoAlumno.objects.filter(pk=doc.pk).update(
+            derivado_en=timezone.now() - documentos_derivados.LOCK_TIMEOUT - timedelta(minutes=1),
+        )
+        self.assertEqual(documentos_derivados.procesar_pendientes()["procesados"], 1)
+
+
+@override_settings(PERF_ACTIVO=False, PROTECTED_MEDIA_ACCEL_PREFIX="")
+class ArchivosProtegidosTests(DocumentosTestMixin, TestCase):
+    """serve_protected_file vía documento_archivo y public_upload_archivo."""
+
+    CONTENIDO = bytes(range(256)) * 4
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        User = get_user_model()
+        cls.alumno = cls.info.alumno
+        cls.alumno.user = User.objects.create_user("dueno_doc")
+        cls.alumno.save(update_fields=["user"])
+        cls.otro = User.objects.create_user("otro_alumno")
+        cls.invite = UploadInvite.objects.create(alumno=cls.alumno, expires_at=timezone.now() + timedelta(days=1))
+
+    def setUp(self):
+        super().setUp()
+        self.doc = self._subir("acta.bin", self.CONTENIDO)
+        self.url = reverse("alumnos:documento_archivo", args=[self.doc.pk])
+        self.client.force_login(self.alumno.user)
+
+    def _leer(self, r):
+        return b"".join(r.streaming_content)
+
+    def test_solo_el_dueno_o_personal_de_documentos(self):
+        r = self.client.get(self.url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(self._leer(r), self.CONTENIDO)
+        self.assertEqual((r["Accept-Ranges"], r["Content-Length"]), ("bytes", str(len(self.CONTENIDO))))
+        self.assertIn("private", r["Cache-Control"])
+
+        self.client.force_login(self.otro)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_enlace_publico_solo_con_invite_valido_y_documentos_del_alumno(self):
+        url = reverse("alumnos:public_upload_archivo", args=[self.invite.token, self.doc.pk])
+        self.client.logout()
+        self.assertEqual(self._leer(self.client.get(url)), self.CONTENIDO)
+
+        ajeno = UploadInvite.objects.create(
+            alumno=Alumno.objects.create(numero_estudiante=90_001, nombre="Ajeno"), expires_at=timezone.now() + timedelta(days=1),
+        )
+        self.assertEqual(self.client.get(reverse("alumnos:public_upload_archivo", args=[ajeno.token, self.doc.pk])).status_code, 404)
+
+        UploadInvite.objects.filter(pk=self.invite.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_rangos(self):
+        r = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(r.status_code, 206)
+        self.assertEqual(r["Content-Range"], f"bytes 10-19/{len(self.CONTENIDO)}")
+        self.assertEqual(self._leer(r), self.CONTENIDO[10:20])
+
+        r = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(r["Content-Range"], f"bytes {len(self.CONTENIDO) - 5}-{len(self.CONTENIDO) - 1}/{len(self.CONTENIDO)}")
+        self.assertEqual(self._leer(r), self.CONTENIDO[-5:])
+
+        r = self.client.get(self.url, HTTP_RANGE=f"bytes={len(self.CONTENIDO)}-")
+        self.assertEqual(r.status_code, 416)
+        self.assertEqual(r["Content-Range"], f"bytes */{len(self.CONTENIDO)}")
+
+    def test_validadores_etag_e_if_range(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        r = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag)
+        self.assertEqual((r.status_code, self._leer(r)), (206, self.CONTENIDO[:10]))
+        # validador viejo: el rango ya no aplica y va completo
+        r = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"viejo"')
+        self.assertEqual((r.status_code, self._leer(r)), (200, self.CONTENIDO))
+
+    @override_settings(PROTECTED_MEDIA_ACCEL_PREFIX="/protected-media/")
+    def test_x_accel_redirect_deja_la_transferencia_a_nginx(self):
+        r = self.client.get(self.url, {"descargar": "1"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["X-Accel-Redirect"], "/protected-media/" + self.doc.archivo.name)
+        self.assertEqual(r.content, b"")
+        self.assertEqual(r["Content-Disposition"], 'attachment; filename="acta.bin"')
+
+        self.client.force_login(self.otro)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+def _weasyprint_disponible() -> bool:
+    try:
+        import weasyprint  # noqa: F401
+    except Exception:   # sin pango/cairo truena con OSError al importar
+        return False
+    return True
+
+
+def _pdf_de_prueba(html, css=None) -> bytes:
+    """Sustituto de html_a_pdf cuando no están las librerías de WeasyPrint: un PDF de una hoja."""
+    from reportlab.pdfgen import canvas
+
+    buf = BytesIO()
+    c = canvas.Canvas(buf)
+    c.drawString(72, 720, strip_tags(html)[:80])
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+@override_settings(PERF_ACTIVO=False)
+class EstadosCuentaTests(DocumentosTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=2, pagos=0, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=13)
+        cls.alumno = Alumno.objects.filter(informacionEscolar__isnull=False).order_by("pk").first()
+        for n, (fecha, monto) in enumerate(((date(2025, 1, 10), "1500.00"), (date(2025, 2, 3), "700.00"))):
+            PagoDiario.objects.create(
+                folio=f"EC-{n}", alumno=cls.alumno, monto=Decimal(monto), fecha=fecha, concepto="Colegiatura",
+            )
+        cls.admin = get_user_model().objects.create_superuser("admin_ec", "admin@example.com", "x")
+
+    def setUp(self):
+        super().setUp()
+        if not _weasyprint_disponible():
+            # el respaldo (xhtml2pdf) no entiende el CSS de la plantilla
+            parche = mock.patch("alumnos.services.estado_cuenta.html_a_pdf", _pdf_de_prueba)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def test_cortes_idempotentes_y_vistas_del_corte(self):
+        salida = StringIO()
+        call_command("generar_estados_cuenta", "--periodo", "2025-01", "--procesos", "1", stdout=salida)
+        alumnos = Alumno.objects.filter(informacionEscolar__isnull=False).count()
+        self.assertIn(f"creados={alumnos} reemplazados=0", salida.getvalue())
+        self.assertIn(f"generados={alumnos} errores=0", salida.getvalue())
+
+        snap = EstadoCuentaSnapshot.objects.get(alumno=self.alumno, periodo=date(2025, 1, 1))
+        # solo los pagos hasta fin de mes
+        self.assertEqual((snap.num_pagos, snap.total_pagado), (1, Decimal("1500.00")))
+
+        # otra corrida del mismo periodo no crea ni toca nada
+        salida = StringIO()
+        call_command("generar_estados_cuenta", "--periodo", "2025-01", "--procesos", "1", stdout=salida)
+        self.assertIn("creados=0 reemplazados=0", salida.getvalue())
+        self.assertIn("generados=0 errores=0", salida.getvalue())
+        self.assertEqual(EstadoCuentaSnapshot.objects.count(), alumnos)
+        self.assertEqual(EstadoCuentaSnapshot.objects.get(pk=snap.pk).pdf.name, snap.pdf.name)
+
+        # un pago tardío del periodo no cambia el corte guardado: las vistas no recalculan
+        PagoDiario.objects.create(
+            folio="EC-tarde", alumno=self.alumno, monto=Decimal("99.00"), fecha=date(2025, 1, 20), concepto="Colegiatura",
+        )
+        self.client.force_login(self.admin)
+        url = reverse("alumnos:estado_cuenta", args=[self.alumno.pk])
+        with self.assertNumQueries(1):   # solo el corte: ni alumno ni pagos
+            r = self.client.get(url, {"periodo": "2025-01"})
+        self.assertEqual(r.context["total_pagado"], "1,500.00")
+        self.assertEqual(len(r.context["pagos"]), 1)
+
+        r = self.client.get(reverse("alumnos:estado_cuenta_pdf", args=[self.alumno.pk, "2025-01"]))
+        self.assertEqual(r.status_code, 200)
+        with default_storage.open(snap.pdf.name, "rb") as fh:
+            self.assertEqual(b"".join(r.streaming_content), fh.read())
@@ -37,11 +37,13 @@ urlpatterns = [
     path("alumnos/api/programa/<int:pk>/", alumnos_views.programa_info, name="alumnos_programa_info"),
     path("alumnos/api/financiamiento/<int:pk>/", alumnos_views.api_financiamiento, name="api_financiamiento"),
     path('configuracion/', views.config_panel, name='config_panel'),
+    path('rendimiento/', views.rendimiento_panel, name='rendimiento_panel'),
     path("pagos/cargo/<int:cargo_id>/crear/", crear_pago_de_cargo, name="clip_crear_pago_cargo"),
     path("pagos/exito/<int:orden_id>/",       pago_exitoso,        name="clip_pago_exitoso"),
     path("pagos/cancelado/<int:orden_id>/",   pago_cancelado,      name="clip_pago_cancelado"),
     path("webhooks/clip/",                    clip_webhook,        name="clip_webhook"),
     path("alumnos/<int:alumno_id>/documentos/pdf/", views.documentos_unificados_pdf, name="alumnos_documentos_pdf"),
+    path("documentos/<int:pk>/archivo/", views.documento_archivo, name="documento_archivo"),
     path("sms/send", views.enviar_sms, name="twilio_send_sms"),
     path("wa/send", views.enviar_wa, name="twilio_send_wa"),
     path("status-callback/", csrf_exempt(views.twilio_status_callback), name="twilio_status_callback"),
@@ -49,6 +51,7 @@ urlpatterns = [
     path("banco/movimientos/", views.MovimientoBancoListView.as_view(), name="movimientos_banco_lista"),
     path("banco/movimientos/run-update/", views.run_movimientos_banco_update, name="movimientos_banco_update"),
     path("uploads/<str:token>/", views.public_upload, name="public_upload"),
+    path("uploads/<str:token>/archivo/<int:doc_id>/", views.public_upload_archivo, name="public_upload_archivo"),
     path("alumnos/<int:pk>/generar-enlace/", views.generar_enlace_subida, name="generar_enlace_subida"),
     path("alumnos/<int:pk>/generar-enlace-json/",views.generar_enlace_subida_json,name="generar_enlace_subida_json"),
     path("banco/abonos/", views.movimientos_abonos_pendientes, name="movimientos_abonos_pendientes"),
@@ -59,10 +62,15 @@ urlpatterns = [
     path("reportes/recibo2/", views.recibo2_from_excel, name="recibo2_from_excel"),
     path("<int:pk>/recibo/", views.recibo_pago_carta, name="recibo_carta"),
     path('estado-cuenta/<int:numero_estudiante>/', views.estado_cuenta, name='estado_cuenta'),
+    path('estado-cuenta/<int:numero_estudiante>/<str:periodo>/pdf/', views.estado_cuenta_pdf, name='estado_cuenta_pdf'),
     path('estado-cuenta/', views.estado_cuenta, name='estado_cuenta_demo'),
     path("alumnos/api/financiamientos/", views.api_financiamientos_list, name="api_financiamientos_list"),
     path("alumnos/<int:numero_estudiante>/generar_cargos/",alumnos_views.generar_cargos_mensuales,name="generar_cargos_mensuales"),
     path("alumnos/cargos/pendientes/", alumnos_views.cargos_pendientes_todos, name="cargos_pendientes_todos"),
+    path("alumnos/cargos/programar/", alumnos_views.programar_cargos_cohorte, name="programar_cargos_cohorte"),
+    path("alumnos/alertas/lista/", alumnos_views.alumnos_con_alertas, name="alumnos_con_alertas"),
+    path("alumnos/cartera/resumen/", alumnos_views.cartera_resumen, name="cartera_resumen"),
+    path("alumnos/pagos/revision-conceptos/", alumnos_views.pagos_concepto_revision, name="pagos_concepto_revision"),
     path("alumnos/<int:pk>/cargos/nuevo/", views.cargo_crear, name="cargo_crear"),
     path("alumnos/<int:alumno_pk>/cargos/<int:cargo_id>/editar/", views.cargo_editar, name="cargo_editar"), 
     path('alumnos/<int:alumno_id>/cargos/<int:cargo_id>/eliminar/', views.cargo_eliminar, name='cargo_eliminar'),
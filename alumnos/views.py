@@ -1,7 +1,7 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
 from django import forms
-from .models import Alumno, Programa
+from .models import Alumno, Programa, q_alumnos_visibles, q_sedes_del_usuario
 from django.contrib.auth.models import User, Group
 
 
@@ -48,7 +48,10 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.decorators import user_passes_test
 
 
-from alumnos.permisos import user_can_view_pagos, user_can_view_documentos, user_can_edit_alumno, user_can_view_alumno
+from alumnos.permisos import (
+    GRUPO_ADMISIONES, GRUPO_EDITAR_ESTATUS_ACADEMICO, en_grupo,
+    user_can_view_pagos, user_can_view_documentos, user_can_edit_alumno, user_can_view_alumno,
+)
 
 def staff_or_admisiones(u):
     return u.is_authenticated and (u.is_staff or u.groups.filter(name="admisiones").exists())
@@ -98,7 +101,7 @@ def alumnos_crear(request):
             if request.user.is_authenticated and not getattr(alumno, "created_by_id", None):
                 alumno.created_by = request.user
 
-            alumno.save()
+            alumno.save(force_insert=True)  # un número repetido falla en lugar de pisar otro alumno
             messages.success(request, "Alumno creado correctamente.")
             return redirect("alumnos:alumnos_detalle", pk=alumno.pk)
     else:
@@ -398,21 +401,21 @@ def alumnos_editar(request, pk):
     )
 ####################################################################
 from django.views.decorators.http import require_GET
+from alumnos.services.http_cache import condicional, etag_catalogos
 @login_required
 @require_GET
+@condicional(etag_catalogos("financiamientos"))
 def api_financiamientos_list(request):
-    prog_id = request.GET.get("programa")
-    qs = Financiamiento.objects.all()
+    from alumnos.services import catalogos
 
-    if prog_id and prog_id.isdigit():
-        pid = int(prog_id)
-        qs = qs.filter(Q(programa_id=pid) | Q(programa__isnull=True))
-    else:
-        # Sin programa seleccionado => solo globales
-        qs = qs.filter(programa__isnull=True)
+    prog_id = request.GET.get("programa")
+    # Sin programa seleccionado => solo globales
+    pid = int(prog_id) if prog_id and prog_id.isdigit() else None
 
     items = []
-    for f in qs.order_by("programa_id", "id"):
+    for f in catalogos.obtener("financiamientos"):  # ya ordenado por programa_id, id
+        if f.programa_id is not None and f.programa_id != pid:
+            continue
         label = f"{str(f)} (Global)" if f.programa_id is None else str(f)
         items.append({
             "id": f.id,
@@ -444,41 +447,6 @@ from django.shortcuts import render
 from datetime import date, timedelta
 import json
 from math import ceil
-from .models import UserProfile
-
-
-def _filtrar_por_permisos_sede(qs, user):
-    """
-    Filtra el queryset de alumnos según los permisos de sede del usuario.
-    - superuser => ve todo
-    - si tiene sedes asignadas => ve sólo esas sedes
-    - puede_ver_todo / puede_editar_todo => no limita por rol, pero sí por sedes asignadas
-    - sin perfil o sin sedes => no ve nada
-    """
-    if not user.is_authenticated:
-        return qs.none()
-
-    if user.is_superuser:
-        return qs  # acceso total
-
-    try:
-        profile = user.profile
-    except UserProfile.DoesNotExist:
-        return qs.none()
-
-    # SedES asignadas al usuario
-    sedes_ids = list(profile.sedes.values_list("id", flat=True))
-
-    if not sedes_ids:
-        # si no tiene sedes asignadas, no puede ver nada
-        return qs.none()
-
-    # Aquí definimos el filtro de base: sólo las sedes asignadas
-    filtro = Q(informacionEscolar__sede_id__in=sedes_ids)
-
-    # Si tiene editar/ver todo, no filtramos más por "alcance total del sistema",
-    # solo le permitimos trabajar libremente dentro de sus sedes.
-    return qs.filter(filtro)
 
 ###############################################################
 from django.db.models import Case, When, Value, BooleanField
@@ -489,7 +457,7 @@ def estudiantes(request):
     hoy = timezone.localdate()
 
     qs = (
-        Alumno.for_user(request.user)
+        Alumno.objects.visibles_para(request.user)
         .select_related(
             "pais", "estado",
             "informacionEscolar",
@@ -528,24 +496,59 @@ def estudiantes(request):
 # views.py
 import re
 from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_http_methods
 from django.contrib.auth.decorators import login_required
+from alumnos.services.http_cache import condicional
 
 # importa tu función real:
 # from .curp_scraper import datos_desde_gobmx_curp
 
 CURP_RE = re.compile(r"^[A-Z]{4}\d{6}[HM][A-Z]{5}[A-Z0-9]\d$")
 
+def _curp_etag(request):
+    """
+    ETag del GET: la fecha de la CurpConsulta vigente (un POST nunca es condicional).
+    La consulta queda en `request._curp_consulta` para que la vista no la repita.
+    """
+    from alumnos.services.curp_lookup import consulta_vigente
+    from alumnos.services.http_cache import FORMATO
+
+    curp = (request.GET.get("curp") or "").strip().upper()
+    if request.method != "GET" or not CURP_RE.match(curp):
+        return None
+    consulta = request._curp_consulta = consulta_vigente(curp)
+    if consulta is None:
+        return None
+    return f"v{FORMATO}-curp-{consulta.pk}-{consulta.consultado_en.timestamp():.0f}"
+
+
 @login_required
-@require_POST
-def api_curp_lookup(request):
-    from alumnos.utils import datos_desde_gobmx_curp
+@require_http_methods(["GET", "POST"])
+@condicional(_curp_etag)
+async def api_curp_lookup(request):
+    """
+    GET ?curp=: solo lo ya guardado en CurpConsulta (cacheable por el navegador, 404 si no hay).
+    POST: consulta gob.mx si no hay entrada vigente (o con forzar=1). Es async: con ASGI
+    la espera del navegador (hasta CURP_LOOKUP_TIMEOUT) no ocupa un worker.
+    """
+    from alumnos.services.curp_lookup import abuscar_curp, aconsulta_vigente, CurpLookupOcupado
 
-    curp = (request.POST.get("curp") or "").strip().upper()
+    datos_req = request.GET if request.method == "GET" else request.POST
+    curp = (datos_req.get("curp") or "").strip().upper()
 
     if not CURP_RE.match(curp):
         return JsonResponse({"ok": False, "error": "CURP inválido."}, status=400)
 
+    if request.method == "GET":
+        # ya la buscó _curp_etag al calcular el ETag
+        if hasattr(request, "_curp_consulta"):
+            consulta = request._curp_consulta
+        else:
+            consulta = await aconsulta_vigente(curp)
+        if consulta is None:
+            return JsonResponse({"ok": False, "error": "Sin consulta guardada para ese CURP."}, status=404)
+        return JsonResponse({"ok": True, "data": consulta.datos, "cache": True})
+
     try:
         # Llama a tu scraper/lógica que devuelve un dict:
         # {
@@ -558,11 +561,14 @@ def api_curp_lookup(request):
         #   "Nacionalidad": "...",
         #   "EntidadNacimiento": "..."
         # }
-        data = datos_desde_gobmx_curp(curp)
+        # Primero la tabla CurpConsulta; solo si no hay entrada vigente se abre navegador.
+        data, desde_cache = await abuscar_curp(curp, forzar=request.POST.get("forzar") == "1")
         if not data or "Nombre" not in data:
             return JsonResponse({"ok": False, "error": "No se pudo obtener datos para ese CURP."}, status=502)
 
-        return JsonResponse({"ok": True, "data": data})
+        return JsonResponse({"ok": True, "data": data, "cache": desde_cache})
+    except CurpLookupOcupado as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=503)
     except Exception as e:
         return JsonResponse({"ok": False, "error": f"Falla al consultar: {e}"}, status=500)
 
@@ -688,7 +694,7 @@ def principal(request):
 @login_required
 def alumnos_lista(request):
     q = (request.GET.get("q") or "").strip()
-    qs = Alumno.for_user(request.user)  # <- AQUÍ
+    qs = Alumno.objects.visibles_para(request.user)
     if q:
         qs = qs.filter(
             Q(numero_estudiante__icontains=q) |
@@ -708,24 +714,16 @@ from academico.models import Calificacion
 
 @login_required
 def alumnos_detalle(request, pk):
-    pago_total_mayor_a_cero = False
-    alumno = get_object_or_404(
-        Alumno.objects.select_related(
-            "pais", "estado", "informacionEscolar",
-            "informacionEscolar__programa", "informacionEscolar__sede",
-             "informacionEscolar__grupo_nuevo",  # 👈 AÑADIR
-        ),
-        pk=pk,
-    )
+    from alumnos.services.detalle_alumno import alumno_para_detalle, detalle_alumno
 
+    alumno = get_object_or_404(alumno_para_detalle(), pk=pk)
 
     # -------- Permisos de visualización del alumno --------
-    hoy = timezone.now().date()
     user = request.user
     can_view = False
     if user.is_superuser:
         can_view = True
-    elif user.groups.filter(name="admisiones").exists():
+    elif en_grupo(user, GRUPO_ADMISIONES):
         can_view = (alumno.created_by_id == user.id)
     elif  (alumno.created_by_id == user.id):
         can_view = True                        
@@ -742,289 +740,30 @@ def alumnos_detalle(request, pk):
     # -------- Flags por permiso/grupo --------
     can_view_pagos = user_can_view_pagos(user)
     can_view_docs  = user_can_view_documentos(user)
+    can_edit_status = user.is_superuser or en_grupo(user, GRUPO_EDITAR_ESTATUS_ACADEMICO)
 
-    # -------- Pagos / Cargos (solo si puede ver) --------
-    hay_cargos_vinculados = Cargo.objects.filter(alumno=alumno).exists()
-    pagos = cargos = cargos_pendientes = None
-    pagos_total = 0
-    if can_view_pagos:
-        pagos = (
-            PagoDiario.objects
-            .filter(alumno=alumno)
-            .order_by("fecha", "-id")
-        )
-        pagos_total = round(pagos.aggregate(total=Sum("monto"))["total"] or 0, 2)
-
-        pago_total_mayor_a_cero = True if pagos_total > 0 else False
-
-        from django.db.models.functions import Coalesce
-        cargos = (
-            Cargo.objects
-            .filter(
-                alumno=alumno,
-                pagado=False
-            )
-            # Mostrar los que ya están en fecha de pago (fecha_cargo ≤ hoy)
-            # o que ya vencieron (fecha_vencimiento ≤ hoy).
-            .filter(
-                Q(fecha_cargo__lte=hoy) |
-                Q(fecha_vencimiento__lte=hoy)
-            )
-            .annotate(
-                # Fecha “exigible” solo para ordenar/mostrar
-                due_date=Coalesce("fecha_vencimiento", "fecha_cargo"),
-                # Vencido = si tiene fecha_vencimiento y es < hoy,
-                # o si NO tiene fecha_vencimiento y la fecha_cargo es < hoy.
-                is_overdue=Case(
-                    When(Q(fecha_vencimiento__isnull=False) & Q(fecha_vencimiento__lt=hoy), then=Value(True)),
-                    When(Q(fecha_vencimiento__isnull=True)  & Q(fecha_cargo__lt=hoy),         then=Value(True)),
-                    default=Value(False),
-                    output_field=BooleanField()
-                )
-            )
-            .select_related("concepto")
-            # Orden: primero vencidos, luego los “en fecha de pago” (hoy),
-            # y dentro de cada grupo por due_date descendente.
-            .order_by(
-                # Vencidos arriba
-                Case(
-                    When(is_overdue=True, then=Value(0)),
-                    default=Value(1),
-                ),
-                "-due_date",
-                "-id",
-            )
-        )
-        cargos_pendientes = cargos.filter(pagado=False)
-
-
-    # === TAB 2: TODOS los cargos pendientes (vencidos, en fecha, y por pagar) ===
-    from django.db.models.functions import Coalesce
-    from django.db.models import IntegerField
-    cargos_todos = (
-        Cargo.objects
-        .filter(alumno=alumno, pagado=False)
-        .annotate(
-            due_date=Coalesce("fecha_vencimiento", "fecha_cargo"),
-
-            # VENCIDO
-            is_overdue=Case(
-                When(Q(fecha_vencimiento__isnull=False, fecha_vencimiento__lt=hoy), then=Value(True)),
-                When(Q(fecha_vencimiento__isnull=True,  fecha_cargo__lt=hoy),        then=Value(True)),
-                default=Value(False), output_field=BooleanField()
-            ),
-
-            # EN FECHA (ventana) => hoy entre fecha_cargo y fecha_vencimiento (incl.)
-            # si no hay vencimiento, en fecha solo si hoy == fecha_cargo
-            is_in_date_window=Case(
-                When(Q(fecha_vencimiento__isnull=False, fecha_cargo__lte=hoy, fecha_vencimiento__gte=hoy), then=Value(True)),
-                When(Q(fecha_vencimiento__isnull=True,  fecha_cargo=hoy),                                   then=Value(True)),
-                default=Value(False), output_field=BooleanField()
-            ),
-
-            # Orden: Vencidos → En fecha → Por pagar
-            status_order=Case(
-                When(is_overdue=True,        then=Value(0)),
-                When(is_in_date_window=True, then=Value(1)),
-                default=Value(2),
-                output_field=IntegerField(),
-            ),
-        )
-        .select_related("concepto")
-        .order_by("status_order", "due_date", "-id")
-    )
-
-    # -------- Documentos DINÁMICOS por programa --------
-    docs = []
-    docs_total = 0
-    docs_last_update = None
-    faltantes = []
-
-    info = getattr(alumno, "informacionEscolar", None)
-    prog = getattr(info, "programa", None)
-
-    # <<< NUEVO: flag para “Fin del programa en futuro” >>>
-# -------- Documentos / fin_programa --------
-    fin_programa_is_future = False
-    if info and getattr(info, "fin_programa", None):
-        fin_programa_is_future = info.fin_programa > hoy
-
-    if can_view_docs and info and prog:
-        # Documentos subidos para el plan escolar del alumno
-        docs_qs = (
-            DocumentoAlumno.objects
-            .filter(info_escolar=info)
-            .select_related("tipo", "verificado_por", "subido_por")
-            .order_by("-actualizado_en")  # usar actualizado_en
-        )
-        docs = list(docs_qs)
-        docs_total = len(docs)
-        agg = docs_qs.aggregate(ultima=Max("actualizado_en"))
-        docs_last_update = agg["ultima"]
-
-        # Tipos requeridos por el PROGRAMA (activos)
-        reqs = (
-            ProgramaDocumentoRequisito.objects
-            .filter(programa=prog, activo=True)
-            .select_related("tipo")
-        )
-        req_tipos = [r.tipo for r in reqs]
-
-        # Ids de tipos ya subidos
-        subidos_tipo_ids = {d.tipo_id for d in docs if d.tipo_id}
-
-        # Faltantes = tipos requeridos cuyo id no está en subidos
-        faltantes = [t for t in req_tipos if t.id not in subidos_tipo_ids]
-
-  
     # Si quieres permitir cambiar la regla de prioridad (?orden=antiguos)
     orden = request.GET.get('orden', 'recientes')
-    restar_mas_recientes = (orden != 'antiguos')
 
-    data = calcular_cargos_con_saldo(alumno, restar_pagos_mas_recientes=restar_mas_recientes)
-
-    def anotar_flags(items):
-        if not items:
-            return
-        for d in items:
-            fv = d.get("fecha_vencimiento") or d.get("fecha_cargo")
-            if d.get("monto_restante", 0) > 0 and fv:
-                # solo si el helper no lo trae
-                if "is_overdue" not in d:
-                    d["is_overdue"] = (fv < hoy)
-                if "is_due_today" not in d:
-                    d["is_due_today"] = (fv == hoy)
-
-    # --- Normaliza 'rows' a una lista y anota flags si faltan ---
-    if isinstance(data, dict):
-        # ajusta a la colección que usas en el template "Todos (pendientes)"
-        rows = data.get("cargos_pendientes") or data.get("cargos_todos") or []
-    else:
-        rows = data or []
-
-    for d in rows:
-        fc = d.get("fecha_cargo")
-        fv = d.get("fecha_vencimiento") or None
-        if d.get("monto_restante", 0) > 0 and fc:
-            # Vencido
-            d.setdefault("is_overdue",
-                        (fv is not None and fv < hoy) or (fv is None and fc < hoy))
-            # En fecha (ventana)
-            in_window = (
-                (fv is not None and fc <= hoy <= fv) or
-                (fv is None and fc == hoy)
-            )
-            d.setdefault("is_in_date_window", in_window)
-
-    # Totales
-    total_original = sum(d['monto_original'] for d in data) if data else 0
-    total_aplicado = sum(d['monto_aplicado'] for d in data) if data else 0
-    total_restante = sum(d['monto_restante'] for d in data) if data else 0
-
-
-    califs = (
-        Calificacion.objects
-        .filter(alumno=alumno)
-        .select_related(
-            "item",
-            "item__materia",
-            "item__listado",
-            "item__listado__programa",
-        )
-        .order_by(
-            "-item__listado__creado_en",   # listados más recientes primero
-            "item__fecha_inicio",
-            "item__materia__codigo",
-        )
+    # Todas las pestañas (pagos, cargos, saldo, documentos, calificaciones, campana)
+    # salen de una lectura por tabla: ver alumnos/services/detalle_alumno.py
+    ctx = detalle_alumno(
+        alumno,
+        ver_pagos=can_view_pagos,
+        ver_documentos=can_view_docs,
+        restar_pagos_mas_recientes=(orden != 'antiguos'),
     )
 
-    can_edit_status = request.user.is_superuser or request.user.groups.filter(name='editar_estatus_academico').exists()
-  
-    bell_items = []
-    if not alumno.email or not alumno.email_institucional:
-        bell_items.append("Recuerda revisar y completar el correo electrónico del alumno.")
-    if not alumno.telefono:
-        bell_items.append("Este alumno no tiene teléfono registrado.")
-    if not alumno.curp:
-        bell_items.append("Falta la CURP del alumno.")
-    if not alumno.informacionEscolar:
-        bell_items.append("El alumno no tiene información escolar asignada.")
-    if alumno.informacionEscolar and not alumno.informacionEscolar.sede:  
-        bell_items.append("El alumno no tiene sede asignada en su información escolar.")
-    if alumno.informacionEscolar and not alumno.informacionEscolar.inicio_programa:  
-        bell_items.append("El alumno no tiene fecha de inicio de programa asignada en su información escolar.")
-
-
-    if alumno.informacionEscolar and not alumno.informacionEscolar.estatus_academico:  
-        bell_items.append("El alumno no tiene estatus académico asignado en su información escolar.")
-    if alumno.informacionEscolar and not alumno.informacionEscolar.estatus_administrativo:  
-        bell_items.append("El alumno no tiene estatus administrativo asignado en su información escolar.")
-
-    if alumno.informacionEscolar and alumno.email and alumno.email_institucional and alumno.informacionEscolar.inicio_programa and not alumno.informacionEscolar.bienvenida_enviada:  
-        bell_items.append("No se ha enviado el correo de bienvenida al alumno.")
-    
-    if not alumno.pais:
-        bell_items.append("Falta el país de residencia del alumno.")
-    if cargos_pendientes.count() > 1:
-        bell_items.append(f"El alumno tiene {cargos_pendientes.count()} cargos pendientes por pagar.")
-    elif cargos_pendientes.count() > 0:
-        bell_items.append("El alumno tiene un cargo pendiente por pagar.")
-    
-    if len(faltantes) > 1:
-        bell_items.append(f"Faltan {len(faltantes)} documentos requeridos por el programa.")
-    elif len(faltantes) == 1:
-        bell_items.append("Falta un documento requerido por el programa.")
-    
-    if alumno.informacionEscolar and ((alumno.informacionEscolar.grupo_nuevo is None and alumno.informacionEscolar.grupo is None)):
-        bell_items.append("El alumno no tiene un grupo asignado en su información escolar.")
-    
-    if alumno.informacionEscolar and alumno.informacionEscolar.matricula is None:
-        bell_items.append("El alumno no tiene matrícula asignada en su información escolar.")
-
-
-
     return render(
         request,
         "alumnos/detalle.html",
-        {   
-
-            "bell_items": bell_items,   # 👈 nuevo
-    
-             # Calificaciones
-            "califs": califs,
-             "can_edit_status": can_edit_status,
-            
+        {
+            **ctx,
             "alumno": alumno,
-            "hoy": hoy,   
-            # pagos/cargos
-            "pagos": pagos,
-            "pagos_total": pagos_total,
-            "pago_total_mayor_a_cero": pago_total_mayor_a_cero,
-            "cargos": cargos,
-            "cargos_pendientes": cargos_pendientes,
+            "orden": orden,
+            "can_edit_status": can_edit_status,
             "can_view_pagos": can_view_pagos,
-
-            # documentos dinámicos
             "can_view_documentos": can_view_docs,
-            "docs": docs,
-            "docs_total": docs_total,
-            "docs_last_update": docs_last_update,
-            "faltantes": faltantes,
-            "cargos_todos": cargos_todos,
-            "hay_cargos_vinculados": hay_cargos_vinculados,
-
-            # <<< NUEVO en el contexto para pintar en el template >>>
-            "fin_programa_is_future": fin_programa_is_future,
-            'orden': orden,
-            'rows': data,
-            'totales': {
-            'original': total_original,
-            'aplicado': total_aplicado,
-            'restante': total_restante,
-
-           
-        
-            },
         },
     )
 
@@ -1277,32 +1016,19 @@ class PagoDiarioListView(ListView):
         user = self.request.user
 
         # Debe pertenecer al grupo "pagos" (salvo superuser)
-        if not user.is_superuser and not user.groups.filter(name="pagos").exists():
+        if not user_can_view_pagos(user):
             return qs.none()
 
         # Superuser: ve todo
         if user.is_superuser:
             base_qs = qs
         else:
-            allowed = None  # ⚠️ NO usar Q() vacío
-
-            # Si es admisiones: solo pagos de alumnos creados por él
-            if user.groups.filter(name="admisiones").exists():
-                cond = Q(alumno__created_by=user)
-                allowed = cond if allowed is None else (allowed | cond)
-
-            # Además: pagos de sedes asociadas a su perfil (si tiene)
-            profile = getattr(user, "profile", None)
-            if profile:
-                sedes_ids = list(profile.sedes.values_list("id", flat=True))
-                if sedes_ids:
-                    cond = Q(alumno__informacionEscolar__sede_id__in=sedes_ids)
-                    allowed = cond if allowed is None else (allowed | cond)
-
-            if allowed is None:
-                return qs.none()
-
-            base_qs = qs.filter(allowed).distinct()
+            # pagos de alumnos de las sedes de su perfil (EXISTS, sin distinct())
+            allowed = q_sedes_del_usuario(user, "alumno__")
+            # admisiones: además los de alumnos creados por él
+            if en_grupo(user, GRUPO_ADMISIONES):
+                allowed |= Q(alumno__created_by=user)
+            base_qs = qs.filter(allowed)
 
         # Límite temporal (2 años) salvo flag en perfil
         profile = getattr(user, "profile", None)
@@ -1356,8 +1082,13 @@ class PagoDiarioListView(ListView):
 ############################################################################################################
 
 @login_required
+@condicional(etag_catalogos("programas"))
 def programa_info(request, pk):
-    p = get_object_or_404(Programa, pk=pk)
+    from alumnos.services import catalogos
+
+    p = catalogos.por_pk("programas", pk)
+    if p is None:
+        raise Http404("Programa no encontrado")
 
     # soporta p.reinscripcion o p.precio_reinscripcion
     rein_val = getattr(p, "reinscripcion", None)
@@ -1379,10 +1110,12 @@ def programa_info(request, pk):
 
 ###############################################################
 @admin_required
+@condicional(etag_catalogos("financiamientos"))
 def api_financiamiento(request, pk):
-    try:
-        f = Financiamiento.objects.get(pk=pk)
-    except Financiamiento.DoesNotExist:
+    from alumnos.services import catalogos
+
+    f = catalogos.por_pk("financiamientos", pk)
+    if f is None:
         raise Http404("Financiamiento no encontrado")
 
     data = {
@@ -1532,14 +1265,14 @@ def alumnos_documentos_editar(request, pk):
 ###############################################################
 @login_required
 def documentos_alumnos_lista(request):
-    from alumnos.services.documentos_helpers import requisitos_para_alumno
+    from alumnos.services.documentos_helpers import es_nacional, requisitos_para_alumno
 
     q = (request.GET.get("q") or "").strip()
     solo_faltantes = (request.GET.get("solo_faltantes") == "1")  # << NUEVO
     user = request.user
 
     alumnos_qs = (
-        Alumno.for_user(user)
+        Alumno.objects.visibles_para(user)
         .select_related(
             "pais",
             "informacionEscolar",
@@ -1565,14 +1298,18 @@ def documentos_alumnos_lista(request):
         )
 
     items = []
+    # Los requisitos solo dependen de (programa, nacional/extranjero): una consulta por combinación
+    requisitos_cache = {}
     for a in alumnos_qs:
         ie = getattr(a, "informacionEscolar", None)
         prog = getattr(ie, "programa", None)
 
-        reqs = list(requisitos_para_alumno(prog, a))
-        req_tipos = [r.tipo for r in reqs]
+        clave = (getattr(prog, "pk", None), es_nacional(a))
+        if clave not in requisitos_cache:
+            requisitos_cache[clave] = [r.tipo for r in requisitos_para_alumno(prog, a)]
+        req_tipos = requisitos_cache[clave]
 
-        docs = list(ie.documentos.select_related("tipo").all()) if ie else []
+        docs = list(ie.documentos.all()) if ie else []  # prefetch informacionEscolar__documentos__tipo
         tipos_subidos_ids = {d.tipo_id for d in docs if d.tipo_id}
         faltantes = [t for t in req_tipos if t.id not in tipos_subidos_ids]
 
@@ -1609,6 +1346,48 @@ def documentos_alumnos_lista(request):
 def config_panel(request):
     return render(request, "panel/panel-configuracion.html")
 ###############################################################
+from django.contrib.admin.views.decorators import staff_member_required
+
+RENDIMIENTO_VENTANAS = {"1": 1, "6": 6, "24": 24, "72": 72, "168": 168}
+
+@staff_member_required
+def rendimiento_panel(request):
+    """Panel de métricas de RendimientoMiddleware: p50/p95 por vista y peticiones lentas."""
+    from alumnos.models import MuestraLenta
+    from alumnos.services import catalogos
+    from alumnos.services.rendimiento import acumulador, resumen
+
+    acumulador.flush()  # incluir lo que este worker aún no vacía
+
+    horas = RENDIMIENTO_VENTANAS.get(request.GET.get("horas") or "24", 24)
+    orden = request.GET.get("orden") or "tiempo_total"
+    desde = timezone.now() - timedelta(hours=horas)
+
+    filas = resumen(desde, orden=orden)
+    lentas = (
+        MuestraLenta.objects
+        .filter(creado_en__gte=desde)
+        .select_related("usuario")
+        .order_by("-ms")[:30]
+    )
+    muestra = None
+    if request.GET.get("muestra"):
+        muestra = MuestraLenta.objects.filter(pk=request.GET["muestra"]).first()
+
+    return render(request, "panel/rendimiento.html", {
+        "filas": filas,
+        "lentas": lentas,
+        "muestra": muestra,
+        "horas": horas,
+        "orden": orden,
+        "ventanas": RENDIMIENTO_VENTANAS,
+        "catalogos": catalogos.metricas(),
+        "totales": {
+            "peticiones": sum(f["peticiones"] for f in filas),
+            "errores": sum(f["errores"] for f in filas),
+        },
+    })
+###############################################################
 
 from decimal import Decimal
 from django.db import transaction
@@ -1617,14 +1396,20 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.shortcuts import aget_object_or_404
+from asgiref.sync import sync_to_async
 
 from .models import Cargo, ClipPaymentOrder, Pago
 from .clip_api import ClipClient
 
 @login_required
-def crear_pago_de_cargo(request, cargo_id):
+async def crear_pago_de_cargo(request, cargo_id):
+    """
+    Vista async: mientras Clip responde (hasta DEFAULT_TIMEOUT) no se ocupa un worker
+    cuando se sirve con ASGI (entrypoint.sh, SERVIDOR=asgi). Con WSGI funciona igual.
+    """
     # 1) Obtener el cargo + alumno
-    cargo = get_object_or_404(
+    cargo = await aget_object_or_404(
         Cargo.objects.select_related("alumno", "concepto"),
         pk=cargo_id
     )
@@ -1637,34 +1422,33 @@ def crear_pago_de_cargo(request, cargo_id):
     description = f"{cargo.concepto.nombre} - Alumno {alumno.numero_estudiante}"
 
     # 3) Crear la orden local primero (para tener un ID de referencia)
-    with transaction.atomic():
-        orden = ClipPaymentOrder.objects.create(
-            alumno=alumno,
-            cargo=cargo,
-            amount=amount,
-            description=description,
-            status="created",
-        )
+    orden = await ClipPaymentOrder.objects.acreate(
+        alumno=alumno,
+        cargo=cargo,
+        amount=amount,
+        description=description,
+        status="created",
+    )
 
     # 4) URLs absolutas de retorno
     success_url = request.build_absolute_uri(reverse("alumnos:clip_pago_exitoso", args=[orden.pk]))
     cancel_url  = request.build_absolute_uri(reverse("alumnos:clip_pago_cancelado", args=[orden.pk]))
+    metadata = {
+        "alumno_id": alumno.pk,
+        "cargo_id": cargo.pk,
+        "numero_estudiante": alumno.numero_estudiante,
+    }
 
     # 5) Llamar a Clip (el cliente manda centavos y usa 'reference' internamente)
-    client = ClipClient()
-    data, code = client.create_payment_link(
+    client = await sync_to_async(ClipClient)()   # lee ClipCredential
+    data, code = await client.create_payment_link_async(
         amount=float(amount),
         description=description,
         order_id=str(orden.pk),     # map a 'reference' dentro del cliente
         success_url=success_url,
         cancel_url=cancel_url,
-        metadata={
-            "alumno_id": alumno.pk,
-            "cargo_id": cargo.pk,
-            "numero_estudiante": alumno.numero_estudiante,
-        },
+        metadata=metadata,
         description_max_len=50,     # seguro para la validación de descripción
-        # use_cents=True ya es el default en tu cliente
     )
 
     # 6) Persistir request/response para auditoría
@@ -1674,11 +1458,7 @@ def crear_pago_de_cargo(request, cargo_id):
         "order_id": str(orden.pk),
         "success_url": success_url,
         "cancel_url": cancel_url,
-        "metadata": {
-            "alumno_id": alumno.pk,
-            "cargo_id": cargo.pk,
-            "numero_estudiante": alumno.numero_estudiante,
-        }
+        "metadata": metadata,
     }
     orden.raw_response = data
 
@@ -1694,18 +1474,23 @@ def crear_pago_de_cargo(request, cargo_id):
 
     # 8) Estado local
     orden.status = "pending" if (code and 200 <= code < 300 and orden.checkout_url) else "failed"
-    orden.save(update_fields=["raw_request", "raw_response", "clip_payment_id", "checkout_url", "status"])
+    await orden.asave(update_fields=["raw_request", "raw_response", "clip_payment_id", "checkout_url", "status"])
 
     # 9) Manejo de error visible y depurable
     if not orden.checkout_url:
         msg = data.get("message") or data.get("error") or "No se pudo crear el pago."
         detail = data.get("detail") or data.get("_raw_text") or data.get("_content_type") or ""
-        messages.error(request, f"Error al crear el pago ({code}): {msg}. {detail}")
-        return render(
-            request,
-            "pagos/crear_error.html",
-            {"orden": orden, "mensaje": msg, "respuesta": data, "status_code": code},
-        )
+
+        def _error():
+            # mensajes y plantilla usan sesión/usuario (síncronos)
+            messages.error(request, f"Error al crear el pago ({code}): {msg}. {detail}")
+            return render(
+                request,
+                "pagos/crear_error.html",
+                {"orden": orden, "mensaje": msg, "respuesta": data, "status_code": code},
+            )
+
+        return await sync_to_async(_error)()
 
     # 10) Redirigir al checkout
     return redirect(orden.checkout_url)
@@ -1809,7 +1594,7 @@ def enviar_wa(request):
     return JsonResponse({"sid": m.sid, "status": m.status})
 
 @csrf_exempt
-def twilio_status_callback(request):
+async def twilio_status_callback(request):
     """
     Twilio enviará POST con campos como:
     MessageSid, SmsStatus (queued/sent/delivered/undelivered/failed), To, From, ErrorCode, ErrorMessage, etc.
@@ -1817,17 +1602,28 @@ def twilio_status_callback(request):
     if request.method != "POST":
         return HttpResponse(status=405)
 
+    from asgiref.sync import sync_to_async
+    from alumnos.services.mensajeria import aregistrar_callback, firma_valida, url_callback
+
     # Lee tanto form-encoded como JSON
     payload = request.POST.dict()
+    firmado = payload
     if not payload:
+        firmado = request.body.decode("utf-8", "replace")
         try:
-            payload = json.loads(request.body.decode("utf-8"))
+            payload = json.loads(firmado)
         except Exception:
             payload = {}
 
-    # TODO: aquí persiste en BD si quieres loguear estados
+    # Solo Twilio: firma del auth_token sobre la URL completa, antes de guardar nada
+    urls = (url_callback(), request.build_absolute_uri())
+    if not await sync_to_async(firma_valida)(urls, firmado, request.headers.get("X-Twilio-Signature", "")):
+        return HttpResponseForbidden("Firma de Twilio inválida.")
+
+    # Solo se guarda (un INSERT); `manage.py ingerir_estados_twilio` lo aplica por lotes.
     # Twilio recomienda responder 200 OK rápido
-    return JsonResponse({"ok": True})
+    evento = await aregistrar_callback(payload)
+    return JsonResponse({"ok": evento is not None})
 
 ###############################################################
 # alumnos/views.py
@@ -1943,7 +1739,8 @@ def documentos_a_pdf_dinamico(*, info_escolar=None, documentos_qs=None, titulo="
     writer = PdfWriter()
 
     for d in documentos:
-        f = d.archivo
+        # Derivado precalculado (procesar_documentos) si está vigente; si no, el original
+        f = d.archivo_para_pdf
         if not f:
             continue
         _, ext = os.path.splitext(f.name or "")
@@ -1992,8 +1789,8 @@ def documentos_a_pdf_dinamico(*, info_escolar=None, documentos_qs=None, titulo="
         right_margin = 40
         bottom_margin = 16
 
-        from django.contrib.staticfiles import finders
-        footer_img_path = finders.find("recibos/footer.png")  # ← tu subcarpeta/archivo
+        from alumnos.services.estaticos import ruta_estatico
+        footer_img_path = ruta_estatico("recibos/footer.png")  # ← tu subcarpeta/archivo
 
         #footer_img_path = os.path.join(settings.BASE_DIR, "static", "recibos", "footer.png")
         # Ejemplo alterno: footer_img_path = r"C:\ruta\a\tu\imagen\footer.png"
@@ -2038,6 +1835,35 @@ def documentos_unificados_pdf(request, alumno_id):
     response["Content-Disposition"] = f'inline; filename="documentos_alumno_{alumno_id}.pdf"'
     return response
 
+################################################################
+from alumnos.services.protected_media import serve_protected_file
+
+@login_required
+def documento_archivo(request, pk):
+    """
+    Descarga protegida de un DocumentoAlumno (personal con permiso de documentos
+    o el propio alumno). La transferencia la hace nginx si está configurado.
+    """
+    doc = get_object_or_404(
+        DocumentoAlumno.objects.select_related("info_escolar__alumno"),
+        pk=pk,
+    )
+    alumno = getattr(doc.info_escolar, "alumno", None)
+    es_propietario = bool(alumno and alumno.user_id and alumno.user_id == request.user.id)
+    if not (user_can_view_documentos(request.user) or es_propietario):
+        return HttpResponseForbidden("No tienes permiso para ver este documento.")
+
+    # ?variante=miniatura -> miniatura para listados; ?variante=pdf -> PDF derivado
+    variante = request.GET.get("variante")
+    if variante == "miniatura":
+        if not (doc.derivados_vigentes and doc.miniatura):
+            raise Http404("Sin miniatura.")
+        return serve_protected_file(request, doc.miniatura)
+    if variante == "pdf":
+        return serve_protected_file(request, doc.archivo_para_pdf, as_attachment=request.GET.get("descargar") == "1")
+
+    return serve_protected_file(request, doc.archivo, filename=doc.nombre_archivo, as_attachment=request.GET.get("descargar") == "1")
+
 ################################################################
 from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.http import require_http_methods
@@ -2409,11 +2235,14 @@ def public_upload(request, token):
         if doc.valido is True:
             messages.error(request, "No puedes eliminar un documento marcado como válido.")
         else:
-            # (Opcional) eliminar el archivo físico del storage
+            # Eliminar el archivo físico solo si no es un blob compartido
+            # (los blobs sin referencias los borra `deduplicar_documentos --gc`)
             archivo = doc.archivo
+            con_blob = bool(doc.blob_id)
             doc.delete()
             try:
-                if archivo and archivo.name:
+                if (not con_blob and archivo and archivo.name
+                        and not DocumentoAlumno.objects.filter(archivo=archivo.name).exists()):
                     archivo.storage.delete(archivo.name)
             except Exception:
                 pass
@@ -2466,6 +2295,17 @@ def public_upload(request, token):
         },
     )
 
+def public_upload_archivo(request, token, doc_id):
+    """
+    Descarga de un documento desde el enlace público: solo mientras el invite
+    sea válido y el documento pertenezca al alumno del invite.
+    """
+    invite = get_object_or_404(UploadInvite, token=token)
+    if not invite.is_valid():
+        raise Http404("Enlace inválido o expirado.")
+    doc = get_object_or_404(DocumentoAlumno, pk=doc_id, info_escolar__alumno=invite.alumno)
+    return serve_protected_file(request, doc.archivo, filename=doc.nombre_archivo)
+
 @login_required
 def crear_enlace_subida(request, pk):
     alumno = get_object_or_404(Alumno, pk=pk)
@@ -2590,9 +2430,9 @@ class LineaConciliacionForm(forms.Form):
         return pk
 
     def clean_concepto_id(self):
-        from .models import ConceptoPago
+        from alumnos.services import catalogos
         pk = self.cleaned_data["concepto_id"]
-        if not ConceptoPago.objects.filter(pk=pk).exists():
+        if catalogos.por_pk("conceptos_pago", pk) is None:
             raise forms.ValidationError("Concepto inválido.")
         return pk
 
@@ -2620,7 +2460,9 @@ def conciliar_movimiento(request, mov_id):
         or ""
     )
 
-    conceptos = ConceptoPago.objects.all().order_by("nombre")
+    from alumnos.services import catalogos
+
+    conceptos = catalogos.obtener("conceptos_pago")  # ordenados por nombre
     candidatos = buscar_alumnos_candidatos(base)
 
     if request.method == "POST":
@@ -2656,7 +2498,7 @@ def conciliar_movimiento(request, mov_id):
             with transaction.atomic():
                 for data in lineas_validas:
                     alumno   = Alumno.objects.get(pk=data["alumno_id"])
-                    concepto = ConceptoPago.objects.get(pk=data["concepto_id"])
+                    concepto = catalogos.por_pk("conceptos_pago", data["concepto_id"])
 
                     programa_txt = get_programa_text(alumno)
                     sede_txt     = get_sede_text(alumno)
@@ -3335,146 +3177,65 @@ def recibo_pago_carta(request, pk):
     }
     return render(request, "reportes/recibo_carta.html", contexto)
 ##########################################################################################
+from .models import EstadoCuentaSnapshot
+
 def estado_cuenta(request, numero_estudiante):
+    """
+    Estado de cuenta en HTML. Con ?periodo=YYYY-MM muestra el corte mensual guardado
+    (EstadoCuentaSnapshot); sin periodo se calcula al momento con el mismo motor.
+    """
+    from alumnos.services.estado_cuenta import contexto_estado_cuenta, contexto_para_plantilla
+
+    periodo = request.GET.get("periodo")
+    if periodo:
+        try:
+            periodo_dt = datetime.strptime(periodo, "%Y-%m").date()
+        except ValueError:
+            raise Http404("Periodo inválido")
+        snap = get_object_or_404(EstadoCuentaSnapshot, alumno_id=numero_estudiante, periodo=periodo_dt)
+        return render(request, "reportes/estado_cuenta.html", contexto_para_plantilla(snap.contexto))
+
     alumno = get_object_or_404(
         Alumno.objects.select_related(
             "informacionEscolar",
+            "informacionEscolar__programa",
             "pais", "estado",
         ),
         pk=numero_estudiante
     )
 
-    info = getattr(alumno, "informacionEscolar", None)
-
-    # ================= Pagos reales del alumno =================
-    pagos_qs = (
+    # ================= Pagos reales del alumno (una consulta) =================
+    pagos = list(
         PagoDiario.objects
         .filter(alumno=alumno)
         .order_by("fecha", "pk")
     )
 
-    numero_colegiatura = pagos_qs.first().alumno.informacionEscolar.meses_programa if pagos_qs.exists() else 0
-    precio_final  = pagos_qs.first().alumno.informacionEscolar.precio_final if pagos_qs.exists() else 0
-    precio_total = precio_final * numero_colegiatura
-
-    pagos = []
-    for p in pagos_qs:
-        pagos.append({
-            "monto": float(p.monto or 0),
-            "grado": getattr(getattr(info, "programa", None), "codigo", "") or getattr(info, "grupo", "") or "",
-            "forma_pago": p.forma_pago or "",
-            "fecha_pago": p.fecha.strftime("%d/%m/%Y") if p.fecha else "",
-            "concepto": p.concepto or "",
-            "detalle": p.pago_detalle or "",
-            "programa": p.programa or (getattr(getattr(info, "programa", None), "nombre", "") or ""),
-        })
+    context = contexto_para_plantilla(contexto_estado_cuenta(alumno, pagos))
+    return render(request, "reportes/estado_cuenta.html", context)
 
-    # ================= Cálculos de totales =================
-    total_pagado_num = pagos_qs.aggregate(s=Sum("monto"))["s"] or Decimal("0.00")
-    total_pagado_num = Decimal(total_pagado_num)
 
-    colegiatura = Decimal(str(getattr(info, "precio_colegiatura", 0) or 0))
-    n_colegiaturas = (
-        getattr(info, "numero_reinscripciones", None)
-        or getattr(info, "meses_programa", None)
-        or 20
+@login_required
+def estado_cuenta_pdf(request, numero_estudiante, periodo):
+    """PDF guardado de un corte mensual (personal con acceso al alumno o el propio alumno)."""
+    try:
+        periodo_dt = datetime.strptime(periodo, "%Y-%m").date()
+    except ValueError:
+        raise Http404("Periodo inválido")
+    snap = get_object_or_404(
+        EstadoCuentaSnapshot.objects.select_related("alumno"),
+        alumno_id=numero_estudiante, periodo=periodo_dt,
+    )
+    es_propietario = bool(snap.alumno.user_id and snap.alumno.user_id == request.user.id)
+    if not (es_propietario or Alumno.for_user(request.user).filter(pk=numero_estudiante).exists()):
+        return HttpResponseForbidden("No tienes permiso para ver este estado de cuenta.")
+    return serve_protected_file(
+        request, snap.pdf,
+        filename=f"estado_cuenta_{numero_estudiante}_{periodo}.pdf",
+        as_attachment=request.GET.get("descargar") == "1",
     )
-
-    total_programa_num = colegiatura * Decimal(n_colegiaturas or 0)
-    if total_programa_num <= 0:
-        total_programa_num = total_pagado_num
-
-    adeudo_num = total_programa_num - total_pagado_num
-    if adeudo_num < 0:
-        adeudo_num = Decimal("0.00")
-
-    # ================= Datos de institución =================
-    institucion = {
-        "nombre": "INSTITUTO UNIVERSITARIO DE ALTA FORMACIÓN IUAF SC.",
-        "direccion": "Blvd Kukulcan km 3.5 plaza nautilus local 53, Zona Hotelera",
-        "ciudad": "Cancún, Q.ROO.",
-        "telefono": "998 253 6750",
-        "rfc": "IUA170913LI2",
-        "cct": "23PSU0064H",
-        "email": "cadministrativa@iuaf.edu.mx",
-    }
-
-    # ================= Datos del alumno =================
-    alumno_ctx = {        
-        "matricula": getattr(info, "matricula", "") or "",
-        "nombre": f"{alumno.nombre} {alumno.apellido_p or ''} {alumno.apellido_m or ''}".strip(),
-        "grupo": getattr(info, "grupo", "") or "",
-        "programa": getattr(getattr(info, "programa", None), "nombre", "") or "",
-        "curp": alumno.curp or "",
-        "no_alumno": alumno.numero_estudiante,
-        "fecha_1er_pago": getattr(info, "inicio_programa", None).strftime("%d/%m/%Y")
-            if getattr(info, "inicio_programa", None)
-            else "",
-    }
-
-    deuda = precio_total - total_pagado_num
-
-    # ================= Contexto final =================
-    context = {
-        "institucion": institucion,
-        "alumno": alumno_ctx,
-        "pagos": pagos,
-        "total_programa": f"{total_programa_num:,.2f}",
-        "total_pagado": f"{total_pagado_num:,.2f}",
-        "adeudo": f"{adeudo_num:,.2f}",
-        "numero_colegiatura": numero_colegiatura,
-        "precio_final": f"{precio_final:,.2f}",
-        "precio_total": f"{precio_total:,.2f}",
-        "deuda": f"{deuda:,.2f}",
-        # imágenes (coloca en /static/iuaf/)
-        "logo": "iuaf/logo-placeholder.png",
-        "qr": "iuaf/qr-placeholder.png",
-        "stamp": "iuaf/stamp-placeholder.png",
-    }
-
-    return render(request, "reportes/estado_cuenta.html", context)
 ###########################################################################################
 from calendar import monthrange
-def _mes_year_siguiente(base: date, offset: int) -> date:
-    y = base.year + (base.month - 1 + offset) // 12
-    m = (base.month - 1 + offset) % 12 + 1
-    day = 1
-    last_day = monthrange(y, m)[1]
-    return date(y, m, min(day, last_day))
-
-def _resolve_concepto(request):
-    concepto_id = request.POST.get("concepto_id")
-    if concepto_id and concepto_id.isdigit():
-        c = ConceptoPago.objects.filter(pk=int(concepto_id)).first()
-        if c:
-            return c
-    c = ConceptoPago.objects.filter(codigo="COLEGIATURA").first()
-    if c:
-        return c
-    return ConceptoPago.objects.first()
-
-######
-def _resolve_concepto_inscripcion():
-    """
-    Busca un ConceptoPago para inscripción por códigos comunes o por nombre.
-    Ajusta los códigos a tu catálogo si usas otros.
-    """
-    # Prioridad por código exacto
-    for code in ("INSCRIPCION", "INSCRIPCIÓN", "INS"):
-        try:
-            return ConceptoPago.objects.get(codigo=code)
-        except ConceptoPago.DoesNotExist:
-            pass
-    # Fallback por nombre
-    try:
-        return ConceptoPago.objects.get(nombre__icontains="inscrip")
-    except ConceptoPago.DoesNotExist:
-        return None
-
-
-
-
-
 from datetime import date, timedelta
 from decimal import Decimal
 from django.db import transaction
@@ -3483,38 +3244,16 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 
-# Si no lo tienes en utilidades:
-from calendar import monthrange
-def add_months_clamp(d: date, months: int) -> date:
-    """Suma 'months' meses a d. Si el mes destino no tiene ese día, ajusta al último del mes."""
-    y = d.year + (d.month - 1 + months) // 12
-    m = (d.month - 1 + months) % 12 + 1
-    last_day = monthrange(y, m)[1]
-    day = min(d.day, last_day)
-    return date(y, m, day)
-
-def _to_decimal(v, default="0.00"):
-    try:
-        return Decimal(v or default)
-    except Exception:
-        return Decimal(default)
-
-# Fallback por si no tienes este helper:
-def _resolve_concepto_reinscripcion():
-    for code in ("REINSCRIPCION", "REINSCRIPCIÓN", "REINS"):
-        try:
-            return ConceptoPago.objects.get(codigo=code)
-        except ConceptoPago.DoesNotExist:
-            pass
-    try:
-        return ConceptoPago.objects.get(nombre__icontains="reinscrip")
-    except ConceptoPago.DoesNotExist:
-        return None
-
 
 @login_required
 @require_POST
 def generar_cargos_mensuales(request, numero_estudiante):
+    """
+    Inscripción, mensualidades y reinscripciones de un alumno (alumnos.services.plan_cargos):
+    crea las que faltan y completa el vencimiento de las existentes.
+    """
+    from alumnos.services import plan_cargos
+
     alumno = get_object_or_404(Alumno, pk=numero_estudiante)
 
     # permisos
@@ -3534,166 +3273,121 @@ def generar_cargos_mensuales(request, numero_estudiante):
     if meses <= 0:
         return JsonResponse({"ok": False, "error": "Meses de programa inválido (<= 0)."}, status=400)
 
-    base = info.inicio_programa or date.today()
-
-    # Concepto de mensualidad/colegiatura
-    concepto_mensual = _resolve_concepto(request)
-    if not concepto_mensual:
-        return JsonResponse({"ok": False, "error": "No se encontró un Concepto de pago para crear cargos (mensual)."}, status=400)
-
-    # Concepto de inscripción (opcional)
-    concepto_insc = _resolve_concepto_inscripcion()
-
-    # Concepto de reinscripción (para hitos)
-    concepto_reins = _resolve_concepto_reinscripcion()
-
-    # ---- Monto mensual (colegiatura / precio_final) ----
-    monto_mensual = _to_decimal(info.precio_final if info.precio_final not in (None, "") else info.precio_colegiatura)
-
-    # ---- Monto inscripción (si hay) ----
-    insc_monto = _to_decimal(info.precio_inscripcion)
+    concepto_id = request.POST.get("concepto_id")
+    detalle = []
+    try:
+        plan_cargos.programar(Alumno.objects.filter(pk=alumno.pk), concepto_id=concepto_id, detalle=detalle)
+    except ValueError as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
 
-    # Resumen para respuesta
-    creados, existentes, actualizados_venc = 0, 0, 0
-    created_ids = []
-    insc_created = False
-    insc_existing = False
-    insc_id = None
+    mensuales = [p for p in detalle if p.tipo == "mensualidad"]
+    insc = next((p for p in detalle if p.tipo == "inscripcion"), None)
+    concepto_insc = plan_cargos.concepto_inscripcion()
+    concepto_reins = plan_cargos.concepto_reinscripcion()
 
-    # Reinscripciones (hitos)
     reins_resumen = []
-    reins_omitidos_fuera_rango = 0
-
-    with transaction.atomic():
-        # --- A) INSCRIPCIÓN (una sola vez, en la fecha base) ---
-        if concepto_insc and insc_monto > 0:
-            insc_fecha = base
-            insc_vence = insc_fecha + timedelta(days=6)
-            insc_obj, insc_was_created = Cargo.objects.get_or_create(
-                alumno=alumno,
-                concepto=concepto_insc,
-                fecha_cargo=insc_fecha,
-                defaults={
-                    "monto": insc_monto,
-                    "pagado": False,
-                    "fecha_vencimiento": insc_vence,
-                },
-            )
-            insc_id = insc_obj.id
-            if insc_was_created:
-                insc_created = True
-            else:
-                insc_existing = True
-                if insc_obj.fecha_vencimiento is None:
-                    insc_obj.fecha_vencimiento = insc_vence
-                    insc_obj.save(update_fields=["fecha_vencimiento"])
-
-        # --- B) CARGOS MENSUALES (colegiatura) ---
-        for i in range(meses):
-            fch = _mes_year_siguiente(base, i)     # tu helper (ej. fija al día 6)
-            vence = fch + timedelta(days=6)
-
-            obj, created = Cargo.objects.get_or_create(
-                alumno=alumno,
-                concepto=concepto_mensual,
-                fecha_cargo=fch,
-                defaults={
-                    "monto": monto_mensual,
-                    "pagado": False,
-                    "fecha_vencimiento": vence,
-                },
-            )
-            if created:
-                creados += 1
-                created_ids.append(obj.id)
-            else:
-                existentes += 1
-                if obj.fecha_vencimiento is None:
-                    obj.fecha_vencimiento = vence
-                    obj.save(update_fields=["fecha_vencimiento"])
-                    actualizados_venc += 1
-
-        # --- C) REINSCRIPCIONES (varios hitos del programa) ---
-        #   - Usa el monto del hito si lo trae; si no, usa Programa.reinscripcion (default).
-        if concepto_reins and info.programa:
-            hitos = info.programa.reinscripciones_hitos.filter(activo=True).order_by("meses_offset")
-            for h in hitos:
-                mes_obj = int(h.meses_offset or 0)
-                if mes_obj <= 0:
-                    continue
-
-                # (opcional) Omitir hitos que exceden la duración del plan:
-                if info.meses_programa and mes_obj > int(info.meses_programa):
-                    reins_omitidos_fuera_rango += 1
-                    reins_resumen.append({
-                        "mes_objetivo": mes_obj,
-                        "estado": "omitido_fuera_de_rango",
-                        "id": None,
-                    })
-                    continue
-
-                fch_reins = add_months_clamp(base, mes_obj)
-                # Si tus mensuales fijan día 6 y quieres unificar:
-                # fch_reins = fch_reins.replace(day=6)
-
-                vence_reins = fch_reins + timedelta(days=6)
-                monto_reins = _to_decimal(h.monto if h.monto not in (None, "") else getattr(info.programa, "reinscripcion", None))
-
-                obj_reins, created_reins = Cargo.objects.get_or_create(
-                    alumno=alumno,
-                    concepto=concepto_reins,
-                    fecha_cargo=fch_reins,
-                    defaults={
-                        "monto": monto_reins,
-                        "pagado": False,
-                        "fecha_vencimiento": vence_reins,
-                    },
-                )
-                if not created_reins and obj_reins.fecha_vencimiento is None:
-                    obj_reins.fecha_vencimiento = vence_reins
-                    obj_reins.save(update_fields=["fecha_vencimiento"])
-
-                reins_resumen.append({
-                    "mes_objetivo": mes_obj,
-                    "monto": f"{monto_reins:.2f}",
-                    "fecha": fch_reins.strftime("%Y-%m-%d"),
-                    "vence": vence_reins.strftime("%Y-%m-%d"),
-                    "creado": bool(created_reins),
-                    "existente": (not created_reins),
-                    "id": obj_reins.id,
-                    "estado": "creado" if created_reins else "existente",
-                })
+    for p in detalle:
+        if p.tipo != "reinscripcion":
+            continue
+        if p.estado == "fuera_de_rango":
+            reins_resumen.append({"mes_objetivo": p.mes, "estado": "omitido_fuera_de_rango", "id": None})
+            continue
+        reins_resumen.append({
+            "mes_objetivo": p.mes,
+            "monto": f"{p.monto:.2f}",
+            "fecha": p.fecha_cargo.strftime("%Y-%m-%d"),
+            "vence": p.fecha_vencimiento.strftime("%Y-%m-%d"),
+            "creado": p.estado == "nuevo",
+            "existente": p.estado != "nuevo",
+            "id": p.cargo_id,
+            "estado": "creado" if p.estado == "nuevo" else "existente",
+        })
 
     # Respuesta
     return JsonResponse({
         "ok": True,
         # Mensuales
-        "creados": creados,
-        "existentes": existentes,
-        "actualizados_venc": actualizados_venc,
-        "concepto_mensual": getattr(concepto_mensual, "codigo", str(concepto_mensual)),
-        "monto_mensual": f"{monto_mensual:.2f}",
-        "desde": base.strftime("%Y-%m-%d"),
+        "creados": sum(p.estado == "nuevo" for p in mensuales),
+        "existentes": sum(p.estado != "nuevo" for p in mensuales),
+        "actualizados_venc": sum(p.estado == "vencimiento" for p in mensuales),
+        "concepto_mensual": getattr(plan_cargos.concepto_mensual(concepto_id), "codigo", None),
+        "monto_mensual": f"{mensuales[0].monto:.2f}",
+        "desde": (info.inicio_programa or timezone.localdate()).strftime("%Y-%m-%d"),
         "meses": meses,
-        "ids": created_ids,
+        "ids": [p.cargo_id for p in mensuales if p.estado == "nuevo"],
 
         # Inscripción
         "inscripcion": {
-            "intentado": bool(concepto_insc and insc_monto > 0),
+            "intentado": insc is not None,
             "concepto": getattr(concepto_insc, "codigo", None),
-            "monto": f"{insc_monto:.2f}",
-            "creado": insc_created,
-            "existente": insc_existing,
-            "id": insc_id,
+            "monto": f"{insc.monto if insc else (info.precio_inscripcion or Decimal('0.00')):.2f}",
+            "creado": bool(insc and insc.estado == "nuevo"),
+            "existente": bool(insc and insc.estado != "nuevo"),
+            "id": insc.cargo_id if insc else None,
         },
 
         # Reinscripciones (hitos)
         "reinscripciones": reins_resumen,
-        "reins_omitidos_fuera_rango": reins_omitidos_fuera_rango,
+        "reins_omitidos_fuera_rango": sum(r["estado"] == "omitido_fuera_de_rango" for r in reins_resumen),
         "concepto_reinscripcion": getattr(concepto_reins, "codigo", None),
     })
 
 
+MUESTRA_PLAN_CARGOS = 500   # cargos listados en la respuesta (los totales van completos)
+
+
+@login_required
+@require_POST
+def programar_cargos_cohorte(request):
+    """
+    Plan de cargos de un grupo completo en una sola petición: todos los alumnos
+    (editables por el usuario) del Grupo, Programa, Sede y/o mes de inicio (AAAA-MM)
+    indicados. Con preview=1 solo informa qué se crearía.
+    """
+    from alumnos.permisos import alumnos_editables
+    from alumnos.services import plan_cargos
+
+    filtros = {}
+    for campo in ("grupo", "programa", "sede"):
+        valor = (request.POST.get(f"{campo}_id") or "").strip()
+        if valor:
+            if not valor.isdigit():
+                return JsonResponse({"ok": False, "error": f"{campo}_id inválido."}, status=400)
+            filtros[campo] = int(valor)
+    inicio = (request.POST.get("inicio") or "").strip()
+    if inicio:
+        try:
+            filtros["inicio"] = datetime.strptime(inicio, "%Y-%m").date()
+        except ValueError:
+            return JsonResponse({"ok": False, "error": "inicio debe ser AAAA-MM."}, status=400)
+    if not filtros:
+        return JsonResponse({"ok": False, "error": "Indica grupo, programa, sede o inicio."}, status=400)
+
+    preview = request.POST.get("preview") == "1"
+    alumnos = plan_cargos.cohorte(**filtros).filter(pk__in=alumnos_editables(request.user).values("pk"))
+    detalle = []
+    try:
+        stats = plan_cargos.programar(
+            alumnos, concepto_id=request.POST.get("concepto_id"), preview=preview, detalle=detalle,
+        )
+    except ValueError as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+
+    return JsonResponse({
+        "ok": True,
+        "preview": preview,
+        **stats,
+        "cargos": [
+            {
+                "alumno": p.alumno_id, "tipo": p.tipo, "concepto_id": p.concepto_id,
+                "fecha": p.fecha_cargo.isoformat(), "vence": p.fecha_vencimiento.isoformat(),
+                "monto": f"{p.monto:.2f}", "estado": p.estado, "id": p.cargo_id,
+            }
+            for p in detalle if p.estado in ("nuevo", "vencimiento")
+        ][:MUESTRA_PLAN_CARGOS],
+    })
+
+
 ############################################################################################
 # views.py
 from django.contrib.auth.decorators import login_required
@@ -3770,6 +3464,8 @@ def cargos_pendientes_todos(request):
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
 
+    from alumnos.services import cartera_corte
+
     return render(
         request,
         "alumnos/cargos_pendientes_todos.html",
@@ -3777,6 +3473,109 @@ def cargos_pendientes_todos(request):
             "page_obj": page_obj,
             "q": q,
             "hoy": hoy,
+            # totales por tramo del último corte nocturno (manage.py corte_cartera)
+            "corte": cartera_corte.resumen(),
+        },
+    )
+############################################################################################
+@login_required
+def alumnos_con_alertas(request):
+    """
+    Lista de trabajo: alumnos con algún aviso de datos (tabla AlertaAlumno, mantenida
+    por señales). Filtros por sede y tipo de alerta resueltos en SQL sobre el índice
+    parcial (flags > 0); respeta el alcance de Alumno.for_user.
+    """
+    from alumnos.models import AlertaAlumno
+    from alumnos.services import alertas, catalogos
+
+    sede = (request.GET.get("sede") or "").strip()
+    tipo = (request.GET.get("tipo") or "").strip()
+
+    qs = AlertaAlumno.objects.filter(flags__gt=0)
+    if not request.user.is_superuser:
+        qs = qs.filter(q_alumnos_visibles(request.user, "alumno__"))
+    if sede.isdigit():
+        qs = qs.filter(sede_id=int(sede))
+    if tipo in AlertaAlumno.BITS:
+        qs = alertas.con_alerta(qs, tipo)
+
+    qs = qs.select_related("alumno", "sede").order_by("-alumno_id")
+    page_obj = Paginator(qs, 50).get_page(request.GET.get("page"))
+
+    return render(
+        request,
+        "alumnos/alumnos_con_alertas.html",
+        {
+            "page_obj": page_obj,
+            "sedes": catalogos.obtener("sedes"),
+            "tipos": AlertaAlumno.ALERTAS,
+            "sede": sede,
+            "tipo": tipo,
+        },
+    )
+############################################################################################
+@login_required
+def cartera_resumen(request):
+    """
+    Cartera por cobrar del último corte (SaldoCartera, `manage.py corte_cartera`):
+    saldo por sede o programa y tramo de antigüedad. Solo superuser o grupo "pagos".
+    """
+    from alumnos.services import cartera_corte
+
+    if not user_can_view_pagos(request.user):
+        return HttpResponseForbidden("No tienes permiso para ver la cartera.")
+
+    por = request.GET.get("por")
+    if por not in ("sede", "programa"):
+        por = "sede"
+
+    return render(
+        request,
+        "alumnos/cartera_resumen.html",
+        {"por": por, **cartera_corte.resumen(por=por)},
+    )
+############################################################################################
+@login_required
+def pagos_concepto_revision(request):
+    """
+    Cola de revisión del clasificador de conceptos: pagos ambiguos o sin regla. Al
+    asignar el concepto a mano queda 'manual' y las reclasificaciones no lo cambian.
+    """
+    from alumnos.models import PagoDiario
+    from alumnos.services import catalogos
+
+    if not user_can_view_pagos(request.user):
+        return HttpResponseForbidden("No tienes permiso para clasificar pagos.")
+
+    if request.method == "POST":
+        pago = get_object_or_404(PagoDiario, pk=request.POST.get("pago"), clasificacion__in=PagoDiario.POR_REVISAR)
+        concepto = catalogos.por_pk("conceptos_pago", request.POST.get("concepto"))
+        if concepto is None:
+            messages.error(request, "Selecciona un concepto.")
+        else:
+            pago.concepto_pago = concepto
+            pago.clasificacion = "manual"
+            pago.save(update_fields=["concepto_pago", "clasificacion", "actualizado_en"])
+            messages.success(request, f"Pago {pago.folio or pago.pk} clasificado como {concepto.nombre}.")
+        return redirect(request.get_full_path())
+
+    estado = request.GET.get("estado")
+    estados = [estado] if estado in PagoDiario.POR_REVISAR else list(PagoDiario.POR_REVISAR)
+    qs = (
+        PagoDiario.objects.filter(clasificacion__in=estados)
+        .select_related("alumno")
+        .order_by("-fecha", "-id")
+    )
+    page_obj = Paginator(qs, 50).get_page(request.GET.get("page"))
+
+    return render(
+        request,
+        "alumnos/pagos_concepto_revision.html",
+        {
+            "page_obj": page_obj,
+            "conceptos": catalogos.obtener("conceptos_pago"),
+            "estado": estado if estado in PagoDiario.POR_REVISAR else "",
+            "estados": [(k, v) for k, v in PagoDiario.CLASIFICACIONES if k in PagoDiario.POR_REVISAR],
         },
     )
 ############################################################################################
@@ -3958,6 +3757,7 @@ from django.utils import timezone
 from django.core.mail import EmailMultiAlternatives
 
 from .models import Alumno  # ajusta si está en otra app
+from alumnos.services.estaticos import ruta_estatico
 
 logger = logging.getLogger(__name__)
 
@@ -4244,7 +4044,7 @@ def enviar_bienvenida_estatica(request, alumno_id):
     _dbg("EmailMultiAlternatives creado y HTML adjuntado.")
 
     # ================== Imágenes inline ==================
-    logo_path = finders.find("iuaf/iuaf-logo3.png")
+    logo_path = ruta_estatico("iuaf/iuaf-logo3.png")
     _dbg(f"logo_path={logo_path}")
     if logo_path:
         try:
@@ -4257,7 +4057,7 @@ def enviar_bienvenida_estatica(request, alumno_id):
         except Exception as e:
             _dbg(f"Error adjuntando logo: {e}")
 
-    hero_path = finders.find("iuaf/imagencorreo.png")
+    hero_path = ruta_estatico("iuaf/imagencorreo.png")
     _dbg(f"hero_path={hero_path}")
     if hero_path:
         try:
@@ -4741,70 +4541,9 @@ def boleta_calificaciones(request, pk):
 
     califs = list(califs_qs.order_by("item__fecha_inicio", "item__materia__codigo"))
 
-    # Metadatos de cabecera
-    programa = None
-    listado = None
-    periodo_txt = "—"
-    rvoe = None
-
-    if califs:
-        listado = califs[0].item.listado
-        programa = listado.programa if listado else None
-        # período a partir del rango de fechas de las materias del listado
-        rango = califs_qs.aggregate(
-            inicio=Min("item__fecha_inicio"),
-            fin=Max("item__fecha_fin")
-        )
-        if rango["inicio"] and rango["fin"]:
-            # ejemplo: MAY–AGO 2025 (en español depende de locale)
-            periodo_txt = f"{rango['inicio']:%b %Y} – {rango['fin']:%b %Y}".upper()
-        rvoe = (getattr(programa, "rvoe_clave", "") or "").strip()
-        
-
-    # Filas para la tabla
-    filas = []
-    for c in califs:
-        filas.append({
-            "codigo": c.item.materia.codigo,
-            "materia": c.item.materia.nombre,
-            "inicio": c.item.fecha_inicio,
-            "fin": c.item.fecha_fin,
-            "nota": c.nota if c.nota is not None else 0.0,   # puedes dejar None si prefieres “—”
-            "aprobado": getattr(c, "aprobado", None),
-            "obs": c.observaciones or "",
-        })
-
-    ctx = {
-        "alumno": alumno,
-        "programa": programa,
-        "listado": listado,
-        "periodo_txt": periodo_txt,
-        "rvoe": rvoe,
-        "filas": filas,
-        "hoy": timezone.now(),
-        "institucion": {
-            "nombre": "IUAF",
-            "campus": getattr(alumno.informacionEscolar, "sede", None),
-            "ciudad": "Cancún, Quintana Roo",
-            "cct": "23PSU0064H",  # pon el real si lo tienes en BD
-        },
-        "firmante": {
-            "nombre": "RA. EN D. YASMIN CAM",  # placeholder
-            "cargo": "Directora General y de Servicios Escolares",
-        },
-        "show_print_button": True,  # para ocultarlo en impresión
-        "institucion": {
-            "nombre": "Instituto Universitario de Alta Formación",
-            "rfc": "IUAT0913LI2",
-            "cct": "23PSU0064H",
-            "direccion": "Blvd. Kukulkán Km 3.5, Plaza Nautilus Int. 53, Cancún, Q.R.",
-            "ciudad": "México",            
-            "telefono": "998 939 4481",
-            "email": "cadministrativa@iuaf.edu.mx",
-            "campus": getattr(alumno.informacionEscolar, "sede", None),
-        },
-      
-    }
+    # Cabecera, periodo y filas en memoria (mismo armado que las boletas por lote)
+    from academico.boletas import contexto_boleta
+    ctx = contexto_boleta(alumno, califs)
     return render(request, "reportes/boleta_calificaciones.html", ctx)
 
 ###############################################################
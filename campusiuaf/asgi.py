@@ -5,6 +5,12 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Se sirve con `SERVIDOR=asgi` (entrypoint.sh: gunicorn + uvicorn_worker). Las vistas
+async (api_curp_lookup, crear_pago_de_cargo, link_pago_cargo, webhooks de Stripe y
+Twilio) no bloquean el worker mientras esperan; las síncronas corren en el hilo de
+sync_to_async de cada worker. Los middlewares propios (alumnos.middleware) son
+sync/async para no forzar el cambio de contexto en cada petición.
 """
 
 import os
@@ -114,6 +114,8 @@ ACCOUNT_RATE_LIMITS = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'alumnos.middleware.RendimientoMiddleware',
+    'alumnos.middleware.NMas1Middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -136,6 +138,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Descargas protegidas (documentos, lecciones, entregas): Django valida permisos
+# y nginx entrega el archivo vía X-Accel-Redirect desde una location "internal".
+# Vacío => Django sirve el archivo (con Range y 304).
+PROTECTED_MEDIA_ACCEL_PREFIX = os.getenv("PROTECTED_MEDIA_ACCEL_PREFIX", "")
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -184,7 +191,9 @@ else:
             "PASSWORD": POSTGRES_PASSWORD,
             "HOST": POSTGRES_HOST,
             "PORT": POSTGRES_PORT,
-            "CONN_MAX_AGE": 600,
+            # con ASGI (SERVIDOR=asgi) las conexiones persistentes no se reciclan bien
+            # entre los hilos de sync_to_async: una por petición
+            "CONN_MAX_AGE": 0 if os.getenv("SERVIDOR") == "asgi" else 600,
         }
     }
 
@@ -234,6 +243,29 @@ STATICFILES_DIRS = [ BASE_DIR / "static" ]  # /app/static (fuente)
 # Destino de collectstatic (separado de la fuente)
 STATIC_ROOT = BASE_DIR / "staticfiles"      # /app/staticfiles (salida)
 
+# Sin DEBUG, collectstatic deja nombres con hash (caché "immutable" en nginx) y
+# versiones .gz/.br precomprimidas (alumnos.services.estaticos)
+STATIC_FINGERPRINT = os.getenv("STATIC_FINGERPRINT", "0" if DEBUG else "1") in ("1", "True", "true")
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "alumnos.services.estaticos.StaticComprimido" if STATIC_FINGERPRINT
+        else "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+STATIC_ZOPFLI_ITERACIONES = int(os.getenv("STATIC_ZOPFLI_ITERACIONES", "15"))
+# Imágenes de correos y PDFs que collectstatic reduce en STATIC_ROOT (la fuente no se toca)
+STATIC_IMAGENES_OPTIMIZAR = [
+    "iuaf/logo-email.png",
+    "iuaf/iuaf-logo3.png",
+    "iuaf/imagencorreo.png",
+    "iuaf/codigoqr.png",
+    "iuaf/firma.png",
+    "iuaf/firma-erika.png",
+    "iuaf/bienvenida/firma.png",
+    "recibos/footer.png",
+]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -261,11 +293,86 @@ DEFAULT_FROM_EMAIL = "CampusIUAF Recibos <recibos@iuaf.edu.mx>"
 ADM_EMAIL_USER = "cadministrativa@iuaf.edu.mx"
 ADM_EMAIL_PASSWORD = "xywy uuch vkyu hbzi"   # app password de Gmail
 WELCOME_FROM_EMAIL = "CampusIUAF Admisiones <cadministrativa@iuaf.edu.mx>"
+
+# Bienvenida automática al dar de alta un alumno: se encola en CorreoSaliente
+# (alumnos.services.correos) y la envía `manage.py enviar_correos`
+SEND_WELCOME_EMAILS = os.getenv("SEND_WELCOME_EMAILS", "0") == "1"
     
             
 
 
 
+##################################################################################
+# ======================
+# CONSULTA CURP (gob.mx)
+# ======================
+CURP_LOOKUP_URL = os.getenv("CURP_LOOKUP_URL", "https://www.gob.mx/curp/")
+CURP_CACHE_TTL_DIAS = int(os.getenv("CURP_CACHE_TTL_DIAS", "30"))
+CURP_LOOKUP_MAX_DRIVERS = int(os.getenv("CURP_LOOKUP_MAX_DRIVERS", "2"))   # navegadores por worker
+CURP_LOOKUP_MAX_USOS = 50            # consultas antes de reciclar un navegador
+CURP_LOOKUP_TIMEOUT = 25             # segundos por carga/espera
+CURP_LOOKUP_ACQUIRE_TIMEOUT = 10     # segundos esperando navegador libre
+# Ruta a un HTML local: si está configurado no se abre navegador (pruebas/desarrollo)
+CURP_LOOKUP_FIXTURE_HTML = os.getenv("CURP_LOOKUP_FIXTURE_HTML", "")
+
+
+##################################################################################
+# ======================
+# MÉTRICAS DE RENDIMIENTO (alumnos.middleware.RendimientoMiddleware)
+# ======================
+PERF_ACTIVO = os.getenv("PERF_ACTIVO", "1") in ("1", "True", "true")
+PERF_LENTO_MS = int(os.getenv("PERF_LENTO_MS", "1000"))  # umbral para guardar muestra con SQL
+PERF_FLUSH_SEGUNDOS = 30             # cada cuánto vacía cada worker su acumulado a la BD
+PERF_MAX_SQL_MUESTRA = 200           # consultas guardadas por muestra lenta
+PERF_MAX_MUESTRAS_FLUSH = 20         # muestras lentas por vaciado (las más lentas)
+PERF_RETENCION_DIAS = 14             # manage.py purgar_metricas
+
+# Detector de N+1 (alumnos.middleware.NMas1Middleware): log en desarrollo/staging,
+# excepción con NMAS1_ESTRICTO (suite de pruebas)
+NMAS1_ACTIVO = os.getenv("NMAS1_ACTIVO", "1" if DEBUG else "0") in ("1", "True", "true")
+NMAS1_ESTRICTO = os.getenv("NMAS1_ESTRICTO", "0") in ("1", "True", "true")
+NMAS1_UMBRAL = int(os.getenv("NMAS1_UMBRAL", "10"))   # repeticiones de la misma forma de SQL
+
+
+##################################################################################
+# ======================
+# CACHÉ
+# ======================
+# "catalogos" la comparten todos los workers (tabla creada con createcachetable);
+# alumnos.services.catalogos guarda ahí la versión y las filas de cada catálogo.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalogos": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "cache_catalogos",
+        "TIMEOUT": None,
+    },
+}
+CATALOGOS_CACHE = "catalogos"
+CATALOGOS_VERIFICAR_SEGUNDOS = int(os.getenv("CATALOGOS_VERIFICAR_SEGUNDOS", "5"))  # cada cuánto un worker revisa la versión compartida
+
+# Números de estudiante (alumnos.services.numeracion): cada worker reserva este
+# tamaño de bloque del contador y reparte desde memoria
+NUMERACION_BLOQUE = int(os.getenv("NUMERACION_BLOQUE", "10"))
+
+# APIs JSON de los formularios (alumnos.services.http_cache): segundos que el navegador
+# reutiliza la respuesta antes de revalidar con If-None-Match
+API_LOOKUP_MAX_AGE = int(os.getenv("API_LOOKUP_MAX_AGE", "60"))
+
+
+##################################################################################
+# ======================
+# TWILIO (alumnos.services.mensajeria; credenciales en TwilioConfig)
+# ======================
+TWILIO_FAKE = os.getenv("TWILIO_FAKE", "0") in ("1", "True", "true")   # cliente falso, sin red
+TWILIO_CONCURRENCIA = int(os.getenv("TWILIO_CONCURRENCIA", "8"))       # hilos por campaña
+TWILIO_MENSAJES_POR_SEGUNDO = float(os.getenv("TWILIO_MENSAJES_POR_SEGUNDO", "10"))  # límite de la cuenta/remitente
+TWILIO_CALLBACK_BASE_URL = os.getenv("TWILIO_CALLBACK_BASE_URL", "https://admin.campusiuaf.com")
+TWILIO_CODIGO_PAIS = os.getenv("TWILIO_CODIGO_PAIS", "52")             # teléfonos de 10 dígitos
+
+
 ##################################################################################
 # ======================
 # STRIPE (config directa temporal)
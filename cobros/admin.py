@@ -20,5 +20,13 @@ class PRAdmin(admin.ModelAdmin):
 
 @admin.register(WebhookEvent)
 class WEAdmin(admin.ModelAdmin):
-    list_display = ("provider_event_id", "event_type", "received_at", "processed_at")
-    search_fields = ("provider_event_id", "event_type")
+    list_display = ("provider_event_id", "event_type", "status", "attempts", "order_key", "received_at", "next_attempt_at", "processed_at")
+    search_fields = ("provider_event_id", "event_type", "order_key")
+    list_filter = ("status", "event_type")
+    actions = ["reprocesar_eventos"]
+
+    @admin.action(description="Reprocesar eventos seleccionados")
+    def reprocesar_eventos(self, request, queryset):
+        from .inbox import reprocesar
+        n = reprocesar(queryset)
+        self.message_user(request, f"{n} evento(s) en cola; el worker los procesará.")
@@ -0,0 +1,58 @@
+# cobros/fake_events.py
+"""
+Generador de eventos de Stripe falsos (misma forma que el payload real) para
+probar el inbox en local sin Stripe ni firma. Uso típico:
+
+    evt = fake_stripe_event("payment_intent.succeeded", pr=pr)
+    registrar_evento(evt)
+    procesar_pendientes()
+"""
+import time
+import uuid
+
+
+def _fake_id(prefix: str) -> str:
+    return f"{prefix}_fake_{uuid.uuid4().hex[:24]}"
+
+
+def _objeto_para(event_type: str, pr=None) -> dict:
+    meta = {"pr_id": str(pr.pk)} if pr else {}
+    amount = int((pr.amount or 0) * 100) if pr else 0
+    pi_id = (pr.payment_intent_id if pr else "") or _fake_id("pi")
+    cs_id = (pr.checkout_session_id if pr else "") or _fake_id("cs")
+    sub_id = (pr.subscription_id if pr else "") or _fake_id("sub")
+
+    if event_type == "checkout.session.completed":
+        return {
+            "id": cs_id, "object": "checkout.session", "metadata": meta,
+            "payment_intent": pi_id, "customer": (pr.customer_id if pr else "") or _fake_id("cus"),
+            "subscription": sub_id if pr and pr.type == "subscription" else None,
+            "payment_status": "paid", "amount_total": amount,
+        }
+    if event_type in ("payment_intent.succeeded", "payment_intent.payment_failed"):
+        return {"id": pi_id, "object": "payment_intent", "metadata": meta, "amount_received": amount}
+    if event_type == "invoice.paid":
+        return {"id": _fake_id("in"), "object": "invoice", "subscription": sub_id, "amount_paid": amount}
+    if event_type in ("customer.subscription.updated", "customer.subscription.deleted"):
+        status = "canceled" if event_type.endswith("deleted") else "active"
+        return {"id": sub_id, "object": "subscription", "status": status, "metadata": meta}
+    if event_type == "charge.refunded":
+        return {"id": _fake_id("ch"), "object": "charge", "payment_intent": pi_id, "amount_refunded": amount}
+    return {"id": _fake_id("obj"), "object": "unknown", "metadata": meta}
+
+
+def fake_stripe_event(event_type: str, *, pr=None, event_id: str | None = None, **overrides) -> dict:
+    """
+    Devuelve un dict con la forma de un Event de Stripe. `overrides` se mezcla
+    sobre data.object (p.ej. payment_status="unpaid").
+    """
+    obj = _objeto_para(event_type, pr)
+    obj.update(overrides)
+    return {
+        "id": event_id or _fake_id("evt"),
+        "object": "event",
+        "type": event_type,
+        "created": int(time.time()),
+        "livemode": False,
+        "data": {"object": obj},
+    }
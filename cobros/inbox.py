@@ -0,0 +1,197 @@
+# cobros/inbox.py
+"""
+Inbox de webhooks de Stripe.
+
+- `registrar_evento(event)` / `aregistrar_evento(event)` (el endpoint, que es async):
+  guarda el evento de forma idempotente (provider_event_id único) y no procesa nada.
+- `procesar_pendientes(...)`: lo usa el worker (`manage.py procesar_webhooks_stripe`);
+  procesa eventos vencidos con reintentos y backoff exponencial, respetando el orden
+  de llegada por `order_key` (mismo PaymentRecord / suscripción / PaymentIntent).
+- `reprocesar(...)`: vuelve a poner en cola eventos fallidos (`reprocesar_webhooks_stripe`).
+"""
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import PaymentRecord, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 6 * 60 * 60
+# Un evento en 'processing' más tiempo que esto se considera abandonado (worker caído)
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+
+def _id(v):
+    if isinstance(v, dict):
+        return v.get("id") or ""
+    return v or ""
+
+
+def _payment_record_id(data, sub_id, pi_id):
+    """
+    PaymentRecord del objeto del evento: metadata.pr_id (la ponemos en la Session y en
+    el PaymentIntent) o, si no viene (invoice, charge, subscription), el que tenga
+    guardado esa Checkout Session, PaymentIntent o suscripción.
+    """
+    pr_id = str((data.get("metadata") or {}).get("pr_id") or "")
+    if pr_id.isdigit():
+        return int(pr_id)
+
+    filtros = Q()
+    if data.get("object") == "checkout.session" and data.get("id"):
+        filtros |= Q(checkout_session_id=data["id"])
+    if pi_id:
+        filtros |= Q(payment_intent_id=pi_id)
+    if sub_id:
+        filtros |= Q(subscription_id=sub_id)
+    if not filtros:
+        return None
+    return PaymentRecord.objects.filter(filtros).order_by("pk").values_list("pk", flat=True).first()
+
+
+def order_key_for_event(event) -> str:
+    """
+    Clave para serializar eventos relacionados: "pr:<id>" para todos los eventos de un
+    mismo PaymentRecord (checkout, PaymentIntent, factura, suscripción, reembolso).
+    Sin PaymentRecord conocido: suscripción, PaymentIntent u objeto. Hace consultas.
+    """
+    data = (event.get("data") or {}).get("object") or {}
+    obj_type = data.get("object")
+    sub_id = _id(data.get("subscription")) or (data.get("id") if obj_type == "subscription" else "")
+    pi_id = _id(data.get("payment_intent")) or (data.get("id") if obj_type == "payment_intent" else "")
+
+    pr_id = _payment_record_id(data, sub_id, pi_id)
+    if pr_id:
+        return f"pr:{pr_id}"
+    if sub_id:
+        return f"sub:{sub_id}"
+    if pi_id:
+        return f"pi:{pi_id}"
+    return f"obj:{data['id']}" if data.get("id") else ""
+
+
+def registrar_evento(event):
+    """
+    Guarda el evento en el inbox. Devuelve (WebhookEvent, created).
+    Reentregas de Stripe con el mismo id no crean duplicados ni fallan.
+    """
+    return WebhookEvent.objects.get_or_create(provider_event_id=event["id"], defaults=_defaults_evento(event))
+
+
+async def aregistrar_evento(event):
+    """registrar_evento para el endpoint async."""
+    # la clave de orden busca el PaymentRecord: se arma fuera del event loop
+    defaults = await sync_to_async(_defaults_evento)(event)
+    return await WebhookEvent.objects.aget_or_create(provider_event_id=event["id"], defaults=defaults)
+
+
+def _defaults_evento(event):
+    return {
+        "event_type": event.get("type", ""),
+        "payload": event,
+        "order_key": order_key_for_event(event)[:80],
+    }
+
+
+def _siguiente_intento(attempts: int):
+    segundos = min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS)
+    return timezone.now() + timedelta(seconds=segundos)
+
+
+def _reclamar(evt) -> bool:
+    """Marca el evento como 'processing' solo si nadie más lo tomó (update condicional)."""
+    now = timezone.now()
+    reclamable = Q(status="pending") | Q(status="processing", locked_at__lt=now - LOCK_TIMEOUT)
+    return WebhookEvent.objects.filter(reclamable, pk=evt.pk).update(status="processing", locked_at=now) == 1
+
+
+def procesar_evento(evt) -> bool:
+    """
+    Ejecuta el handler para un evento ya reclamado. Devuelve True si se procesó.
+    En error programa el siguiente intento o lo marca 'failed' al agotar MAX_ATTEMPTS.
+    """
+    from .views import _handle_stripe_event  # import local para evitar ciclos
+
+    evt.attempts += 1
+    try:
+        _handle_stripe_event(evt.payload)
+    except Exception as exc:
+        evt.error = f"{type(exc).__name__}: {exc}"
+        if evt.attempts >= MAX_ATTEMPTS:
+            evt.status = "failed"
+        else:
+            evt.status = "pending"
+            evt.next_attempt_at = _siguiente_intento(evt.attempts)
+        evt.locked_at = None
+        evt.save(update_fields=["attempts", "error", "status", "next_attempt_at", "locked_at"])
+        logger.exception("Webhook %s (%s) falló en intento %s", evt.provider_event_id, evt.event_type, evt.attempts)
+        return False
+
+    evt.status = "processed"
+    evt.processed_at = timezone.now()
+    evt.error = ""
+    evt.locked_at = None
+    evt.save(update_fields=["attempts", "status", "processed_at", "error", "locked_at"])
+    return True
+
+
+def eventos_listos():
+    """
+    Eventos vencidos y sin eventos anteriores pendientes con la misma order_key.
+    Los 'failed' (sin reintentos) no bloquean: se atienden con el comando de replay.
+    """
+    now = timezone.now()
+    anteriores_pendientes = WebhookEvent.objects.filter(
+        order_key=OuterRef("order_key"),
+        pk__lt=OuterRef("pk"),
+        status__in=["pending", "processing"],
+    )
+    return (
+        WebhookEvent.objects
+        .filter(
+            Q(status="pending", next_attempt_at__lte=now)
+            | Q(status="processing", locked_at__lt=now - LOCK_TIMEOUT)
+        )
+        .filter(Q(order_key="") | ~Exists(anteriores_pendientes))
+        .order_by("id")
+    )
+
+
+def procesar_pendientes(limit: int = 100) -> dict:
+    """
+    Procesa hasta `limit` eventos listos. Si un evento falla, los siguientes con
+    la misma order_key se saltan en esta pasada para no romper el orden.
+    """
+    stats = {"procesados": 0, "fallidos": 0, "omitidos": 0}
+    bloqueadas = set()
+
+    for evt in list(eventos_listos()[:limit]):
+        if evt.order_key and evt.order_key in bloqueadas:
+            stats["omitidos"] += 1
+            continue
+        if not _reclamar(evt):
+            stats["omitidos"] += 1
+            continue
+        if procesar_evento(evt):
+            stats["procesados"] += 1
+        else:
+            stats["fallidos"] += 1
+            if evt.order_key:
+                bloqueadas.add(evt.order_key)
+    return stats
+
+
+def reprocesar(qs) -> int:
+    """Regresa a la cola los eventos del queryset (p.ej. fallidos). Devuelve cuántos."""
+    return qs.exclude(status="processing").update(
+        status="pending",
+        attempts=0,
+        next_attempt_at=timezone.now(),
+        locked_at=None,
+    )
@@ -0,0 +1,31 @@
+# cobros/management/commands/generar_evento_stripe_fake.py
+from django.core.management.base import BaseCommand, CommandError
+
+from cobros.fake_events import fake_stripe_event
+from cobros.inbox import procesar_pendientes, registrar_evento
+from cobros.models import PaymentRecord
+
+
+class Command(BaseCommand):
+    help = "Inserta un evento de Stripe falso en el inbox (pruebas locales, sin Stripe)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tipo", help="event_type, p.ej. payment_intent.succeeded")
+        parser.add_argument("--pr", type=int, help="ID del PaymentRecord al que apunta el evento.")
+        parser.add_argument("--procesar", action="store_true", help="Procesa el inbox después de insertar.")
+
+    def handle(self, *args, **opts):
+        pr = None
+        if opts["pr"]:
+            pr = PaymentRecord.objects.filter(pk=opts["pr"]).first()
+            if not pr:
+                raise CommandError(f"No existe PaymentRecord {opts['pr']}")
+
+        evt, created = registrar_evento(fake_stripe_event(opts["tipo"], pr=pr))
+        self.stdout.write(f"{evt.provider_event_id} ({evt.event_type}) order_key={evt.order_key or '-'}")
+
+        if opts["procesar"]:
+            stats = procesar_pendientes()
+            self.stdout.write(
+                f"procesados={stats['procesados']} fallidos={stats['fallidos']} omitidos={stats['omitidos']}"
+            )
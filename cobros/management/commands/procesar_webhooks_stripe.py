@@ -0,0 +1,28 @@
+# cobros/management/commands/procesar_webhooks_stripe.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from cobros.inbox import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = "Worker del inbox de Stripe: procesa eventos pendientes con reintentos y orden por PaymentRecord."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Máximo de eventos por pasada.")
+        parser.add_argument("--loop", action="store_true", help="Queda corriendo (modo worker).")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Segundos entre pasadas sin trabajo (con --loop).")
+
+    def handle(self, *args, **opts):
+        while True:
+            stats = procesar_pendientes(limit=opts["limit"])
+            trabajo = stats["procesados"] + stats["fallidos"]
+            if trabajo or not opts["loop"]:
+                self.stdout.write(
+                    f"procesados={stats['procesados']} fallidos={stats['fallidos']} omitidos={stats['omitidos']}"
+                )
+            if not opts["loop"]:
+                break
+            if not trabajo:
+                time.sleep(opts["sleep"])
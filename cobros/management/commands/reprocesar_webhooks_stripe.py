@@ -0,0 +1,40 @@
+# cobros/management/commands/reprocesar_webhooks_stripe.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from cobros.inbox import procesar_pendientes, reprocesar
+from cobros.models import WebhookEvent
+
+
+class Command(BaseCommand):
+    help = "Regresa a la cola eventos de Stripe fallidos (o los indicados) y los procesa."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--evento", action="append", default=[], help="provider_event_id (repetible).")
+        parser.add_argument("--tipo", help="Filtra por event_type (p.ej. payment_intent.succeeded).")
+        parser.add_argument("--desde", help="Solo eventos recibidos desde esta fecha (YYYY-MM-DD).")
+        parser.add_argument("--incluir-procesados", action="store_true",
+                            help="También reprocesa eventos ya procesados (los handlers son idempotentes).")
+        parser.add_argument("--solo-encolar", action="store_true", help="No procesa; el worker los tomará.")
+
+    def handle(self, *args, **opts):
+        qs = WebhookEvent.objects.all()
+        if opts["evento"]:
+            qs = qs.filter(provider_event_id__in=opts["evento"])
+        elif not opts["incluir_procesados"]:
+            qs = qs.filter(status="failed")
+        if opts["tipo"]:
+            qs = qs.filter(event_type=opts["tipo"])
+        if opts["desde"]:
+            desde = parse_date(opts["desde"])
+            if not desde:
+                raise CommandError("--desde debe tener formato YYYY-MM-DD")
+            qs = qs.filter(received_at__date__gte=desde)
+
+        n = reprocesar(qs)
+        self.stdout.write(f"Eventos en cola: {n}")
+        if n and not opts["solo_encolar"]:
+            stats = procesar_pendientes(limit=max(n, 100))
+            self.stdout.write(
+                f"procesados={stats['procesados']} fallidos={stats['fallidos']} omitidos={stats['omitidos']}"
+            )
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def marcar_eventos_existentes(apps, schema_editor):
+    """Los eventos ya procesados (o con error) antes del inbox no deben reprocesarse solos."""
+    WebhookEvent = apps.get_model("cobros", "WebhookEvent")
+    WebhookEvent.objects.filter(processed_at__isnull=False).update(status="processed")
+    WebhookEvent.objects.filter(processed_at__isnull=True).exclude(error="").update(status="failed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cobros', '0003_paymentrecord_cargo'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='webhookevent',
+            options={'ordering': ['received_at', 'id']},
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='order_key',
+            field=models.CharField(blank=True, max_length=80),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'Procesando'), ('processed', 'Procesado'), ('failed', 'Fallido')], db_index=True, default='pending', max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='cobros_webh_status_78b63e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(fields=['order_key', 'status'], name='cobros_webh_order_k_f18a8a_idx'),
+        ),
+        migrations.RunPython(marcar_eventos_existentes, migrations.RunPython.noop),
+    ]
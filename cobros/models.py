@@ -173,6 +173,18 @@ class PaymentRecord(models.Model):
         return res
 
 class WebhookEvent(models.Model):
+    """
+    Bandeja de entrada (inbox) de webhooks de Stripe.
+    El endpoint solo guarda el evento; `cobros.inbox` lo procesa después
+    con reintentos y en orden por PaymentRecord (order_key).
+    """
+    STATUS_CHOICES = (
+        ("pending", "Pendiente"),
+        ("processing", "Procesando"),
+        ("processed", "Procesado"),
+        ("failed", "Fallido"),   # agotó reintentos; se reprocesa con `reprocesar_webhooks_stripe`
+    )
+
     provider_event_id = models.CharField(max_length=64, unique=True)
     event_type = models.CharField(max_length=80)
     payload = models.JSONField()
@@ -180,5 +192,19 @@ class WebhookEvent(models.Model):
     processed_at = models.DateTimeField(null=True, blank=True)
     error = models.TextField(blank=True)
 
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default="pending", db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    # Clave de orden: eventos con la misma clave (p.ej. "pr:15") se procesan en orden de llegada
+    order_key = models.CharField(max_length=80, blank=True)
+
+    class Meta:
+        ordering = ["received_at", "id"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["order_key", "status"]),
+        ]
+
     def __str__(self):
         return f"{self.event_type} ({self.provider_event_id})"
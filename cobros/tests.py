@@ -1,3 +1,122 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from cobros import inbox
+from cobros.fake_events import fake_stripe_event
+from cobros.models import PaymentRecord, WebhookEvent
+
+
+def _evento_roto(**kwargs):
+    """Evento sin 'type': el handler truena con KeyError y el inbox lo reintenta."""
+    evt = fake_stripe_event("invoice.paid", **kwargs)
+    evt.pop("type")
+    evt["data"]["object"]["subscription"] = "sub_orden"
+    return evt
+
+
+class InboxWebhooksTests(TestCase):
+    """Inbox de Stripe (cobros/inbox.py): idempotencia, reintentos, orden por order_key y replay."""
+
+    def test_misma_entrega_una_sola_fila(self):
+        evt = fake_stripe_event("invoice.paid", event_id="evt_dup")
+        _, creado = inbox.registrar_evento(evt)
+        _, creado_otra_vez = inbox.registrar_evento(evt)
+
+        self.assertTrue(creado)
+        self.assertFalse(creado_otra_vez)
+        self.assertEqual(WebhookEvent.objects.filter(provider_event_id="evt_dup").count(), 1)
+
+        self.assertEqual(inbox.procesar_pendientes(), {"procesados": 1, "fallidos": 0, "omitidos": 0})
+        self.assertEqual(WebhookEvent.objects.get().status, "processed")
+
+    def test_backoff_y_failed_al_agotar_intentos(self):
+        evt, _ = inbox.registrar_evento(_evento_roto())
+        antes = timezone.now()
+        with self.assertLogs("cobros.inbox", "ERROR"):
+            self.assertEqual(inbox.procesar_pendientes()["fallidos"], 1)
+
+        evt.refresh_from_db()
+        self.assertEqual((evt.status, evt.attempts), ("pending", 1))
+        self.assertIn("KeyError", evt.error)
+        espera = evt.next_attempt_at - antes
+        self.assertGreaterEqual(espera, timedelta(seconds=inbox.BACKOFF_BASE_SECONDS))
+        self.assertLess(espera, timedelta(seconds=inbox.BACKOFF_BASE_SECONDS * 2))
+
+        # aún no vence: la siguiente pasada no lo toca
+        self.assertEqual(inbox.procesar_pendientes(), {"procesados": 0, "fallidos": 0, "omitidos": 0})
+
+        # último intento: pasa a 'failed' y ya no se reintenta
+        WebhookEvent.objects.filter(pk=evt.pk).update(
+            attempts=inbox.MAX_ATTEMPTS - 1, next_attempt_at=timezone.now(),
+        )
+        with self.assertLogs("cobros.inbox", "ERROR"):
+            inbox.procesar_pendientes()
+        evt.refresh_from_db()
+        self.assertEqual((evt.status, evt.attempts), ("failed", inbox.MAX_ATTEMPTS))
+        self.assertNotIn(evt, inbox.eventos_listos())
+
+    def test_orden_por_order_key(self):
+        primero, _ = inbox.registrar_evento(_evento_roto())
+        segundo, _ = inbox.registrar_evento(fake_stripe_event("invoice.paid", subscription="sub_orden"))
+        otro, _ = inbox.registrar_evento(fake_stripe_event("invoice.paid", subscription="sub_otra"))
+        self.assertEqual(primero.order_key, segundo.order_key)
+
+        # el primero falla; el segundo (misma llave) ni se toma, el de otra llave sigue
+        with self.assertLogs("cobros.inbox", "ERROR"):
+            stats = inbox.procesar_pendientes()
+        self.assertEqual(stats, {"procesados": 1, "fallidos": 1, "omitidos": 0})
+        segundo.refresh_from_db()
+        otro.refresh_from_db()
+        self.assertEqual((segundo.status, segundo.attempts), ("pending", 0))
+        self.assertEqual(otro.status, "processed")
+
+        # mientras el primero siga pendiente, el segundo no está listo
+        self.assertEqual(list(inbox.eventos_listos()), [])
+        self.assertEqual(inbox.procesar_pendientes()["procesados"], 0)
+
+        # cuando el primero termina en 'failed' ya no bloquea
+        WebhookEvent.objects.filter(pk=primero.pk).update(status="failed")
+        self.assertEqual(list(inbox.eventos_listos()), [segundo])
+        inbox.procesar_pendientes()
+        segundo.refresh_from_db()
+        self.assertEqual(segundo.status, "processed")
+
+    def test_reembolso_espera_al_checkout_del_mismo_payment_record(self):
+        pr = PaymentRecord.objects.create(
+            type="one_time", status="pending", amount=1500,
+            checkout_session_id="cs_orden", payment_intent_id="pi_orden",
+        )
+        # el checkout llega primero pero su reintento aún no vence; el reembolso (sin
+        # metadata: solo trae el PaymentIntent) llega después
+        checkout, _ = inbox.registrar_evento(fake_stripe_event("checkout.session.completed", pr=pr))
+        WebhookEvent.objects.filter(pk=checkout.pk).update(next_attempt_at=timezone.now() + timedelta(minutes=1))
+        reembolso, _ = inbox.registrar_evento(fake_stripe_event("charge.refunded", pr=pr))
+        factura, _ = inbox.registrar_evento(fake_stripe_event("invoice.paid", subscription="sub_sin_pr"))
+
+        self.assertEqual({checkout.order_key, reembolso.order_key}, {f"pr:{pr.pk}"})
+        self.assertEqual(factura.order_key, "sub:sub_sin_pr")
+        self.assertEqual(list(inbox.eventos_listos()), [factura])
+
+        WebhookEvent.objects.filter(pk=checkout.pk).update(next_attempt_at=timezone.now())
+        inbox.procesar_pendientes()
+        pr.refresh_from_db()
+        self.assertEqual(pr.status, "paid")
+        inbox.procesar_pendientes()
+        pr.refresh_from_db()
+        self.assertEqual(pr.status, "refunded")
+
+    def test_reprocesar_regresa_a_la_cola(self):
+        evt, _ = inbox.registrar_evento(fake_stripe_event("invoice.paid"))
+        WebhookEvent.objects.filter(pk=evt.pk).update(
+            status="failed", attempts=inbox.MAX_ATTEMPTS, next_attempt_at=timezone.now() + timedelta(days=1),
+        )
+
+        self.assertEqual(inbox.reprocesar(WebhookEvent.objects.filter(status="failed")), 1)
+        evt.refresh_from_db()
+        self.assertEqual((evt.status, evt.attempts), ("pending", 0))
 
-# Create your tests here.
+        self.assertEqual(inbox.procesar_pendientes()["procesados"], 1)
+        evt.refresh_from_db()
+        self.assertEqual(evt.status, "processed")
@@ -10,6 +10,7 @@ from django.shortcuts import render
 
 from .models import BillingInvite, PaymentRecord, WebhookEvent
 from .services import create_checkout_for_invite
+from .inbox import aregistrar_evento
 
 @csrf_exempt  # El link es público (token largo + expiración); puedes añadir rate limiting a nivel Nginx
 def pagar_con_token(request, token):
@@ -24,32 +25,23 @@ def pagar_con_token(request, token):
     return HttpResponseRedirect(url)
 
 @csrf_exempt
-def stripe_webhook(request):
+async def stripe_webhook(request):
+    """
+    Verifica la firma, guarda el evento en el inbox y responde 200 de inmediato.
+    El procesamiento lo hace el worker (`manage.py procesar_webhooks_stripe`).
+    """
     payload = request.body
     sig_header = request.META.get("HTTP_STRIPE_SIGNATURE", "")
     endpoint_secret = settings.STRIPE_WEBHOOK_SECRET
     try:
-        event = stripe.Webhook.construct_event(payload=payload, sig_header=sig_header, secret=endpoint_secret)
+        stripe.Webhook.construct_event(payload=payload, sig_header=sig_header, secret=endpoint_secret)
     except stripe.error.SignatureVerificationError:
         return HttpResponse(status=400)
     except ValueError:
         return HttpResponse(status=400)
 
-    # Guarda evento
-    evt = WebhookEvent.objects.create(
-        provider_event_id=event["id"],
-        event_type=event["type"],
-        payload=event
-    )
-
-    try:
-        _handle_stripe_event(event)
-        evt.processed_at = timezone.now()
-        evt.save(update_fields=["processed_at"])
-    except Exception as exc:
-        evt.error = str(exc)
-        evt.save(update_fields=["error"])
-        # puedes registrar logs
+    # Guarda evento (idempotente: reentregas con el mismo id no duplican)
+    await aregistrar_evento(json.loads(payload))
     return HttpResponse(status=200)
 
 
@@ -367,7 +359,7 @@ def _handle_stripe_event(event):
 from decimal import Decimal, InvalidOperation
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse, HttpResponseBadRequest
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.views.decorators.csrf import csrf_protect
 from django.utils import timezone
 from django.conf import settings
@@ -387,15 +379,23 @@ def _mk_idem(prefix="cargo"):
 
 @login_required
 @csrf_protect
-def link_pago_cargo(request, cargo_id):
+async def link_pago_cargo(request, cargo_id):
+    """
+    Vista async: las llamadas a Stripe van con aiohttp (StripeClient + AIOHTTPClient),
+    así que con ASGI (entrypoint.sh, SERVIDOR=asgi) no ocupan un worker mientras Stripe
+    responde. El cliente HTTP se crea y cierra por petición: con WSGI cada vista async
+    corre en su propio event loop y una sesión aiohttp no se puede compartir entre loops.
+    """
     if request.method != "POST":
         return HttpResponseBadRequest("Método no permitido.")
 
+    http = stripe.AIOHTTPClient()
     try:
         if not settings.STRIPE_SECRET_KEY:
             return JsonResponse({"ok": False, "error": "STRIPE_SECRET_KEY no configurada."}, status=500)
+        sesiones = stripe.StripeClient(settings.STRIPE_SECRET_KEY, http_client=http).v1.checkout.sessions
 
-        cargo = get_object_or_404(Cargo.objects.select_related("alumno", "concepto"), pk=cargo_id)
+        cargo = await aget_object_or_404(Cargo.objects.select_related("alumno", "concepto"), pk=cargo_id)
         if not cargo.alumno:
             return JsonResponse({"ok": False, "error": "El cargo no está vinculado a un alumno."}, status=400)
 
@@ -412,21 +412,26 @@ def link_pago_cargo(request, cargo_id):
 
         # === 1) Buscar PaymentRecord existente para este cargo ===
         # Si tu modelo tiene FK: 'cargo = models.OneToOneField/ForeignKey(...)', filtra por ese campo.
-        pr = PaymentRecord.objects.filter(type="one_time", cargo=cargo).order_by("-created_at").first()
+        pr = await PaymentRecord.objects.filter(type="one_time", cargo=cargo).order_by("-created_at").afirst()
 
         # === 2) Si ya está pagado, no generes link nuevo ===
         if pr and pr.status == "paid":
             return JsonResponse({"ok": True, "already_paid": True, "message": "El cargo ya está pagado."})
 
         # Helper para (re)crear Session y actualizar el MISMO PR
-        def _create_or_refresh_session_for(pr_obj):
-            alumno = pr_obj.alumno  # (opcional, por si luego lo quieres tomar del alumno)
+        async def _create_or_refresh_session_for(pr_obj):
+            alumno = cargo.alumno  # el PR siempre se crea con el alumno del cargo
             email_prefill = ((getattr(alumno, "email", None) or getattr(alumno, "email_institucional", None) or "").strip() or None)
 
-            
-            session = stripe.checkout.Session.create(
-                mode="payment",
-                line_items=[{
+            metadata = {
+                "tipo": "cargo",
+                "cargo_id": str(cargo.pk),
+                "alumno_id": str(cargo.alumno_id),
+                "pr_id": str(pr_obj.pk),
+            }
+            params = {
+                "mode": "payment",
+                "line_items": [{
                     "price_data": {
                         "currency": "mxn",
                         "product_data": {"name": desc},
@@ -434,30 +439,18 @@ def link_pago_cargo(request, cargo_id):
                     },
                     "quantity": 1,
                 }],
-                success_url=settings.FRONTEND_SUCCESS_URL + "?session_id={CHECKOUT_SESSION_ID}",
-                cancel_url=settings.FRONTEND_CANCEL_URL,
-                client_reference_id=str(cargo.alumno_id),
-                metadata={
-                    "tipo": "cargo",
-                    "cargo_id": str(cargo.pk),
-                    "alumno_id": str(cargo.alumno_id),
-                    "pr_id": str(pr_obj.pk),
-                },
-                payment_intent_data={
-                    "metadata": {
-                        "tipo": "cargo",
-                        "cargo_id": str(cargo.pk),
-                        "alumno_id": str(cargo.alumno_id),
-                        "pr_id": str(pr_obj.pk),
-                    }
-                },
-                customer_email=email_prefill,
-                customer_creation="if_required",
-                billing_address_collection="auto",
-
-                expand=["payment_intent"],
-                idempotency_key=_mk_idem("cargo"),
-            )
+                "success_url": settings.FRONTEND_SUCCESS_URL + "?session_id={CHECKOUT_SESSION_ID}",
+                "cancel_url": settings.FRONTEND_CANCEL_URL,
+                "client_reference_id": str(cargo.alumno_id),
+                "metadata": metadata,
+                "payment_intent_data": {"metadata": metadata},
+                "customer_creation": "if_required",
+                "billing_address_collection": "auto",
+                "expand": ["payment_intent"],
+            }
+            if email_prefill:
+                params["customer_email"] = email_prefill
+            session = await sesiones.create_async(params=params, options={"idempotency_key": _mk_idem("cargo")})
 
             pr_obj.checkout_session_id = session.id or ""
             pr_obj.payment_intent_id = getattr(session, "payment_intent", None).id if getattr(session, "payment_intent", None) else ""
@@ -465,7 +458,7 @@ def link_pago_cargo(request, cargo_id):
             pr_obj.status = "pending"
             pr_obj.amount = monto  # por si cambió el cargo
             pr_obj.extra = {**(pr_obj.extra or {}), "cargo_id": cargo.pk, "url": session.url}
-            pr_obj.save(update_fields=["checkout_session_id", "payment_intent_id", "customer_id", "status", "amount", "extra"])
+            await pr_obj.asave(update_fields=["checkout_session_id", "payment_intent_id", "customer_id", "status", "amount", "extra"])
             return session
 
         # === 3) Reutilizar PR existente si hay ===
@@ -473,7 +466,7 @@ def link_pago_cargo(request, cargo_id):
             sess_id = pr.checkout_session_id or ""
             if sess_id:
                 try:
-                    sess = stripe.checkout.Session.retrieve(sess_id)
+                    sess = await sesiones.retrieve_async(sess_id)
                     sess_status = getattr(sess, "status", None)          # 'open' | 'complete' | 'expired'
                     pay_status  = getattr(sess, "payment_status", None)  # 'paid' | 'unpaid' | 'no_payment_required'
 
@@ -487,27 +480,27 @@ def link_pago_cargo(request, cargo_id):
                     if sess_status == "complete":
                         if pay_status == "paid":
                             pr.status = "paid"
-                            pr.save(update_fields=["status"])
+                            await pr.asave(update_fields=["status"])
                             return JsonResponse({"ok": True, "already_paid": True, "message": "El cargo ya se pagó."})
                         # unpaid → nueva Session
-                        new_sess = _create_or_refresh_session_for(pr)
+                        new_sess = await _create_or_refresh_session_for(pr)
                         return JsonResponse({"ok": True, "url": new_sess.url, "amount": f"{monto:.2f}"})
 
                     # c) Expirada u otro estado → nueva Session
-                    new_sess = _create_or_refresh_session_for(pr)
+                    new_sess = await _create_or_refresh_session_for(pr)
                     return JsonResponse({"ok": True, "url": new_sess.url, "amount": f"{monto:.2f}"})
 
                 except Exception:
                     # No se pudo recuperar → crear nueva sobre el mismo PR
-                    new_sess = _create_or_refresh_session_for(pr)
+                    new_sess = await _create_or_refresh_session_for(pr)
                     return JsonResponse({"ok": True, "url": new_sess.url, "amount": f"{monto:.2f}"})
             else:
                 # PR sin Session → crear una y actualizar el PR existente
-                new_sess = _create_or_refresh_session_for(pr)
+                new_sess = await _create_or_refresh_session_for(pr)
                 return JsonResponse({"ok": True, "url": new_sess.url, "amount": f"{monto:.2f}"})
 
         # === 4) No existe PR → crearlo UNA sola vez (respeta la restricción única por cargo) ===
-        pr = PaymentRecord.objects.create(
+        pr = await PaymentRecord.objects.acreate(
             alumno=cargo.alumno,
             cargo=cargo,              # <-- FK/OneToOne al cargo
             type="one_time",
@@ -516,12 +509,14 @@ def link_pago_cargo(request, cargo_id):
             currency="MXN",
             extra={"cargo_id": cargo.pk},
         )
-        sess = _create_or_refresh_session_for(pr)
+        sess = await _create_or_refresh_session_for(pr)
         return JsonResponse({"ok": True, "url": sess.url, "amount": f"{monto:.2f}"})
 
     except Exception as e:
         logger.exception("Error creando/reutilizando link de pago (cargo_id=%s)", cargo_id)
         return JsonResponse({"ok": False, "error": str(e)}, status=500)
+    finally:
+        await http.close_async()
 
 
 #########################################################################################
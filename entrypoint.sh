@@ -13,10 +13,38 @@ cd /app
 
 # Migraciones y estáticos
 python manage.py migrate --noinput
+python manage.py createcachetable
+python manage.py invalidar_catalogos
 python manage.py collectstatic --noinput
 
 
-# Ejecutar gunicorn (WSGI). Para ASGI, reemplaza por daphne/uvicorn
+# Los workers de colas (webhooks de Stripe, documentos, boletas, campañas, correos)
+# corren aparte como servicios worker_* de compose.yml.
+#
+# Tareas programadas: van en el cron del host (o un contenedor de cron), no aquí; el
+# arranque no debe esperar a recorrer todos los pagos ni correr una vez por réplica.
+#   0 2 * * *   docker compose exec -T web python manage.py vincular_pagos
+#   15 2 * * *  docker compose exec -T web python manage.py reclasificar_pagos
+#   30 2 * * *  docker compose exec -T web python manage.py corte_cartera
+# vincular_pagos liga los PagoDiario que llegaron sin alumno (los saldos solo usan
+# pagos ligados por FK); corte_cartera también lo hace antes del corte.
+# reclasificar_pagos asigna concepto a los pagos importados con bulk_create, que no
+# pasan por el clasificador al guardar.
+
+
+# Ejecutar gunicorn. SERVIDOR=asgi usa workers de uvicorn: las vistas async (CURP,
+# links de pago Clip/Stripe, webhooks) esperan a terceros sin ocupar el worker; las
+# síncronas se atienden igual que con WSGI.
+if [ "${SERVIDOR:-wsgi}" = "asgi" ]; then
+exec gunicorn miapp.asgi:application \
+--worker-class uvicorn_worker.UvicornWorker \
+--bind 0.0.0.0:8000 \
+--workers 3 \
+--timeout 60 \
+--access-logfile - \
+--error-logfile -
+fi
+
 exec gunicorn miapp.wsgi:application \
 --bind 0.0.0.0:8000 \
 --workers 3 \
@@ -1,3 +1,67 @@
-from django.test import TestCase
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from alumnos.models import Alumno, Grupo
+from alumnos.services.datos_sinteticos import sembrar
+from lms.models import Actividad, Curso, Entrega, Leccion, Modulo
+
+
+@override_settings(PERF_ACTIVO=False, PROTECTED_MEDIA_ACCEL_PREFIX="")
+class ArchivosLmsTests(TestCase):
+    """Acceso a leccion_archivo y entrega_archivo: grupo del alumno, autor de la entrega, docente."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(alumnos=2, pagos=0, movimientos=1, invitaciones=1, usuarios=1, programas=1, seed=21)
+        User = get_user_model()
+        cls.propio, cls.ajeno = Alumno.objects.select_related("informacionEscolar").order_by("pk")
+        grupo, otro_grupo = Grupo.objects.filter(programa=cls.propio.informacionEscolar.programa).order_by("codigo")[:2]
+        for alumno, g in ((cls.propio, grupo), (cls.ajeno, otro_grupo)):
+            alumno.user = User.objects.create_user(f"lms_{alumno.pk}")
+            alumno.save(update_fields=["user"])
+            alumno.informacionEscolar.grupo_nuevo = g
+            alumno.informacionEscolar.save(update_fields=["grupo_nuevo"])
+        cls.docente = User.objects.create_user("docente_lms")
+        cls.curso = Curso.objects.create(
+            programa=grupo.programa, grupo=grupo, nombre="Curso de prueba", codigo="PRUEBA-ARCH", docente=cls.docente,
+        )
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        ajuste = override_settings(MEDIA_ROOT=media.name)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+        modulo = Modulo.objects.create(curso=self.curso, titulo="Módulo 1")
+        self.leccion = Leccion.objects.create(
+            modulo=modulo, titulo="Lección 1", archivo=SimpleUploadedFile("lectura.txt", b"lectura"),
+        )
+        actividad = Actividad.objects.create(leccion=self.leccion, titulo="Tarea 1")
+        self.entrega = Entrega.objects.create(
+            actividad=actividad, alumno=self.propio, archivo=SimpleUploadedFile("tarea.txt", b"tarea"),
+        )
+
+    def _status(self, user, nombre, pk):
+        self.client.force_login(user)
+        return self.client.get(reverse(f"lms:{nombre}", args=[pk])).status_code
+
+    def test_leccion_solo_para_el_grupo_del_curso(self):
+        self.client.force_login(self.propio.user)
+        r = self.client.get(reverse("lms:leccion_archivo", args=[self.leccion.pk]))
+        self.assertEqual(b"".join(r.streaming_content), b"lectura")
+        self.assertEqual(self._status(self.docente, "leccion_archivo", self.leccion.pk), 200)
+        self.assertEqual(self._status(self.ajeno.user, "leccion_archivo", self.leccion.pk), 403)
+
+        Curso.objects.filter(pk=self.curso.pk).update(activo=False)
+        self.assertEqual(self._status(self.propio.user, "leccion_archivo", self.leccion.pk), 403)
+
+    def test_entrega_solo_para_su_autor_y_el_docente(self):
+        self.assertEqual(self._status(self.propio.user, "entrega_archivo", self.entrega.pk), 200)
+        self.assertEqual(self._status(self.docente, "entrega_archivo", self.entrega.pk), 200)
+        self.assertEqual(self._status(self.ajeno.user, "entrega_archivo", self.entrega.pk), 403)
+        self.assertEqual(self._status(self.ajeno.user, "entrega_archivo", self.entrega.pk + 1000), 404)
@@ -12,5 +12,8 @@ urlpatterns = [
 
     path("actividad/<int:pk>/respuestas/", views.actividad_respuestas, name="actividad_respuestas"),
 
+    path("leccion/<int:pk>/archivo/", views.leccion_archivo, name="leccion_archivo"),
+    path("entrega/<int:pk>/archivo/", views.entrega_archivo, name="entrega_archivo"),
+
     path("admin/cursos/", views.cursos_todos, name="cursos_todos"),
 ]
@@ -48,12 +48,12 @@ def mis_cursos(request):
     # Filtrar por grupo_nuevo (FK a Grupo) y opcionalmente por programa
     if info and info.grupo_nuevo_id:
         cursos = cursos.filter(
-            programa=info.programa,
-            grupo=info.grupo_nuevo,
+            programa_id=info.programa_id,
+            grupo_id=info.grupo_nuevo_id,
         )
     else:
         if info and info.programa_id:
-            cursos = cursos.filter(programa=info.programa)
+            cursos = cursos.filter(programa_id=info.programa_id)
         else:
             cursos = Curso.objects.none()
 
@@ -79,7 +79,7 @@ def mis_cursos(request):
             default=0,
             output_field=IntegerField(),
         )
-    ).order_by("terminado", "fecha_inicio", "nombre")
+    ).select_related("programa", "grupo").order_by("terminado", "fecha_inicio", "nombre")
 
     # Calcular si el curso está disponible según fechas
     for c in cursos:
@@ -351,4 +351,53 @@ def cursos_todos(request):
         "q": q,
         "es_docente": True,  # para reusar templates que revisan esto
     }
-    return render(request, "lms/cursos_todos.html", context)
\ No newline at end of file
+    return render(request, "lms/cursos_todos.html", context)
+##############################################################################
+from alumnos.services.protected_media import serve_protected_file
+from .models import Leccion
+
+
+@login_required
+def leccion_archivo(request, pk):
+    """
+    Archivo adjunto de una lección. Mismas reglas de acceso que curso_detalle:
+    el alumno solo ve cursos de su grupo; docente y staff ven todo.
+    """
+    leccion = get_object_or_404(
+        Leccion.objects.select_related("modulo__curso"),
+        pk=pk,
+    )
+    curso = leccion.modulo.curso
+    user = request.user
+    es_docente = bool(user.is_staff or user.is_superuser or curso.docente_id == user.id)
+
+    if not es_docente:
+        if not curso.activo:
+            return HttpResponseForbidden("No tienes acceso a este archivo.")
+        alumno = _get_alumno_from_user(user)
+        info = getattr(alumno, "informacionEscolar", None) if alumno else None
+        if not info:
+            return HttpResponseForbidden("No tienes acceso a este archivo.")
+        if info.grupo_nuevo_id and curso.grupo_id and curso.grupo_id != info.grupo_nuevo_id:
+            return HttpResponseForbidden("No tienes acceso a este archivo.")
+
+    return serve_protected_file(request, leccion.archivo)
+
+
+@login_required
+def entrega_archivo(request, pk):
+    """
+    Archivo de una entrega: lo ve el alumno que la envió, el docente del curso o staff.
+    """
+    entrega = get_object_or_404(
+        Entrega.objects.select_related("alumno", "actividad__leccion__modulo__curso"),
+        pk=pk,
+    )
+    curso = entrega.actividad.leccion.modulo.curso
+    user = request.user
+    es_docente = bool(user.is_staff or user.is_superuser or curso.docente_id == user.id)
+    es_autor = bool(entrega.alumno.user_id and entrega.alumno.user_id == user.id)
+    if not (es_docente or es_autor):
+        return HttpResponseForbidden("No tienes permiso para ver esta entrega.")
+
+    return serve_protected_file(request, entrega.archivo)